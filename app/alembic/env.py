@@ -1,4 +1,5 @@
 import os
+import re
 from logging.config import fileConfig
 
 from alembic import context
@@ -27,6 +28,8 @@ from app.models.changes import Cambio
 from app.models.config_items import ItemConfiguracion
 from app.models.changes_items_link import CambioItemLink
 from app.models.auditoria import Auditoria
+from app.models.kpis import KpiDiario
+from app.models.token import TokenRevocado
 
 target_metadata = SQLModel.metadata
 
@@ -40,6 +43,19 @@ def get_url():
     return str(settings.SQLALCHEMY_DATABASE_URI)
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    # Created by hand in migrations, not part of the models:
+    # full text search columns/indexes and the monthly partitions of auditorias
+    if type_ == "column" and name == "busqueda":
+        return False
+    if type_ == "index" and name.endswith("_busqueda"):
+        return False
+    if type_ == "table" and re.fullmatch(r"auditorias_\d{4}_\d{2}", name):
+        return False
+
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -54,7 +70,11 @@ def run_migrations_offline():
     """
     url = get_url()
     context.configure(
-        url=url, target_metadata=target_metadata, literal_binds=True, compare_type=True
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        compare_type=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -78,7 +98,10 @@ def run_migrations_online():
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata, compare_type=True
+            connection=connection,
+            target_metadata=target_metadata,
+            compare_type=True,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
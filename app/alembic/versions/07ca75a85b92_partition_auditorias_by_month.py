@@ -0,0 +1,92 @@
+"""partition auditorias by month
+
+Revision ID: 07ca75a85b92
+Revises: fdadb197b3fb
+Create Date: 2025-12-06 16:03:12.640915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '07ca75a85b92'
+down_revision = 'fdadb197b3fb'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = """
+    CREATE INDEX ix_auditorias_fecha_actualizacion_id ON auditorias (fecha_actualizacion, id);
+    CREATE INDEX ix_auditorias_id_entidad_version ON auditorias (id_entidad, version);
+    CREATE INDEX ix_auditorias_tipo_entidad_id_entidad_fecha ON auditorias (tipo_entidad, id_entidad, fecha_actualizacion DESC, id DESC);
+    CREATE INDEX ix_auditorias_operacion_fecha ON auditorias (operacion, fecha_actualizacion, id);
+"""
+
+
+def upgrade():
+    # Written by hand: Alembic can't autogenerate partitioned tables.
+    # The partition key has to be part of the primary key.
+    op.execute("ALTER TABLE auditorias RENAME TO auditorias_old")
+    op.execute("ALTER INDEX auditorias_pkey RENAME TO auditorias_old_pkey")
+    op.execute("DROP INDEX ix_auditorias_fecha_actualizacion_id, ix_auditorias_id_entidad_version, ix_auditorias_tipo_entidad_id_entidad_fecha, ix_auditorias_operacion_fecha")
+
+    op.execute(
+        """
+        CREATE TABLE auditorias (LIKE auditorias_old INCLUDING DEFAULTS)
+        PARTITION BY RANGE (fecha_actualizacion)
+        """
+    )
+    op.execute("ALTER TABLE auditorias ADD CONSTRAINT auditorias_pkey PRIMARY KEY (id, fecha_actualizacion)")
+    op.execute("ALTER TABLE auditorias ADD CONSTRAINT auditorias_actualizado_por_fkey FOREIGN KEY (actualizado_por) REFERENCES usuarios (id)")
+    op.execute(INDEXES)
+
+    # One partition per month from the oldest audit up to three months from now,
+    # `python app/audit_maintenance.py` keeps creating them from then on
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            mes date;
+        BEGIN
+            FOR mes IN
+                SELECT generate_series(
+                    date_trunc('month', coalesce((SELECT min(fecha_actualizacion) FROM auditorias_old), now())),
+                    date_trunc('month', now()) + interval '3 months',
+                    interval '1 month'
+                )::date
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF auditorias FOR VALUES FROM (%L) TO (%L)',
+                    'auditorias_' || to_char(mes, 'YYYY_MM'),
+                    mes,
+                    mes + interval '1 month'
+                );
+            END LOOP;
+        END
+        $$
+        """
+    )
+
+    # Catches audits of a month with no partition yet instead of failing the
+    # write, `python app/audit_maintenance.py` moves them to their own partition
+    op.execute("CREATE TABLE auditorias_default PARTITION OF auditorias DEFAULT")
+
+    op.execute("INSERT INTO auditorias SELECT * FROM auditorias_old")
+    op.execute("DROP TABLE auditorias_old")
+
+
+def downgrade():
+    op.execute("ALTER TABLE auditorias RENAME TO auditorias_partitioned")
+    op.execute("ALTER INDEX auditorias_pkey RENAME TO auditorias_partitioned_pkey")
+    op.execute("DROP INDEX ix_auditorias_fecha_actualizacion_id, ix_auditorias_id_entidad_version, ix_auditorias_tipo_entidad_id_entidad_fecha, ix_auditorias_operacion_fecha")
+
+    op.execute("CREATE TABLE auditorias (LIKE auditorias_partitioned INCLUDING DEFAULTS)")
+    op.execute("ALTER TABLE auditorias ADD CONSTRAINT auditorias_pkey PRIMARY KEY (id)")
+    op.execute("ALTER TABLE auditorias ADD CONSTRAINT auditorias_actualizado_por_fkey FOREIGN KEY (actualizado_por) REFERENCES usuarios (id)")
+    op.execute(INDEXES)
+
+    op.execute("INSERT INTO auditorias SELECT * FROM auditorias_partitioned")
+    # Drops every partition with it
+    op.execute("DROP TABLE auditorias_partitioned")
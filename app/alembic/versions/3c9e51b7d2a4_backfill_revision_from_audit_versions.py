@@ -0,0 +1,43 @@
+"""backfill revision from audit versions
+
+Revision ID: 3c9e51b7d2a4
+Revises: 4ecd49e5faec
+Create Date: 2025-12-12 09:18:44.207315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9e51b7d2a4'
+down_revision = '4ecd49e5faec'
+branch_labels = None
+depends_on = None
+
+
+TABLAS = ['cambios', 'incidentes', 'problemas', 'items_configuracion']
+
+
+def upgrade():
+    # Written by hand: 4ecd49e5faec started every row at revision 1, but audit
+    # versions follow the revision, so entities with history would reuse the
+    # versions they already have. They go on from their last audit instead.
+    for tabla in TABLAS:
+        op.execute(
+            f"""
+            UPDATE {tabla}
+            SET revision = (
+                SELECT max(version) FROM auditorias WHERE id_entidad = {tabla}.id
+            )
+            WHERE revision < (
+                SELECT max(version) FROM auditorias WHERE id_entidad = {tabla}.id
+            )
+            """
+        )
+
+
+def downgrade():
+    # Revisions only go up, there is nothing to undo
+    pass
@@ -0,0 +1,37 @@
+"""add revision and fecha_actualizacion to entities
+
+Revision ID: 4ecd49e5faec
+Revises: 1d185fdc1342
+Create Date: 2025-12-11 10:42:07.915263
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '4ecd49e5faec'
+down_revision = '1d185fdc1342'
+branch_labels = None
+depends_on = None
+
+
+TABLAS = ['cambios', 'incidentes', 'problemas', 'items_configuracion']
+
+
+def upgrade():
+    # Adjusted by hand: existing rows start at revision 1, last updated when
+    # they were created
+    for tabla in TABLAS:
+        op.add_column(tabla, sa.Column('revision', sa.Integer(), server_default='1', nullable=False))
+        op.add_column(tabla, sa.Column('fecha_actualizacion', sa.DateTime(), nullable=True))
+        op.execute(f'UPDATE {tabla} SET fecha_actualizacion = fecha_creacion')
+        op.alter_column(tabla, 'fecha_actualizacion', nullable=False)
+        op.alter_column(tabla, 'revision', server_default=None)
+
+
+def downgrade():
+    for tabla in reversed(TABLAS):
+        op.drop_column(tabla, 'fecha_actualizacion')
+        op.drop_column(tabla, 'revision')
@@ -0,0 +1,37 @@
+"""add es_arrastre to auditorias
+
+Revision ID: 8d2f6a4c1e97
+Revises: 3c9e51b7d2a4
+Create Date: 2025-12-12 11:05:31.482960
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2f6a4c1e97'
+down_revision = '3c9e51b7d2a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('auditorias', sa.Column('es_arrastre', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+    # Adjusted by hand: states already carried over by the archival are the
+    # snapshots on the first instant of a month
+    op.execute(
+        """
+        UPDATE auditorias
+        SET es_arrastre = true
+        WHERE es_snapshot
+            AND operacion = 'ACTUALIZAR'
+            AND fecha_actualizacion = date_trunc('month', fecha_actualizacion)
+        """
+    )
+
+
+def downgrade():
+    op.drop_column('auditorias', 'es_arrastre')
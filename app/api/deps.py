@@ -2,8 +2,7 @@ import uuid
 from collections.abc import Generator
 from typing import Annotated
 
-import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
@@ -11,7 +10,9 @@ from sqlmodel import Session
 
 from app.core import security
 from app.core.db import engine
-from app.models.token import TokenPayload
+from app.crud.users import UsuariosService
+from app.models.pagination import LIMIT_DEFAULT, LIMIT_MAXIMO, Paginacion
+from app.models.token import TokenPayload, UsuarioToken
 from app.models.users import Usuario
 from app.utils.config import settings
 
@@ -21,7 +22,9 @@ reusable_oauth2 = OAuth2PasswordBearer(
 
 
 def get_db() -> Generator[Session, None, None]:
-    with Session(engine) as session:
+    # Writes already hold every value they commit (ids and dates are generated
+    # in Python), so there is no need to reload them after the commit
+    with Session(engine, expire_on_commit=False) as session:
         yield session
 
 
@@ -29,19 +32,33 @@ SessionDep = Annotated[Session, Depends(get_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
-def get_current_user(session: SessionDep, token: TokenDep) -> Usuario:
+def get_paginacion(
+    limit: Annotated[int, Query(ge=1, le=LIMIT_MAXIMO)] = LIMIT_DEFAULT,
+    cursor: str | None = None,
+) -> Paginacion:
+    return Paginacion(limit=limit, cursor=cursor)
+
+
+PaginacionDep = Annotated[Paginacion, Depends(get_paginacion)]
+
+
+def _token_payload(token: str) -> TokenPayload:
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
+        payload = security.decode_access_token(token)
+        return TokenPayload(**payload)
     except (InvalidTokenError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="No se pudo validar las credenciales",
         )
 
-    usuario = session.get(Usuario, uuid.UUID(token_data.sub))
+
+def get_current_user(session: SessionDep, token: TokenDep) -> Usuario:
+    token_data = _token_payload(token)
+
+    usuario = UsuariosService.get_usuario_autenticado(
+        session=session, id_usuario=uuid.UUID(token_data.sub)
+    )
 
     if not usuario:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
@@ -50,3 +67,25 @@ def get_current_user(session: SessionDep, token: TokenDep) -> Usuario:
 
 
 CurrentUser = Annotated[Usuario, Depends(get_current_user)]
+
+
+def get_token_user(session: SessionDep, token: TokenDep) -> UsuarioToken:
+    """The user as described by the access token, without loading it. Only for
+    read-only routes: a user changed or deleted since the token was issued is
+    seen as it was for up to ACCESS_TOKEN_EXPIRE_MINUTES."""
+    token_data = _token_payload(token)
+
+    if token_data.rol is None:
+        # Issued before access tokens carried the user
+        return UsuarioToken.model_validate(get_current_user(session, token))
+
+    return UsuarioToken(
+        id=uuid.UUID(token_data.sub),
+        nombre=token_data.nombre,
+        apellido=token_data.apellido,
+        email=token_data.email,
+        rol=token_data.rol,
+    )
+
+
+TokenUser = Annotated[UsuarioToken, Depends(get_token_user)]
@@ -3,9 +3,14 @@ from fastapi import APIRouter
 from app.api.routes import (
     changes,
     config_items,
+    events,
+    exports,
     incidents,
+    kpis,
     login,
     problems,
+    search,
+    stats,
     users,
     utils,
     audits
@@ -20,3 +25,8 @@ api_router.include_router(problems.router, tags=["problems"])
 api_router.include_router(incidents.router, tags=["incidents"])
 api_router.include_router(utils.router, tags=["utils"])
 api_router.include_router(audits.router, tags=["audits"])
+api_router.include_router(search.router, tags=["search"])
+api_router.include_router(stats.router, tags=["stats"])
+api_router.include_router(kpis.router, tags=["kpis"])
+api_router.include_router(events.router, tags=["events"])
+api_router.include_router(exports.router, tags=["export"])
@@ -1,29 +1,50 @@
 import uuid
+from datetime import datetime
 
 from app.models.commons import Operacion, TipoEntidad
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 
-from app.api.deps import SessionDep
+from app.api.deps import PaginacionDep, SessionDep
 from app.crud.audits import AuditoriaService as crud
+from app.crud.pagination import set_pagination_headers
 from app.models.auditoria import Auditoria, AuditoriaFilter
 
 router = APIRouter(prefix="/audits")
 
 
 @router.get("", response_model=list[Auditoria])
-async def get_audits(
+def get_audits(
     session: SessionDep,
+    response: Response,
+    paginacion: PaginacionDep,
     tipo_entidad: TipoEntidad | None = None,
     id_entidad: uuid.UUID | None = None,
-    operacion: Operacion | None = None
+    operacion: Operacion | None = None,
+    desde: datetime | None = None,
+    hasta: datetime | None = None,
 ) -> list[Auditoria]:
     auditoria_filter = AuditoriaFilter(
-        tipo_entidad=tipo_entidad, id_entidad=id_entidad, operacion=operacion
+        tipo_entidad=tipo_entidad,
+        id_entidad=id_entidad,
+        operacion=operacion,
+        desde=desde,
+        hasta=hasta,
     )
-    return crud.get_audits(session=session, auditoria_filter=auditoria_filter)
+    auditorias = crud.get_audits(
+        session=session, auditoria_filter=auditoria_filter, paginacion=paginacion
+    )
+
+    set_pagination_headers(
+        response,
+        auditorias,
+        paginacion=paginacion,
+        campo_fecha="fecha_actualizacion",
+    )
+
+    return auditorias
 
 @router.get("/{id_auditoria}", response_model=Auditoria)
-async def get_audit_by_id(
+def get_audit_by_id(
     session: SessionDep,
     id_auditoria: uuid.UUID
 ) -> Auditoria:
@@ -1,28 +1,32 @@
 import uuid
+from typing import Annotated
 
-from fastapi import APIRouter, HTTPException
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Body, Header, HTTPException, Request, Response
 
-from app.api.deps import CurrentUser, SessionDep
+from app.api.deps import CurrentUser, PaginacionDep, SessionDep, TokenUser
 from app.crud.audits import AuditoriaService
 from app.crud.changes import CambiosService as crud
-from app.models.auditoria import Auditoria, AuditoriaCrear, AuditoriaFilter
+from app.crud.etags import etag_entidad, respuesta_condicional, revision_if_match
+from app.crud.pagination import set_pagination_headers
+from app.models.auditoria import Auditoria, AuditoriaFilter
+from app.models.bulk import LOTE_MAXIMO, ResultadoLote
 from app.models.changes import (
     CambioActualizar,
+    CambioActualizarLote,
     CambioCrear,
     CambioFilter,
     CambioPublicoConRelaciones,
     EstadoCambio,
     Prioridad,
 )
-from app.models.commons import Operacion, TipoEntidad
+from app.models.commons import TipoEntidad
 from app.models.users import Rol
 
 router = APIRouter(prefix="/changes")
 
 
 @router.post("/", response_model=CambioPublicoConRelaciones)
-async def create_change(
+def create_change(
     session: SessionDep, current_user: CurrentUser, cambio_in: CambioCrear
 ) -> CambioPublicoConRelaciones:
     cambio_crear = CambioCrear.model_validate(
@@ -36,9 +40,47 @@ async def create_change(
     return cambio
 
 
+@router.post("/bulk", response_model=list[ResultadoLote])
+def create_changes(
+    session: SessionDep,
+    current_user: CurrentUser,
+    cambios_in: Annotated[
+        list[CambioCrear], Body(min_length=1, max_length=LOTE_MAXIMO)
+    ],
+) -> list[ResultadoLote]:
+    cambios_crear = [
+        CambioCrear.model_validate(crear, update={"owner_id": current_user.id})
+        for crear in cambios_in
+    ]
+
+    return crud.create_cambios(
+        session=session,
+        cambios_crear=cambios_crear,
+        current_user_id=current_user.id,
+    )
+
+
+@router.patch("/bulk", response_model=list[ResultadoLote])
+def update_changes(
+    session: SessionDep,
+    current_user: CurrentUser,
+    cambios_actualizar: Annotated[
+        list[CambioActualizarLote], Body(min_length=1, max_length=LOTE_MAXIMO)
+    ],
+) -> list[ResultadoLote]:
+    return crud.update_changes(
+        session=session,
+        cambios_actualizar=cambios_actualizar,
+        current_user_id=current_user.id,
+    )
+
+
 @router.get("/", response_model=list[CambioPublicoConRelaciones])
-async def get_changes(
+def get_changes(
     session: SessionDep,
+    request: Request,
+    response: Response,
+    paginacion: PaginacionDep,
     titulo: str | None = None,
     prioridad: Prioridad | None = None,
     estado: EstadoCambio | None = None,
@@ -47,49 +89,62 @@ async def get_changes(
     cambio_filter = CambioFilter(
         titulo=titulo, estado=estado, prioridad=prioridad, descripcion=descripcion
     )
-    return crud.get_changes(session=session, cambio_filter=cambio_filter)
+    cambios = crud.get_changes(
+        session=session, cambio_filter=cambio_filter, paginacion=paginacion
+    )
+
+    set_pagination_headers(response, cambios, paginacion=paginacion)
+
+    no_modificado = respuesta_condicional(
+        request, response, cambios, publico=CambioPublicoConRelaciones
+    )
+    if no_modificado is not None:
+        return no_modificado
+
+    return cambios
 
 
 @router.get("/{id_change}", response_model=CambioPublicoConRelaciones)
-async def get_change(
-    session: SessionDep, id_change: uuid.UUID
+def get_change(
+    session: SessionDep, request: Request, response: Response, id_change: uuid.UUID
 ) -> CambioPublicoConRelaciones:
-    return crud.get_change_by_id(session=session, id_change=id_change)
+    cambio = crud.get_change_by_id(session=session, id_change=id_change)
+
+    no_modificado = respuesta_condicional(
+        request, response, cambio, publico=CambioPublicoConRelaciones
+    )
+    if no_modificado is not None:
+        return no_modificado
+
+    return cambio
 
 
 @router.patch("/{id_change}", response_model=CambioPublicoConRelaciones)
-async def update_change(
+def update_change(
     session: SessionDep,
     current_user: CurrentUser,
+    response: Response,
     id_change: uuid.UUID,
     cambio_actualizar: CambioActualizar,
+    if_match: Annotated[str | None, Header()] = None,
 ) -> CambioPublicoConRelaciones:
-    cambio = crud.update_change(
-        session=session, id_change=id_change, cambio_actualizar=cambio_actualizar
-    )
+    revision = revision_if_match(if_match)
+    if revision is not None:
+        cambio_actualizar.revision = revision
 
-    estado_nuevo = cambio.model_dump(mode="json")
-    estado_nuevo["id_config_items"] = [str(item.id) for item in cambio.config_items]
-    estado_nuevo["id_incidentes"] = [
-        str(incidente.id) for incidente in cambio.incidentes
-    ]
-    estado_nuevo["id_problemas"] = [str(problema.id) for problema in cambio.problemas]
-    auditoria_crear = AuditoriaCrear(
-        tipo_entidad=TipoEntidad.CAMBIO,
-        id_entidad=cambio.id,
-        operacion=Operacion.ACTUALIZAR,
-        estado_nuevo=estado_nuevo,
-        actualizado_por=current_user.id,
-    )
-    AuditoriaService.registrar_operacion(
-        session=session, auditoria_crear=auditoria_crear
+    cambio = crud.update_change(
+        session=session,
+        id_change=id_change,
+        cambio_actualizar=cambio_actualizar,
+        current_user_id=current_user.id,
     )
+    response.headers["ETag"] = etag_entidad(cambio, CambioPublicoConRelaciones)
 
     return cambio
 
 
 @router.delete("/{id_change}", response_model=CambioPublicoConRelaciones)
-async def delete_change(
+def delete_change(
     session: SessionDep, current_user: CurrentUser, id_change: uuid.UUID
 ) -> CambioPublicoConRelaciones:
     if current_user.rol != Rol.EMPLEADO:
@@ -97,37 +152,39 @@ async def delete_change(
             status_code=401, detail="Sólo empleados pueden eliminar un cambio"
         )
 
-    cambio = crud.delete_change(session=session, id_change=id_change)
-
-    auditoria_crear = AuditoriaCrear(
-        tipo_entidad=TipoEntidad.CAMBIO,
-        id_entidad=cambio.id,
-        operacion=Operacion.ELIMINAR,
-        estado_nuevo=jsonable_encoder(cambio),
-        actualizado_por=current_user.id,
-    )
-    AuditoriaService.registrar_operacion(
-        session=session, auditoria_crear=auditoria_crear
+    return crud.delete_change(
+        session=session, id_change=id_change, current_user_id=current_user.id
     )
 
-    return cambio
-
 
 @router.get("/{id_change}/history", response_model=list[Auditoria])
-async def get_history(
-    session: SessionDep, current_user: CurrentUser, id_change: uuid.UUID
+def get_history(
+    session: SessionDep,
+    current_user: TokenUser,
+    response: Response,
+    paginacion: PaginacionDep,
+    id_change: uuid.UUID,
 ) -> list[Auditoria]:
     auditoria_filter = AuditoriaFilter(
         tipo_entidad=TipoEntidad.CAMBIO, id_entidad=id_change
     )
 
-    return AuditoriaService.get_audits(
-        session=session, auditoria_filter=auditoria_filter
+    auditorias = AuditoriaService.get_audits(
+        session=session, auditoria_filter=auditoria_filter, paginacion=paginacion
     )
 
+    set_pagination_headers(
+        response,
+        auditorias,
+        paginacion=paginacion,
+        campo_fecha="fecha_actualizacion",
+    )
+
+    return auditorias
+
 
 @router.post("/{id_change}/rollback", response_model=CambioPublicoConRelaciones)
-async def rollback_change(
+def rollback_change(
     session: SessionDep,
     current_user: CurrentUser,
     id_change: uuid.UUID,
@@ -1,17 +1,30 @@
 import uuid
+from typing import Annotated
+
+from fastapi import (
+    APIRouter,
+    Body,
+    Header,
+    HTTPException,
+    Request,
+    Response,
+    UploadFile,
+)
 
-from fastapi import APIRouter, HTTPException
-from fastapi.encoders import jsonable_encoder
-
-from app.api.deps import CurrentUser, SessionDep
+from app.api.deps import CurrentUser, PaginacionDep, SessionDep, TokenUser
 from app.crud.audits import AuditoriaService
 from app.crud.config_items import ItemsConfiguracionService as crud
-from app.models.auditoria import Auditoria, AuditoriaCrear, AuditoriaFilter
-from app.models.commons import Operacion, TipoEntidad
+from app.crud.etags import etag_entidad, respuesta_condicional, revision_if_match
+from app.crud.imports import formato_de_archivo
+from app.crud.pagination import set_pagination_headers
+from app.models.auditoria import Auditoria, AuditoriaFilter
+from app.models.bulk import LOTE_MAXIMO, ResultadoImportacion, ResultadoLote
+from app.models.commons import TipoEntidad
 from app.models.config_items import (
     CategoriaItem,
     EstadoItem,
     ItemConfiguracionActualizar,
+    ItemConfiguracionActualizarLote,
     ItemConfiguracionCrear,
     ItemConfiguracionFilter,
     ItemConfiguracionPublico,
@@ -22,7 +35,7 @@ router = APIRouter(prefix="/config-items")
 
 
 @router.post("", response_model=ItemConfiguracionPublico)
-async def create_config_item(
+def create_config_item(
     session: SessionDep,
     current_user: CurrentUser,
     item_config_in: ItemConfiguracionCrear,
@@ -38,9 +51,65 @@ async def create_config_item(
     return item_configuracion
 
 
+@router.post("/bulk", response_model=list[ResultadoLote])
+def create_config_items(
+    session: SessionDep,
+    current_user: CurrentUser,
+    items_config_in: Annotated[
+        list[ItemConfiguracionCrear], Body(min_length=1, max_length=LOTE_MAXIMO)
+    ],
+) -> list[ResultadoLote]:
+    items_config_crear = [
+        ItemConfiguracionCrear.model_validate(
+            crear, update={"owner_id": current_user.id}
+        )
+        for crear in items_config_in
+    ]
+
+    return crud.create_items_configuracion(
+        session=session,
+        items_config_crear=items_config_crear,
+        current_user_id=current_user.id,
+    )
+
+
+@router.post("/import", response_model=ResultadoImportacion)
+def import_config_items(
+    session: SessionDep, current_user: CurrentUser, archivo: UploadFile
+) -> ResultadoImportacion:
+    formato, comprimido = formato_de_archivo(archivo.filename or "")
+
+    return crud.importar_items_configuracion(
+        session=session,
+        archivo=archivo.file,
+        formato=formato,
+        comprimido=comprimido,
+        current_user_id=current_user.id,
+    )
+
+
+@router.patch("/bulk", response_model=list[ResultadoLote])
+def update_config_items(
+    session: SessionDep,
+    current_user: CurrentUser,
+    items_config_actualizar: Annotated[
+        list[ItemConfiguracionActualizarLote],
+        Body(min_length=1, max_length=LOTE_MAXIMO),
+    ],
+) -> list[ResultadoLote]:
+    return crud.update_items_configuracion(
+        session=session,
+        items_config_actualizar=items_config_actualizar,
+        current_user_id=current_user.id,
+    )
+
+
 @router.get("", response_model=list[ItemConfiguracionPublico])
-async def get_config_items(
+def get_config_items(
     session: SessionDep,
+    request: Request,
+    response: Response,
+    paginacion: PaginacionDep,
     nombre: str | None = None,
     version: str | None = None,
     categoria: CategoriaItem | None = None,
@@ -49,50 +118,69 @@ async def get_config_items(
     item_config_filter = ItemConfiguracionFilter(
         nombre=nombre, version=version, categoria=categoria, estado=estado
     )
-    return crud.get_items_configuracion(
-        session=session, item_config_filter=item_config_filter
+    items_config = crud.get_items_configuracion(
+        session=session, item_config_filter=item_config_filter, paginacion=paginacion
+    )
+
+    set_pagination_headers(response, items_config, paginacion=paginacion)
+
+    no_modificado = respuesta_condicional(
+        request, response, items_config, publico=ItemConfiguracionPublico
     )
+    if no_modificado is not None:
+        return no_modificado
+
+    return items_config
 
 
 @router.get("/{id_item_config}", response_model=ItemConfiguracionPublico)
-async def get_config_item(
-    session: SessionDep, id_item_config: uuid.UUID
+def get_config_item(
+    session: SessionDep,
+    request: Request,
+    response: Response,
+    id_item_config: uuid.UUID,
 ) -> ItemConfiguracionPublico:
-    return crud.get_item_configuracion_by_id(
+    item_config = crud.get_item_configuracion_by_id(
         session=session, id_item_config=id_item_config
     )
 
+    no_modificado = respuesta_condicional(
+        request, response, item_config, publico=ItemConfiguracionPublico
+    )
+    if no_modificado is not None:
+        return no_modificado
+
+    return item_config
+
 
 @router.patch("/{id_item_config}", response_model=ItemConfiguracionPublico)
-async def update_change(
+def update_change(
     session: SessionDep,
     current_user: CurrentUser,
+    response: Response,
     id_item_config: uuid.UUID,
     item_config_actualizar: ItemConfiguracionActualizar,
+    if_match: Annotated[str | None, Header()] = None,
 ) -> ItemConfiguracionPublico:
-    
-    item_configuracion = crud.update_item_configuracion(
+    revision = revision_if_match(if_match)
+    if revision is not None:
+        item_config_actualizar.revision = revision
+
+    item_config = crud.update_item_configuracion(
         session=session,
         id_item_config=id_item_config,
         item_config_actualizar=item_config_actualizar,
+        current_user_id=current_user.id,
     )
-    
-    auditoria_crear = AuditoriaCrear( 
-        tipo_entidad = TipoEntidad.CONFIG_ITEM,
-        id_entidad = item_configuracion.id,
-        operacion = Operacion.ACTUALIZAR,
-        estado_nuevo = jsonable_encoder(item_configuracion),
-        actualizado_por = current_user.id
-    )
-    AuditoriaService.registrar_operacion(session=session, auditoria_crear=auditoria_crear)
-    
-    return item_configuracion
-    
+    response.headers["ETag"] = etag_entidad(item_config, ItemConfiguracionPublico)
+
+    return item_config
+
     
 
 
 @router.delete("/{id_item_config}", response_model=ItemConfiguracionPublico)
-async def delete_item_config(
+def delete_item_config(
     session: SessionDep, current_user: CurrentUser, id_item_config: uuid.UUID
 ) -> ItemConfiguracionPublico:
     if current_user.rol != Rol.EMPLEADO:
@@ -101,34 +189,25 @@ async def delete_item_config(
             detail="Sólo empleados pueden eliminar un ítem de configuración",
         )
 
-    item =  crud.delete_item_configuracion(
-        session=session, id_item_config=id_item_config
+    return crud.delete_item_configuracion(
+        session=session, id_item_config=id_item_config, current_user_id=current_user.id
     )
-    
-    auditoria_crear = AuditoriaCrear(
-        tipo_entidad=TipoEntidad.CONFIG_ITEM,
-        id_entidad=item.id,
-        operacion=Operacion.ELIMINAR,
-        estado_nuevo=jsonable_encoder(item),
-        actualizado_por=current_user.id,
-    )
-    AuditoriaService.registrar_operacion(
-        session=session, auditoria_crear=auditoria_crear
-    )
-    
-    return item
 
 
 @router.get("/{id_item_config}/history", response_model=list[Auditoria])
-async def get_history(session: SessionDep, current_user: CurrentUser, id_item_config: uuid.UUID
+def get_history(session: SessionDep, current_user: TokenUser, response: Response, paginacion: PaginacionDep, id_item_config: uuid.UUID
 ) -> list[Auditoria]:
     auditoria_filter = AuditoriaFilter(tipo_entidad=TipoEntidad.CONFIG_ITEM, id_entidad=id_item_config)
     
-    return AuditoriaService.get_audits(session=session, auditoria_filter=auditoria_filter)
+    auditorias = AuditoriaService.get_audits(session=session, auditoria_filter=auditoria_filter, paginacion=paginacion)
+
+    set_pagination_headers(response, auditorias, paginacion=paginacion, campo_fecha="fecha_actualizacion")
+
+    return auditorias
 
 
 @router.post("/{id_item_config}/rollback", response_model=ItemConfiguracionPublico)
-async def rollback_item_config(session: SessionDep, current_user: CurrentUser, id_item_config: uuid.UUID, id_auditoria: uuid.UUID
+def rollback_item_config(session: SessionDep, current_user: CurrentUser, id_item_config: uuid.UUID, id_auditoria: uuid.UUID
 ) -> ItemConfiguracionPublico:
     item = crud.get_item_configuracion_by_id(session=session, id_item_config=id_item_config)
     
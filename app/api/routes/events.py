@@ -0,0 +1,109 @@
+import asyncio
+import uuid
+from collections.abc import AsyncIterator
+from typing import Annotated
+
+from anyio import from_thread
+from fastapi import APIRouter, Depends, Header, Request
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import SessionDep, get_token_user
+from app.core.events import FIN, Suscripcion, eventos
+from app.crud.events import EventosService as crud
+from app.crud.pagination import encode_cursor
+from app.models.commons import TipoEntidad
+from app.models.events import Evento, EventoFilter
+from app.utils.config import settings
+
+router = APIRouter(prefix="/events")
+
+
+def _mensaje(evento: Evento) -> str:
+    # The id is a cursor, sent back by the browser in Last-Event-ID
+    return (
+        f"id: {encode_cursor(evento.fecha_actualizacion, evento.id)}\n"
+        f"event: {evento.operacion.value}\n"
+        f"data: {evento.model_dump_json()}\n\n"
+    )
+
+
+async def _stream(
+    request: Request,
+    suscripcion: Suscripcion,
+    perdidos: list[Evento],
+    completo: bool = True,
+) -> AsyncIterator[str]:
+    try:
+        for evento in perdidos:
+            yield _mensaje(evento)
+
+        # More were missed than one replay sends. Ending here makes the
+        # client reconnect from the last id it got, instead of skipping to
+        # live events and losing the rest.
+        if not completo:
+            return
+
+        # Written while replaying, already sent
+        enviados = {evento.id for evento in perdidos}
+
+        while True:
+            try:
+                evento = await asyncio.wait_for(
+                    suscripcion.cola.get(), timeout=settings.EVENTS_HEARTBEAT_SECONDS
+                )
+            except TimeoutError:
+                if await request.is_disconnected():
+                    return
+
+                # Keeps proxies from closing an idle connection
+                yield ": ping\n\n"
+                continue
+
+            if evento is FIN:
+                return
+
+            if evento.id not in enviados:
+                yield _mensaje(evento)
+    finally:
+        eventos.cancelar(suscripcion)
+
+
+@router.get(
+    "", response_class=StreamingResponse, dependencies=[Depends(get_token_user)]
+)
+def get_events(
+    session: SessionDep,
+    request: Request,
+    tipo_entidad: TipoEntidad | None = None,
+    id_entidad: uuid.UUID | None = None,
+    last_event_id: Annotated[str | None, Header()] = None,
+) -> StreamingResponse:
+    evento_filter = EventoFilter(tipo_entidad=tipo_entidad, id_entidad=id_entidad)
+
+    # Subscribed before replaying, so nothing written in between is missed.
+    # The queue belongs to the event loop that will stream it.
+    suscripcion = from_thread.run_sync(eventos.suscribir, evento_filter)
+    perdidos = []
+
+    try:
+        if last_event_id is not None:
+            perdidos = crud.get_eventos(
+                session=session,
+                evento_filter=evento_filter,
+                cursor=last_event_id,
+                limite=settings.EVENTS_REPLAY_LIMIT,
+            )
+    except Exception:
+        eventos.cancelar(suscripcion)
+        raise
+    finally:
+        # The stream may stay open for hours, it must not keep a connection
+        session.close()
+
+    completo = len(perdidos) < settings.EVENTS_REPLAY_LIMIT
+
+    return StreamingResponse(
+        _stream(request, suscripcion, perdidos, completo),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
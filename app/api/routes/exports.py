@@ -0,0 +1,209 @@
+import uuid
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlmodel import Session
+
+from app.api.deps import CurrentUser, SessionDep
+from app.crud.audits import filtrar_auditorias
+from app.crud.changes import filtrar_cambios
+from app.crud.config_items import filtrar_items_configuracion
+from app.crud.exports import ExportacionService as crud
+from app.crud.exports import columnas_exportadas
+from app.crud.incidents import filtrar_incidentes
+from app.crud.problems import filtrar_problemas
+from app.models.auditoria import Auditoria, AuditoriaFilter
+from app.models.changes import Cambio, CambioFilter, CambioPublico, EstadoCambio
+from app.models.commons import Operacion, Prioridad, TipoEntidad
+from app.models.config_items import (
+    CategoriaItem,
+    EstadoItem,
+    ItemConfiguracion,
+    ItemConfiguracionFilter,
+    ItemConfiguracionPublico,
+)
+from app.models.exports import FormatoExportacion
+from app.models.incidents import (
+    CategoriaIncidente,
+    EstadoIncidente,
+    Incidente,
+    IncidenteFilter,
+    IncidentePublico,
+)
+from app.models.problems import (
+    EstadoProblema,
+    Problema,
+    ProblemaFilter,
+    ProblemaPublico,
+)
+from app.models.users import Rol, Usuario
+
+router = APIRouter(prefix="/export")
+
+MEDIA_TYPES = {
+    FormatoExportacion.NDJSON: "application/x-ndjson",
+    FormatoExportacion.CSV: "text/csv",
+}
+
+
+def _exportar(
+    session: Session,
+    current_user: Usuario,
+    query: Select,
+    *,
+    nombre: str,
+    formato: FormatoExportacion,
+    gzip: bool,
+) -> StreamingResponse:
+    if current_user.rol != Rol.EMPLEADO:
+        raise HTTPException(status_code=401, detail="Sólo empleados pueden exportar")
+
+    archivo = f"{nombre}.{formato.value}"
+    media_type = MEDIA_TYPES[formato]
+
+    if gzip:
+        archivo, media_type = f"{archivo}.gz", "application/gzip"
+
+    return StreamingResponse(
+        crud.exportar(session=session, query=query, formato=formato, comprimir=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{archivo}"'},
+    )
+
+
+@router.get("/audits", response_class=StreamingResponse)
+def export_audits(
+    session: SessionDep,
+    current_user: CurrentUser,
+    tipo_entidad: TipoEntidad | None = None,
+    id_entidad: uuid.UUID | None = None,
+    operacion: Operacion | None = None,
+    desde: datetime | None = None,
+    hasta: datetime | None = None,
+    formato: FormatoExportacion = FormatoExportacion.NDJSON,
+    gzip: bool = False,
+) -> StreamingResponse:
+    auditoria_filter = AuditoriaFilter(
+        tipo_entidad=tipo_entidad,
+        id_entidad=id_entidad,
+        operacion=operacion,
+        desde=desde,
+        hasta=hasta,
+    )
+    query = filtrar_auditorias(
+        columnas_exportadas(Auditoria, Auditoria, columna_fecha="fecha_actualizacion"),
+        auditoria_filter,
+    )
+
+    return _exportar(
+        session,
+        current_user,
+        query,
+        nombre="auditorias",
+        formato=formato,
+        gzip=gzip,
+    )
+
+
+@router.get("/changes", response_class=StreamingResponse)
+def export_changes(
+    session: SessionDep,
+    current_user: CurrentUser,
+    titulo: str | None = None,
+    prioridad: Prioridad | None = None,
+    estado: EstadoCambio | None = None,
+    descripcion: str | None = None,
+    formato: FormatoExportacion = FormatoExportacion.NDJSON,
+    gzip: bool = False,
+) -> StreamingResponse:
+    cambio_filter = CambioFilter(
+        titulo=titulo, estado=estado, prioridad=prioridad, descripcion=descripcion
+    )
+    query = filtrar_cambios(
+        columnas_exportadas(Cambio, CambioPublico, columna_fecha="fecha_creacion"),
+        cambio_filter,
+    )
+
+    return _exportar(
+        session, current_user, query, nombre="cambios", formato=formato, gzip=gzip
+    )
+
+
+@router.get("/incidents", response_class=StreamingResponse)
+def export_incidents(
+    session: SessionDep,
+    current_user: CurrentUser,
+    titulo: str | None = None,
+    prioridad: Prioridad | None = None,
+    categoria: CategoriaIncidente | None = None,
+    estado: EstadoIncidente | None = None,
+    formato: FormatoExportacion = FormatoExportacion.NDJSON,
+    gzip: bool = False,
+) -> StreamingResponse:
+    incidente_filter = IncidenteFilter(
+        titulo=titulo, prioridad=prioridad, categoria=categoria, estado=estado
+    )
+    query = filtrar_incidentes(
+        columnas_exportadas(
+            Incidente, IncidentePublico, columna_fecha="fecha_creacion"
+        ),
+        incidente_filter,
+    )
+
+    return _exportar(
+        session, current_user, query, nombre="incidentes", formato=formato, gzip=gzip
+    )
+
+
+@router.get("/problems", response_class=StreamingResponse)
+def export_problems(
+    session: SessionDep,
+    current_user: CurrentUser,
+    titulo: str | None = None,
+    prioridad: Prioridad | None = None,
+    estado: EstadoProblema | None = None,
+    formato: FormatoExportacion = FormatoExportacion.NDJSON,
+    gzip: bool = False,
+) -> StreamingResponse:
+    problema_filter = ProblemaFilter(titulo=titulo, prioridad=prioridad, estado=estado)
+    query = filtrar_problemas(
+        columnas_exportadas(Problema, ProblemaPublico, columna_fecha="fecha_creacion"),
+        problema_filter,
+    )
+
+    return _exportar(
+        session, current_user, query, nombre="problemas", formato=formato, gzip=gzip
+    )
+
+
+@router.get("/config-items", response_class=StreamingResponse)
+def export_config_items(
+    session: SessionDep,
+    current_user: CurrentUser,
+    nombre: str | None = None,
+    version: str | None = None,
+    categoria: CategoriaItem | None = None,
+    estado: EstadoItem | None = None,
+    formato: FormatoExportacion = FormatoExportacion.NDJSON,
+    gzip: bool = False,
+) -> StreamingResponse:
+    item_config_filter = ItemConfiguracionFilter(
+        nombre=nombre, version=version, categoria=categoria, estado=estado
+    )
+    query = filtrar_items_configuracion(
+        columnas_exportadas(
+            ItemConfiguracion, ItemConfiguracionPublico, columna_fecha="fecha_creacion"
+        ),
+        item_config_filter,
+    )
+
+    return _exportar(
+        session,
+        current_user,
+        query,
+        nombre="items_configuracion",
+        formato=formato,
+        gzip=gzip,
+    )
@@ -1,17 +1,19 @@
 import uuid
+from typing import Annotated
 
-from app.crud.audits import AuditoriaService
-from app.models.auditoria import AuditoriaCrear
-from fastapi import APIRouter, HTTPException
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Body, Header, HTTPException, Request, Response
 
-from app.api.deps import CurrentUser, SessionDep
+from app.api.deps import CurrentUser, PaginacionDep, SessionDep
+from app.crud.etags import etag_entidad, respuesta_condicional, revision_if_match
 from app.crud.incidents import IncidentesService as crud
-from app.models.commons import Operacion, Prioridad, TipoEntidad
+from app.crud.pagination import set_pagination_headers
+from app.models.bulk import LOTE_MAXIMO, ResultadoLote
+from app.models.commons import Prioridad
 from app.models.incidents import (
     CategoriaIncidente,
     EstadoIncidente,
     IncidenteActualizar,
+    IncidenteActualizarLote,
     IncidenteCrear,
     IncidenteFilter,
     IncidentePublicoConItems,
@@ -22,7 +24,7 @@ router = APIRouter(prefix="/incidents")
 
 
 @router.post("/", response_model=IncidentePublicoConItems)
-async def create_incidente(
+def create_incidente(
     session: SessionDep, current_user: CurrentUser, incidente_in: IncidenteCrear
 ) -> IncidentePublicoConItems:
     incidente_crear = IncidenteCrear.model_validate(
@@ -34,9 +36,47 @@ async def create_incidente(
     return incidente
 
 
+@router.post("/bulk", response_model=list[ResultadoLote])
+def create_incidentes(
+    session: SessionDep,
+    current_user: CurrentUser,
+    incidentes_in: Annotated[
+        list[IncidenteCrear], Body(min_length=1, max_length=LOTE_MAXIMO)
+    ],
+) -> list[ResultadoLote]:
+    incidentes_crear = [
+        IncidenteCrear.model_validate(crear, update={"owner_id": current_user.id})
+        for crear in incidentes_in
+    ]
+
+    return crud.create_incidentes(
+        session=session,
+        incidentes_crear=incidentes_crear,
+        current_user_id=current_user.id,
+    )
+
+
+@router.patch("/bulk", response_model=list[ResultadoLote])
+def update_incidentes(
+    session: SessionDep,
+    current_user: CurrentUser,
+    incidentes_actualizar: Annotated[
+        list[IncidenteActualizarLote], Body(min_length=1, max_length=LOTE_MAXIMO)
+    ],
+) -> list[ResultadoLote]:
+    return crud.update_incidentes(
+        session=session,
+        incidentes_actualizar=incidentes_actualizar,
+        current_user_id=current_user.id,
+    )
+
+
 @router.get("/", response_model=list[IncidentePublicoConItems])
-async def get_incidentes(
+def get_incidentes(
     session: SessionDep,
+    request: Request,
+    response: Response,
+    paginacion: PaginacionDep,
     titulo: str | None = None,
     prioridad: Prioridad | None = None,
     categoria: CategoriaIncidente | None = None,
@@ -48,44 +88,65 @@ async def get_incidentes(
         categoria=categoria,
         estado=estado,
     )
-    return crud.get_incidentes(session=session, incidente_filter=incidente_filter)
+    incidentes = crud.get_incidentes(
+        session=session, incidente_filter=incidente_filter, paginacion=paginacion
+    )
+
+    set_pagination_headers(response, incidentes, paginacion=paginacion)
+
+    no_modificado = respuesta_condicional(
+        request, response, incidentes, publico=IncidentePublicoConItems
+    )
+    if no_modificado is not None:
+        return no_modificado
+
+    return incidentes
 
 
 @router.get("/{id_incidente}", response_model=IncidentePublicoConItems)
-async def get_incidente(
-    session: SessionDep, id_incidente: uuid.UUID
+def get_incidente(
+    session: SessionDep,
+    request: Request,
+    response: Response,
+    id_incidente: uuid.UUID,
 ) -> IncidentePublicoConItems:
-    return crud.get_incidente_by_id(session=session, id_incidente=id_incidente)
+    incidente = crud.get_incidente_by_id(session=session, id_incidente=id_incidente)
+
+    no_modificado = respuesta_condicional(
+        request, response, incidente, publico=IncidentePublicoConItems
+    )
+    if no_modificado is not None:
+        return no_modificado
+
+    return incidente
 
 
 @router.patch("/{id_incidente}", response_model=IncidentePublicoConItems)
-async def update_incidente(
+def update_incidente(
     session: SessionDep,
     current_user: CurrentUser,
+    response: Response,
     id_incidente: uuid.UUID,
     incidente_actualizar: IncidenteActualizar,
+    if_match: Annotated[str | None, Header()] = None,
 ) -> IncidentePublicoConItems:
-    
-    incidente =  crud.update_incidente(
+    revision = revision_if_match(if_match)
+    if revision is not None:
+        incidente_actualizar.revision = revision
+
+    incidente = crud.update_incidente(
         session=session,
         id_incidente=id_incidente,
         incidente_actualizar=incidente_actualizar,
+        current_user_id=current_user.id,
     )
-        
-    auditoria_crear = AuditoriaCrear( 
-        tipo_entidad = TipoEntidad.INCIDENTE,
-        id_entidad = incidente.id,
-        operacion = Operacion.ACTUALIZAR,
-        estado_nuevo = jsonable_encoder(incidente),
-        actualizado_por = current_user.id
-    )
-    AuditoriaService.registrar_operacion(session=session, auditoria_crear=auditoria_crear)
-    
+    response.headers["ETag"] = etag_entidad(incidente, IncidentePublicoConItems)
+
     return incidente
 
 
 @router.delete("/{id_incidente}", response_model=IncidentePublicoConItems)
-async def delete_incidente(
+def delete_incidente(
     session: SessionDep, current_user: CurrentUser, id_incidente: uuid.UUID
 ) -> IncidentePublicoConItems:
     if current_user.rol != Rol.EMPLEADO:
@@ -93,15 +154,6 @@ async def delete_incidente(
             status_code=401, detail="Sólo empleados pueden eliminar un incidente"
         )
 
-    incident =  crud.delete_incidente(session=session, id_incidente=id_incidente)
-    
-    auditoria_crear = AuditoriaCrear( 
-        tipo_entidad = TipoEntidad.INCIDENTE,
-        id_entidad = incident.id,
-        operacion = Operacion.ELIMINAR,
-        estado_nuevo = jsonable_encoder(incident),
-        actualizado_por = current_user.id
-    )
-    AuditoriaService.registrar_operacion(session=session, auditoria_crear=auditoria_crear)    
-
-    return incident
\ No newline at end of file
+    return crud.delete_incidente(
+        session=session, id_incidente=id_incidente, current_user_id=current_user.id
+    )
\ No newline at end of file
@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+from typing import Annotated
+
+from fastapi import APIRouter, Query
+
+from app.api.deps import SessionDep
+from app.crud.kpis import KpisService as crud
+from app.models.commons import Prioridad, TipoEntidad
+from app.models.incidents import CategoriaIncidente
+from app.models.kpis import Kpis
+from app.models.stats import DIAS_DEFAULT, DIAS_MAXIMO
+
+router = APIRouter(prefix="/kpis")
+
+DiasQuery = Annotated[int, Query(ge=1, le=DIAS_MAXIMO)]
+
+
+def get_kpis(
+    session: SessionDep,
+    tipo_entidad: TipoEntidad,
+    dias: int,
+    prioridad: Prioridad | None,
+    categoria: str | None = None,
+) -> Kpis:
+    return crud.get_kpis(
+        session=session,
+        tipo_entidad=tipo_entidad,
+        hasta=datetime.now(timezone.utc).date(),
+        dias=dias,
+        prioridad=prioridad,
+        categoria=categoria,
+    )
+
+
+@router.get("/incidents", response_model=Kpis)
+def get_incidents_kpis(
+    session: SessionDep,
+    dias: DiasQuery = DIAS_DEFAULT,
+    prioridad: Prioridad | None = None,
+    categoria: CategoriaIncidente | None = None,
+) -> Kpis:
+    return get_kpis(
+        session,
+        TipoEntidad.INCIDENTE,
+        dias,
+        prioridad,
+        categoria.value if categoria else None,
+    )
+
+
+@router.get("/problems", response_model=Kpis)
+def get_problems_kpis(
+    session: SessionDep,
+    dias: DiasQuery = DIAS_DEFAULT,
+    prioridad: Prioridad | None = None,
+) -> Kpis:
+    return get_kpis(session, TipoEntidad.PROBLEMA, dias, prioridad)
+
+
+@router.get("/changes", response_model=Kpis)
+def get_changes_kpis(
+    session: SessionDep,
+    dias: DiasQuery = DIAS_DEFAULT,
+    prioridad: Prioridad | None = None,
+) -> Kpis:
+    return get_kpis(session, TipoEntidad.CAMBIO, dias, prioridad)
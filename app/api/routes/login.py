@@ -1,20 +1,18 @@
-from datetime import timedelta
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 
 from app.api.deps import SessionDep
-from app.core import security
+from app.crud.tokens import TokensService
 from app.crud.users import UsuariosService as crud
-from app.models.token import Token
-from app.utils.config import settings
+from app.models.token import RefreshToken, Token
 
 router = APIRouter()
 
 
 @router.post("/login/access-token")
-async def login_access_token(
+def login_access_token(
     session: SessionDep, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
 ) -> Token:
     user = crud.authenticate(
@@ -23,10 +21,16 @@ async def login_access_token(
     if not user:
         raise HTTPException(status_code=400, detail="Email o contraseña incorrectos")
 
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return TokensService.crear_tokens(usuario=user)
 
-    return Token(
-        access_token=security.create_access_token(
-            user.id, expires_delta=access_token_expires
-        )
+
+@router.post("/login/refresh-token")
+def refresh_access_token(session: SessionDep, refresh_token: RefreshToken) -> Token:
+    return TokensService.refrescar(
+        session=session, refresh_token=refresh_token.refresh_token
     )
+
+
+@router.post("/login/logout", status_code=204)
+def logout(session: SessionDep, refresh_token: RefreshToken) -> None:
+    TokensService.revocar(session=session, refresh_token=refresh_token.refresh_token)
@@ -1,16 +1,18 @@
 import uuid
+from typing import Annotated
 
-from fastapi import APIRouter, HTTPException
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Body, Header, HTTPException, Request, Response
 
-from app.api.deps import CurrentUser, SessionDep
-from app.crud.audits import AuditoriaService
+from app.api.deps import CurrentUser, PaginacionDep, SessionDep
+from app.crud.etags import etag_entidad, respuesta_condicional, revision_if_match
+from app.crud.pagination import set_pagination_headers
 from app.crud.problems import ProblemasService as crud
-from app.models.auditoria import AuditoriaCrear
-from app.models.commons import Operacion, Prioridad, TipoEntidad
+from app.models.bulk import LOTE_MAXIMO, ResultadoLote
+from app.models.commons import Prioridad
 from app.models.problems import (
     EstadoProblema,
     ProblemaActualizar,
+    ProblemaActualizarLote,
     ProblemaCrear,
     ProblemaFilter,
     ProblemaPublicoConRelaciones,
@@ -21,7 +23,7 @@ router = APIRouter(prefix="/problems")
 
 
 @router.post("/", response_model=ProblemaPublicoConRelaciones)
-async def create_problema(
+def create_problema(
     session: SessionDep, current_user: CurrentUser, problema_in: ProblemaCrear
 ) -> ProblemaPublicoConRelaciones:
     problema_crear = ProblemaCrear.model_validate(
@@ -33,9 +35,47 @@ async def create_problema(
     return problema
 
 
+@router.post("/bulk", response_model=list[ResultadoLote])
+def create_problemas(
+    session: SessionDep,
+    current_user: CurrentUser,
+    problemas_in: Annotated[
+        list[ProblemaCrear], Body(min_length=1, max_length=LOTE_MAXIMO)
+    ],
+) -> list[ResultadoLote]:
+    problemas_crear = [
+        ProblemaCrear.model_validate(crear, update={"owner_id": current_user.id})
+        for crear in problemas_in
+    ]
+
+    return crud.create_problemas(
+        session=session,
+        problemas_crear=problemas_crear,
+        current_user_id=current_user.id,
+    )
+
+
+@router.patch("/bulk", response_model=list[ResultadoLote])
+def update_problemas(
+    session: SessionDep,
+    current_user: CurrentUser,
+    problemas_actualizar: Annotated[
+        list[ProblemaActualizarLote], Body(min_length=1, max_length=LOTE_MAXIMO)
+    ],
+) -> list[ResultadoLote]:
+    return crud.update_problemas(
+        session=session,
+        problemas_actualizar=problemas_actualizar,
+        current_user_id=current_user.id,
+    )
+
+
 @router.get("/", response_model=list[ProblemaPublicoConRelaciones])
-async def get_problemas(
+def get_problemas(
     session: SessionDep,
+    request: Request,
+    response: Response,
+    paginacion: PaginacionDep,
     titulo: str | None = None,
     prioridad: Prioridad | None = None,
     estado: EstadoProblema | None = None,
@@ -45,45 +85,65 @@ async def get_problemas(
         prioridad=prioridad,
         estado=estado,
     )
-    return crud.get_problemas(session=session, problema_filter=problema_filter)
+    problemas = crud.get_problemas(
+        session=session, problema_filter=problema_filter, paginacion=paginacion
+    )
+
+    set_pagination_headers(response, problemas, paginacion=paginacion)
+
+    no_modificado = respuesta_condicional(
+        request, response, problemas, publico=ProblemaPublicoConRelaciones
+    )
+    if no_modificado is not None:
+        return no_modificado
+
+    return problemas
 
 
 @router.get("/{id_problema}", response_model=ProblemaPublicoConRelaciones)
-async def get_problema(
-    session: SessionDep, id_problema: uuid.UUID
+def get_problema(
+    session: SessionDep,
+    request: Request,
+    response: Response,
+    id_problema: uuid.UUID,
 ) -> ProblemaPublicoConRelaciones:
-    return crud.get_problema_by_id(session=session, id_problema=id_problema)
+    problema = crud.get_problema_by_id(session=session, id_problema=id_problema)
+
+    no_modificado = respuesta_condicional(
+        request, response, problema, publico=ProblemaPublicoConRelaciones
+    )
+    if no_modificado is not None:
+        return no_modificado
+
+    return problema
 
 
 @router.patch("/{id_problema}", response_model=ProblemaPublicoConRelaciones)
-async def update_problema(
+def update_problema(
     session: SessionDep,
     current_user: CurrentUser,
+    response: Response,
     id_problema: uuid.UUID,
     problema_actualizar: ProblemaActualizar,
+    if_match: Annotated[str | None, Header()] = None,
 ) -> ProblemaPublicoConRelaciones:
+    revision = revision_if_match(if_match)
+    if revision is not None:
+        problema_actualizar.revision = revision
+
     problema = crud.update_problema(
         session=session,
         id_problema=id_problema,
         problema_actualizar=problema_actualizar,
+        current_user_id=current_user.id,
     )
-
-    auditoria_crear = AuditoriaCrear(
-        tipo_entidad=TipoEntidad.PROBLEMA,
-        id_entidad=problema.id,
-        operacion=Operacion.ACTUALIZAR,
-        estado_nuevo=jsonable_encoder(problema),
-        actualizado_por=current_user.id,
-    )
-    AuditoriaService.registrar_operacion(
-        session=session, auditoria_crear=auditoria_crear
-    )
+    response.headers["ETag"] = etag_entidad(problema, ProblemaPublicoConRelaciones)
 
     return problema
 
 
 @router.delete("/{id_problema}", response_model=ProblemaPublicoConRelaciones)
-async def delete_problema(
+def delete_problema(
     session: SessionDep, current_user: CurrentUser, id_problema: uuid.UUID
 ) -> ProblemaPublicoConRelaciones:
     if current_user.rol != Rol.EMPLEADO:
@@ -91,17 +151,6 @@ async def delete_problema(
             status_code=401, detail="Sólo empleados pueden eliminar un problema"
         )
 
-    problema = crud.delete_problema(session=session, id_problema=id_problema)
-
-    auditoria_crear = AuditoriaCrear(
-        tipo_entidad=TipoEntidad.PROBLEMA,
-        id_entidad=problema.id,
-        operacion=Operacion.ELIMINAR,
-        estado_nuevo=jsonable_encoder(problema),
-        actualizado_por=current_user.id,
+    return crud.delete_problema(
+        session=session, id_problema=id_problema, current_user_id=current_user.id
     )
-    AuditoriaService.registrar_operacion(
-        session=session, auditoria_crear=auditoria_crear
-    )
-
-    return problema
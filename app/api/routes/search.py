@@ -0,0 +1,39 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Query, Response
+
+from app.api.deps import PaginacionDep, SessionDep
+from app.crud.search import BusquedaService as crud
+from app.models.commons import Prioridad, TipoEntidad
+from app.models.search import Busqueda, BusquedaFilter
+
+router = APIRouter(prefix="/search")
+
+
+@router.get("", response_model=Busqueda)
+def search(
+    session: SessionDep,
+    response: Response,
+    paginacion: PaginacionDep,
+    q: Annotated[str, Query(min_length=1)],
+    tipo_entidad: TipoEntidad | None = None,
+    estado: str | None = None,
+    prioridad: Prioridad | None = None,
+    categoria: str | None = None,
+) -> Busqueda:
+    busqueda_filter = BusquedaFilter(
+        q=q,
+        tipo_entidad=tipo_entidad,
+        estado=estado,
+        prioridad=prioridad,
+        categoria=categoria,
+    )
+    busqueda, next_cursor = crud.buscar(
+        session=session, busqueda_filter=busqueda_filter, paginacion=paginacion
+    )
+
+    response.headers["X-Limit"] = str(paginacion.limit)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    return busqueda
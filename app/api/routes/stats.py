@@ -0,0 +1,51 @@
+from datetime import datetime, timezone
+from typing import Annotated
+
+from fastapi import APIRouter, Query
+
+from app.api.deps import SessionDep
+from app.core.cache import TTLCache
+from app.crud.stats import EstadisticasService as crud
+from app.models.commons import TipoEntidad
+from app.models.stats import DIAS_DEFAULT, DIAS_MAXIMO, Estadisticas
+from app.utils.config import settings
+
+router = APIRouter(prefix="/stats")
+
+cache = TTLCache(name="stats", ttl=settings.STATS_CACHE_TTL_SECONDS)
+
+DiasQuery = Annotated[int, Query(ge=1, le=DIAS_MAXIMO)]
+
+
+def get_estadisticas(
+    session: SessionDep, tipo_entidad: TipoEntidad, dias: int
+) -> Estadisticas:
+    hasta = datetime.now(timezone.utc).date()
+
+    return cache.get_or_set(
+        (tipo_entidad, hasta, dias),
+        lambda: crud.get_estadisticas(
+            session=session, tipo_entidad=tipo_entidad, hasta=hasta, dias=dias
+        ),
+    )
+
+
+@router.get("/incidents", response_model=Estadisticas)
+def get_incidents_stats(
+    session: SessionDep, dias: DiasQuery = DIAS_DEFAULT
+) -> Estadisticas:
+    return get_estadisticas(session, TipoEntidad.INCIDENTE, dias)
+
+
+@router.get("/problems", response_model=Estadisticas)
+def get_problems_stats(
+    session: SessionDep, dias: DiasQuery = DIAS_DEFAULT
+) -> Estadisticas:
+    return get_estadisticas(session, TipoEntidad.PROBLEMA, dias)
+
+
+@router.get("/changes", response_model=Estadisticas)
+def get_changes_stats(
+    session: SessionDep, dias: DiasQuery = DIAS_DEFAULT
+) -> Estadisticas:
+    return get_estadisticas(session, TipoEntidad.CAMBIO, dias)
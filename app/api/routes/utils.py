@@ -2,6 +2,7 @@ from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 
 from app.api.deps import SessionDep
+from app.core.metrics import metrics
 from app.crud.utils import AppVersionService as crud
 
 router = APIRouter(prefix="/utils")
@@ -13,7 +14,12 @@ async def health_check() -> JSONResponse:
 
 
 @router.get("/version")
-async def get_version(session: SessionDep) -> JSONResponse:
+def get_version(session: SessionDep) -> JSONResponse:
     version = crud.get_version(session=session)
 
     return JSONResponse({"version": version.version})
+
+
+@router.get("/metrics")
+async def get_metrics() -> JSONResponse:
+    return JSONResponse(metrics.snapshot())
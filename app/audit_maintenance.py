@@ -0,0 +1,55 @@
+import logging
+from datetime import date
+from pathlib import Path
+
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.crud.audit_partitions import ParticionesAuditoriaService as crud
+from app.crud.audit_partitions import meses_vencidos
+from app.utils.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def maintain(hoy: date) -> None:
+    with Session(engine) as session:
+        creadas = crud.crear_particiones(
+            session=session, desde=hoy, meses=settings.AUDIT_PARTITION_MONTHS_AHEAD
+        )
+
+        for nombre in creadas:
+            logger.info("Created partition %s", nombre)
+
+        # Written for months with no partition, e.g. when this didn't run
+        for mes in crud.get_meses_default(session=session):
+            logger.warning("The default partition holds audits of %s", f"{mes:%Y-%m}")
+
+        for nombre in crud.separar_default(session=session):
+            logger.warning("Moved audits out of the default partition to %s", nombre)
+
+        if not settings.AUDIT_RETENTION_MONTHS:
+            return
+
+        vencidas = meses_vencidos(
+            crud.get_particiones(session=session),
+            hoy=hoy,
+            retencion=settings.AUDIT_RETENTION_MONTHS,
+        )
+
+        for mes in vencidas:
+            archivo = crud.archivar_particion(
+                session=session, mes=mes, directorio=Path(settings.AUDIT_ARCHIVE_DIR)
+            )
+            logger.info("Archived audits of %s to %s", f"{mes:%Y-%m}", archivo)
+
+
+def main() -> None:
+    logger.info("Maintaining audit partitions")
+    maintain(date.today())
+    logger.info("Audit partitions maintained")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable
+
+from sqlalchemy import Engine
+from sqlmodel import Session
+
+from app.core.metrics import metrics
+from app.crud.audits import AuditoriaService
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class AuditWriter:
+    """Writes audit rows from a background thread, in batches, outside the
+    request that produced them. Rows are only handed over after the audited
+    write is committed, so rolled back writes are never audited."""
+
+    def __init__(
+        self,
+        *,
+        queue_size: int,
+        batch_size: int,
+        flush_interval: float,
+        enqueue_timeout: float,
+        max_retries: int = 3,
+    ) -> None:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.max_retries = max_retries
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._session_factory: Callable[[], Session] | None = None
+        self._thread: threading.Thread | None = None
+        # Set once stopping begins, rows submitted after it would be queued
+        # behind _STOP and never flushed
+        self._deteniendo = False
+        self._enviando = 0
+        self._condicion = threading.Condition()
+
+        metrics.gauge("audit_queue_depth", self._queue.qsize)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, engine: Engine) -> None:
+        if self.running:
+            return
+
+        self._deteniendo = False
+        self._session_factory = lambda: Session(engine)
+        self._thread = threading.Thread(
+            target=self._run, name="audit-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Flushes everything still queued and stops the worker."""
+        if not self.running:
+            return
+
+        # Later submits are handed back, the ones already putting rows finish
+        # before _STOP is queued
+        with self._condicion:
+            self._deteniendo = True
+            self._condicion.wait_for(lambda: self._enviando == 0)
+
+        # Blocks while the queue is full, the worker keeps draining it
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def submit(self, rows: list[dict]) -> list[dict]:
+        """Queues `rows` and returns the ones that did not fit before
+        `enqueue_timeout`, or all of them once the writer is stopping, which
+        the caller has to write itself."""
+        with self._condicion:
+            if self._deteniendo:
+                return rows
+
+            self._enviando += 1
+
+        try:
+            for indice, row in enumerate(rows):
+                try:
+                    self._queue.put(row, timeout=self.enqueue_timeout)
+                except queue.Full:
+                    metrics.inc("audit_queue_full_total")
+                    return rows[indice:]
+
+            return []
+        finally:
+            with self._condicion:
+                self._enviando -= 1
+                self._condicion.notify_all()
+
+    def _run(self) -> None:
+        detener = False
+
+        while not detener:
+            batch, detener = self._next_batch()
+
+            if batch:
+                self._flush(batch)
+
+    def _next_batch(self) -> tuple[list[dict], bool]:
+        batch: list[dict] = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            try:
+                row = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+
+            if row is _STOP:
+                return batch, True
+
+            batch.append(row)
+
+        return batch, False
+
+    def _flush(self, batch: list[dict]) -> None:
+        start = time.perf_counter()
+
+        for intento in range(1, self.max_retries + 1):
+            try:
+                with self._session_factory() as session:
+                    AuditoriaService.registrar_filas(session=session, filas=batch)
+                    session.commit()
+            except Exception:
+                metrics.inc("audit_flush_errors_total")
+                logger.exception(
+                    "Could not write %d audit rows (attempt %d)", len(batch), intento
+                )
+                time.sleep(min(2**intento * 0.1, self.flush_interval))
+            else:
+                metrics.inc("audit_rows_written_total", len(batch))
+                metrics.observe("audit_flush_seconds", time.perf_counter() - start)
+                return
+
+        metrics.inc("audit_rows_dropped_total", len(batch))
+        logger.error("Dropped %d audit rows: %s", len(batch), batch)
+
+
+audit_writer = AuditWriter(
+    queue_size=settings.AUDIT_QUEUE_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    enqueue_timeout=settings.AUDIT_ENQUEUE_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,70 @@
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from threading import Lock
+from typing import Any
+
+from app.core.metrics import metrics
+
+_MISS = object()
+
+
+class TTLCache:
+    """In-process LRU cache whose entries expire `ttl` seconds after being
+    stored. Like the metrics, every uvicorn worker keeps its own copy."""
+
+    def __init__(self, *, name: str, ttl: float, maxsize: int = 256) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+        metrics.gauge(f"{name}_cache_size", lambda: len(self._entries))
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                metrics.inc(f"{self.name}_cache_hits_total")
+                return entry[1]
+
+            if entry is not None:
+                del self._entries[key]
+
+        metrics.inc(f"{self.name}_cache_misses_total")
+        return default
+
+    def set(self, key: Hashable, value: Any, *, ttl: float | None = None) -> None:
+        """Stores `value` for `ttl` seconds, or the cache's `ttl` if None."""
+        expira = time.monotonic() + (self.ttl if ttl is None else min(ttl, self.ttl))
+
+        with self._lock:
+            self._entries[key] = (expira, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        value = self.get(key, _MISS)
+
+        if value is _MISS:
+            # Computed outside the lock, concurrent misses of the same key may
+            # both compute it, which is cheaper than serializing every miss
+            value = fn()
+            self.set(key, value)
+
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+        metrics.inc(f"{self.name}_cache_invalidations_total")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
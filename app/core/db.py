@@ -1,15 +1,18 @@
 import os
 import random
+import uuid
+from collections.abc import Callable
+from typing import Any, TypeVar
 
 import sqlalchemy as sa
 from faker import Faker
-from sqlmodel import Session, create_engine, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, SQLModel, select
 
-from app.crud.changes import CambiosService
-from app.crud.config_items import ItemsConfiguracionService
-from app.crud.incidents import IncidentesService
-from app.crud.problems import ProblemasService
-from app.crud.users import UsuariosService
+from app.core.engine import create_db_engine, register_pool_gauges
+from app.core.security import get_password_hash
+from app.crud.bulk import chunks
+from app.crud.unit_of_work import UnitOfWork
 from app.db_seed import (
     seed_cambios,
     seed_incidentes,
@@ -18,17 +21,28 @@ from app.db_seed import (
     seed_usuarios,
 )
 from app.models.app_version import AppVersion
+from app.models.auditoria import AuditoriaCrear
 from app.models.changes import Cambio
+from app.models.changes_incidents_link import CambioIncidenteLink
+from app.models.changes_items_link import CambioItemLink
+from app.models.changes_problems_link import CambioProblemaLink
+from app.models.commons import Operacion, TipoEntidad
 from app.models.config_items import ItemConfiguracion
 from app.models.incidents import Incidente
+from app.models.incidents_items_link import IncidenteItemLink
 from app.models.problems import Problema
+from app.models.problems_incidents_link import ProblemaIncidenteLink
+from app.models.problems_items_link import ProblemaItemLink
 from app.models.users import Usuario
 from app.utils.config import settings
 
 Faker.seed(0)
 fake = Faker()
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+T = TypeVar("T", bound=SQLModel)
+
+engine = create_db_engine(settings)
+register_pool_gauges(engine.pool)
 
 
 def set_version(session: Session, version: AppVersion) -> None:
@@ -36,122 +50,224 @@ def set_version(session: Session, version: AppVersion) -> None:
     session.commit()
 
 
-def populate_db(session: Session) -> None:
-    automated_test = os.getenv("TESTS", None)
-
-    usuarios = [usuario.email for usuario in session.exec(select(Usuario)).all()]
-
-    for usuario in seed_usuarios:
-        if usuario.email not in usuarios:
-            UsuariosService.create_user(session=session, usuario_registrar=usuario)
-
-    usuario = session.exec(select(Usuario)).first()
-
-    # `nombre` is not unique but it's the only way to check for duplicates
-    items_config = [
-        item_config.nombre
-        for item_config in session.exec(select(ItemConfiguracion)).all()
-    ]
-
-    for item_config in seed_items_config:
-        if item_config.nombre not in items_config:
-            item_config.owner_id = usuario.id
-            new_item = ItemsConfiguracionService.create_item_configuracion(
-                session=session,
-                item_config_crear=item_config,
-                current_user_id=usuario.id,
-            )
+# A seed always gets the same id, derived from its key, so a deploy racing
+# another one inserts nothing twice
+SEED_NAMESPACE = uuid.UUID("6f1f5d0e-9a53-4b8e-8f3c-2f1c7a0d9b41")
 
-            if not automated_test:
-                new_item.fecha_creacion = fake.date_time_between(start_date="-30d")
-                session.add(new_item)
+# Rows per INSERT, keeps the statement below the bind parameter limit
+LIMITE_FILAS = 1_000
 
-    session.commit()
-
-    incidentes = [
-        incidente.titulo for incidente in session.exec(select(Incidente)).all()
-    ]
-    
-    id_items_config = [
-        item_config.id for item_config in session.exec(select(ItemConfiguracion)).all()
-    ]
 
-    for incidente in seed_incidentes:
-        if incidente.titulo not in incidentes:
-            incidente.owner_id = usuario.id
+def _insertar(session: Session, modelo: type[SQLModel], filas: list[dict]) -> set:
+    """Inserts `filas` skipping the ones already stored, returns the ids of
+    the inserted ones."""
+    if session.get_bind().dialect.name == "postgresql":
+        insert = postgresql.insert
+    else:
+        insert = sqlite.insert
 
-            if automated_test:
-                incidente.id_config_items = [id_items_config[0]]
-            else:
-                incidente.id_config_items = [random.choice(id_items_config)]
+    insertados = set()
 
-            new_incidente = IncidentesService.create_incidente(
-                session=session, incidente_crear=incidente, current_user_id=usuario.id
-            )
+    for inicio in range(0, len(filas), LIMITE_FILAS):
+        query = insert(modelo).values(filas[inicio : inicio + LIMITE_FILAS])
+        query = query.on_conflict_do_nothing()
 
-            if not automated_test:
-                new_incidente.fecha_creacion = fake.date_time_between(start_date="-30d")
-                session.add(new_incidente)
+        if "id" in modelo.__table__.c:
+            insertados.update(session.execute(query.returning(modelo.id)).scalars())
+        else:
+            session.execute(query)
 
-    session.commit()
-    
-    problemas = [problema.titulo for problema in session.exec(select(Problema)).all()]
-    id_incidentes = [
-        incidente.id for incidente in session.exec(select(Incidente)).all()
-    ]
+    return insertados
 
-    for problema in seed_problemas:
-        if problema.titulo not in problemas:
-            problema.owner_id = usuario.id
 
-            if automated_test:
-                problema.id_config_items = [id_items_config[0]]
-                problema.id_incidentes = [id_incidentes[0]]
-            else:
-                problema.id_config_items = [random.choice(id_items_config)]
-                problema.id_incidentes = [random.choice(id_incidentes)]
+def _sembrar(
+    session: Session,
+    modelo: type[T],
+    campo: str,
+    seeds: list[Any],
+    construir: Callable[[Any, uuid.UUID], T],
+) -> tuple[dict[str, uuid.UUID], list[T]]:
+    """Inserts the `seeds` whose `campo` is not stored yet, built by
+    `construir` with their id. Returns the id of every seed by its `campo`
+    and the rows inserted now."""
+    por_clave: dict[str, Any] = {}
 
-            new_problema = ProblemasService.create_problema(
-                session=session, problema_crear=problema, current_user_id=usuario.id
-            )
+    for seed in seeds:
+        por_clave.setdefault(getattr(seed, campo), seed)
 
-            if not automated_test:
-                new_problema.fecha_creacion = fake.date_time_between(start_date="-30d")
-                session.add(new_problema)
+    # Seeds stored before their ids were derived from the key are found too
+    columna = getattr(modelo, campo)
+    ids: dict[str, uuid.UUID] = {}
 
-    session.commit()
+    for chunk in chunks(por_clave):
+        query = select(columna, modelo.id).where(columna.in_(chunk))
+        ids.update(session.execute(query).all())
 
-    id_incidentes = [
-        incidente.id for incidente in session.exec(select(Incidente)).all()
-    ]
-    id_problemas = [
-        problema.id for problema in session.exec(select(Problema)).all()
+    nuevas = [
+        construir(seed, uuid.uuid5(SEED_NAMESPACE, f"{modelo.__tablename__}:{clave}"))
+        for clave, seed in por_clave.items()
+        if clave not in ids
     ]
+    insertados = _insertar(session, modelo, [fila.model_dump() for fila in nuevas])
+    ids.update({getattr(fila, campo): fila.id for fila in nuevas})
 
-    cambios = [cambio.titulo for cambio in session.exec(select(Cambio)).all()]
+    return ids, [fila for fila in nuevas if fila.id in insertados]
 
-    for cambio in seed_cambios:
-        if cambio.titulo not in cambios:
-            cambio.owner_id = usuario.id
 
-            if automated_test:
-                cambio.id_config_items = [id_items_config[0]]
-                cambio.id_incidentes = [id_incidentes[0]]
-                cambio.id_problemas = [id_problemas[0]]
-            else:
-                cambio.id_config_items = [random.choice(id_items_config)]
-                cambio.id_incidentes = [random.choice(id_incidentes)]
-                cambio.id_problemas = [random.choice(id_problemas)]
+def populate_db(session: Session) -> None:
+    """Inserts the seeds that are missing, found by email, `nombre` or
+    `titulo`. Runs on every deploy: once they are stored it costs one
+    indexed query per table, whatever the size of the database."""
+    automated_test = os.getenv("TESTS", None)
 
-            new_cambio = CambiosService.create_cambio(
-                session=session, cambio_crear=cambio, current_user_id=usuario.id
+    def fechas() -> dict:
+        if automated_test:
+            return {}
+
+        return {"fecha_creacion": fake.date_time_between(start_date="-30d")}
+
+    def relacionados(ids: dict[str, uuid.UUID], primera: str) -> list[uuid.UUID]:
+        if automated_test:
+            return [ids[primera]]
+
+        return [random.choice(list(ids.values()))]
+
+    def creada(tipo_entidad: TipoEntidad, entidad: SQLModel, **ids) -> AuditoriaCrear:
+        estado = entidad.model_dump(mode="json")
+        for campo, lista in ids.items():
+            estado[campo] = [str(id) for id in lista]
+
+        return AuditoriaCrear(
+            tipo_entidad=tipo_entidad,
+            id_entidad=entidad.id,
+            operacion=Operacion.CREAR,
+            estado_nuevo=estado,
+            actualizado_por=owner_id,
+        )
+
+    with UnitOfWork(session) as uow:
+        # Only new users pay for hashing their password
+        ids_usuarios, _ = _sembrar(
+            session,
+            Usuario,
+            "email",
+            seed_usuarios,
+            lambda usuario, id: Usuario.model_validate(
+                usuario,
+                update={
+                    "id": id,
+                    "contraseña_hasheada": get_password_hash(usuario.contraseña),
+                },
+            ),
+        )
+        owner_id = ids_usuarios[seed_usuarios[0].email]
+        propios = {"owner_id": owner_id}
+
+        ids_items, items_config = _sembrar(
+            session,
+            ItemConfiguracion,
+            "nombre",
+            seed_items_config,
+            lambda item, id: ItemConfiguracion.model_validate(
+                item, update={"id": id, **propios, **fechas()}
+            ),
+        )
+        uow.auditar_lote(
+            [creada(TipoEntidad.CONFIG_ITEM, item) for item in items_config]
+        )
+        primer_item = seed_items_config[0].nombre
+
+        ids_incidentes, incidentes = _sembrar(
+            session,
+            Incidente,
+            "titulo",
+            seed_incidentes,
+            lambda incidente, id: Incidente.model_validate(
+                incidente, update={"id": id, **propios, **fechas()}
+            ),
+        )
+        _insertar(
+            session,
+            IncidenteItemLink,
+            [
+                {"id_incidente": incidente.id, "id_config_item": id}
+                for incidente in incidentes
+                for id in relacionados(ids_items, primer_item)
+            ],
+        )
+        uow.auditar_lote(
+            [creada(TipoEntidad.INCIDENTE, incidente) for incidente in incidentes]
+        )
+        primer_incidente = seed_incidentes[0].titulo
+
+        ids_problemas, problemas = _sembrar(
+            session,
+            Problema,
+            "titulo",
+            seed_problemas,
+            lambda problema, id: Problema.model_validate(
+                problema, update={"id": id, **propios, **fechas()}
+            ),
+        )
+        links_items, links_incidentes = [], []
+
+        for problema in problemas:
+            links_items.extend(
+                {"id_problema": problema.id, "id_config_item": id}
+                for id in relacionados(ids_items, primer_item)
+            )
+            links_incidentes.extend(
+                {"id_problema": problema.id, "id_incidente": id}
+                for id in relacionados(ids_incidentes, primer_incidente)
             )
 
-            if not automated_test:
-                new_cambio.fecha_creacion = fake.date_time_between(start_date="-30d")
-                session.add(new_cambio)
+        _insertar(session, ProblemaItemLink, links_items)
+        _insertar(session, ProblemaIncidenteLink, links_incidentes)
+        uow.auditar_lote(
+            [creada(TipoEntidad.PROBLEMA, problema) for problema in problemas]
+        )
+        primer_problema = seed_problemas[0].titulo
+
+        _, cambios = _sembrar(
+            session,
+            Cambio,
+            "titulo",
+            seed_cambios,
+            lambda cambio, id: Cambio.model_validate(
+                cambio, update={"id": id, **propios, **fechas()}
+            ),
+        )
+        links_items, links_incidentes, links_problemas = [], [], []
+        auditorias = []
+
+        for cambio in cambios:
+            id_config_items = relacionados(ids_items, primer_item)
+            id_incidentes = relacionados(ids_incidentes, primer_incidente)
+            id_problemas = relacionados(ids_problemas, primer_problema)
+
+            links_items.extend(
+                {"id_cambio": cambio.id, "id_config_item": id} for id in id_config_items
+            )
+            links_incidentes.extend(
+                {"id_cambio": cambio.id, "id_incidente": id} for id in id_incidentes
+            )
+            links_problemas.extend(
+                {"id_cambio": cambio.id, "id_problema": id} for id in id_problemas
+            )
+            auditorias.append(
+                creada(
+                    TipoEntidad.CAMBIO,
+                    cambio,
+                    id_config_items=id_config_items,
+                    id_incidentes=id_incidentes,
+                    id_problemas=id_problemas,
+                )
+            )
 
-    session.commit()
+        _insertar(session, CambioItemLink, links_items)
+        _insertar(session, CambioIncidenteLink, links_incidentes)
+        _insertar(session, CambioProblemaLink, links_problemas)
+        uow.auditar_lote(auditorias)
 
 
 def init_db(session: Session) -> None:
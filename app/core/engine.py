@@ -0,0 +1,58 @@
+import time
+
+from sqlalchemy import Engine
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import QueuePool
+from sqlmodel import create_engine
+
+from app.core.metrics import metrics
+from app.utils.config import Settings
+
+
+class InstrumentedQueuePool(QueuePool):
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except TimeoutError:
+            metrics.inc("db_pool_checkout_timeouts_total")
+            raise
+        finally:
+            metrics.observe(
+                "db_pool_checkout_wait_seconds", time.perf_counter() - start
+            )
+
+
+def pool_saturation(pool: QueuePool) -> float:
+    # A negative max_overflow means no overflow limit, a pool_size of 0 no
+    # limit at all
+    capacity = pool.size() + max(pool._max_overflow, 0)
+
+    return pool.checkedout() / capacity if capacity else 0
+
+
+def register_pool_gauges(pool: QueuePool) -> None:
+    """Exports the pool of the app engine. Gauges are process-wide, so only
+    one engine registers them."""
+    metrics.gauge("db_pool_size", pool.size)
+    metrics.gauge("db_pool_checked_out", pool.checkedout)
+    metrics.gauge("db_pool_overflow", lambda: max(pool.overflow(), 0))
+    metrics.gauge("db_pool_saturation", lambda: pool_saturation(pool))
+
+
+def create_db_engine(settings: Settings) -> Engine:
+    engine = create_engine(
+        str(settings.SQLALCHEMY_DATABASE_URI),
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.POSTGRES_POOL_SIZE,
+        max_overflow=settings.POSTGRES_MAX_OVERFLOW,
+        pool_timeout=settings.POSTGRES_POOL_TIMEOUT,
+        pool_recycle=settings.POSTGRES_POOL_RECYCLE,
+        pool_pre_ping=settings.POSTGRES_POOL_PRE_PING,
+        connect_args={
+            "application_name": settings.POSTGRES_APPLICATION_NAME,
+            "options": f"-c statement_timeout={settings.POSTGRES_STATEMENT_TIMEOUT_MS}",
+        },
+    )
+
+    return engine
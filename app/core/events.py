@@ -0,0 +1,177 @@
+import asyncio
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+
+import psycopg
+from sqlalchemy import Engine
+
+from app.core.metrics import metrics
+from app.models.events import Evento, EventoFilter
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Postgres channel the audit log notifies its writes on
+CANAL = "eventos"
+
+# Marks the end of a stream: the subscriber fell behind or the app stops
+FIN = None
+
+
+def _acepta(evento_filter: EventoFilter, evento: Evento) -> bool:
+    return (
+        evento_filter.tipo_entidad is None
+        or evento.tipo_entidad == evento_filter.tipo_entidad
+    ) and (
+        evento_filter.id_entidad is None
+        or evento.id_entidad == evento_filter.id_entidad
+    )
+
+
+@dataclass(eq=False)
+class Suscripcion:
+    evento_filter: EventoFilter
+    loop: asyncio.AbstractEventLoop
+    cola: asyncio.Queue = field(repr=False)
+    cerrada: bool = False
+
+    def entregar(self, evento: Evento | None) -> None:
+        # Runs in the event loop of the subscriber
+        if self.cerrada:
+            return
+
+        if evento is FIN:
+            self.cerrada = True
+            self.cola.put_nowait(FIN)
+            return
+
+        # The last slot is kept for FIN
+        if self.cola.qsize() >= self.cola.maxsize - 1:
+            # Dropping single events would leave the client silently out of
+            # date, closing the stream makes it reconnect and replay them
+            metrics.inc("events_subscribers_overflowed_total")
+            self.cerrada = True
+            self.cola.put_nowait(FIN)
+            return
+
+        self.cola.put_nowait(evento)
+
+
+class Eventos:
+    """Fans out the writes of the audit log to the /events streams of this
+    worker. On Postgres the writes of every worker arrive through LISTEN on a
+    connection of its own, see `EventosService.notificar`."""
+
+    def __init__(self, *, queue_size: int) -> None:
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._suscripciones: set[Suscripcion] = set()
+        self._thread: threading.Thread | None = None
+        self._detener = threading.Event()
+
+        metrics.gauge("events_subscribers", lambda: self.suscriptores)
+
+    @property
+    def suscriptores(self) -> int:
+        return len(self._suscripciones)
+
+    @property
+    def escuchando(self) -> bool:
+        return self._thread is not None
+
+    def suscribir(self, evento_filter: EventoFilter) -> Suscripcion:
+        """Called from the event loop that will read the subscription."""
+        # One extra slot, so FIN always fits
+        suscripcion = Suscripcion(
+            evento_filter=evento_filter,
+            loop=asyncio.get_running_loop(),
+            cola=asyncio.Queue(maxsize=self.queue_size + 1),
+        )
+
+        with self._lock:
+            self._suscripciones.add(suscripcion)
+
+        return suscripcion
+
+    def cancelar(self, suscripcion: Suscripcion) -> None:
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+
+    def publicar(self, eventos: list[Evento]) -> None:
+        """Thread-safe, delivers `eventos` to every matching subscription."""
+        with self._lock:
+            suscripciones = list(self._suscripciones)
+
+        for suscripcion in suscripciones:
+            for evento in eventos:
+                if _acepta(suscripcion.evento_filter, evento):
+                    self._enviar(suscripcion, evento)
+
+        metrics.inc("events_published_total", len(eventos))
+
+    def _enviar(self, suscripcion: Suscripcion, evento: Evento | None) -> None:
+        try:
+            suscripcion.loop.call_soon_threadsafe(suscripcion.entregar, evento)
+        except RuntimeError:
+            # Its loop is already closed
+            self.cancelar(suscripcion)
+
+    def start(self, engine: Engine) -> None:
+        if self.escuchando:
+            return
+
+        # A connection outside the pool: LISTEN keeps it busy forever
+        conninfo = engine.url.set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+
+        self._detener.clear()
+        self._thread = threading.Thread(
+            target=self._escuchar, args=(conninfo,), name="events", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stops listening and ends every open stream."""
+        with self._lock:
+            suscripciones = list(self._suscripciones)
+
+        for suscripcion in suscripciones:
+            self._enviar(suscripcion, FIN)
+
+        if not self.escuchando:
+            return
+
+        self._detener.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _escuchar(self, conninfo: str) -> None:
+        intento = 0
+
+        while not self._detener.is_set():
+            try:
+                with psycopg.connect(conninfo, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {CANAL}")
+                    intento = 0
+
+                    while not self._detener.is_set():
+                        for notificacion in conn.notifies(timeout=1.0):
+                            self.publicar(
+                                [
+                                    Evento.model_validate(evento)
+                                    for evento in json.loads(notificacion.payload)
+                                ]
+                            )
+            except Exception:
+                # Writes made while reconnecting are only seen by clients
+                # that reconnect with Last-Event-ID
+                intento += 1
+                metrics.inc("events_listener_errors_total")
+                logger.exception("Listening to %s failed (attempt %d)", CANAL, intento)
+                self._detener.wait(min(2**intento * 0.1, 30))
+
+
+eventos = Eventos(queue_size=settings.EVENTS_QUEUE_SIZE)
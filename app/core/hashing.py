@@ -0,0 +1,51 @@
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from app.core.metrics import metrics
+
+T = TypeVar("T")
+
+
+class HashingSaturado(Exception):
+    """Every hashing worker is busy and the queue is full."""
+
+
+class HashingPool:
+    """Runs password hashing on its own bounded pool of threads, so a burst of
+    logins can't take every thread that serves requests. bcrypt releases the
+    GIL, so `workers` threads hash in parallel."""
+
+    def __init__(self, *, workers: int, max_pendientes: int) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hash"
+        )
+        self._lugares = threading.BoundedSemaphore(workers + max_pendientes)
+        self._lock = threading.Lock()
+        self._en_uso = 0
+
+        metrics.gauge("password_hash_in_flight", lambda: self._en_uso)
+
+    def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Runs `fn(*args)` on the pool and waits for it. Raises HashingSaturado
+        right away instead of queueing past the limit."""
+        if not self._lugares.acquire(blocking=False):
+            metrics.inc("password_hash_rejected_total")
+            raise HashingSaturado
+
+        with self._lock:
+            self._en_uso += 1
+
+        try:
+            start = time.perf_counter()
+            resultado = self._executor.submit(fn, *args).result()
+            metrics.observe("password_hash_seconds", time.perf_counter() - start)
+
+            return resultado
+        finally:
+            with self._lock:
+                self._en_uso -= 1
+
+            self._lugares.release()
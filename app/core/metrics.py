@@ -0,0 +1,44 @@
+from collections import defaultdict
+from collections.abc import Callable
+from threading import Lock
+
+
+class Metrics:
+    """In-process metrics registry. Every uvicorn worker keeps its own values,
+    so they are meant to be scraped per worker/replica."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._counters: dict[str, float] = defaultdict(float)
+        self._timings: dict[str, dict[str, float]] = {}
+        self._gauges: dict[str, Callable[[], float]] = {}
+
+    def inc(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            timing = self._timings.setdefault(
+                name, {"count": 0, "sum": 0.0, "max": 0.0}
+            )
+            timing["count"] += 1
+            timing["sum"] += seconds
+            timing["max"] = max(timing["max"], seconds)
+
+    def gauge(self, name: str, fn: Callable[[], float]) -> None:
+        self._gauges[name] = fn
+
+    def snapshot(self) -> dict[str, float | dict[str, float]]:
+        with self._lock:
+            values: dict[str, float | dict[str, float]] = dict(self._counters)
+            values.update(
+                {name: dict(timing) for name, timing in self._timings.items()}
+            )
+
+        values.update({name: fn() for name, fn in self._gauges.items()})
+
+        return values
+
+
+metrics = Metrics()
@@ -1,24 +1,96 @@
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
 import bcrypt
 import jwt
 
+from app.core.cache import TTLCache
+from app.core.hashing import HashingPool
 from app.utils.config import settings
 
 ALGORITHM = "HS256"
 
+# Decoded tokens, until they expire
+tokens_cache = TTLCache(
+    name="tokens",
+    ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    maxsize=settings.TOKEN_CACHE_MAXSIZE,
+)
 
-def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
+hashing_pool = HashingPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pendientes=settings.PASSWORD_HASH_QUEUE_SIZE,
+)
+
+
+def create_access_token(
+    subject: str | Any, expires_delta: timedelta, claims: dict[str, Any] | None = None
+) -> str:
     expire = datetime.now(timezone.utc) + expires_delta
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject), "typ": "access"}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
+def create_refresh_token(
+    subject: str | Any, expires_delta: timedelta, *, jti: uuid.UUID, fam: uuid.UUID
+) -> str:
+    expire = datetime.now(timezone.utc) + expires_delta
+    to_encode = {
+        "exp": expire,
+        "sub": str(subject),
+        "typ": "refresh",
+        "jti": str(jti),
+        "fam": str(fam),
+    }
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
+
+
+def decode_refresh_token(token: str) -> dict[str, Any]:
+    """Payload of a valid refresh token, raises `jwt.InvalidTokenError`
+    otherwise. Not memoized, each one is used once."""
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+
+    if payload.get("typ") != "refresh":
+        raise jwt.InvalidTokenError("Not a refresh token")
+
+    return payload
+
+
+def decode_access_token(token: str) -> dict[str, Any]:
+    """Payload of a valid `token`, raises `jwt.InvalidTokenError` otherwise.
+    Only valid tokens are memoized."""
+    payload = tokens_cache.get(token)
+
+    if payload is None:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+
+        # A refresh token can't be used as an access token
+        if payload.get("typ", "access") != "access":
+            raise jwt.InvalidTokenError("Not an access token")
+
+        restante = None
+        if "exp" in payload:
+            restante = payload["exp"] - datetime.now(timezone.utc).timestamp()
+
+        tokens_cache.set(token, payload, ttl=restante)
+
+    return payload
+
+
 def get_password_hash(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
+
+    return hashing_pool.run(bcrypt.hashpw, password.encode(), salt).decode()
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+    return hashing_pool.run(
+        bcrypt.checkpw, plain_password.encode(), hashed_password.encode()
+    )
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    # "$2b$<rounds>$<salt and hash>"
+    return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
@@ -0,0 +1,207 @@
+import gzip
+import re
+from datetime import date, datetime, time, timezone
+from pathlib import Path
+
+from sqlalchemy import insert, text
+from sqlmodel import Session, select
+
+from app.crud.audits import ultimas_auditorias
+from app.crud.bulk import chunks
+from app.models.auditoria import Auditoria
+from app.models.commons import Operacion
+
+# Monthly partitions of `auditorias`, created by the 07ca75a85b92 migration
+_PARTICION = re.compile(r"^auditorias_(\d{4})_(\d{2})$")
+# Holds the audits of the months with no partition
+_DEFAULT = "auditorias_default"
+
+
+def sumar_meses(mes: date, meses: int) -> date:
+    indice = mes.year * 12 + mes.month - 1 + meses
+
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def nombre_particion(mes: date) -> str:
+    return f"auditorias_{mes:%Y_%m}"
+
+
+def meses_vencidos(particiones: list[date], *, hoy: date, retencion: int) -> list[date]:
+    """Partitions that only hold rows older than `retencion` months, oldest
+    first. The current month is never expired."""
+    limite = sumar_meses(hoy.replace(day=1), -retencion)
+
+    return sorted(mes for mes in particiones if sumar_meses(mes, 1) <= limite)
+
+
+class ParticionesAuditoriaService:
+    def get_particiones(*, session: Session) -> list[date]:
+        nombres = session.execute(
+            text(
+                """
+                SELECT c.relname
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'auditorias'::regclass
+                """
+            )
+        ).scalars()
+
+        particiones = []
+
+        for nombre in nombres:
+            match = _PARTICION.match(nombre)
+
+            if match:
+                particiones.append(date(int(match[1]), int(match[2]), 1))
+
+        return sorted(particiones)
+
+    def crear_particiones(*, session: Session, desde: date, meses: int) -> list[str]:
+        """Creates the partitions of the `meses` months after the one of `desde`
+        (included) that are missing."""
+        existentes = set(ParticionesAuditoriaService.get_particiones(session=session))
+        creadas = []
+
+        for i in range(meses + 1):
+            mes = sumar_meses(desde.replace(day=1), i)
+
+            if mes in existentes:
+                continue
+
+            creadas.append(
+                ParticionesAuditoriaService._crear_particion(session=session, mes=mes)
+            )
+
+        session.commit()
+
+        return creadas
+
+    def get_meses_default(*, session: Session) -> list[date]:
+        """Months with audits in the default partition, which should be empty."""
+        return list(
+            session.execute(
+                text(
+                    f"SELECT DISTINCT date_trunc('month', fecha_actualizacion)::date "
+                    f"FROM {_DEFAULT} ORDER BY 1"
+                )
+            ).scalars()
+        )
+
+    def separar_default(*, session: Session) -> list[str]:
+        """Moves the audits in the default partition to partitions of their
+        months, created for them."""
+        creadas = [
+            ParticionesAuditoriaService._crear_particion(session=session, mes=mes)
+            for mes in ParticionesAuditoriaService.get_meses_default(session=session)
+        ]
+        session.commit()
+
+        return creadas
+
+    def _crear_particion(*, session: Session, mes: date) -> str:
+        nombre = nombre_particion(mes)
+        desde, hasta = mes, sumar_meses(mes, 1)
+        rango = f"fecha_actualizacion >= '{desde}' AND fecha_actualizacion < '{hasta}'"
+        crear = text(
+            f"CREATE TABLE {nombre} PARTITION OF auditorias "
+            f"FOR VALUES FROM ('{desde}') TO ('{hasta}')"
+        )
+
+        en_default = session.execute(
+            text(f"SELECT EXISTS (SELECT 1 FROM {_DEFAULT} WHERE {rango})")
+        ).scalar_one()
+
+        if not en_default:
+            session.execute(crear)
+            return nombre
+
+        # Postgres refuses to create a partition for rows the default one holds,
+        # so they are moved out of it while it is detached
+        session.execute(text(f"ALTER TABLE auditorias DETACH PARTITION {_DEFAULT}"))
+        session.execute(crear)
+        session.execute(
+            text(f"INSERT INTO {nombre} SELECT * FROM {_DEFAULT} WHERE {rango}")
+        )
+        session.execute(text(f"DELETE FROM {_DEFAULT} WHERE {rango}"))
+        session.execute(
+            text(f"ALTER TABLE auditorias ATTACH PARTITION {_DEFAULT} DEFAULT")
+        )
+
+        return nombre
+
+    def archivar_particion(*, session: Session, mes: date, directorio: Path) -> Path:
+        """Exports the partition of `mes` to `<directorio>/<partition>.csv.gz`,
+        then detaches and drops it."""
+        nombre = nombre_particion(mes)
+        archivo = directorio / f"{nombre}.csv.gz"
+
+        # A month archived again, after late audits were moved out of the
+        # default partition, must not overwrite the first archive
+        copia = 1
+        while archivo.exists():
+            archivo = directorio / f"{nombre}.{copia}.csv.gz"
+            copia += 1
+
+        temporal = archivo.with_suffix(".tmp")
+
+        directorio.mkdir(parents=True, exist_ok=True)
+
+        cursor = session.connection().connection.cursor()
+        with (
+            gzip.open(temporal, "wb") as salida,
+            cursor.copy(f"COPY {nombre} TO STDOUT (FORMAT csv, HEADER)") as copy,
+        ):
+            for datos in copy:
+                salida.write(datos)
+
+        # Only drop the partition once the archive is complete
+        temporal.rename(archivo)
+
+        ParticionesAuditoriaService._conservar_estados(session=session, mes=mes)
+
+        session.execute(text(f"ALTER TABLE auditorias DETACH PARTITION {nombre}"))
+        session.execute(text(f"DROP TABLE {nombre}"))
+        session.commit()
+
+        return archivo
+
+    def _conservar_estados(*, session: Session, mes: date) -> None:
+        """Copies the state every entity of the month of `mes` had at its end to
+        a snapshot on the first instant of the next month, so the history, the
+        versions and the rollups go on from it once the month is dropped.
+
+        The snapshot keeps the id and version of the last row archived, so
+        rollbacks to it keep working."""
+        inicio = datetime.combine(mes, time(), tzinfo=timezone.utc)
+        fin = datetime.combine(sumar_meses(mes, 1), time(), tzinfo=timezone.utc)
+        ids_entidad = session.exec(
+            select(Auditoria.id_entidad)
+            .where(
+                Auditoria.fecha_actualizacion >= inicio,
+                Auditoria.fecha_actualizacion < fin,
+            )
+            .distinct()
+        ).all()
+
+        for chunk in chunks(ids_entidad):
+            filas = [
+                {
+                    **auditoria.model_dump(),
+                    # Replayed as the state the entity already had, not as its
+                    # creation
+                    "operacion": Operacion.ACTUALIZAR,
+                    "estado_nuevo": estado,
+                    "es_snapshot": True,
+                    "es_arrastre": True,
+                    "fecha_actualizacion": fin,
+                }
+                for auditoria, estado in ultimas_auditorias(
+                    session, chunk, hasta=fin
+                ).values()
+                if auditoria.operacion != Operacion.ELIMINAR
+            ]
+
+            if filas:
+                session.execute(insert(Auditoria), filas)
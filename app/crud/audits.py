@@ -1,33 +1,297 @@
 import uuid
 from http.client import HTTPException
 
+from collections.abc import Iterable
+from datetime import datetime
+
+from sqlalchemy import Select, and_, func, insert
 from sqlmodel import Session, select
 
+from app.crud.bulk import chunks
+from app.crud.events import EventosService
+from app.crud.kpis import KpisService
+from app.crud.pagination import paginar
 from app.models.auditoria import AuditoriaCrear, Auditoria, AuditoriaFilter
+from app.models.commons import Operacion
+from app.models.pagination import Paginacion
+from app.utils.config import settings
+
+
+def _aplicar(auditorias: Iterable[Auditoria]) -> dict:
+  # `auditorias` starts at a snapshot and is sorted by version
+  estado: dict = {}
+
+  for auditoria in auditorias:
+    if auditoria.es_snapshot:
+      estado = dict(auditoria.estado_nuevo)
+    else:
+      estado.update(auditoria.estado_nuevo)
+
+  return estado
+
+
+def ultimas_auditorias(
+  session: Session,
+  ids_entidad: Iterable[uuid.UUID],
+  *,
+  hasta: datetime | None = None,
+) -> dict[uuid.UUID, tuple[Auditoria, dict]]:
+  """Latest audit row and state of every entity, read from its last snapshot
+  onwards. Only rows before `hasta` when given."""
+  ultimas: dict[uuid.UUID, tuple[Auditoria, dict]] = {}
+  filtros = [] if hasta is None else [Auditoria.fecha_actualizacion < hasta]
+
+  for chunk in chunks(ids_entidad):
+    snapshots = (
+      select(Auditoria.id_entidad, func.max(Auditoria.version).label("version"))
+      .where(Auditoria.id_entidad.in_(chunk), Auditoria.es_snapshot, *filtros)
+      .group_by(Auditoria.id_entidad)
+      .subquery()
+    )
+    query = (
+      select(Auditoria)
+      .join(
+        snapshots,
+        and_(
+          Auditoria.id_entidad == snapshots.c.id_entidad,
+          Auditoria.version >= snapshots.c.version,
+        ),
+      )
+      .where(*filtros)
+      .order_by(Auditoria.id_entidad, Auditoria.version, Auditoria.fecha_actualizacion)
+    )
+
+    por_entidad: dict[uuid.UUID, list[Auditoria]] = {}
+    for auditoria in session.exec(query).all():
+      por_entidad.setdefault(auditoria.id_entidad, []).append(auditoria)
+
+    for id_entidad, auditorias in por_entidad.items():
+      ultimas[id_entidad] = (auditorias[-1], _aplicar(auditorias))
+
+  return ultimas
+
+
+def _ultimos_estados(
+  session: Session, ids_entidad: Iterable[uuid.UUID]
+) -> dict[uuid.UUID, tuple[int, dict]]:
+  """Latest version and state of every entity."""
+  return {
+    id_entidad: (auditoria.version, estado)
+    for id_entidad, (auditoria, estado) in ultimas_auditorias(
+      session, ids_entidad
+    ).items()
+  }
+
+
+def filtrar_auditorias(query: Select, auditoria_filter: AuditoriaFilter) -> Select:
+  # The states carried over by the archival are not writes
+  query = query.where(Auditoria.es_arrastre.is_(False))
+
+  if auditoria_filter.tipo_entidad is not None:
+    query = query.where(Auditoria.tipo_entidad == auditoria_filter.tipo_entidad)
+
+  if auditoria_filter.id_entidad is not None:
+    query = query.where(Auditoria.id_entidad == auditoria_filter.id_entidad)
+
+  if auditoria_filter.operacion is not None:
+    query = query.where(Auditoria.operacion == auditoria_filter.operacion)
+
+  if auditoria_filter.desde is not None:
+    query = query.where(Auditoria.fecha_actualizacion >= auditoria_filter.desde)
+
+  if auditoria_filter.hasta is not None:
+    query = query.where(Auditoria.fecha_actualizacion < auditoria_filter.hasta)
+
+  return query
+
+
+def fila_auditoria(auditoria_crear: AuditoriaCrear) -> dict:
+  """Row `AuditoriaService.registrar_filas` takes, with the state the update
+  started from."""
+  return {
+    **Auditoria.model_validate(auditoria_crear).model_dump(),
+    "estado_anterior": auditoria_crear.estado_anterior,
+  }
+
+
+def _version(fila: dict) -> int | None:
+  # The revision of the entity once written, a delete doesn't bump it
+  revision = fila["estado_nuevo"].get("revision")
+
+  if revision is None or fila["operacion"] != Operacion.ELIMINAR:
+    return revision
+
+  return revision + 1
+
+
+def _estado_anterior(
+  session: Session, id_entidad: uuid.UUID, version: int
+) -> tuple[int, dict]:
+  """Latest stored version of the entity below `version`, and its state."""
+  anterior = (
+    select(func.max(Auditoria.version))
+    .where(Auditoria.id_entidad == id_entidad, Auditoria.version < version)
+    .scalar_subquery()
+  )
+  snapshot = (
+    select(func.max(Auditoria.version))
+    .where(
+      Auditoria.id_entidad == id_entidad,
+      Auditoria.es_snapshot,
+      Auditoria.version <= anterior,
+    )
+    .scalar_subquery()
+  )
+  auditorias = session.exec(
+    select(Auditoria)
+    .where(
+      Auditoria.id_entidad == id_entidad,
+      Auditoria.version >= snapshot,
+      Auditoria.version <= anterior,
+    )
+    .order_by(Auditoria.version, Auditoria.fecha_actualizacion)
+  ).all()
+
+  if not auditorias:
+    return 0, {}
+
+  return auditorias[-1].version, _aplicar(auditorias)
+
 
 class AuditoriaService:
-  def registrar_operacion(*, session: Session, auditoria_crear: AuditoriaCrear) -> Auditoria:
-    auditoria_obj = Auditoria.model_validate(auditoria_crear)
-    
-    session.add(auditoria_obj)
-    session.commit()
-    session.refresh(auditoria_obj)
-    
-    return auditoria_obj
-  
-  def get_audits(*, session: Session, auditoria_filter: AuditoriaFilter) -> list[Auditoria]:
-    query = select(Auditoria)
+  def registrar_operaciones(*, session: Session, auditorias_crear: list[AuditoriaCrear]) -> None:
+    # Committed by the caller, in the same transaction as the audited write
+    AuditoriaService.registrar_filas(
+      session=session, filas=[fila_auditoria(a) for a in auditorias_crear]
+    )
+
+  def registrar_filas(*, session: Session, filas: list[dict]) -> None:
+    """Stores a full snapshot every AUDIT_SNAPSHOT_INTERVAL versions, on
+    creation and deletion, and when the previous version is not stored yet,
+    and only the changed fields otherwise.
+
+    The version of a write is the revision it gave the entity, so the
+    history keeps the order the writes committed in even when the async
+    writers store them in another one."""
+    if not filas:
+      return
+
+    ultimos = _ultimos_estados(session, (fila["id_entidad"] for fila in filas))
+    # Rows of this batch already processed, the latest of each entity
+    del_lote: dict[uuid.UUID, tuple[int, dict]] = {}
+    filas_db = []
+    transiciones = []
 
-    if auditoria_filter.tipo_entidad is not None:
-        query = query.where(Auditoria.tipo_entidad == auditoria_filter.tipo_entidad)
+    for fila in sorted(filas, key=lambda fila: _version(fila) or 0):
+      id_entidad = fila["id_entidad"]
+      version_ultima, estado = max(
+        ultimos.get(id_entidad, (0, {})),
+        del_lote.get(id_entidad, (0, {})),
+        key=lambda ultimo: ultimo[0],
+      )
+      version = _version(fila) or version_ultima + 1
 
-    if auditoria_filter.id_entidad is not None:
-        query = query.where(Auditoria.id_entidad == auditoria_filter.id_entidad)
+      if version <= version_ultima:
+        # Arrived after a later write of the entity, so it diffs against the
+        # write before it instead
+        version_ultima, estado = _estado_anterior(session, id_entidad, version)
+        lote = del_lote.get(id_entidad)
 
-    if auditoria_filter.operacion is not None:
-        query = query.where(Auditoria.operacion == auditoria_filter.operacion)
-        
-    query = query.order_by(Auditoria.fecha_actualizacion.desc())
+        if lote is not None and version_ultima < lote[0] < version:
+          version_ultima, estado = lote
+
+      estado_nuevo = fila["estado_nuevo"]
+      es_snapshot = (
+        fila["operacion"] != Operacion.ACTUALIZAR
+        or (version - 1) % settings.AUDIT_SNAPSHOT_INTERVAL == 0
+        # A delta on top of anything but the previous version can't be
+        # rebuilt once the missing one is stored
+        or version_ultima != version - 1
+      )
+
+      if not es_snapshot:
+        estado_nuevo = {
+          campo: valor
+          for campo, valor in estado_nuevo.items()
+          if campo not in estado or estado[campo] != valor
+        }
+
+      fila_db = {
+        **fila,
+        "estado_nuevo": estado_nuevo,
+        "version": version,
+        "es_snapshot": es_snapshot,
+      }
+      fila_db.pop("estado_anterior", None)
+      filas_db.append(fila_db)
+
+      if fila["operacion"] == Operacion.CREAR:
+        anterior = None
+      elif fila["operacion"] == Operacion.ELIMINAR:
+        anterior = fila["estado_nuevo"]
+      else:
+        anterior = fila.get("estado_anterior") or estado or None
+
+      transiciones.append(
+        (
+          fila["tipo_entidad"],
+          anterior,
+          None if fila["operacion"] == Operacion.ELIMINAR else fila["estado_nuevo"],
+          fila["fecha_actualizacion"],
+        )
+      )
+
+      del_lote[id_entidad] = (version, fila["estado_nuevo"])
+
+    # One multi-row INSERT instead of an ORM object per audit
+    session.execute(insert(Auditoria), filas_db)
+    EventosService.notificar(session=session, filas=filas_db)
+    # In the same transaction, so the rollups never count an unaudited write
+    KpisService.registrar_transiciones(session=session, transiciones=transiciones)
+
+  def reconstruir_estado(*, session: Session, auditoria: Auditoria) -> dict:
+    """Full state of the entity right after `auditoria`."""
+    if auditoria.es_snapshot:
+      return auditoria.estado_nuevo
+
+    snapshot = (
+      select(func.max(Auditoria.version))
+      .where(
+        Auditoria.id_entidad == auditoria.id_entidad,
+        Auditoria.es_snapshot,
+        Auditoria.version < auditoria.version,
+      )
+      .scalar_subquery()
+    )
+    auditorias = session.exec(
+      select(Auditoria)
+      .where(
+        Auditoria.id_entidad == auditoria.id_entidad,
+        Auditoria.version >= snapshot,
+        Auditoria.version <= auditoria.version,
+      )
+      .order_by(Auditoria.version, Auditoria.fecha_actualizacion)
+    ).all()
+
+    # Concurrent writes may share a version, ignore the ones that came after
+    ids = [a.id for a in auditorias]
+
+    return _aplicar(auditorias[: ids.index(auditoria.id) + 1])
+  
+  def get_audits(
+    *,
+    session: Session,
+    auditoria_filter: AuditoriaFilter,
+    paginacion: Paginacion = Paginacion(),
+  ) -> list[Auditoria]:
+    query = filtrar_auditorias(select(Auditoria), auditoria_filter)
+    query = paginar(
+        query,
+        paginacion=paginacion,
+        columna_fecha=Auditoria.fecha_actualizacion,
+        columna_id=Auditoria.id,
+        descendente=True,
+    )
 
     auditorias = session.exec(query).all()
 
@@ -0,0 +1,62 @@
+import uuid
+from collections.abc import Iterable, Iterator
+from typing import Any, TypeVar
+
+from sqlmodel import Session, select
+
+T = TypeVar("T")
+
+# Keeps every IN query well below the bind parameter limit of the driver
+LIMITE_IN = 10_000
+
+
+def chunks(ids: Iterable[uuid.UUID]) -> Iterator[list[uuid.UUID]]:
+    unicos = list(set(ids))
+
+    for inicio in range(0, len(unicos), LIMITE_IN):
+        yield unicos[inicio : inicio + LIMITE_IN]
+
+
+def resolver(
+    session: Session, modelo: type[T], ids: Iterable[uuid.UUID], *options: Any
+) -> dict[uuid.UUID, T]:
+    """Loads every `modelo` in `ids` with one IN query (per chunk)."""
+    encontrados: dict[uuid.UUID, T] = {}
+
+    for chunk in chunks(ids):
+        query = select(modelo).where(modelo.id.in_(chunk)).options(*options)
+        encontrados.update({obj.id: obj for obj in session.exec(query).all()})
+
+    return encontrados
+
+
+def ids_existentes(
+    session: Session, modelo: type[Any], ids: Iterable[uuid.UUID]
+) -> set[uuid.UUID]:
+    existentes: set[uuid.UUID] = set()
+
+    for chunk in chunks(ids):
+        existentes.update(
+            session.exec(select(modelo.id).where(modelo.id.in_(chunk))).all()
+        )
+
+    return existentes
+
+
+def seleccionar(objetos: dict[uuid.UUID, T], ids: Iterable[uuid.UUID]) -> list[T]:
+    # Same semantics as `IN`: duplicates and unknown ids are dropped
+    return [objetos[id] for id in dict.fromkeys(ids) if id in objetos]
+
+
+def faltantes(
+    nombre: str, ids: Iterable[uuid.UUID] | None, existentes: Iterable[uuid.UUID]
+) -> str | None:
+    if ids is None:
+        return None
+
+    sin_resolver = [str(id) for id in dict.fromkeys(ids) if id not in existentes]
+
+    if not sin_resolver:
+        return None
+
+    return f"No existen {nombre}: {', '.join(sin_resolver)}"
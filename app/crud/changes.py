@@ -2,24 +2,105 @@ import uuid
 from datetime import datetime, timezone
 
 from fastapi import HTTPException
-from sqlmodel import Session, select
+from sqlalchemy import Select, insert
+from sqlmodel import Session, SQLModel, select
 
 from app.crud.audits import AuditoriaService
+from app.crud.bulk import faltantes, ids_existentes, resolver, seleccionar
+from app.crud.loaders import eager_load
+from app.crud.pagination import paginar
+from app.crud.unit_of_work import (
+    UnitOfWork,
+    comprobar_revision,
+    revision_desactualizada,
+)
 from app.models.auditoria import AuditoriaCrear
+from app.models.bulk import ResultadoLote
 from app.models.changes import (
     Cambio,
     CambioActualizar,
+    CambioActualizarLote,
     CambioCrear,
     CambioFilter,
     CambioPublicoConRelaciones,
     EstadoCambio,
 )
-from app.models.commons import Operacion, TipoEntidad
+from app.models.changes_incidents_link import CambioIncidenteLink
+from app.models.changes_items_link import CambioItemLink
+from app.models.changes_problems_link import CambioProblemaLink
+from app.models.commons import Operacion, Prioridad, TipoEntidad, nueva_revision
 from app.models.config_items import ItemConfiguracion
 from app.models.incidents import Incidente
+from app.models.pagination import Paginacion
 from app.models.problems import Problema
 
 
+def _estado_cambio(cambio: Cambio) -> dict:
+    estado = cambio.model_dump(mode="json")
+    estado["id_config_items"] = [str(item.id) for item in cambio.config_items]
+    estado["id_incidentes"] = [str(incidente.id) for incidente in cambio.incidentes]
+    estado["id_problemas"] = [str(problema.id) for problema in cambio.problemas]
+
+    return estado
+
+
+def _actualizar_cambio(
+    cambio: Cambio,
+    cambio_actualizar: CambioActualizar,
+    config_items: dict[uuid.UUID, ItemConfiguracion],
+    incidentes: dict[uuid.UUID, Incidente],
+    problemas: dict[uuid.UUID, Problema],
+) -> None:
+    if cambio_actualizar.titulo is not None:
+        cambio.titulo = cambio_actualizar.titulo
+
+    if cambio_actualizar.descripcion is not None:
+        cambio.descripcion = cambio_actualizar.descripcion
+
+    if cambio_actualizar.prioridad is not None:
+        cambio.prioridad = cambio_actualizar.prioridad
+
+    if cambio_actualizar.estado is not None:
+        cambio.estado = cambio_actualizar.estado
+        if cambio_actualizar.estado == EstadoCambio.CERRADO.value:
+            cambio.fecha_cierre = datetime.now(timezone.utc)
+
+    if cambio_actualizar.impacto is not None:
+        cambio.impacto = cambio_actualizar.impacto
+
+    if cambio_actualizar.id_config_items is not None:
+        cambio.config_items = seleccionar(
+            config_items, cambio_actualizar.id_config_items
+        )
+
+    if cambio_actualizar.id_incidentes is not None:
+        cambio.incidentes = seleccionar(incidentes, cambio_actualizar.id_incidentes)
+
+    if cambio_actualizar.id_problemas is not None:
+        cambio.problemas = seleccionar(problemas, cambio_actualizar.id_problemas)
+
+    if cambio_actualizar.responsable_id is not None:
+        cambio.responsable_id = cambio_actualizar.responsable_id
+
+    nueva_revision(cambio)
+
+
+def filtrar_cambios(query: Select, cambio_filter: CambioFilter) -> Select:
+    if cambio_filter.titulo is not None:
+        query = query.where(Cambio.titulo.ilike(f"%{cambio_filter.titulo}%"))
+
+    if cambio_filter.descripcion is not None:
+        query = query.where(Cambio.descripcion.ilike(f"%{cambio_filter.descripcion}%"))
+
+    if cambio_filter.prioridad is not None:
+        query = query.where(Cambio.prioridad == cambio_filter.prioridad)
+
+    if cambio_filter.estado is not None:
+        query = query.where(Cambio.estado == cambio_filter.estado)
+
+    return query
+
+
 class CambiosService:
     def create_cambio(
         *, session: Session, cambio_crear: CambioCrear, current_user_id: uuid
@@ -42,60 +123,143 @@ class CambiosService:
         db_obj.incidentes = incidentes
         db_obj.problemas = problemas
 
-        session.add(db_obj)
-        session.commit()
-        session.refresh(db_obj)
+        with UnitOfWork(session) as uow:
+            session.add(db_obj)
 
-        estado_nuevo = db_obj.model_dump(mode="json")
-        estado_nuevo["id_config_items"] = [str(item.id) for item in db_obj.config_items]
-        estado_nuevo["id_incidentes"] = [
-            str(incidente.id) for incidente in db_obj.incidentes
-        ]
-        estado_nuevo["id_problemas"] = [
-            str(problema.id) for problema in db_obj.problemas
-        ]
-        estado_nuevo["responsable_id"] = None
+            uow.auditar(
+                tipo_entidad=TipoEntidad.CAMBIO,
+                id_entidad=db_obj.id,
+                operacion=Operacion.CREAR,
+                estado_nuevo=_estado_cambio(db_obj),
+                actualizado_por=current_user_id,
+            )
+
+        return db_obj
 
-        auditoria_crear = AuditoriaCrear(
-            tipo_entidad=TipoEntidad.CAMBIO,
-            id_entidad=db_obj.id,
-            operacion=Operacion.CREAR,
-            estado_nuevo=estado_nuevo,
-            actualizado_por=current_user_id,
+    def create_cambios(
+        *,
+        session: Session,
+        cambios_crear: list[CambioCrear],
+        current_user_id: uuid.UUID,
+    ) -> list[ResultadoLote]:
+        id_config_items = ids_existentes(
+            session,
+            ItemConfiguracion,
+            (id for cambio in cambios_crear for id in cambio.id_config_items),
         )
-        AuditoriaService.registrar_operacion(
-            session=session, auditoria_crear=auditoria_crear
+        id_incidentes = ids_existentes(
+            session,
+            Incidente,
+            (id for cambio in cambios_crear for id in cambio.id_incidentes),
+        )
+        id_problemas = ids_existentes(
+            session,
+            Problema,
+            (id for cambio in cambios_crear for id in cambio.id_problemas),
         )
 
-        return db_obj
+        resultados = []
+        filas = []
+        links_items = []
+        links_incidentes = []
+        links_problemas = []
+        auditorias = []
+
+        for indice, cambio_crear in enumerate(cambios_crear):
+            error = (
+                faltantes(
+                    "items de configuración",
+                    cambio_crear.id_config_items,
+                    id_config_items,
+                )
+                or faltantes("incidentes", cambio_crear.id_incidentes, id_incidentes)
+                or faltantes("problemas", cambio_crear.id_problemas, id_problemas)
+            )
 
-    def get_changes(
-        *, session: Session, cambio_filter: CambioFilter
-    ) -> list[CambioPublicoConRelaciones]:
-        query = select(Cambio)
+            if error is not None:
+                resultados.append(ResultadoLote(indice=indice, error=error))
+                continue
+
+            cambio = Cambio.model_validate(cambio_crear)
+            config_items = list(dict.fromkeys(cambio_crear.id_config_items))
+            incidentes = list(dict.fromkeys(cambio_crear.id_incidentes))
+            problemas = list(dict.fromkeys(cambio_crear.id_problemas))
 
-        if cambio_filter.titulo is not None:
-            query = query.where(Cambio.titulo.ilike(f"%{cambio_filter.titulo}%"))
+            filas.append(cambio.model_dump())
+            links_items.extend(
+                {"id_cambio": cambio.id, "id_config_item": id_config_item}
+                for id_config_item in config_items
+            )
+            links_incidentes.extend(
+                {"id_cambio": cambio.id, "id_incidente": id_incidente}
+                for id_incidente in incidentes
+            )
+            links_problemas.extend(
+                {"id_cambio": cambio.id, "id_problema": id_problema}
+                for id_problema in problemas
+            )
 
-        if cambio_filter.descripcion is not None:
-            query = query.where(
-                Cambio.descripcion.ilike(f"%{cambio_filter.descripcion}%")
+            estado = cambio.model_dump(mode="json")
+            estado["id_config_items"] = [str(id) for id in config_items]
+            estado["id_incidentes"] = [str(id) for id in incidentes]
+            estado["id_problemas"] = [str(id) for id in problemas]
+
+            auditorias.append(
+                AuditoriaCrear(
+                    tipo_entidad=TipoEntidad.CAMBIO,
+                    id_entidad=cambio.id,
+                    operacion=Operacion.CREAR,
+                    estado_nuevo=estado,
+                    actualizado_por=current_user_id,
+                )
             )
+            resultados.append(ResultadoLote(indice=indice, id=cambio.id))
+
+        with UnitOfWork(session) as uow:
+            if filas:
+                session.execute(insert(Cambio), filas)
+            if links_items:
+                session.execute(insert(CambioItemLink), links_items)
+            if links_incidentes:
+                session.execute(insert(CambioIncidenteLink), links_incidentes)
+            if links_problemas:
+                session.execute(insert(CambioProblemaLink), links_problemas)
 
-        if cambio_filter.prioridad is not None:
-            query = query.where(Cambio.prioridad == cambio_filter.prioridad)
+            uow.auditar_lote(auditorias)
 
-        if cambio_filter.estado is not None:
-            query = query.where(Cambio.estado == cambio_filter.estado)
+        return resultados
+
+    def get_changes(
+        *,
+        session: Session,
+        cambio_filter: CambioFilter,
+        paginacion: Paginacion = Paginacion(),
+        respuesta: type[SQLModel] = CambioPublicoConRelaciones,
+    ) -> list[CambioPublicoConRelaciones]:
+        query = select(Cambio).options(*eager_load(Cambio, respuesta))
+        query = filtrar_cambios(query, cambio_filter)
+        query = paginar(
+            query,
+            paginacion=paginacion,
+            columna_fecha=Cambio.fecha_creacion,
+            columna_id=Cambio.id,
+        )
 
         cambios = session.exec(query).all()
 
         return cambios
 
     def get_change_by_id(
-        *, session: Session, id_change: uuid.UUID
+        *,
+        session: Session,
+        id_change: uuid.UUID,
+        respuesta: type[SQLModel] = CambioPublicoConRelaciones,
     ) -> CambioPublicoConRelaciones:
-        cambio = session.exec(select(Cambio).where(Cambio.id == id_change)).first()
+        cambio = session.exec(
+            select(Cambio)
+            .where(Cambio.id == id_change)
+            .options(*eager_load(Cambio, respuesta))
+        ).first()
 
         if not cambio:
             raise HTTPException(status_code=404, detail="No existe cambio")
@@ -103,68 +267,133 @@ class CambiosService:
         return cambio
 
     def update_change(
-        *, session: Session, id_change: uuid.UUID, cambio_actualizar: CambioActualizar
+        *,
+        session: Session,
+        id_change: uuid.UUID,
+        cambio_actualizar: CambioActualizar,
+        current_user_id: uuid.UUID,
     ) -> CambioPublicoConRelaciones:
         cambio = CambiosService.get_change_by_id(session=session, id_change=id_change)
+        comprobar_revision(cambio, cambio_actualizar.revision)
 
-        if cambio_actualizar.titulo is not None:
-            cambio.titulo = cambio_actualizar.titulo
-
-        if cambio_actualizar.descripcion is not None:
-            cambio.descripcion = cambio_actualizar.descripcion
+        config_items = resolver(
+            session, ItemConfiguracion, cambio_actualizar.id_config_items or []
+        )
+        incidentes = resolver(session, Incidente, cambio_actualizar.id_incidentes or [])
+        problemas = resolver(session, Problema, cambio_actualizar.id_problemas or [])
 
-        if cambio_actualizar.prioridad is not None:
-            cambio.prioridad = cambio_actualizar.prioridad
+        estado_anterior = _estado_cambio(cambio)
+        _actualizar_cambio(
+            cambio, cambio_actualizar, config_items, incidentes, problemas
+        )
 
-        if cambio_actualizar.estado is not None:
-            cambio.estado = cambio_actualizar.estado
-            if cambio_actualizar.estado == EstadoCambio.CERRADO.value:
-                cambio.fecha_cierre = datetime.now(timezone.utc)
+        with UnitOfWork(session) as uow:
+            session.add(cambio)
 
-        if cambio_actualizar.impacto is not None:
-            cambio.impacto = cambio_actualizar.impacto
+            uow.auditar(
+                tipo_entidad=TipoEntidad.CAMBIO,
+                id_entidad=cambio.id,
+                operacion=Operacion.ACTUALIZAR,
+                estado_nuevo=_estado_cambio(cambio),
+                actualizado_por=current_user_id,
+                estado_anterior=estado_anterior,
+            )
 
-        if cambio_actualizar.id_config_items is not None:
-            config_items = session.exec(
-                select(ItemConfiguracion).where(
-                    ItemConfiguracion.id.in_(cambio_actualizar.id_config_items)
-                )
-            ).all()
+        return cambio
 
-            cambio.config_items = config_items
+    def update_changes(
+        *,
+        session: Session,
+        cambios_actualizar: list[CambioActualizarLote],
+        current_user_id: uuid.UUID,
+    ) -> list[ResultadoLote]:
+        cambios = resolver(
+            session,
+            Cambio,
+            (cambio.id for cambio in cambios_actualizar),
+            *eager_load(Cambio, CambioPublicoConRelaciones),
+        )
+        config_items = resolver(
+            session,
+            ItemConfiguracion,
+            (
+                id
+                for cambio in cambios_actualizar
+                for id in cambio.id_config_items or []
+            ),
+        )
+        incidentes = resolver(
+            session,
+            Incidente,
+            (id for cambio in cambios_actualizar for id in cambio.id_incidentes or []),
+        )
+        problemas = resolver(
+            session,
+            Problema,
+            (id for cambio in cambios_actualizar for id in cambio.id_problemas or []),
+        )
 
-        if cambio_actualizar.id_incidentes is not None:
-            incidentes = session.exec(
-                select(Incidente).where(
-                    Incidente.id.in_(cambio_actualizar.id_incidentes)
+        resultados = []
+        auditorias = []
+
+        for indice, cambio_actualizar in enumerate(cambios_actualizar):
+            cambio = cambios.get(cambio_actualizar.id)
+            error = (
+                "No existe cambio"
+                if cambio is None
+                else revision_desactualizada(cambio, cambio_actualizar.revision)
+                or faltantes(
+                    "items de configuración",
+                    cambio_actualizar.id_config_items,
+                    config_items,
                 )
-            ).all()
-
-            cambio.incidentes = incidentes
+                or faltantes("incidentes", cambio_actualizar.id_incidentes, incidentes)
+                or faltantes("problemas", cambio_actualizar.id_problemas, problemas)
+            )
 
-        if cambio_actualizar.id_problemas is not None:
-            problemas = session.exec(
-                select(Problema).where(Problema.id.in_(cambio_actualizar.id_problemas))
-            ).all()
+            if error is not None:
+                resultados.append(
+                    ResultadoLote(indice=indice, id=cambio_actualizar.id, error=error)
+                )
+                continue
 
-            cambio.problemas = problemas
+            estado_anterior = _estado_cambio(cambio)
+            _actualizar_cambio(
+                cambio, cambio_actualizar, config_items, incidentes, problemas
+            )
 
-        if cambio_actualizar.responsable_id is not None:
-            cambio.responsable_id = cambio_actualizar.responsable_id
+            auditorias.append(
+                AuditoriaCrear(
+                    tipo_entidad=TipoEntidad.CAMBIO,
+                    id_entidad=cambio.id,
+                    operacion=Operacion.ACTUALIZAR,
+                    estado_nuevo=_estado_cambio(cambio),
+                    actualizado_por=current_user_id,
+                    estado_anterior=estado_anterior,
+                )
+            )
+            resultados.append(ResultadoLote(indice=indice, id=cambio.id))
 
-        session.add(cambio)
-        session.commit()
-        session.refresh(cambio)
+        with UnitOfWork(session) as uow:
+            uow.auditar_lote(auditorias)
 
-        return cambio
+        return resultados
 
     def delete_change(
-        *, session: Session, id_change: uuid.UUID
+        *, session: Session, id_change: uuid.UUID, current_user_id: uuid.UUID
     ) -> CambioPublicoConRelaciones:
         cambio = CambiosService.get_change_by_id(session=session, id_change=id_change)
 
-        session.delete(cambio)
-        session.commit()
+        with UnitOfWork(session) as uow:
+            uow.auditar(
+                tipo_entidad=TipoEntidad.CAMBIO,
+                id_entidad=cambio.id,
+                operacion=Operacion.ELIMINAR,
+                estado_nuevo=_estado_cambio(cambio),
+                actualizado_por=current_user_id,
+            )
+
+            session.delete(cambio)
 
         return cambio
 
@@ -191,14 +420,25 @@ class CambiosService:
                 status_code=400, detail="Auditoría no corresponde al cambio"
             )
 
-        estado_anterior = auditoria.estado_nuevo
+        estado_actual = _estado_cambio(cambio_actual)
+        estado_anterior = AuditoriaService.reconstruir_estado(
+            session=session, auditoria=auditoria
+        )
+
+        # The audit holds JSON values, the entity is returned without a reload
+        fecha_cierre = estado_anterior["fecha_cierre"]
+        responsable_id = estado_anterior["responsable_id"]
 
         cambio_actual.titulo = estado_anterior["titulo"]
         cambio_actual.descripcion = estado_anterior["descripcion"]
-        cambio_actual.prioridad = estado_anterior["prioridad"]
-        cambio_actual.estado = estado_anterior["estado"]
-        cambio_actual.fecha_cierre = estado_anterior["fecha_cierre"]
-        cambio_actual.responsable_id = estado_anterior["responsable_id"]
+        cambio_actual.prioridad = Prioridad(estado_anterior["prioridad"])
+        cambio_actual.estado = EstadoCambio(estado_anterior["estado"])
+        cambio_actual.fecha_cierre = (
+            datetime.fromisoformat(fecha_cierre) if fecha_cierre else None
+        )
+        cambio_actual.responsable_id = (
+            uuid.UUID(responsable_id) if responsable_id else None
+        )
 
         id_config_items = [
             uuid.UUID(id_item) for id_item in estado_anterior["id_config_items"]
@@ -229,9 +469,18 @@ class CambiosService:
         ).all()
 
         cambio_actual.problemas = problemas
-
-        session.add(cambio_actual)
-        session.commit()
-        session.refresh(cambio_actual)
+        nueva_revision(cambio_actual)
+
+        with UnitOfWork(session) as uow:
+            session.add(cambio_actual)
+
+            uow.auditar(
+                tipo_entidad=TipoEntidad.CAMBIO,
+                id_entidad=cambio_actual.id,
+                operacion=Operacion.ACTUALIZAR,
+                estado_nuevo=_estado_cambio(cambio_actual),
+                actualizado_por=current_user_id,
+                estado_anterior=estado_actual,
+            )
 
         return cambio_actual
@@ -1,18 +1,234 @@
 import uuid
+from typing import BinaryIO
 
 from app.crud.audits import AuditoriaService
+from app.crud.bulk import ids_existentes, resolver
+from app.crud.imports import leer_filas, lotes
+from app.crud.loaders import eager_load
+from app.crud.pagination import paginar
+from app.crud.unit_of_work import (
+    UnitOfWork,
+    comprobar_revision,
+    revision_desactualizada,
+)
 from app.models.auditoria import AuditoriaCrear
-from app.models.commons import Operacion, TipoEntidad
+from app.models.bulk import ResultadoImportacion, ResultadoLote
+from app.models.commons import Operacion, TipoEntidad, nueva_revision
 from fastapi import HTTPException
-from sqlmodel import Session, select
+from sqlalchemy import Select, column, insert, table, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import Session, SQLModel, select
 
 from app.models.config_items import (
+    CategoriaItem,
+    EstadoItem,
     ItemConfiguracion,
     ItemConfiguracionActualizar,
+    ItemConfiguracionActualizarLote,
     ItemConfiguracionCrear,
     ItemConfiguracionFilter,
+    ItemConfiguracionImportar,
     ItemConfiguracionPublico,
 )
+from app.models.exports import FormatoExportacion
+from app.models.pagination import Paginacion
+from app.models.users import Usuario
+
+# Fields an import replaces, the rest keep the values of the existing item
+CAMPOS_IMPORTADOS = [
+    "nombre",
+    "descripcion",
+    "version",
+    "categoria",
+    "owner_id",
+    "estado",
+]
+
+# Rows per INSERT when there is no COPY, below the bind parameter limit
+LIMITE_FILAS = 1_000
+
+
+def _actualizar_item(
+    item_config: ItemConfiguracion, item_config_actualizar: ItemConfiguracionActualizar
+) -> None:
+    if item_config_actualizar.nombre is not None:
+        item_config.nombre = item_config_actualizar.nombre
+
+    if item_config_actualizar.descripcion is not None:
+        item_config.descripcion = item_config_actualizar.descripcion
+
+    if item_config_actualizar.categoria is not None:
+        item_config.categoria = item_config_actualizar.categoria
+
+    if item_config_actualizar.estado is not None:
+        item_config.estado = item_config_actualizar.estado
+
+    nueva_revision(item_config)
+
+
+def filtrar_items_configuracion(
+    query: Select, item_config_filter: ItemConfiguracionFilter
+) -> Select:
+    if item_config_filter.nombre is not None:
+        query = query.where(
+            ItemConfiguracion.nombre.ilike(f"%{item_config_filter.nombre}%")
+        )
+
+    if item_config_filter.version is not None:
+        query = query.where(
+            ItemConfiguracion.version.ilike(f"%{item_config_filter.version}%")
+        )
+
+    if item_config_filter.categoria is not None:
+        query = query.where(ItemConfiguracion.categoria == item_config_filter.categoria)
+
+    if item_config_filter.estado is not None:
+        query = query.where(ItemConfiguracion.estado == item_config_filter.estado)
+
+    return query
+
+
+def _copiar_a_staging(session: Session, filas: list[dict]) -> Select:
+    columnas = list(filas[0])
+    staging = table("items_configuracion_importacion", *map(column, columnas))
+
+    # Dropped with the transaction, so each batch gets an empty one
+    session.execute(
+        text(
+            f"CREATE TEMP TABLE {staging.name} ON COMMIT DROP AS "
+            f"SELECT {', '.join(columnas)} FROM items_configuracion WITH NO DATA"
+        )
+    )
+
+    cursor = session.connection().connection.cursor()
+    with cursor.copy(f"COPY {staging.name} ({', '.join(columnas)}) FROM STDIN") as copy:
+        for fila in filas:
+            copy.write_row([fila[columna] for columna in columnas])
+
+    return select(*staging.c)
+
+
+def _upsert_items(session: Session, filas: list[dict]) -> list[ItemConfiguracion]:
+    """Inserts `filas`, or replaces the `CAMPOS_IMPORTADOS` of the items whose
+    id already exists, and returns them as stored."""
+    if session.get_bind().dialect.name == "postgresql":
+        # COPY is much faster than any INSERT, and lets the upsert run as one
+        # statement whatever the size of the batch
+        staging = _copiar_a_staging(session, filas)
+        queries = [
+            postgresql.insert(ItemConfiguracion).from_select(list(filas[0]), staging)
+        ]
+    else:
+        queries = [
+            sqlite.insert(ItemConfiguracion).values(
+                filas[inicio : inicio + LIMITE_FILAS]
+            )
+            for inicio in range(0, len(filas), LIMITE_FILAS)
+        ]
+
+    guardados = []
+
+    for query in queries:
+        query = query.on_conflict_do_update(
+            index_elements=["id"],
+            set_={
+                **{campo: query.excluded[campo] for campo in CAMPOS_IMPORTADOS},
+                "revision": ItemConfiguracion.revision + 1,
+                "fecha_actualizacion": query.excluded.fecha_actualizacion,
+            },
+        ).returning(*ItemConfiguracion.__table__.c)
+
+        guardados.extend(
+            ItemConfiguracion.model_validate(dict(fila._mapping))
+            for fila in session.execute(query)
+        )
+
+    return guardados
+
+
+def _importar_lote(
+    session: Session,
+    filas: list[tuple[int, ItemConfiguracionImportar]],
+    resultado: ResultadoImportacion,
+    current_user_id: uuid.UUID,
+) -> None:
+    usuarios = ids_existentes(
+        session, Usuario, (fila.owner_id for _, fila in filas if fila.owner_id)
+    )
+    existentes = resolver(
+        session, ItemConfiguracion, (fila.id for _, fila in filas if fila.id)
+    )
+
+    validas = []
+    vistos: set[uuid.UUID] = set()
+
+    for indice, fila in filas:
+        if fila.owner_id is not None and fila.owner_id not in usuarios:
+            error = f"No existe usuario: {fila.owner_id}"
+        elif fila.id is not None and fila.id in vistos:
+            # An upsert can't write the same row twice
+            error = "Item de configuracion repetido en el lote"
+        else:
+            error = None
+
+        if error is not None:
+            resultado.errores.append(
+                ResultadoLote(indice=indice, id=fila.id, error=error)
+            )
+            continue
+
+        datos = fila.model_dump(exclude_none=True)
+        existente = existentes.get(fila.id)
+
+        if existente is None:
+            datos.setdefault("owner_id", current_user_id)
+        else:
+            # Fields missing in the row keep the values of the item
+            datos = {**existente.model_dump(include=set(CAMPOS_IMPORTADOS)), **datos}
+
+        item_config = ItemConfiguracion.model_validate(datos)
+        vistos.add(item_config.id)
+        validas.append((indice, item_config))
+
+    if not validas:
+        return
+
+    try:
+        with UnitOfWork(session) as uow:
+            guardados = _upsert_items(
+                session, [item_config.model_dump() for _, item_config in validas]
+            )
+
+            uow.auditar_lote(
+                [
+                    AuditoriaCrear(
+                        tipo_entidad=TipoEntidad.CONFIG_ITEM,
+                        id_entidad=item_config.id,
+                        operacion=(
+                            Operacion.ACTUALIZAR
+                            if item_config.id in existentes
+                            else Operacion.CREAR
+                        ),
+                        estado_nuevo=item_config.model_dump(mode="json"),
+                        actualizado_por=current_user_id,
+                    )
+                    for item_config in guardados
+                ]
+            )
+    except DBAPIError as error:
+        session.rollback()
+
+        detalle = str(error.orig).splitlines()[0]
+        resultado.errores.extend(
+            ResultadoLote(indice=indice, id=item_config.id, error=detalle)
+            for indice, item_config in validas
+        )
+        return
+
+    actualizados = sum(item_config.id in existentes for item_config in guardados)
+    resultado.actualizados += actualizados
+    resultado.creados += len(guardados) - actualizados
 
 
 class ItemsConfiguracionService:
@@ -21,57 +237,120 @@ class ItemsConfiguracionService:
     ) -> ItemConfiguracion:
         db_obj = ItemConfiguracion.model_validate(item_config_crear)
 
-        session.add(db_obj)
-        session.commit()
-        session.refresh(db_obj)
-        
+        with UnitOfWork(session) as uow:
+            session.add(db_obj)
 
-        estado_nuevo = db_obj.model_dump(mode='json')
-        auditoria_crear = AuditoriaCrear(
-            tipo_entidad=TipoEntidad.CONFIG_ITEM,
-            id_entidad=db_obj.id,
-            operacion=Operacion.CREAR,
-            estado_nuevo=estado_nuevo,
-            actualizado_por=current_user_id,
-        )
-        AuditoriaService.registrar_operacion(
-            session=session, auditoria_crear=auditoria_crear
-        )
+            uow.auditar(
+                tipo_entidad=TipoEntidad.CONFIG_ITEM,
+                id_entidad=db_obj.id,
+                operacion=Operacion.CREAR,
+                estado_nuevo=db_obj.model_dump(mode="json"),
+                actualizado_por=current_user_id,
+            )
 
         return db_obj
 
-    def get_items_configuracion(
-        *, session: Session, item_config_filter: ItemConfiguracionFilter
-    ) -> list[ItemConfiguracion]:
-        query = select(ItemConfiguracion)
+    def create_items_configuracion(
+        *,
+        session: Session,
+        items_config_crear: list[ItemConfiguracionCrear],
+        current_user_id: uuid.UUID,
+    ) -> list[ResultadoLote]:
+        if not items_config_crear:
+            return []
 
-        if item_config_filter.nombre is not None:
-            query = query.where(
-                ItemConfiguracion.nombre.ilike(f"%{item_config_filter.nombre}%")
-            )
+        items_config = [
+            ItemConfiguracion.model_validate(item_config_crear)
+            for item_config_crear in items_config_crear
+        ]
 
-        if item_config_filter.version is not None:
-            query = query.where(
-                ItemConfiguracion.version.ilike(f"%{item_config_filter.version}%")
+        with UnitOfWork(session) as uow:
+            session.execute(
+                insert(ItemConfiguracion),
+                [item_config.model_dump() for item_config in items_config],
             )
 
-        if item_config_filter.categoria is not None:
-            query = query.where(
-                ItemConfiguracion.categoria == item_config_filter.categoria
+            uow.auditar_lote(
+                [
+                    AuditoriaCrear(
+                        tipo_entidad=TipoEntidad.CONFIG_ITEM,
+                        id_entidad=item_config.id,
+                        operacion=Operacion.CREAR,
+                        estado_nuevo=item_config.model_dump(mode="json"),
+                        actualizado_por=current_user_id,
+                    )
+                    for item_config in items_config
+                ]
             )
 
-        if item_config_filter.estado is not None:
-            query = query.where(ItemConfiguracion.estado == item_config_filter.estado)
+        return [
+            ResultadoLote(indice=indice, id=item_config.id)
+            for indice, item_config in enumerate(items_config)
+        ]
+
+    def importar_items_configuracion(
+        *,
+        session: Session,
+        archivo: BinaryIO,
+        formato: FormatoExportacion,
+        comprimido: bool = False,
+        current_user_id: uuid.UUID,
+    ) -> ResultadoImportacion:
+        """Creates the items of a CSV/NDJSON file, or replaces the ones whose
+        id exists, reading it in batches that are committed one by one.
+        Invalid rows and failed batches are reported, the rest is kept."""
+        resultado = ResultadoImportacion()
+        filas = leer_filas(
+            archivo, ItemConfiguracionImportar, formato=formato, comprimido=comprimido
+        )
+
+        for lote in lotes(filas):
+            validas = []
+
+            for indice, fila in lote:
+                if isinstance(fila, str):
+                    resultado.errores.append(ResultadoLote(indice=indice, error=fila))
+                else:
+                    validas.append((indice, fila))
+
+            _importar_lote(session, validas, resultado, current_user_id)
+
+        resultado.errores.sort(key=lambda error: error.indice)
+
+        return resultado
+
+    def get_items_configuracion(
+        *,
+        session: Session,
+        item_config_filter: ItemConfiguracionFilter,
+        paginacion: Paginacion = Paginacion(),
+        respuesta: type[SQLModel] = ItemConfiguracionPublico,
+    ) -> list[ItemConfiguracion]:
+        query = select(ItemConfiguracion).options(
+            *eager_load(ItemConfiguracion, respuesta)
+        )
+        query = filtrar_items_configuracion(query, item_config_filter)
+        query = paginar(
+            query,
+            paginacion=paginacion,
+            columna_fecha=ItemConfiguracion.fecha_creacion,
+            columna_id=ItemConfiguracion.id,
+        )
 
         items_config = session.exec(query).all()
 
         return items_config
 
     def get_item_configuracion_by_id(
-        *, session: Session, id_item_config: uuid.UUID
+        *,
+        session: Session,
+        id_item_config: uuid.UUID,
+        respuesta: type[SQLModel] = ItemConfiguracionPublico,
     ) -> ItemConfiguracion:
         item_config = session.exec(
-            select(ItemConfiguracion).where(ItemConfiguracion.id == id_item_config)
+            select(ItemConfiguracion)
+            .where(ItemConfiguracion.id == id_item_config)
+            .options(*eager_load(ItemConfiguracion, respuesta))
         ).first()
         if not item_config:
             raise HTTPException(
@@ -84,38 +363,96 @@ class ItemsConfiguracionService:
         session: Session,
         id_item_config: uuid.UUID,
         item_config_actualizar: ItemConfiguracionActualizar,
+        current_user_id: uuid.UUID,
     ) -> ItemConfiguracionPublico:
         item_config = ItemsConfiguracionService.get_item_configuracion_by_id(
             session=session, id_item_config=id_item_config
         )
+        comprobar_revision(item_config, item_config_actualizar.revision)
+
+        _actualizar_item(item_config, item_config_actualizar)
 
-        if item_config_actualizar.nombre is not None:
-            item_config.nombre = item_config_actualizar.nombre
+        with UnitOfWork(session) as uow:
+            session.add(item_config)
 
-        if item_config_actualizar.descripcion is not None:
-            item_config.descripcion = item_config_actualizar.descripcion
+            uow.auditar(
+                tipo_entidad=TipoEntidad.CONFIG_ITEM,
+                id_entidad=item_config.id,
+                operacion=Operacion.ACTUALIZAR,
+                estado_nuevo=item_config.model_dump(mode="json"),
+                actualizado_por=current_user_id,
+            )
 
-        if item_config_actualizar.categoria is not None:
-            item_config.categoria = item_config_actualizar.categoria
+        return item_config
 
-        if item_config_actualizar.estado is not None:
-            item_config.estado = item_config_actualizar.estado
+    def update_items_configuracion(
+        *,
+        session: Session,
+        items_config_actualizar: list[ItemConfiguracionActualizarLote],
+        current_user_id: uuid.UUID,
+    ) -> list[ResultadoLote]:
+        items_config = resolver(
+            session,
+            ItemConfiguracion,
+            (item_config.id for item_config in items_config_actualizar),
+        )
 
-        session.add(item_config)
-        session.commit()
-        session.refresh(item_config)
+        resultados = []
+        auditorias = []
 
-        return item_config
+        for indice, item_config_actualizar in enumerate(items_config_actualizar):
+            item_config = items_config.get(item_config_actualizar.id)
+            error = (
+                "No existe item de configuracion"
+                if item_config is None
+                else revision_desactualizada(
+                    item_config, item_config_actualizar.revision
+                )
+            )
+
+            if error is not None:
+                resultados.append(
+                    ResultadoLote(
+                        indice=indice, id=item_config_actualizar.id, error=error
+                    )
+                )
+                continue
+
+            _actualizar_item(item_config, item_config_actualizar)
+
+            auditorias.append(
+                AuditoriaCrear(
+                    tipo_entidad=TipoEntidad.CONFIG_ITEM,
+                    id_entidad=item_config.id,
+                    operacion=Operacion.ACTUALIZAR,
+                    estado_nuevo=item_config.model_dump(mode="json"),
+                    actualizado_por=current_user_id,
+                )
+            )
+            resultados.append(ResultadoLote(indice=indice, id=item_config.id))
+
+        with UnitOfWork(session) as uow:
+            uow.auditar_lote(auditorias)
+
+        return resultados
 
     def delete_item_configuracion(
-        *, session: Session, id_item_config: uuid.UUID
+        *, session: Session, id_item_config: uuid.UUID, current_user_id: uuid.UUID
     ) -> ItemConfiguracionPublico:
         item_config = ItemsConfiguracionService.get_item_configuracion_by_id(
             session=session, id_item_config=id_item_config
         )
 
-        session.delete(item_config)
-        session.commit()
+        with UnitOfWork(session) as uow:
+            uow.auditar(
+                tipo_entidad=TipoEntidad.CONFIG_ITEM,
+                id_entidad=item_config.id,
+                operacion=Operacion.ELIMINAR,
+                estado_nuevo=item_config.model_dump(mode="json"),
+                actualizado_por=current_user_id,
+            )
+
+            session.delete(item_config)
 
         return item_config
 
@@ -133,16 +470,27 @@ class ItemsConfiguracionService:
                 detail="Auditoría no corresponde al ítem de configuración"
             )
 
-        estado_anterior = auditoria.estado_nuevo
+        estado_anterior = AuditoriaService.reconstruir_estado(
+            session=session, auditoria=auditoria
+        )
         
         item_actual.nombre = estado_anterior["nombre"]
         item_actual.descripcion = estado_anterior["descripcion"]
         item_actual.version = estado_anterior["version"]
-        item_actual.categoria = estado_anterior["categoria"]
-        item_actual.estado = estado_anterior["estado"]
+        # The audit holds JSON values, the item is returned without a reload
+        item_actual.categoria = CategoriaItem(estado_anterior["categoria"])
+        item_actual.estado = EstadoItem(estado_anterior["estado"])
+        nueva_revision(item_actual)
         
-        session.add(item_actual)
-        session.commit()
-        session.refresh(item_actual)
+        with UnitOfWork(session) as uow:
+            session.add(item_actual)
+
+            uow.auditar(
+                tipo_entidad=TipoEntidad.CONFIG_ITEM,
+                id_entidad=item_actual.id,
+                operacion=Operacion.ACTUALIZAR,
+                estado_nuevo=item_actual.model_dump(mode="json"),
+                actualizado_por=current_user_id,
+            )
         
         return item_actual
\ No newline at end of file
@@ -0,0 +1,145 @@
+import hashlib
+import re
+from collections.abc import Iterator, Sequence
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import inspect
+from sqlmodel import SQLModel
+
+from app.crud.loaders import modelo_relacionado
+from app.models.commons import Versionado
+
+_ETAG_ENTIDAD = re.compile(r'^(?:W/)?"(\d+)-[0-9a-f]+"$')
+
+
+def _utc(fecha: datetime) -> datetime:
+    # SQLite hands back naive datetimes
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+
+    return fecha.astimezone(timezone.utc)
+
+
+def _versiones(entidad: Versionado, publico: type[SQLModel]) -> Iterator[Versionado]:
+    """`entidad` and every related entity that `publico` serializes."""
+    yield entidad
+
+    relaciones = inspect(type(entidad)).relationships
+
+    for nombre, field in publico.model_fields.items():
+        publico_relacionado = modelo_relacionado(field.annotation)
+
+        if nombre not in relaciones or publico_relacionado is None:
+            continue
+
+        for relacionada in getattr(entidad, nombre):
+            yield from _versiones(relacionada, publico_relacionado)
+
+
+def calcular_etag(entidades: Sequence[Versionado], publico: type[SQLModel]) -> str:
+    """Weak ETag of the response of `entidades` serialized as `publico`, taken
+    from the revisions and update dates of the rows instead of the serialized
+    body. Adding, removing, reordering or updating any of them changes it."""
+    digest = hashlib.blake2b(digest_size=16)
+
+    for entidad in entidades:
+        for version in _versiones(entidad, publico):
+            # The date tells apart writes that ended up with the same revision
+            fecha = _utc(version.fecha_actualizacion).isoformat()
+            clave = f"{version.__tablename__}:{version.id}:{version.revision}:{fecha};"
+            digest.update(clave.encode())
+
+    return digest.hexdigest()
+
+
+def etag_entidad(entidad: Versionado, publico: type[SQLModel]) -> str:
+    # Starts with the revision of the entity, so it can be sent back in
+    # If-Match to update it
+    return f'W/"{entidad.revision}-{calcular_etag([entidad], publico)}"'
+
+
+def revision_if_match(if_match: str | None) -> int | None:
+    """Revision of the entity the client read, from the ETag in If-Match."""
+    if if_match is None or if_match.strip() == "*":
+        return None
+
+    match = _ETAG_ENTIDAD.match(if_match.strip())
+
+    if match is None:
+        raise HTTPException(status_code=400, detail="If-Match inválido")
+
+    return int(match[1])
+
+
+def _coincide(if_none_match: str, etag: str) -> bool:
+    # Weak comparison, RFC 9110 section 13.1.2
+    if if_none_match.strip() == "*":
+        return True
+
+    return any(
+        candidato.strip().removeprefix("W/") == etag.removeprefix("W/")
+        for candidato in if_none_match.split(",")
+    )
+
+
+def _sin_cambios_desde(if_modified_since: str, ultima_modificacion: datetime) -> bool:
+    try:
+        desde = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+    if desde.tzinfo is None:
+        return False
+
+    # HTTP dates have a resolution of one second
+    return ultima_modificacion.replace(microsecond=0) <= desde
+
+
+def respuesta_condicional(
+    request: Request,
+    response: Response,
+    entidades: Versionado | Sequence[Versionado],
+    *,
+    publico: type[SQLModel],
+) -> Response | None:
+    """Sets the validators of a GET response of one entity or a list of them,
+    and returns a `304 Not Modified` to send instead if the copy of the client
+    is still current.
+
+    Lists have no Last-Modified: removing a row from them doesn't move the
+    date of any of the rows left, only their ETag."""
+    ultima_modificacion = None
+
+    if isinstance(entidades, Versionado):
+        etag = etag_entidad(entidades, publico)
+        ultima_modificacion = max(
+            _utc(version.fecha_actualizacion)
+            for version in _versiones(entidades, publico)
+        )
+        response.headers["Last-Modified"] = format_datetime(
+            ultima_modificacion, usegmt=True
+        )
+    else:
+        etag = f'W/"{calcular_etag(entidades, publico)}"'
+
+    response.headers["ETag"] = etag
+    # Clients may store the response, but have to revalidate it every time
+    response.headers["Cache-Control"] = "no-cache"
+
+    if_none_match = request.headers.get("If-None-Match")
+    if_modified_since = request.headers.get("If-Modified-Since")
+
+    # If-Modified-Since is only checked when there is no If-None-Match
+    if if_none_match is not None:
+        no_modificado = _coincide(if_none_match, etag)
+    elif if_modified_since is not None and ultima_modificacion is not None:
+        no_modificado = _sin_cambios_desde(if_modified_since, ultima_modificacion)
+    else:
+        no_modificado = False
+
+    if not no_modificado:
+        return None
+
+    return Response(status_code=304, headers=dict(response.headers))
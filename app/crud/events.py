@@ -0,0 +1,100 @@
+from sqlalchemy import event, func, tuple_
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select
+
+from app.core.events import CANAL, eventos
+from app.crud.pagination import decode_cursor
+from app.models.auditoria import Auditoria
+from app.models.events import Evento, EventoFilter
+
+# NOTIFY payloads must stay below 8000 bytes
+TAMANIO_NOTIFICACION = 7_000
+
+
+def _evento(fila: dict) -> Evento:
+    return Evento(
+        id=fila["id"],
+        tipo_entidad=fila["tipo_entidad"],
+        id_entidad=fila["id_entidad"],
+        operacion=fila["operacion"],
+        version=fila["version"],
+        revision=(fila["estado_nuevo"] or {}).get("revision"),
+        fecha_actualizacion=fila["fecha_actualizacion"],
+    )
+
+
+def _notificaciones(nuevos: list[Evento]) -> list[str]:
+    """JSON arrays of events, as many per NOTIFY as fit."""
+    notificaciones: list[str] = []
+    actual: list[str] = []
+    tamanio = 0
+
+    for evento in nuevos:
+        serializado = evento.model_dump_json()
+
+        if actual and tamanio + len(serializado) + 1 > TAMANIO_NOTIFICACION:
+            notificaciones.append(f"[{','.join(actual)}]")
+            actual, tamanio = [], 0
+
+        actual.append(serializado)
+        tamanio += len(serializado) + 1
+
+    if actual:
+        notificaciones.append(f"[{','.join(actual)}]")
+
+    return notificaciones
+
+
+class EventosService:
+    def notificar(*, session: Session, filas: list[dict]) -> None:
+        """Publishes the audit rows `filas` to /events when the transaction
+        commits, and never if it rolls back."""
+        nuevos = [_evento(fila) for fila in filas]
+
+        if session.get_bind().dialect.name != "postgresql":
+            # Single process (tests, local SQLite): published by `_publicar`
+            session.info.setdefault("eventos", []).extend(nuevos)
+            return
+
+        # Postgres delivers notifications on commit, to every worker
+        for notificacion in _notificaciones(nuevos):
+            session.execute(select(func.pg_notify(CANAL, notificacion)))
+
+    def get_eventos(
+        *, session: Session, evento_filter: EventoFilter, cursor: str, limite: int
+    ) -> list[Evento]:
+        """Events written after `cursor` (the id of the last event a client
+        got), oldest first, read back from the audit log."""
+        fecha, id = decode_cursor(cursor)
+        query = select(Auditoria).where(
+            tuple_(Auditoria.fecha_actualizacion, Auditoria.id) > tuple_(fecha, id),
+            # Left by the archival, never written
+            Auditoria.es_arrastre.is_(False),
+        )
+
+        if evento_filter.tipo_entidad is not None:
+            query = query.where(Auditoria.tipo_entidad == evento_filter.tipo_entidad)
+
+        if evento_filter.id_entidad is not None:
+            query = query.where(Auditoria.id_entidad == evento_filter.id_entidad)
+
+        query = query.order_by(Auditoria.fecha_actualizacion, Auditoria.id).limit(
+            limite
+        )
+
+        return [
+            _evento(auditoria.model_dump()) for auditoria in session.exec(query).all()
+        ]
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _publicar(session: OrmSession) -> None:
+    pendientes = session.info.pop("eventos", None)
+
+    if pendientes:
+        eventos.publicar(pendientes)
+
+
+@event.listens_for(OrmSession, "after_soft_rollback")
+def _descartar(session: OrmSession, previous_transaction: object) -> None:  # noqa: ARG001
+    session.info.pop("eventos", None)
@@ -0,0 +1,116 @@
+import csv
+import io
+import json
+import zlib
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import date, datetime
+from typing import Any
+
+from sqlalchemy import Select
+from sqlmodel import Session, SQLModel, select
+
+from app.models.exports import FormatoExportacion
+
+# Rows per round trip to the database and per chunk of the response. On
+# Postgres they are read from a server-side cursor, so memory stays constant
+# whatever the size of the export.
+LOTE_EXPORTACION = 1_000
+
+
+def _json(valor: Any) -> Any:
+    if isinstance(valor, datetime | date):
+        return valor.isoformat()
+
+    return str(valor)
+
+
+def _celda(valor: Any) -> Any:
+    if isinstance(valor, dict | list):
+        return json.dumps(valor, default=_json)
+
+    if isinstance(valor, datetime | date):
+        return valor.isoformat()
+
+    return valor
+
+
+def _ndjson(columnas: list[str], lotes: Iterable[Sequence]) -> Iterator[str]:
+    for filas in lotes:
+        yield "".join(
+            json.dumps(dict(zip(columnas, fila, strict=True)), default=_json) + "\n"
+            for fila in filas
+        )
+
+
+def _csv(columnas: list[str], lotes: Iterable[Sequence]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columnas)
+
+    for filas in lotes:
+        writer.writerows([_celda(valor) for valor in fila] for fila in filas)
+        yield buffer.getvalue()
+
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Only the header is left when nothing matched
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _gzip(partes: Iterable[bytes]) -> Iterator[bytes]:
+    compresor = zlib.compressobj(wbits=31)
+
+    for parte in partes:
+        comprimido = compresor.compress(parte)
+
+        if comprimido:
+            yield comprimido
+
+    yield compresor.flush()
+
+
+def columnas_exportadas(
+    modelo: type[SQLModel], publico: type[SQLModel], *, columna_fecha: str
+) -> Select:
+    """Selects the columns of `modelo` that `publico` exposes, as plain rows,
+    sorted like the keyset pagination of its list endpoint."""
+    campos = ["id", *(campo for campo in publico.model_fields if campo != "id")]
+
+    return select(*(getattr(modelo, campo) for campo in campos)).order_by(
+        getattr(modelo, columna_fecha), modelo.id
+    )
+
+
+class ExportacionService:
+    def exportar(
+        *,
+        session: Session,
+        query: Select,
+        formato: FormatoExportacion,
+        comprimir: bool = False,
+    ) -> Iterator[bytes]:
+        """Rows of `query` as NDJSON (one object per line) or CSV (with a
+        header), optionally gzipped. Nothing is read until it is iterated,
+        and the session is closed once it is exhausted."""
+        try:
+            resultado = session.execute(
+                query.execution_options(yield_per=LOTE_EXPORTACION)
+            )
+            columnas = list(resultado.keys())
+
+            if formato == FormatoExportacion.CSV:
+                texto = _csv(columnas, resultado.partitions())
+            else:
+                texto = _ndjson(columnas, resultado.partitions())
+
+            partes = (parte.encode() for parte in texto)
+
+            if comprimir:
+                partes = _gzip(partes)
+
+            yield from partes
+        finally:
+            # Streaming outlives the endpoint, the connection is released here
+            session.close()
@@ -0,0 +1,103 @@
+import csv
+import gzip
+import io
+import zlib
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from pathlib import PurePath
+from typing import Any, BinaryIO, TypeVar
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlmodel import SQLModel
+
+from app.models.exports import FormatoExportacion
+
+T = TypeVar("T", bound=SQLModel)
+
+# Rows validated and upserted per transaction. A failing batch is rolled back
+# on its own, every other one is kept.
+LOTE_IMPORTACION = 5_000
+
+
+def formato_de_archivo(nombre: str) -> tuple[FormatoExportacion, bool]:
+    """Format of a file named like the exports (`.csv`, `.ndjson`, optionally
+    `.gz`) and whether it is gzipped."""
+    sufijos = [sufijo.lower() for sufijo in PurePath(nombre).suffixes]
+    comprimido = bool(sufijos) and sufijos[-1] == ".gz"
+
+    if comprimido:
+        sufijos.pop()
+
+    extension = sufijos[-1] if sufijos else ""
+
+    if extension == ".csv":
+        return FormatoExportacion.CSV, comprimido
+
+    if extension in {".ndjson", ".jsonl"}:
+        return FormatoExportacion.NDJSON, comprimido
+
+    raise HTTPException(
+        status_code=400, detail="El archivo debe ser .csv, .ndjson o .jsonl"
+    )
+
+
+def _error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, detalle['loc']))}: {detalle['msg']}"
+        if detalle["loc"]
+        else detalle["msg"]
+        for detalle in error.errors()
+    )
+
+
+def leer_filas(
+    archivo: BinaryIO, modelo: type[T], *, formato: FormatoExportacion, comprimido: bool
+) -> Iterator[tuple[int, T | str]]:
+    """Reads `archivo` one row at a time and validates it as `modelo`. Yields
+    the position of each row and the model, or the error when it is invalid.
+
+    A file that can't be read any further (not UTF-8, a corrupt gzip) yields
+    the error at the position it was reached, and ends there."""
+    if comprimido:
+        archivo = gzip.open(archivo)
+
+    texto = io.TextIOWrapper(archivo, encoding="utf-8-sig", newline="")
+    filas: Iterator[dict | str] = (
+        csv.DictReader(texto) if formato == FormatoExportacion.CSV else texto
+    )
+    indice = 0
+
+    while True:
+        try:
+            fila = next(filas)
+        except StopIteration:
+            return
+        except csv.Error as error:
+            # The reader goes on with the next line
+            yield indice, f"CSV inválido: {error}"
+            indice += 1
+            continue
+        except (UnicodeDecodeError, OSError, EOFError, zlib.error) as error:
+            yield indice, f"No se puede leer el archivo desde esta fila: {error}"
+            return
+
+        try:
+            if isinstance(fila, str):
+                if not fila.strip():
+                    continue
+
+                yield indice, modelo.model_validate_json(fila)
+            else:
+                # Empty cells are missing values, so the defaults of `modelo` apply
+                datos = {campo: valor for campo, valor in fila.items() if valor != ""}
+                yield indice, modelo.model_validate(datos)
+        except ValidationError as error:
+            yield indice, _error(error)
+
+        indice += 1
+
+
+def lotes(filas: Iterable[Any], tamanio: int | None = None) -> Iterator[list[Any]]:
+    while lote := list(islice(filas, tamanio or LOTE_IMPORTACION)):
+        yield lote
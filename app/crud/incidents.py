@@ -1,21 +1,82 @@
 from datetime import datetime, timezone
 import uuid
 
-from app.crud.audits import AuditoriaService
+from app.crud.bulk import faltantes, ids_existentes, resolver, seleccionar
+from app.crud.loaders import eager_load
+from app.crud.pagination import paginar
+from app.crud.unit_of_work import (
+    UnitOfWork,
+    comprobar_revision,
+    revision_desactualizada,
+)
 from app.models.auditoria import AuditoriaCrear
-from app.models.commons import Operacion, TipoEntidad
+from app.models.bulk import ResultadoLote
+from app.models.commons import Operacion, TipoEntidad, nueva_revision
 from fastapi import HTTPException
-from sqlmodel import Session, select
+from sqlalchemy import Select, insert
+from sqlmodel import Session, SQLModel, select
 
 from app.models.config_items import ItemConfiguracion
 from app.models.incidents import (
     EstadoIncidente,
     Incidente,
     IncidenteActualizar,
+    IncidenteActualizarLote,
     IncidenteCrear,
     IncidenteFilter,
     IncidentePublicoConItems,
 )
+from app.models.incidents_items_link import IncidenteItemLink
+from app.models.pagination import Paginacion
+
+
+def _actualizar_incidente(
+    incidente: Incidente,
+    incidente_actualizar: IncidenteActualizar,
+    config_items: dict[uuid.UUID, ItemConfiguracion],
+) -> None:
+    if incidente_actualizar.titulo is not None:
+        incidente.titulo = incidente_actualizar.titulo
+
+    if incidente_actualizar.descripcion is not None:
+        incidente.descripcion = incidente_actualizar.descripcion
+
+    if incidente_actualizar.categoria is not None:
+        incidente.categoria = incidente_actualizar.categoria
+
+    if incidente_actualizar.estado is not None:
+        incidente.estado = incidente_actualizar.estado
+        if incidente_actualizar.estado == EstadoIncidente.CERRADO.value:
+            incidente.fecha_cierre = datetime.now(timezone.utc)
+
+    if incidente_actualizar.prioridad is not None:
+        incidente.prioridad = incidente_actualizar.prioridad
+
+    if incidente_actualizar.responsable_id is not None:
+        incidente.responsable_id = incidente_actualizar.responsable_id
+
+    if incidente_actualizar.id_config_items is not None:
+        incidente.config_items = seleccionar(
+            config_items, incidente_actualizar.id_config_items
+        )
+
+    nueva_revision(incidente)
+
+
+def filtrar_incidentes(query: Select, incidente_filter: IncidenteFilter) -> Select:
+    if incidente_filter.titulo is not None:
+        query = query.where(Incidente.titulo.ilike(f"%{incidente_filter.titulo}%"))
+
+    if incidente_filter.prioridad is not None:
+        query = query.where(Incidente.prioridad == incidente_filter.prioridad)
+
+    if incidente_filter.categoria is not None:
+        query = query.where(Incidente.categoria == incidente_filter.categoria)
+
+    if incidente_filter.estado is not None:
+        query = query.where(Incidente.estado == incidente_filter.estado)
+
+    return query
 
 
 class IncidentesService:
@@ -32,46 +93,105 @@ class IncidentesService:
 
         db_obj.config_items = config_items
 
-        session.add(db_obj)
-        session.commit()
-        session.refresh(db_obj)
-        
-        estado_nuevo = db_obj.model_dump(mode='json')
-        auditoria_crear = AuditoriaCrear( 
-            tipo_entidad = TipoEntidad.INCIDENTE,
-            id_entidad = db_obj.id,
-            operacion = Operacion.CREAR,
-            estado_nuevo = estado_nuevo,
-            actualizado_por = current_user_id
-        )
-        AuditoriaService.registrar_operacion(session=session, auditoria_crear=auditoria_crear)
+        with UnitOfWork(session) as uow:
+            session.add(db_obj)
+
+            uow.auditar(
+                tipo_entidad=TipoEntidad.INCIDENTE,
+                id_entidad=db_obj.id,
+                operacion=Operacion.CREAR,
+                estado_nuevo=db_obj.model_dump(mode="json"),
+                actualizado_por=current_user_id,
+            )
 
         return db_obj
 
-    def get_incidentes(
-        *, session: Session, incidente_filter: IncidenteFilter
-    ) -> list[IncidentePublicoConItems]:
-        query = select(Incidente)
+    def create_incidentes(
+        *,
+        session: Session,
+        incidentes_crear: list[IncidenteCrear],
+        current_user_id: uuid.UUID,
+    ) -> list[ResultadoLote]:
+        id_config_items = ids_existentes(
+            session,
+            ItemConfiguracion,
+            (id for incidente in incidentes_crear for id in incidente.id_config_items),
+        )
+
+        resultados = []
+        filas = []
+        links = []
+        auditorias = []
+
+        for indice, incidente_crear in enumerate(incidentes_crear):
+            error = faltantes(
+                "items de configuración",
+                incidente_crear.id_config_items,
+                id_config_items,
+            )
 
-        if incidente_filter.titulo is not None:
-            query = query.where(Incidente.titulo.ilike(f"%{incidente_filter.titulo}%"))
+            if error is not None:
+                resultados.append(ResultadoLote(indice=indice, error=error))
+                continue
 
-        if incidente_filter.prioridad is not None:
-            query = query.where(Incidente.prioridad == incidente_filter.prioridad)
+            incidente = Incidente.model_validate(incidente_crear)
 
-        if incidente_filter.categoria is not None:
-            query = query.where(Incidente.categoria == incidente_filter.categoria)
+            filas.append(incidente.model_dump())
+            links.extend(
+                {"id_incidente": incidente.id, "id_config_item": id_config_item}
+                for id_config_item in dict.fromkeys(incidente_crear.id_config_items)
+            )
+            auditorias.append(
+                AuditoriaCrear(
+                    tipo_entidad=TipoEntidad.INCIDENTE,
+                    id_entidad=incidente.id,
+                    operacion=Operacion.CREAR,
+                    estado_nuevo=incidente.model_dump(mode="json"),
+                    actualizado_por=current_user_id,
+                )
+            )
+            resultados.append(ResultadoLote(indice=indice, id=incidente.id))
 
-        if incidente_filter.estado is not None:
-            query = query.where(Incidente.estado == incidente_filter.estado)
+        with UnitOfWork(session) as uow:
+            if filas:
+                session.execute(insert(Incidente), filas)
+            if links:
+                session.execute(insert(IncidenteItemLink), links)
+
+            uow.auditar_lote(auditorias)
+
+        return resultados
+
+    def get_incidentes(
+        *,
+        session: Session,
+        incidente_filter: IncidenteFilter,
+        paginacion: Paginacion = Paginacion(),
+        respuesta: type[SQLModel] = IncidentePublicoConItems,
+    ) -> list[IncidentePublicoConItems]:
+        query = select(Incidente).options(*eager_load(Incidente, respuesta))
+        query = filtrar_incidentes(query, incidente_filter)
+        query = paginar(
+            query,
+            paginacion=paginacion,
+            columna_fecha=Incidente.fecha_creacion,
+            columna_id=Incidente.id,
+        )
 
         incidentes = session.exec(query).all()
 
         return incidentes
 
-    def get_incidente_by_id(*, session: Session, id_incidente: uuid.UUID) -> Incidente:
+    def get_incidente_by_id(
+        *,
+        session: Session,
+        id_incidente: uuid.UUID,
+        respuesta: type[SQLModel] = IncidentePublicoConItems,
+    ) -> Incidente:
         incidente = session.exec(
-            select(Incidente).where(Incidente.id == id_incidente)
+            select(Incidente)
+            .where(Incidente.id == id_incidente)
+            .options(*eager_load(Incidente, respuesta))
         ).first()
 
         if not incidente:
@@ -84,54 +204,116 @@ class IncidentesService:
         session: Session,
         id_incidente: uuid.UUID,
         incidente_actualizar: IncidenteActualizar,
+        current_user_id: uuid.UUID,
     ) -> IncidentePublicoConItems:
         incidente = IncidentesService.get_incidente_by_id(
             session=session, id_incidente=id_incidente
         )
+        comprobar_revision(incidente, incidente_actualizar.revision)
+
+        config_items = resolver(
+            session, ItemConfiguracion, incidente_actualizar.id_config_items or []
+        )
+
+        estado_anterior = incidente.model_dump(mode="json")
+        _actualizar_incidente(incidente, incidente_actualizar, config_items)
 
-        if incidente_actualizar.titulo is not None:
-            incidente.titulo = incidente_actualizar.titulo
+        with UnitOfWork(session) as uow:
+            session.add(incidente)
 
-        if incidente_actualizar.descripcion is not None:
-            incidente.descripcion = incidente_actualizar.descripcion
+            uow.auditar(
+                tipo_entidad=TipoEntidad.INCIDENTE,
+                id_entidad=incidente.id,
+                operacion=Operacion.ACTUALIZAR,
+                estado_nuevo=incidente.model_dump(mode="json"),
+                actualizado_por=current_user_id,
+                estado_anterior=estado_anterior,
+            )
 
-        if incidente_actualizar.categoria is not None:
-            incidente.categoria = incidente_actualizar.categoria
+        return incidente
 
-        if incidente_actualizar.estado is not None:
-            incidente.estado = incidente_actualizar.estado
-            if incidente_actualizar.estado == EstadoIncidente.CERRADO.value:
-                    incidente.fecha_cierre = datetime.now(timezone.utc)
+    def update_incidentes(
+        *,
+        session: Session,
+        incidentes_actualizar: list[IncidenteActualizarLote],
+        current_user_id: uuid.UUID,
+    ) -> list[ResultadoLote]:
+        incidentes = resolver(
+            session,
+            Incidente,
+            (incidente.id for incidente in incidentes_actualizar),
+            *eager_load(Incidente, IncidentePublicoConItems),
+        )
+        config_items = resolver(
+            session,
+            ItemConfiguracion,
+            (
+                id
+                for incidente in incidentes_actualizar
+                for id in incidente.id_config_items or []
+            ),
+        )
 
-        if incidente_actualizar.prioridad is not None:
-            incidente.prioridad = incidente_actualizar.prioridad
+        resultados = []
+        auditorias = []
 
-        if incidente_actualizar.responsable_id is not None:
-            incidente.responsable_id = incidente_actualizar.responsable_id
-            
-        if incidente_actualizar.id_config_items is not None:
-            config_items = session.exec(
-                select(ItemConfiguracion).where(
-                    ItemConfiguracion.id.in_(incidente_actualizar.id_config_items)
+        for indice, incidente_actualizar in enumerate(incidentes_actualizar):
+            incidente = incidentes.get(incidente_actualizar.id)
+            error = (
+                "No existe incidente"
+                if incidente is None
+                else revision_desactualizada(incidente, incidente_actualizar.revision)
+                or faltantes(
+                    "items de configuración",
+                    incidente_actualizar.id_config_items,
+                    config_items,
                 )
-            ).all()
+            )
 
-            incidente.config_items = config_items
+            if error is not None:
+                resultados.append(
+                    ResultadoLote(
+                        indice=indice, id=incidente_actualizar.id, error=error
+                    )
+                )
+                continue
 
-        session.add(incidente)
-        session.commit()
-        session.refresh(incidente)
+            estado_anterior = incidente.model_dump(mode="json")
+            _actualizar_incidente(incidente, incidente_actualizar, config_items)
 
-        return incidente
+            auditorias.append(
+                AuditoriaCrear(
+                    tipo_entidad=TipoEntidad.INCIDENTE,
+                    id_entidad=incidente.id,
+                    operacion=Operacion.ACTUALIZAR,
+                    estado_nuevo=incidente.model_dump(mode="json"),
+                    actualizado_por=current_user_id,
+                    estado_anterior=estado_anterior,
+                )
+            )
+            resultados.append(ResultadoLote(indice=indice, id=incidente.id))
+
+        with UnitOfWork(session) as uow:
+            uow.auditar_lote(auditorias)
+
+        return resultados
 
     def delete_incidente(
-        *, session: Session, id_incidente: uuid.UUID
+        *, session: Session, id_incidente: uuid.UUID, current_user_id: uuid.UUID
     ) -> IncidentePublicoConItems:
         incidente = IncidentesService.get_incidente_by_id(
             session=session, id_incidente=id_incidente
         )
 
-        session.delete(incidente)
-        session.commit()
+        with UnitOfWork(session) as uow:
+            uow.auditar(
+                tipo_entidad=TipoEntidad.INCIDENTE,
+                id_entidad=incidente.id,
+                operacion=Operacion.ELIMINAR,
+                estado_nuevo=incidente.model_dump(mode="json"),
+                actualizado_por=current_user_id,
+            )
+
+            session.delete(incidente)
 
         return incidente
@@ -0,0 +1,356 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select
+
+from app.models.auditoria import Auditoria
+from app.models.changes import EstadoCambio
+from app.models.commons import Operacion, Prioridad, TipoEntidad
+from app.models.incidents import EstadoIncidente
+from app.models.kpis import KpiDia, KpiDiario, Kpis
+from app.models.problems import EstadoProblema
+
+# Entities in these states are not part of the backlog
+ESTADOS_FINALES = {
+    TipoEntidad.INCIDENTE: {EstadoIncidente.CERRADO.value},
+    TipoEntidad.PROBLEMA: {EstadoProblema.CERRADO.value},
+    TipoEntidad.CAMBIO: {EstadoCambio.CERRADO.value, EstadoCambio.RECHAZADO.value},
+}
+
+CLAVE = ["fecha", "tipo_entidad", "estado", "prioridad", "categoria"]
+CONTADORES = ["creados", "entradas", "salidas", "cerrados", "segundos_hasta_cierre"]
+
+# Rows per INSERT, keeps the statement below the bind parameter limit
+LIMITE_FILAS = 1_000
+
+Clave = tuple[date, TipoEntidad, str, str, str]
+Deltas = dict[Clave, dict[str, float]]
+
+
+def _fecha(valor: datetime | str) -> datetime:
+    # States are stored as JSON, dates come back as ISO strings
+    if isinstance(valor, str):
+        valor = datetime.fromisoformat(valor)
+
+    if valor.tzinfo is None:
+        valor = valor.replace(tzinfo=timezone.utc)
+
+    return valor.astimezone(timezone.utc)
+
+
+def _clave(tipo_entidad: TipoEntidad, estado: dict, dia: date) -> Clave:
+    return (
+        dia,
+        tipo_entidad,
+        estado["estado"],
+        estado["prioridad"],
+        estado.get("categoria") or "",
+    )
+
+
+def _cierre(estado: dict | None) -> tuple[date, float] | None:
+    if not estado or not estado.get("fecha_cierre"):
+        return None
+
+    cierre = _fecha(estado["fecha_cierre"])
+    segundos = (cierre - _fecha(estado["fecha_creacion"])).total_seconds()
+
+    return cierre.date(), segundos
+
+
+def acumular(
+    deltas: Deltas,
+    *,
+    tipo_entidad: TipoEntidad,
+    anterior: dict | None,
+    nuevo: dict | None,
+    fecha: datetime,
+) -> None:
+    """Adds to `deltas` the change of the rollups when an entity goes from
+    `anterior` to `nuevo` (None when it is created or deleted) at `fecha`."""
+    dia = _fecha(fecha).date()
+
+    def sumar(clave: Clave, **valores: float) -> None:
+        for campo, valor in valores.items():
+            deltas[clave][campo] += valor
+
+    clave_anterior = anterior and _clave(tipo_entidad, anterior, dia)
+    clave_nueva = nuevo and _clave(tipo_entidad, nuevo, dia)
+
+    if clave_anterior != clave_nueva:
+        if clave_anterior:
+            sumar(clave_anterior, salidas=1)
+
+        if clave_nueva:
+            sumar(clave_nueva, entradas=1)
+
+    if anterior is None and clave_nueva:
+        sumar(clave_nueva, creados=1)
+
+    # Closes count on the day of `fecha_cierre`, a rollback that reopens an
+    # entity takes its close back
+    cierre_anterior, cierre_nuevo = _cierre(anterior), _cierre(nuevo)
+
+    if cierre_anterior != cierre_nuevo:
+        if cierre_anterior:
+            dia_cierre, segundos = cierre_anterior
+            sumar(
+                _clave(tipo_entidad, anterior, dia_cierre),
+                cerrados=-1,
+                segundos_hasta_cierre=-segundos,
+            )
+
+        if cierre_nuevo:
+            dia_cierre, segundos = cierre_nuevo
+            sumar(
+                _clave(tipo_entidad, nuevo, dia_cierre),
+                cerrados=1,
+                segundos_hasta_cierre=segundos,
+            )
+
+
+def _nuevos_deltas() -> Deltas:
+    return defaultdict(lambda: dict.fromkeys(CONTADORES, 0))
+
+
+class KpisService:
+    def registrar_transiciones(
+        *,
+        session: Session,
+        transiciones: list[tuple[TipoEntidad, dict | None, dict | None, datetime]],
+    ) -> None:
+        """Updates the rollups in the caller's transaction. Called with the audit
+        rows of every write, so every service keeps them up to date."""
+        deltas = _nuevos_deltas()
+
+        for tipo_entidad, anterior, nuevo, fecha in transiciones:
+            if tipo_entidad not in ESTADOS_FINALES:
+                continue
+
+            acumular(
+                deltas,
+                tipo_entidad=tipo_entidad,
+                anterior=anterior,
+                nuevo=nuevo,
+                fecha=fecha,
+            )
+
+        KpisService._sumar(session=session, deltas=deltas)
+
+    def _sumar(*, session: Session, deltas: Deltas) -> None:
+        filas = [
+            {**dict(zip(CLAVE, clave, strict=True)), **contadores}
+            for clave, contadores in sorted(deltas.items())
+            if any(contadores.values())
+        ]
+
+        if session.get_bind().dialect.name == "postgresql":
+            insert = postgresql.insert
+        else:
+            insert = sqlite.insert
+
+        # Concurrent writes only add to the counters, so they can't lose updates.
+        # Sorted rows lock the buckets always in the same order.
+        for inicio in range(0, len(filas), LIMITE_FILAS):
+            query = insert(KpiDiario).values(filas[inicio : inicio + LIMITE_FILAS])
+            query = query.on_conflict_do_update(
+                index_elements=CLAVE,
+                set_={
+                    campo: getattr(KpiDiario, campo) + query.excluded[campo]
+                    for campo in CONTADORES
+                },
+            )
+            session.execute(query)
+
+    def reconstruir(*, session: Session) -> int:
+        """Rebuilds the rollups replaying the audit log, returns the number
+        of audit rows read.
+
+        The rollups of the days before the oldest audit row are kept, their
+        writes were archived. Entities whose creation was archived start from
+        the snapshot the archival left (see `ParticionesAuditoriaService`)."""
+        if session.get_bind().dialect.name == "postgresql":
+            # Writes wait for the rebuild instead of adding to the old rollups
+            session.execute(text("LOCK TABLE kpis_diarios IN EXCLUSIVE MODE"))
+
+        primera = session.exec(select(func.min(Auditoria.fecha_actualizacion))).one()
+        desde = _fecha(primera).date() if primera is not None else date.min
+
+        session.execute(delete(KpiDiario).where(KpiDiario.fecha >= desde))
+
+        query = (
+            select(
+                Auditoria.tipo_entidad,
+                Auditoria.id_entidad,
+                Auditoria.operacion,
+                Auditoria.estado_nuevo,
+                Auditoria.es_snapshot,
+                Auditoria.es_arrastre,
+                Auditoria.fecha_actualizacion,
+            )
+            .where(Auditoria.tipo_entidad.in_(list(ESTADOS_FINALES)))
+            .order_by(
+                Auditoria.id_entidad, Auditoria.version, Auditoria.fecha_actualizacion
+            )
+            .execution_options(yield_per=LIMITE_FILAS)
+        )
+
+        deltas = _nuevos_deltas()
+        id_actual, estado = None, None
+        leidas = 0
+
+        for auditoria in session.execute(query):
+            leidas += 1
+
+            if auditoria.es_arrastre:
+                # Left by the archival, already counted in the kept rollups
+                id_actual, estado = auditoria.id_entidad, dict(auditoria.estado_nuevo)
+                continue
+
+            if auditoria.id_entidad != id_actual:
+                id_actual, estado = auditoria.id_entidad, None
+
+                if auditoria.operacion != Operacion.CREAR:
+                    # Its creation is not in the log, start from its first state
+                    estado = dict(auditoria.estado_nuevo)
+                    continue
+
+            if auditoria.operacion == Operacion.ELIMINAR:
+                nuevo = None
+            elif auditoria.es_snapshot or estado is None:
+                nuevo = dict(auditoria.estado_nuevo)
+            else:
+                nuevo = {**estado, **auditoria.estado_nuevo}
+
+            acumular(
+                deltas,
+                tipo_entidad=auditoria.tipo_entidad,
+                anterior=estado,
+                nuevo=nuevo,
+                fecha=auditoria.fecha_actualizacion,
+            )
+            estado = nuevo
+
+        # Changes to the kept days (closes taken back by a later reopen) were
+        # added to them when they happened
+        for clave in [clave for clave in deltas if clave[0] < desde]:
+            del deltas[clave]
+
+        KpisService._sumar(session=session, deltas=deltas)
+        session.commit()
+
+        return leidas
+
+    def get_kpis(
+        *,
+        session: Session,
+        tipo_entidad: TipoEntidad,
+        hasta: date,
+        dias: int,
+        prioridad: Prioridad | None = None,
+        categoria: str | None = None,
+    ) -> Kpis:
+        """KPIs of the `dias` days up to `hasta` (included), read from the
+        rollups: the cost grows with the days, not with the entities."""
+        desde = hasta - timedelta(days=dias - 1)
+        filtros = [KpiDiario.tipo_entidad == tipo_entidad, KpiDiario.fecha <= hasta]
+
+        if prioridad is not None:
+            filtros.append(KpiDiario.prioridad == prioridad.value)
+
+        if categoria is not None:
+            filtros.append(KpiDiario.categoria == categoria)
+
+        # Everything before the period only matters for the starting backlog
+        anteriores = (
+            select(
+                KpiDiario.estado,
+                KpiDiario.prioridad,
+                func.sum(KpiDiario.entradas - KpiDiario.salidas),
+            )
+            .where(*filtros, KpiDiario.fecha < desde)
+            .group_by(KpiDiario.estado, KpiDiario.prioridad)
+        )
+        periodo = (
+            select(
+                KpiDiario.fecha,
+                KpiDiario.estado,
+                KpiDiario.prioridad,
+                *(
+                    func.sum(getattr(KpiDiario, campo)).label(campo)
+                    for campo in CONTADORES
+                ),
+            )
+            .where(*filtros, KpiDiario.fecha >= desde)
+            .group_by(KpiDiario.fecha, KpiDiario.estado, KpiDiario.prioridad)
+        )
+
+        finales = ESTADOS_FINALES[tipo_entidad]
+        backlog: dict[tuple[str, str], int] = defaultdict(int)
+
+        for estado, prioridad_fila, neto in session.execute(anteriores):
+            backlog[estado, prioridad_fila] += neto
+
+        por_dia: dict[date, list] = defaultdict(list)
+        for fila in session.execute(periodo):
+            por_dia[fila.fecha].append(fila)
+
+        kpis_dias = []
+        netos: dict[str, int] = defaultdict(int)
+        cerrados_periodo, segundos_periodo = 0, 0.0
+
+        for i in range(dias):
+            dia = desde + timedelta(days=i)
+            creados = cerrados = segundos = 0
+
+            for fila in por_dia.get(dia, []):
+                neto = fila.entradas - fila.salidas
+                backlog[fila.estado, fila.prioridad] += neto
+                netos[fila.estado] += neto
+                creados += fila.creados
+                cerrados += fila.cerrados
+                segundos += fila.segundos_hasta_cierre
+
+            cerrados_periodo += cerrados
+            segundos_periodo += segundos
+            kpis_dias.append(
+                KpiDia(
+                    fecha=dia,
+                    creados=creados,
+                    cerrados=cerrados,
+                    backlog=sum(
+                        cantidad
+                        for (estado, _), cantidad in backlog.items()
+                        if estado not in finales
+                    ),
+                    mttr_horas=segundos / cerrados / 3600 if cerrados else None,
+                )
+            )
+
+        backlog_por_estado: dict[str, int] = defaultdict(int)
+        backlog_por_prioridad: dict[str, int] = defaultdict(int)
+
+        for (estado, prioridad_fila), cantidad in backlog.items():
+            if estado not in finales and cantidad:
+                backlog_por_estado[estado] += cantidad
+                backlog_por_prioridad[prioridad_fila] += cantidad
+
+        tasa_exito = None
+        if tipo_entidad == TipoEntidad.CAMBIO:
+            exitosos = netos[EstadoCambio.CERRADO.value]
+            rechazados = netos[EstadoCambio.RECHAZADO.value]
+
+            if exitosos + rechazados > 0:
+                tasa_exito = exitosos / (exitosos + rechazados)
+
+        return Kpis(
+            dias=kpis_dias,
+            backlog_por_estado=backlog_por_estado,
+            backlog_por_prioridad=backlog_por_prioridad,
+            mttr_horas=(
+                segundos_periodo / cerrados_periodo / 3600 if cerrados_periodo else None
+            ),
+            tasa_exito=tasa_exito,
+        )
@@ -0,0 +1,49 @@
+import typing
+from functools import lru_cache
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
+from sqlmodel import SQLModel
+
+
+def modelo_relacionado(anotacion: typing.Any) -> type[SQLModel] | None:
+    # `list[ItemConfiguracionPublico]` -> `ItemConfiguracionPublico`
+    for arg in typing.get_args(anotacion) or (anotacion,):
+        if isinstance(arg, type) and issubclass(arg, SQLModel):
+            return arg
+    return None
+
+
+def _cargar(
+    tabla: type[SQLModel], publico: type[SQLModel], padre: LoaderOption | None
+) -> list[LoaderOption]:
+    relaciones = inspect(tabla).relationships
+    opciones = []
+
+    for nombre, field in publico.model_fields.items():
+        if nombre not in relaciones:
+            continue
+
+        atributo = getattr(tabla, nombre)
+        opcion = (
+            selectinload(atributo) if padre is None else padre.selectinload(atributo)
+        )
+        opciones.append(opcion)
+
+        publico_relacionado = modelo_relacionado(field.annotation)
+        if publico_relacionado is not None:
+            opciones.extend(
+                _cargar(relaciones[nombre].mapper.class_, publico_relacionado, opcion)
+            )
+
+    return opciones
+
+
+@lru_cache
+def eager_load(
+    tabla: type[SQLModel], publico: type[SQLModel]
+) -> tuple[LoaderOption, ...]:
+    """`selectinload` options for every relationship that `publico` serializes,
+    so a list of N rows costs one query per relationship instead of N."""
+    return tuple(_cargar(tabla, publico, None))
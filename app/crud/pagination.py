@@ -0,0 +1,92 @@
+import base64
+import binascii
+import json
+import uuid
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+
+from app.models.pagination import Paginacion
+
+
+def encode_clave(*valores: Any) -> str:
+    """Opaque cursor holding the sort key of the last item of a page."""
+    raw = json.dumps(valores, default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_clave(cursor: str) -> list[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        return json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def encode_cursor(fecha: datetime, id: uuid.UUID) -> str:
+    return encode_clave(fecha.isoformat(), id)
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        fecha, id = decode_clave(cursor)
+        return datetime.fromisoformat(fecha), uuid.UUID(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def paginar(
+    query: Any,
+    *,
+    paginacion: Paginacion,
+    columna_fecha: Any,
+    columna_id: Any,
+    descendente: bool = False,
+) -> Any:
+    """Keyset pagination over `(columna_fecha, columna_id)`, both columns
+    must be covered by a composite index on the table."""
+    if paginacion.cursor is not None:
+        fecha, id = decode_cursor(paginacion.cursor)
+        clave = tuple_(columna_fecha, columna_id)
+
+        if descendente:
+            query = query.where(clave < tuple_(fecha, id))
+        else:
+            query = query.where(clave > tuple_(fecha, id))
+
+    if descendente:
+        query = query.order_by(columna_fecha.desc(), columna_id.desc())
+    else:
+        query = query.order_by(columna_fecha, columna_id)
+
+    return query.limit(paginacion.limit)
+
+
+def siguiente_cursor(
+    items: Sequence[Any], *, paginacion: Paginacion, campo_fecha: str
+) -> str | None:
+    # A short page means there is nothing left to fetch
+    if len(items) < paginacion.limit:
+        return None
+
+    ultimo = items[-1]
+    return encode_cursor(getattr(ultimo, campo_fecha), ultimo.id)
+
+
+def set_pagination_headers(
+    response: Response,
+    items: Sequence[Any],
+    *,
+    paginacion: Paginacion,
+    campo_fecha: str = "fecha_creacion",
+) -> None:
+    response.headers["X-Limit"] = str(paginacion.limit)
+
+    next_cursor = siguiente_cursor(
+        items, paginacion=paginacion, campo_fecha=campo_fecha
+    )
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
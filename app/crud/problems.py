@@ -1,22 +1,87 @@
 import uuid
 from datetime import datetime, timezone
 
-from app.crud.audits import AuditoriaService
+from app.crud.bulk import faltantes, ids_existentes, resolver, seleccionar
+from app.crud.loaders import eager_load
+from app.crud.pagination import paginar
+from app.crud.unit_of_work import (
+    UnitOfWork,
+    comprobar_revision,
+    revision_desactualizada,
+)
 from app.models.auditoria import AuditoriaCrear
-from app.models.commons import Operacion, TipoEntidad
+from app.models.bulk import ResultadoLote
+from app.models.commons import Operacion, TipoEntidad, nueva_revision
 from fastapi import HTTPException
-from sqlmodel import Session, select
+from sqlalchemy import Select, insert
+from sqlmodel import Session, SQLModel, select
 
 from app.models.config_items import ItemConfiguracion
 from app.models.incidents import Incidente
+from app.models.pagination import Paginacion
 from app.models.problems import (
     EstadoProblema,
     Problema,
     ProblemaActualizar,
+    ProblemaActualizarLote,
     ProblemaCrear,
     ProblemaFilter,
     ProblemaPublicoConItems,
+    ProblemaPublicoConRelaciones,
 )
+from app.models.problems_incidents_link import ProblemaIncidenteLink
+from app.models.problems_items_link import ProblemaItemLink
+
+
+def _actualizar_problema(
+    problema: Problema,
+    problema_actualizar: ProblemaActualizar,
+    config_items: dict[uuid.UUID, ItemConfiguracion],
+    incidentes: dict[uuid.UUID, Incidente],
+) -> None:
+    if problema_actualizar.titulo is not None:
+        problema.titulo = problema_actualizar.titulo
+
+    if problema_actualizar.descripcion is not None:
+        problema.descripcion = problema_actualizar.descripcion
+
+    if problema_actualizar.estado is not None:
+        problema.estado = problema_actualizar.estado
+
+        if problema_actualizar.estado == EstadoProblema.CERRADO:
+            problema.fecha_cierre = datetime.now(timezone.utc)
+
+    if problema_actualizar.responsable_id is not None:
+        problema.responsable_id = problema_actualizar.responsable_id
+
+    if problema_actualizar.prioridad is not None:
+        problema.prioridad = problema_actualizar.prioridad
+
+    if problema_actualizar.solucion is not None:
+        problema.solucion = problema_actualizar.solucion
+
+    if problema_actualizar.id_incidentes is not None:
+        problema.incidentes = seleccionar(incidentes, problema_actualizar.id_incidentes)
+
+    if problema_actualizar.id_config_items is not None:
+        problema.config_items = seleccionar(
+            config_items, problema_actualizar.id_config_items
+        )
+
+    nueva_revision(problema)
+
+
+def filtrar_problemas(query: Select, problema_filter: ProblemaFilter) -> Select:
+    if problema_filter.titulo is not None:
+        query = query.where(Problema.titulo.ilike(f"%{problema_filter.titulo}%"))
+
+    if problema_filter.prioridad is not None:
+        query = query.where(Problema.prioridad == problema_filter.prioridad)
+
+    if problema_filter.estado is not None:
+        query = query.where(Problema.estado == problema_filter.estado)
+
+    return query
 
 
 class ProblemasService:
@@ -36,45 +101,117 @@ class ProblemasService:
         db_obj.config_items = config_items
         db_obj.incidentes = incidentes
 
-        session.add(db_obj)
-        session.commit()
-        session.refresh(db_obj)
-
-        estado_nuevo = db_obj.model_dump(mode='json')
-        auditoria_crear = AuditoriaCrear(
-            tipo_entidad=TipoEntidad.PROBLEMA,
-            id_entidad=db_obj.id,
-            operacion=Operacion.CREAR,
-            estado_nuevo=estado_nuevo,
-            actualizado_por=current_user_id,
+        with UnitOfWork(session) as uow:
+            session.add(db_obj)
+
+            uow.auditar(
+                tipo_entidad=TipoEntidad.PROBLEMA,
+                id_entidad=db_obj.id,
+                operacion=Operacion.CREAR,
+                estado_nuevo=db_obj.model_dump(mode="json"),
+                actualizado_por=current_user_id,
+            )
+
+        return db_obj
+
+    def create_problemas(
+        *,
+        session: Session,
+        problemas_crear: list[ProblemaCrear],
+        current_user_id: uuid.UUID,
+    ) -> list[ResultadoLote]:
+        id_config_items = ids_existentes(
+            session,
+            ItemConfiguracion,
+            (id for problema in problemas_crear for id in problema.id_config_items),
         )
-        AuditoriaService.registrar_operacion(
-            session=session, auditoria_crear=auditoria_crear
+        id_incidentes = ids_existentes(
+            session,
+            Incidente,
+            (id for problema in problemas_crear for id in problema.id_incidentes),
         )
 
-        return db_obj
+        resultados = []
+        filas = []
+        links_items = []
+        links_incidentes = []
+        auditorias = []
+
+        for indice, problema_crear in enumerate(problemas_crear):
+            error = faltantes(
+                "items de configuración",
+                problema_crear.id_config_items,
+                id_config_items,
+            ) or faltantes("incidentes", problema_crear.id_incidentes, id_incidentes)
+
+            if error is not None:
+                resultados.append(ResultadoLote(indice=indice, error=error))
+                continue
+
+            problema = Problema.model_validate(problema_crear)
+
+            filas.append(problema.model_dump())
+            links_items.extend(
+                {"id_problema": problema.id, "id_config_item": id_config_item}
+                for id_config_item in dict.fromkeys(problema_crear.id_config_items)
+            )
+            links_incidentes.extend(
+                {"id_problema": problema.id, "id_incidente": id_incidente}
+                for id_incidente in dict.fromkeys(problema_crear.id_incidentes)
+            )
+            auditorias.append(
+                AuditoriaCrear(
+                    tipo_entidad=TipoEntidad.PROBLEMA,
+                    id_entidad=problema.id,
+                    operacion=Operacion.CREAR,
+                    estado_nuevo=problema.model_dump(mode="json"),
+                    actualizado_por=current_user_id,
+                )
+            )
+            resultados.append(ResultadoLote(indice=indice, id=problema.id))
 
-    def get_problemas(
-        *, session: Session, problema_filter: ProblemaFilter
-    ) -> list[ProblemaPublicoConItems]:
-        query = select(Problema)
+        with UnitOfWork(session) as uow:
+            if filas:
+                session.execute(insert(Problema), filas)
+            if links_items:
+                session.execute(insert(ProblemaItemLink), links_items)
+            if links_incidentes:
+                session.execute(insert(ProblemaIncidenteLink), links_incidentes)
 
-        if problema_filter.titulo is not None:
-            query = query.where(Problema.titulo.ilike(f"%{problema_filter.titulo}%"))
+            uow.auditar_lote(auditorias)
 
-        if problema_filter.prioridad is not None:
-            query = query.where(Problema.prioridad == problema_filter.prioridad)
+        return resultados
 
-        if problema_filter.estado is not None:
-            query = query.where(Problema.estado == problema_filter.estado)
+    def get_problemas(
+        *,
+        session: Session,
+        problema_filter: ProblemaFilter,
+        paginacion: Paginacion = Paginacion(),
+        respuesta: type[SQLModel] = ProblemaPublicoConRelaciones,
+    ) -> list[ProblemaPublicoConItems]:
+        query = select(Problema).options(*eager_load(Problema, respuesta))
+        query = filtrar_problemas(query, problema_filter)
+        query = paginar(
+            query,
+            paginacion=paginacion,
+            columna_fecha=Problema.fecha_creacion,
+            columna_id=Problema.id,
+        )
 
         problemas = session.exec(query).all()
 
         return problemas
 
-    def get_problema_by_id(*, session: Session, id_problema: uuid.UUID) -> Problema:
+    def get_problema_by_id(
+        *,
+        session: Session,
+        id_problema: uuid.UUID,
+        respuesta: type[SQLModel] = ProblemaPublicoConRelaciones,
+    ) -> Problema:
         problema = session.exec(
-            select(Problema).where(Problema.id == id_problema)
+            select(Problema)
+            .where(Problema.id == id_problema)
+            .options(*eager_load(Problema, respuesta))
         ).first()
 
         if not problema:
@@ -87,64 +224,131 @@ class ProblemasService:
         session: Session,
         id_problema: uuid.UUID,
         problema_actualizar: ProblemaActualizar,
+        current_user_id: uuid.UUID,
     ) -> ProblemaPublicoConItems:
         problema = ProblemasService.get_problema_by_id(
             session=session, id_problema=id_problema
         )
+        comprobar_revision(problema, problema_actualizar.revision)
 
-        if problema_actualizar.titulo is not None:
-            problema.titulo = problema_actualizar.titulo
+        config_items = resolver(
+            session, ItemConfiguracion, problema_actualizar.id_config_items or []
+        )
+        incidentes = resolver(
+            session, Incidente, problema_actualizar.id_incidentes or []
+        )
 
-        if problema_actualizar.descripcion is not None:
-            problema.descripcion = problema_actualizar.descripcion
+        estado_anterior = problema.model_dump(mode="json")
+        _actualizar_problema(problema, problema_actualizar, config_items, incidentes)
 
-        if problema_actualizar.estado is not None:
-            problema.estado = problema_actualizar.estado
+        with UnitOfWork(session) as uow:
+            session.add(problema)
 
-            if problema_actualizar.estado == EstadoProblema.CERRADO:
-                problema.fecha_cierre = datetime.now(timezone.utc)
+            uow.auditar(
+                tipo_entidad=TipoEntidad.PROBLEMA,
+                id_entidad=problema.id,
+                operacion=Operacion.ACTUALIZAR,
+                estado_nuevo=problema.model_dump(mode="json"),
+                actualizado_por=current_user_id,
+                estado_anterior=estado_anterior,
+            )
 
-        if problema_actualizar.responsable_id is not None:
-            problema.responsable_id = problema_actualizar.responsable_id
+        return problema
 
-        if problema_actualizar.prioridad is not None:
-            problema.prioridad = problema_actualizar.prioridad
+    def update_problemas(
+        *,
+        session: Session,
+        problemas_actualizar: list[ProblemaActualizarLote],
+        current_user_id: uuid.UUID,
+    ) -> list[ResultadoLote]:
+        problemas = resolver(
+            session,
+            Problema,
+            (problema.id for problema in problemas_actualizar),
+            *eager_load(Problema, ProblemaPublicoConRelaciones),
+        )
+        config_items = resolver(
+            session,
+            ItemConfiguracion,
+            (
+                id
+                for problema in problemas_actualizar
+                for id in problema.id_config_items or []
+            ),
+        )
+        incidentes = resolver(
+            session,
+            Incidente,
+            (
+                id
+                for problema in problemas_actualizar
+                for id in problema.id_incidentes or []
+            ),
+        )
 
-        if problema_actualizar.solucion is not None:
-            problema.solucion = problema_actualizar.solucion
+        resultados = []
+        auditorias = []
+
+        for indice, problema_actualizar in enumerate(problemas_actualizar):
+            problema = problemas.get(problema_actualizar.id)
+            error = (
+                "No existe problema"
+                if problema is None
+                else revision_desactualizada(problema, problema_actualizar.revision)
+                or faltantes(
+                    "items de configuración",
+                    problema_actualizar.id_config_items,
+                    config_items,
+                )
+                or faltantes(
+                    "incidentes", problema_actualizar.id_incidentes, incidentes
+                )
+            )
 
-        if problema_actualizar.id_incidentes is not None:
-            incidentes = session.exec(
-                select(Incidente).where(
-                    Incidente.id.in_(problema_actualizar.id_incidentes)
+            if error is not None:
+                resultados.append(
+                    ResultadoLote(indice=indice, id=problema_actualizar.id, error=error)
                 )
-            ).all()
+                continue
 
-            problema.incidentes = incidentes
+            estado_anterior = problema.model_dump(mode="json")
+            _actualizar_problema(
+                problema, problema_actualizar, config_items, incidentes
+            )
 
-        if problema_actualizar.id_config_items is not None:
-            config_items = session.exec(
-                select(ItemConfiguracion).where(
-                    ItemConfiguracion.id.in_(problema_actualizar.id_config_items)
+            auditorias.append(
+                AuditoriaCrear(
+                    tipo_entidad=TipoEntidad.PROBLEMA,
+                    id_entidad=problema.id,
+                    operacion=Operacion.ACTUALIZAR,
+                    estado_nuevo=problema.model_dump(mode="json"),
+                    actualizado_por=current_user_id,
+                    estado_anterior=estado_anterior,
                 )
-            ).all()
+            )
+            resultados.append(ResultadoLote(indice=indice, id=problema.id))
 
-            problema.config_items = config_items
+        with UnitOfWork(session) as uow:
+            uow.auditar_lote(auditorias)
 
-        session.add(problema)
-        session.commit()
-        session.refresh(problema)
-
-        return problema
+        return resultados
 
     def delete_problema(
-        *, session: Session, id_problema: uuid.UUID
+        *, session: Session, id_problema: uuid.UUID, current_user_id: uuid.UUID
     ) -> ProblemaPublicoConItems:
         problema = ProblemasService.get_problema_by_id(
             session=session, id_problema=id_problema
         )
 
-        session.delete(problema)
-        session.commit()
+        with UnitOfWork(session) as uow:
+            uow.auditar(
+                tipo_entidad=TipoEntidad.PROBLEMA,
+                id_entidad=problema.id,
+                operacion=Operacion.ELIMINAR,
+                estado_nuevo=problema.model_dump(mode="json"),
+                actualizado_por=current_user_id,
+            )
+
+            session.delete(problema)
 
         return problema
@@ -0,0 +1,197 @@
+import uuid
+
+from fastapi import HTTPException
+from sqlalchemy import (
+    ColumnElement,
+    String,
+    case,
+    cast,
+    func,
+    literal,
+    literal_column,
+    null,
+    or_,
+    tuple_,
+    union_all,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlmodel import Session, select
+
+from app.crud.pagination import decode_clave, encode_clave
+from app.models.changes import Cambio
+from app.models.commons import TipoEntidad
+from app.models.config_items import ItemConfiguracion
+from app.models.incidents import Incidente
+from app.models.pagination import Paginacion
+from app.models.problems import Problema
+from app.models.search import (
+    Busqueda,
+    BusquedaFilter,
+    FacetasBusqueda,
+    ResultadoBusqueda,
+)
+
+# Searched columns of every entity, the title first
+_ENTIDADES = [
+    (TipoEntidad.CAMBIO, Cambio, [Cambio.titulo, Cambio.descripcion]),
+    (TipoEntidad.INCIDENTE, Incidente, [Incidente.titulo, Incidente.descripcion]),
+    (TipoEntidad.PROBLEMA, Problema, [Problema.titulo, Problema.descripcion]),
+    (
+        TipoEntidad.CONFIG_ITEM,
+        ItemConfiguracion,
+        [
+            ItemConfiguracion.nombre,
+            ItemConfiguracion.descripcion,
+            ItemConfiguracion.version,
+        ],
+    ),
+]
+
+FACETAS = ["tipo_entidad", "estado", "prioridad", "categoria"]
+
+
+def _coincidencia_postgres(
+    modelo: type, columnas: list, q: str
+) -> tuple[ColumnElement[bool], ColumnElement[float]]:
+    # `busqueda` is the tsvector generated column created by 19aa4eccc040
+    busqueda = literal_column(f"{modelo.__tablename__}.busqueda", type_=TSVECTOR)
+    consulta = func.websearch_to_tsquery("spanish", q)
+    titulo = columnas[0]
+
+    # The trigram index on the title catches partial words the tsvector misses
+    coincide = or_(busqueda.op("@@")(consulta), titulo.ilike(f"%{q}%"))
+    relevancia = func.ts_rank_cd(busqueda, consulta) + func.similarity(titulo, q)
+
+    return coincide, relevancia
+
+
+def _coincidencia_ilike(
+    columnas: list, q: str
+) -> tuple[ColumnElement[bool], ColumnElement[float]]:
+    # Other databases (SQLite in tests): a match in the title counts double
+    coincidencias = [columna.ilike(f"%{q}%") for columna in columnas]
+    pesos = [2] + [1] * (len(columnas) - 1)
+
+    relevancia = sum(
+        case((coincidencia, peso), else_=0)
+        for coincidencia, peso in zip(coincidencias, pesos, strict=True)
+    )
+
+    return or_(*coincidencias), relevancia
+
+
+def _faceta(modelo: type, nombre: str) -> ColumnElement:
+    # Each entity has its own enum type, the union needs plain text
+    if not hasattr(modelo, nombre):
+        return null().cast(String)
+
+    return cast(getattr(modelo, nombre), String)
+
+
+class BusquedaService:
+    def buscar(
+        *,
+        session: Session,
+        busqueda_filter: BusquedaFilter,
+        paginacion: Paginacion = Paginacion(),
+    ) -> tuple[Busqueda, str | None]:
+        """Ranked matches of the four entities and their facet counts, with
+        the cursor of the next page if there is one."""
+        coincidencias = BusquedaService._coincidencias(
+            session=session, busqueda_filter=busqueda_filter
+        )
+
+        query = select(coincidencias).order_by(
+            coincidencias.c.relevancia.desc(), coincidencias.c.id.desc()
+        )
+
+        if paginacion.cursor is not None:
+            try:
+                relevancia, id = decode_clave(paginacion.cursor)
+                clave = (float(relevancia), uuid.UUID(id))
+            except (ValueError, TypeError):
+                raise HTTPException(status_code=400, detail="Cursor inválido")
+
+            query = query.where(
+                tuple_(coincidencias.c.relevancia, coincidencias.c.id) < tuple_(*clave)
+            )
+
+        resultados = [
+            ResultadoBusqueda.model_validate(resultado)
+            for resultado in session.execute(query.limit(paginacion.limit)).mappings()
+        ]
+
+        facetas = BusquedaService._facetas(session=session, coincidencias=coincidencias)
+        busqueda = Busqueda(
+            total=sum(facetas.tipo_entidad.values()),
+            facetas=facetas,
+            resultados=resultados,
+        )
+
+        siguiente = None
+        if len(resultados) == paginacion.limit:
+            ultimo = resultados[-1]
+            siguiente = encode_clave(ultimo.relevancia, ultimo.id)
+
+        return busqueda, siguiente
+
+    def _coincidencias(*, session: Session, busqueda_filter: BusquedaFilter):
+        postgres = session.get_bind().dialect.name == "postgresql"
+        q = busqueda_filter.q
+        selects = []
+
+        for tipo_entidad, modelo, columnas in _ENTIDADES:
+            if busqueda_filter.tipo_entidad not in (None, tipo_entidad):
+                continue
+
+            if postgres:
+                coincide, relevancia = _coincidencia_postgres(modelo, columnas, q)
+            else:
+                coincide, relevancia = _coincidencia_ilike(columnas, q)
+
+            selects.append(
+                select(
+                    literal(tipo_entidad.value).label("tipo_entidad"),
+                    modelo.id.label("id"),
+                    columnas[0].label("titulo"),
+                    modelo.descripcion.label("descripcion"),
+                    _faceta(modelo, "estado").label("estado"),
+                    _faceta(modelo, "prioridad").label("prioridad"),
+                    _faceta(modelo, "categoria").label("categoria"),
+                    relevancia.label("relevancia"),
+                ).where(coincide)
+            )
+
+        coincidencias = union_all(*selects).subquery()
+        query = select(coincidencias)
+
+        for nombre in ["estado", "prioridad", "categoria"]:
+            valor = getattr(busqueda_filter, nombre)
+
+            if valor is not None:
+                query = query.where(coincidencias.c[nombre] == valor)
+
+        # Referenced by both the page and the facets
+        return query.cte("coincidencias")
+
+    def _facetas(*, session: Session, coincidencias) -> FacetasBusqueda:
+        # A single grouped query, one branch per facet
+        query = union_all(
+            *(
+                select(
+                    literal(nombre).label("faceta"),
+                    coincidencias.c[nombre].label("valor"),
+                    func.count().label("cantidad"),
+                )
+                .where(coincidencias.c[nombre].is_not(None))
+                .group_by(coincidencias.c[nombre])
+                for nombre in FACETAS
+            )
+        )
+
+        facetas: dict[str, dict[str, int]] = {nombre: {} for nombre in FACETAS}
+
+        for faceta, valor, cantidad in session.execute(query):
+            facetas[faceta][valor] = cantidad
+
+        return FacetasBusqueda.model_validate(facetas)
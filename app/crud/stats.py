@@ -0,0 +1,121 @@
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import Date, String, cast, func, literal, union_all
+from sqlmodel import Session, select
+
+from app.models.changes import Cambio
+from app.models.commons import TipoEntidad
+from app.models.incidents import Incidente
+from app.models.problems import Problema
+from app.models.stats import Estadisticas, TendenciaDiaria
+
+MODELOS = {
+    TipoEntidad.INCIDENTE: Incidente,
+    TipoEntidad.PROBLEMA: Problema,
+    TipoEntidad.CAMBIO: Cambio,
+}
+
+
+def _limites(desde: date, hasta: date) -> tuple[datetime, datetime]:
+    # Days are UTC, like the dates stored by the app
+    inicio = datetime.combine(desde, time.min, tzinfo=timezone.utc)
+    fin = datetime.combine(hasta + timedelta(days=1), time.min, tzinfo=timezone.utc)
+
+    return inicio, fin
+
+
+class EstadisticasService:
+    def get_estadisticas(
+        *, session: Session, tipo_entidad: TipoEntidad, hasta: date, dias: int
+    ) -> Estadisticas:
+        """Counts, daily trend and mean time-to-close of the `dias` days up to
+        `hasta` (included), all computed by the database."""
+        modelo = MODELOS[tipo_entidad]
+        desde = hasta - timedelta(days=dias - 1)
+
+        conteos = EstadisticasService._conteos(session=session, modelo=modelo)
+        tendencia = EstadisticasService._tendencia(
+            session=session, modelo=modelo, desde=desde, hasta=hasta
+        )
+        tiempo_medio = EstadisticasService._tiempo_medio_cierre(
+            session=session, modelo=modelo, desde=desde, hasta=hasta
+        )
+
+        return Estadisticas(
+            total=sum(conteos["estado"].values()),
+            por_estado=conteos["estado"],
+            por_prioridad=conteos["prioridad"],
+            tendencia=tendencia,
+            tiempo_medio_cierre_horas=tiempo_medio,
+        )
+
+    def _conteos(*, session: Session, modelo: type) -> dict[str, dict[str, int]]:
+        query = union_all(
+            *(
+                select(
+                    literal(nombre).label("campo"),
+                    cast(getattr(modelo, nombre), String).label("valor"),
+                    func.count().label("cantidad"),
+                ).group_by(getattr(modelo, nombre))
+                for nombre in ["estado", "prioridad"]
+            )
+        )
+
+        conteos: dict[str, dict[str, int]] = {"estado": {}, "prioridad": {}}
+
+        for campo, valor, cantidad in session.execute(query):
+            conteos[campo][valor] = cantidad
+
+        return conteos
+
+    def _tendencia(
+        *, session: Session, modelo: type, desde: date, hasta: date
+    ) -> list[TendenciaDiaria]:
+        inicio, fin = _limites(desde, hasta)
+        conteos: dict[str, dict[date, int]] = {}
+
+        for campo, columna in [
+            ("abiertos", modelo.fecha_creacion),
+            ("cerrados", modelo.fecha_cierre),
+        ]:
+            dia = func.date(columna, type_=Date)
+            query = (
+                select(dia, func.count())
+                .where(columna >= inicio, columna < fin)
+                .group_by(dia)
+            )
+            conteos[campo] = dict(session.execute(query).all())
+
+        # Days without activity are not returned by the database
+        fechas = [desde + timedelta(days=i) for i in range((hasta - desde).days + 1)]
+
+        return [
+            TendenciaDiaria(
+                fecha=fecha,
+                abiertos=conteos["abiertos"].get(fecha, 0),
+                cerrados=conteos["cerrados"].get(fecha, 0),
+            )
+            for fecha in fechas
+        ]
+
+    def _tiempo_medio_cierre(
+        *, session: Session, modelo: type, desde: date, hasta: date
+    ) -> float | None:
+        if session.get_bind().dialect.name == "postgresql":
+            segundos = func.extract(
+                "epoch", modelo.fecha_cierre - modelo.fecha_creacion
+            )
+        else:
+            segundos = (
+                func.julianday(modelo.fecha_cierre)
+                - func.julianday(modelo.fecha_creacion)
+            ) * 86400
+
+        inicio, fin = _limites(desde, hasta)
+        promedio = session.execute(
+            select(func.avg(segundos)).where(
+                modelo.fecha_cierre >= inicio, modelo.fecha_cierre < fin
+            )
+        ).scalar_one()
+
+        return None if promedio is None else float(promedio) / 3600
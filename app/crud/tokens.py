@@ -0,0 +1,138 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import jwt
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select
+
+from app.core import security
+from app.crud.users import UsuariosService
+from app.models.token import Token, TokenPayload, TokenRevocado
+from app.models.users import Usuario
+from app.utils.config import settings
+
+
+class _RefreshPayload(TokenPayload):
+    sub: str
+    exp: int
+    jti: uuid.UUID
+    fam: uuid.UUID
+
+
+def _familia_expira() -> datetime:
+    # Every token of a family expires before the last one issued, at most now
+    return datetime.now(timezone.utc) + timedelta(
+        minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES
+    )
+
+
+def _token_invalido() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token inválido"
+    )
+
+
+class TokensService:
+    def crear_tokens(*, usuario: Usuario, familia: uuid.UUID | None = None) -> Token:
+        """Access and refresh token pair. `familia` groups every refresh token
+        descending from the same login, a new login starts a new one."""
+        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+
+        return Token(
+            access_token=security.create_access_token(
+                usuario.id,
+                expires_delta=access_token_expires,
+                claims={
+                    "nombre": usuario.nombre,
+                    "apellido": usuario.apellido,
+                    "email": usuario.email,
+                    "rol": usuario.rol,
+                },
+            ),
+            refresh_token=security.create_refresh_token(
+                usuario.id,
+                expires_delta=timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES),
+                jti=uuid.uuid4(),
+                fam=familia or uuid.uuid4(),
+            ),
+            expires_in=int(access_token_expires.total_seconds()),
+        )
+
+    def refrescar(*, session: Session, refresh_token: str) -> Token:
+        """Exchanges a refresh token for a new pair. Each refresh token works
+        once: using one again revokes the whole family, since either the
+        client or whoever stole it is replaying it."""
+        token_data = TokensService._decodificar(refresh_token)
+        expira = datetime.fromtimestamp(token_data.exp, timezone.utc)
+
+        revocados = session.exec(
+            select(TokenRevocado.jti).where(
+                TokenRevocado.jti.in_([token_data.jti, token_data.fam])
+            )
+        ).all()
+
+        if token_data.fam in revocados:
+            raise _token_invalido()
+
+        # Concurrent refreshes with the same token: only one inserts the row
+        if token_data.jti in revocados or not TokensService._revocar(
+            session=session, jti=token_data.jti, expira=expira
+        ):
+            TokensService._revocar(
+                session=session, jti=token_data.fam, expira=_familia_expira()
+            )
+            session.commit()
+            raise _token_invalido()
+
+        usuario = UsuariosService.get_usuario_autenticado(
+            session=session, id_usuario=uuid.UUID(token_data.sub)
+        )
+
+        if usuario is None:
+            session.rollback()
+            raise _token_invalido()
+
+        session.commit()
+
+        return TokensService.crear_tokens(usuario=usuario, familia=token_data.fam)
+
+    def revocar(*, session: Session, refresh_token: str) -> None:
+        """Logout: revokes every refresh token of the login of `refresh_token`."""
+        token_data = TokensService._decodificar(refresh_token)
+
+        TokensService._revocar(
+            session=session, jti=token_data.fam, expira=_familia_expira()
+        )
+        session.commit()
+
+    def _decodificar(refresh_token: str) -> _RefreshPayload:
+        try:
+            return _RefreshPayload(**security.decode_refresh_token(refresh_token))
+        except (jwt.InvalidTokenError, ValidationError):
+            raise _token_invalido()
+
+    def _revocar(*, session: Session, jti: uuid.UUID, expira: datetime) -> bool:
+        """False if it was already revoked."""
+        # Rows of expired tokens are useless, dropping them keeps the table small
+        session.execute(
+            delete(TokenRevocado).where(
+                TokenRevocado.expira < datetime.now(timezone.utc)
+            )
+        )
+
+        if session.get_bind().dialect.name == "postgresql":
+            insert = postgresql.insert
+        else:
+            insert = sqlite.insert
+
+        query = (
+            insert(TokenRevocado)
+            .values(jti=jti, expira=expira)
+            .on_conflict_do_nothing(index_elements=["jti"])
+            .returning(TokenRevocado.jti)
+        )
+
+        return session.execute(query).first() is not None
@@ -0,0 +1,111 @@
+import uuid
+from types import TracebackType
+
+from fastapi import HTTPException
+from sqlalchemy.orm.exc import StaleDataError
+from sqlmodel import Session
+
+from app.core.audit_writer import audit_writer
+from app.crud.audits import AuditoriaService, fila_auditoria
+from app.models.auditoria import AuditoriaCrear
+from app.models.commons import Operacion, TipoEntidad, Versionado
+
+CONFLICTO = "Modificado por otra operación, vuelva a leerlo y reintente"
+
+
+def revision_desactualizada(entidad: Versionado, revision: int | None) -> str | None:
+    """Error of an update made from `revision` if the entity changed since."""
+    if revision is None or revision == entidad.revision:
+        return None
+
+    return f"{CONFLICTO} (revisión {revision}, actual {entidad.revision})"
+
+
+def comprobar_revision(entidad: Versionado, revision: int | None) -> None:
+    error = revision_desactualizada(entidad, revision)
+
+    if error is not None:
+        raise HTTPException(status_code=409, detail=error)
+
+
+class UnitOfWork:
+    """Groups an entity write and its audit rows so both are flushed and
+    committed together, or rolled back together if anything raises.
+
+    When the audit writer is running (AUDIT_MODE=async) the audit rows are
+    handed to it after the commit instead.
+
+    A versioned entity written by someone else since it was read (see
+    `Versionado`) rolls everything back and answers 409."""
+
+    def __init__(self, session: Session) -> None:
+        self.session = session
+        self._pendientes: list[AuditoriaCrear] = []
+
+    def __enter__(self) -> "UnitOfWork":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        if exc_type is not None:
+            self.session.rollback()
+
+            if issubclass(exc_type, StaleDataError):
+                raise HTTPException(status_code=409, detail=CONFLICTO) from exc
+            return
+
+        # Read once: if the writer stops in between, the rows must still be
+        # written either inline or by the request after submit hands them back
+        asincrono = audit_writer.running
+
+        try:
+            if not asincrono:
+                AuditoriaService.registrar_operaciones(
+                    session=self.session, auditorias_crear=self._pendientes
+                )
+
+            self.session.commit()
+        except StaleDataError:
+            self.session.rollback()
+            raise HTTPException(status_code=409, detail=CONFLICTO)
+
+        if asincrono:
+            self._encolar_auditorias()
+
+    def _encolar_auditorias(self) -> None:
+        filas = [fila_auditoria(auditoria) for auditoria in self._pendientes]
+        rechazadas = audit_writer.submit(filas)
+
+        # Backpressure: a full queue, or a stopping writer, makes the request
+        # write its own rows
+        if rechazadas:
+            AuditoriaService.registrar_filas(session=self.session, filas=rechazadas)
+            self.session.commit()
+
+    def auditar(
+        self,
+        *,
+        tipo_entidad: TipoEntidad,
+        id_entidad: uuid.UUID,
+        operacion: Operacion,
+        estado_nuevo: dict,
+        actualizado_por: uuid.UUID,
+        estado_anterior: dict | None = None,
+    ) -> None:
+        self._pendientes.append(
+            AuditoriaCrear(
+                tipo_entidad=tipo_entidad,
+                id_entidad=id_entidad,
+                operacion=operacion,
+                estado_nuevo=estado_nuevo,
+                actualizado_por=actualizado_por,
+                estado_anterior=estado_anterior,
+            )
+        )
+
+    def auditar_lote(self, auditorias_crear: list[AuditoriaCrear]) -> None:
+        self._pendientes.extend(auditorias_crear)
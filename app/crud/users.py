@@ -3,8 +3,17 @@ import uuid
 from fastapi import HTTPException
 from sqlmodel import Session, select
 
-from app.core.security import get_password_hash, verify_password
+from app.core.cache import TTLCache
+from app.core.security import get_password_hash, needs_rehash, verify_password
 from app.models.users import Usuario, UsuarioFilter, UsuarioRegistrar
+from app.utils.config import settings
+
+# Authenticated users by id. Other workers only see a change after the TTL.
+usuarios_cache = TTLCache(
+    name="users",
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    maxsize=settings.USER_CACHE_MAXSIZE,
+)
 
 
 class UsuariosService:
@@ -22,6 +31,8 @@ class UsuariosService:
         session.commit()
         session.refresh(db_obj)
 
+        usuarios_cache.invalidate(db_obj.id)
+
         return db_obj
 
     def get_user_by_email(*, session: Session, email: str) -> Usuario | None:
@@ -34,6 +45,15 @@ class UsuariosService:
             return None
         if not verify_password(password, db_user.contraseña_hasheada):
             return None
+
+        # The plain password is only known here, so this is when a hash made
+        # with another BCRYPT_ROUNDS can be replaced
+        if needs_rehash(db_user.contraseña_hasheada):
+            db_user.contraseña_hasheada = get_password_hash(password)
+            session.add(db_user)
+            session.commit()
+            UsuariosService.invalidar_usuario(id_usuario=db_user.id)
+
         return db_user
 
     def get_usuarios(
@@ -53,3 +73,25 @@ class UsuariosService:
             raise HTTPException(status_code=404, detail="No existe usuario con ese id")
 
         return usuario
+
+    def get_usuario_autenticado(
+        *, session: Session, id_usuario: uuid.UUID
+    ) -> Usuario | None:
+        usuario = usuarios_cache.get(id_usuario)
+
+        if usuario is None:
+            usuario = session.get(Usuario, id_usuario)
+
+            if usuario is None:
+                return None
+
+            # A copy detached from the session, shared by the requests of
+            # this worker, so it must not be modified
+            usuario = Usuario.model_validate(usuario)
+            usuarios_cache.set(id_usuario, usuario)
+
+        return usuario
+
+    def invalidar_usuario(*, id_usuario: uuid.UUID) -> None:
+        """Has to be called by every write to a user."""
+        usuarios_cache.invalidate(id_usuario)
@@ -0,0 +1,65 @@
+import argparse
+import logging
+from pathlib import Path
+
+from sqlmodel import Session, select
+
+from app.core.db import engine
+from app.crud.config_items import ItemsConfiguracionService as crud
+from app.crud.imports import formato_de_archivo
+from app.models.users import Usuario
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def importar(archivo: Path, email: str) -> None:
+    formato, comprimido = formato_de_archivo(archivo.name)
+
+    with Session(engine) as session, archivo.open("rb") as entrada:
+        usuario = session.exec(select(Usuario).where(Usuario.email == email)).first()
+
+        if usuario is None:
+            raise SystemExit(f"No existe usuario: {email}")
+
+        resultado = crud.importar_items_configuracion(
+            session=session,
+            archivo=entrada,
+            formato=formato,
+            comprimido=comprimido,
+            current_user_id=usuario.id,
+        )
+
+    for error in resultado.errores:
+        logger.warning("Row %d not imported: %s", error.indice, error.error)
+
+    logger.info(
+        "%d config items created, %d updated, %d rows with errors",
+        resultado.creados,
+        resultado.actualizados,
+        len(resultado.errores),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Creates or updates config items from a CSV or NDJSON file"
+    )
+    parser.add_argument(
+        "archivo",
+        type=Path,
+        help=".csv, .ndjson or .jsonl, optionally gzipped (.gz)",
+    )
+    parser.add_argument(
+        "--email",
+        required=True,
+        help="user the items are audited as, and owner of the rows without one",
+    )
+    args = parser.parse_args()
+
+    logger.info("Importing config items from %s", args.archivo)
+    importar(args.archivo, args.email)
+
+
+if __name__ == "__main__":
+    main()
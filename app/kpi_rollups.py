@@ -0,0 +1,41 @@
+import argparse
+import logging
+
+from sqlmodel import Session, select
+
+from app.core.db import engine
+from app.crud.kpis import KpisService as crud
+from app.models.kpis import KpiDiario
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def rebuild(solo_si_vacio: bool) -> None:
+    with Session(engine) as session:
+        if solo_si_vacio and session.exec(select(KpiDiario).limit(1)).first():
+            logger.info("KPI rollups already filled")
+            return
+
+        leidas = crud.reconstruir(session=session)
+        logger.info("Replayed %d audit rows", leidas)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Rebuilds the daily KPI rollups from the audit log"
+    )
+    parser.add_argument(
+        "--if-empty",
+        action="store_true",
+        help="only rebuild when there are no rollups yet (first deploy)",
+    )
+    args = parser.parse_args()
+
+    logger.info("Rebuilding KPI rollups")
+    rebuild(args.if_empty)
+    logger.info("KPI rollups rebuilt")
+
+
+if __name__ == "__main__":
+    main()
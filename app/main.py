@@ -1,4 +1,8 @@
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
@@ -6,6 +10,10 @@ from fastapi.responses import JSONResponse
 from fastapi import Request
 
 from app.api.main import api_router
+from app.core.audit_writer import audit_writer
+from app.core.db import engine
+from app.core.events import eventos
+from app.core.hashing import HashingSaturado
 from app.utils.config import settings
 
 
@@ -13,8 +21,27 @@ def custom_generate_unique_id(route: APIRoute) -> str:
     return f"{route.tags[0]}-{route.name}"
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    if settings.AUDIT_MODE == "async":
+        audit_writer.start(engine)
+
+    # Writes made by every worker reach the /events streams of this one
+    if engine.dialect.name == "postgresql":
+        eventos.start(engine)
+
+    yield
+
+    # Ends the open /events streams, clients reconnect to another worker
+    await run_in_threadpool(eventos.stop)
+
+    # Graceful shutdown: wait until every queued audit row is written
+    await run_in_threadpool(audit_writer.stop)
+
+
 app = FastAPI(
     title="9559-backend",
+    lifespan=lifespan,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
 )
@@ -26,14 +53,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Limit", "X-Next-Cursor", "ETag", "Last-Modified"],
 )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    errors = [{"field": err['loc'][1], "message": err['msg']} for err in exc.errors()]
+    # Bulk bodies are lists, so the field path also carries the row index
+    errors = [
+        {"field": ".".join(str(loc) for loc in err["loc"][1:]), "message": err["msg"]}
+        for err in exc.errors()
+    ]
     return JSONResponse(
         status_code=422,
         content={"message": "Validation Error", "details": errors},
     )
+
+
+@app.exception_handler(HashingSaturado)
+async def hashing_saturado_handler(request: Request, exc: HashingSaturado):
+    # Fail fast: retrying soon is cheaper than queueing behind a login burst
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Demasiados inicios de sesión, reintente en unos segundos"},
+        headers={"Retry-After": "1"},
+    )
@@ -3,10 +3,11 @@ import uuid
 from datetime import datetime, timezone
 from .commons import TipoEntidad, Operacion
 
+from sqlalchemy import Index, text
 from sqlmodel import Field, SQLModel, JSON
 
   
-class AuditoriaCrear(SQLModel):
+class AuditoriaBase(SQLModel):
   tipo_entidad: TipoEntidad
   id_entidad: uuid.UUID
   operacion: Operacion
@@ -14,10 +15,42 @@ class AuditoriaCrear(SQLModel):
   estado_nuevo: dict = Field(sa_type=JSON, default=None)
 
 
-class Auditoria(AuditoriaCrear, table=True):
+class AuditoriaCrear(AuditoriaBase):
+  # State the update started from, when the caller has it. Not stored, the
+  # rollups take their transitions from it instead of from the audit log
+  estado_anterior: dict | None = None
+
+
+class Auditoria(AuditoriaBase, table=True):
     __tablename__: str = "auditorias"
-    fecha_actualizacion: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    __table_args__ = (
+        Index("ix_auditorias_fecha_actualizacion_id", "fecha_actualizacion", "id"),
+        Index("ix_auditorias_id_entidad_version", "id_entidad", "version"),
+        # /history and the audit list filters, in the order they are paginated
+        Index(
+            "ix_auditorias_tipo_entidad_id_entidad_fecha",
+            "tipo_entidad",
+            "id_entidad",
+            text("fecha_actualizacion DESC"),
+            text("id DESC"),
+        ),
+        Index(
+            "ix_auditorias_operacion_fecha", "operacion", "fecha_actualizacion", "id"
+        ),
+    )
+    # Primary key (id, fecha_actualizacion) as in the 07ca75a85b92 migration
     id: uuid.UUID | None = Field(default_factory=uuid.uuid4, primary_key=True)
+    # Part of the primary key because the table is partitioned by it
+    fecha_actualizacion: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc), primary_key=True
+    )
+    # Position in the history of the entity, starting at 1
+    version: int = Field(default=1)
+    # Otherwise `estado_nuevo` only has the fields that changed since `version - 1`
+    es_snapshot: bool = Field(default=True)
+    # State an archived month left, not a write: kept out of /history, /audits,
+    # exports, events and the rollups
+    es_arrastre: bool = Field(default=False)
     
       
 @dataclass
@@ -25,4 +58,7 @@ class AuditoriaFilter:
   tipo_entidad: TipoEntidad | None = None
   id_entidad: uuid.UUID | None = None
   operacion: Operacion | None = None
+  # [desde, hasta) on fecha_actualizacion, lets Postgres skip whole partitions
+  desde: datetime | None = None
+  hasta: datetime | None = None
   
\ No newline at end of file
@@ -0,0 +1,19 @@
+import uuid
+
+from sqlmodel import SQLModel
+
+LOTE_MAXIMO = 10_000
+
+
+class ResultadoLote(SQLModel):
+    # Position of the row in the request body
+    indice: int
+    id: uuid.UUID | None = None
+    error: str | None = None
+
+
+class ResultadoImportacion(SQLModel):
+    creados: int = 0
+    actualizados: int = 0
+    # Only the rows that were not imported, `indice` counts from the first one
+    errores: list[ResultadoLote] = []
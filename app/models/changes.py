@@ -4,6 +4,7 @@ from datetime import datetime, timezone
 from enum import Enum
 from typing import TYPE_CHECKING
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 from app.models.problems import Problema
@@ -11,7 +12,7 @@ from app.models.problems import Problema
 from .changes_incidents_link import CambioIncidenteLink
 from .changes_items_link import CambioItemLink
 from .changes_problems_link import CambioProblemaLink
-from .commons import Prioridad
+from .commons import Prioridad, Versionado, trigram_index
 
 if TYPE_CHECKING:
     from .config_items import ItemConfiguracion, ItemConfiguracionPublico
@@ -59,6 +60,7 @@ class CambioCrear(SQLModel):
 
 class CambioPublico(CambioBase):
     id: uuid.UUID
+    revision: int
 
 
 class CambioPublicoConItems(CambioPublico):
@@ -79,8 +81,13 @@ class CambioPublicoConRelaciones(
     pass
 
 
-class Cambio(CambioBase, table=True):
+class Cambio(CambioBase, Versionado, table=True):
     __tablename__: str = "cambios"
+    __table_args__ = (
+        Index("ix_cambios_fecha_creacion_id", "fecha_creacion", "id"),
+        trigram_index("ix_cambios_titulo_trgm", "titulo"),
+        trigram_index("ix_cambios_descripcion_trgm", "descripcion"),
+    )
     id: uuid.UUID | None = Field(default_factory=uuid.uuid4, primary_key=True)
 
     config_items: list["ItemConfiguracion"] = Relationship(
@@ -110,6 +117,12 @@ class CambioActualizar(SQLModel):
     id_problemas: None | list[uuid.UUID] = Field(
         default=None, foreign_key="problemas.id"
     )
+    # Revision the client read, the update fails with 409 if it changed since
+    revision: int | None = None
+
+
+class CambioActualizarLote(CambioActualizar):
+    id: uuid.UUID
 
 
 @dataclass
@@ -1,5 +1,10 @@
+from datetime import datetime, timezone
 from enum import Enum
 
+from sqlalchemy import Index
+from sqlalchemy.orm import declared_attr
+from sqlmodel import Field, SQLModel
+
 
 class Prioridad(str, Enum):
     BAJA = "BAJA"
@@ -19,3 +24,42 @@ class Operacion(str, Enum):
     CREAR = "CREAR"
     ACTUALIZAR = "ACTUALIZAR"
     ELIMINAR = "ELIMINAR"
+
+
+def trigram_index(nombre: str, columna: str) -> Index:
+    # GIN over pg_trgm, lets Postgres use an index for `ilike '%...%'` filters
+    return Index(
+        nombre,
+        columna,
+        postgresql_using="gin",
+        postgresql_ops={columna: "gin_trgm_ops"},
+    )
+
+
+class Versionado(SQLModel):
+    """Row version of the entity tables, the source of their ETags. Services
+    call `nueva_revision` on every write.
+
+    Every UPDATE and DELETE also checks that the row still has the revision
+    it was read with (`... WHERE revision = :leida`), so a concurrent write
+    makes the flush fail with `StaleDataError` instead of being overwritten,
+    without locking the row in between."""
+
+    revision: int = Field(default=1)
+    fecha_actualizacion: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc)
+    )
+
+    @declared_attr
+    def __mapper_args__(cls) -> dict:
+        # Incremented by `nueva_revision` rather than by SQLAlchemy, so the
+        # audited state already has the new revision
+        return {
+            "version_id_col": cls.__table__.c.revision,
+            "version_id_generator": False,
+        }
+
+
+def nueva_revision(entidad: Versionado) -> None:
+    entidad.revision += 1
+    entidad.fecha_actualizacion = datetime.now(timezone.utc)
@@ -4,9 +4,11 @@ from datetime import datetime, timezone
 from enum import Enum
 from typing import TYPE_CHECKING
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 from app.models.changes_items_link import CambioItemLink
+from app.models.commons import Versionado, trigram_index
 from app.models.incidents_items_link import IncidenteItemLink
 from app.models.problems_items_link import ProblemaItemLink
 
@@ -50,8 +52,16 @@ class ItemConfiguracionCrear(SQLModel):
     owner_id: None | uuid.UUID = Field(default=None)
 
 
+class ItemConfiguracionImportar(ItemConfiguracionCrear):
+    # Rows with the id of an existing item replace the fields they have
+    id: uuid.UUID | None = None
+    # PLANEADO when missing, on new items only
+    estado: EstadoItem | None = None
+
+
 class ItemConfiguracionPublico(ItemConfiguracionBase):
     id: uuid.UUID
+    revision: int
 
 
 class ItemConfiguracionPublicoConCambios(ItemConfiguracionPublico):
@@ -66,8 +76,14 @@ class ItemConfiguracionPublicoConIncidentes(ItemConfiguracionPublico):
     incidentes: list["IncidentePublico"] = []
 
 
-class ItemConfiguracion(ItemConfiguracionBase, table=True):
+class ItemConfiguracion(ItemConfiguracionBase, Versionado, table=True):
     __tablename__: str = "items_configuracion"
+    __table_args__ = (
+        Index("ix_items_configuracion_fecha_creacion_id", "fecha_creacion", "id"),
+        trigram_index("ix_items_configuracion_nombre_trgm", "nombre"),
+        trigram_index("ix_items_configuracion_descripcion_trgm", "descripcion"),
+        trigram_index("ix_items_configuracion_version_trgm", "version"),
+    )
     id: uuid.UUID | None = Field(default_factory=uuid.uuid4, primary_key=True)
 
     cambios: list["Cambio"] = Relationship(
@@ -88,6 +104,11 @@ class ItemConfiguracionActualizar(SQLModel):
     descripcion: str | None = Field(None, min_length=1)
     categoria: CategoriaItem | None = None
     estado: EstadoItem | None = None
+    revision: int | None = None
+
+
+class ItemConfiguracionActualizarLote(ItemConfiguracionActualizar):
+    id: uuid.UUID
 
 
 @dataclass
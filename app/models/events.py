@@ -0,0 +1,28 @@
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlmodel import SQLModel
+
+from app.models.commons import Operacion, TipoEntidad
+
+
+class Evento(SQLModel):
+    """A write of an entity, as pushed by /events. It only says what changed,
+    clients fetch the entity again (with If-None-Match) if they need it."""
+
+    # Id of the audit row of the write
+    id: uuid.UUID
+    tipo_entidad: TipoEntidad
+    id_entidad: uuid.UUID
+    operacion: Operacion
+    version: int
+    # Revision of the entity after the write
+    revision: int | None = None
+    fecha_actualizacion: datetime
+
+
+@dataclass
+class EventoFilter:
+    tipo_entidad: TipoEntidad | None = None
+    id_entidad: uuid.UUID | None = None
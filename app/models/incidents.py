@@ -4,13 +4,14 @@ from datetime import datetime, timezone
 from enum import Enum
 from typing import TYPE_CHECKING
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 from app.models.problems import Problema
 from app.models.problems_incidents_link import ProblemaIncidenteLink
 from app.models.changes_incidents_link import CambioIncidenteLink
 
-from .commons import Prioridad
+from .commons import Prioridad, Versionado, trigram_index
 from .incidents_items_link import IncidenteItemLink
 
 if TYPE_CHECKING:
@@ -56,6 +57,7 @@ class IncidenteCrear(SQLModel):
 
 class IncidentePublico(IncidenteBase):
     id: uuid.UUID
+    revision: int
 
 
 class IncidentePublicoConItems(IncidentePublico):
@@ -66,8 +68,13 @@ class IncidentePulicoConProblemas(IncidentePublico):
     problemas: list["ProblemaPublico"] = []
 
 
-class Incidente(IncidenteBase, table=True):
+class Incidente(IncidenteBase, Versionado, table=True):
     __tablename__: str = "incidentes"
+    __table_args__ = (
+        Index("ix_incidentes_fecha_creacion_id", "fecha_creacion", "id"),
+        trigram_index("ix_incidentes_titulo_trgm", "titulo"),
+        trigram_index("ix_incidentes_descripcion_trgm", "descripcion"),
+    )
     id: uuid.UUID | None = Field(default_factory=uuid.uuid4, primary_key=True)
     config_items: list["ItemConfiguracion"] = Relationship(
         back_populates="incidentes", link_model=IncidenteItemLink
@@ -91,6 +98,11 @@ class IncidenteActualizar(SQLModel):
     id_config_items: None | list[uuid.UUID] = Field(
         default=None, foreign_key="items_configuracion.id"
     )
+    revision: int | None = None
+
+
+class IncidenteActualizarLote(IncidenteActualizar):
+    id: uuid.UUID
 
 
 @dataclass
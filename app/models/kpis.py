@@ -0,0 +1,48 @@
+from datetime import date
+
+from sqlmodel import Field, SQLModel
+
+from app.models.commons import Prioridad, TipoEntidad
+
+
+class KpiDiario(SQLModel, table=True):
+    """Daily rollup of the incidents, problems and changes in each estado,
+    prioridad and categoria, kept up to date with every audited write."""
+
+    __tablename__ = "kpis_diarios"
+
+    fecha: date = Field(primary_key=True)
+    tipo_entidad: TipoEntidad = Field(primary_key=True)
+    estado: str = Field(primary_key=True)
+    prioridad: str = Field(primary_key=True)
+    # Part of the primary key, so "" instead of NULL for problems and changes
+    categoria: str = Field(default="", primary_key=True)
+    creados: int = 0
+    # Entities that moved into and out of this bucket, the backlog of a day is
+    # the sum of `entradas - salidas` of every day up to it
+    entradas: int = 0
+    salidas: int = 0
+    # Closed on this day, and the sum of their time from creation to close
+    cerrados: int = 0
+    segundos_hasta_cierre: float = 0
+
+
+class KpiDia(SQLModel):
+    fecha: date
+    creados: int
+    cerrados: int
+    # Not closed (or rejected) at the end of the day
+    backlog: int
+    # Mean time-to-close of the ones closed on this day
+    mttr_horas: float | None
+
+
+class Kpis(SQLModel):
+    # One entry per day of the period, oldest first
+    dias: list[KpiDia]
+    # At the end of the period
+    backlog_por_estado: dict[str, int]
+    backlog_por_prioridad: dict[Prioridad, int]
+    mttr_horas: float | None
+    # Changes only: closed / (closed + rejected) during the period
+    tasa_exito: float | None = None
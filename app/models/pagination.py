@@ -0,0 +1,11 @@
+from dataclasses import dataclass
+
+LIMIT_DEFAULT = 100
+LIMIT_MAXIMO = 1000
+
+
+@dataclass(frozen=True)
+class Paginacion:
+    limit: int = LIMIT_DEFAULT
+    # Opaque cursor returned as `X-Next-Cursor` by the previous page
+    cursor: str | None = None
@@ -6,9 +6,10 @@ from typing import TYPE_CHECKING
 
 from app.models.changes_incidents_link import CambioIncidenteLink
 from app.models.changes_problems_link import CambioProblemaLink
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
-from app.models.commons import Prioridad
+from app.models.commons import Prioridad, Versionado, trigram_index
 from app.models.problems_incidents_link import ProblemaIncidenteLink
 from app.models.problems_items_link import ProblemaItemLink
 
@@ -48,6 +49,7 @@ class ProblemaCrear(SQLModel):
 
 class ProblemaPublico(ProblemaBase):
     id: uuid.UUID
+    revision: int
 
 
 class ProblemaPublicoConItems(ProblemaPublico):
@@ -65,8 +67,13 @@ class ProblemaPublicoConRelaciones(
     pass
 
 
-class Problema(ProblemaBase, table=True):
+class Problema(ProblemaBase, Versionado, table=True):
     __tablename__: str = "problemas"
+    __table_args__ = (
+        Index("ix_problemas_fecha_creacion_id", "fecha_creacion", "id"),
+        trigram_index("ix_problemas_titulo_trgm", "titulo"),
+        trigram_index("ix_problemas_descripcion_trgm", "descripcion"),
+    )
     id: uuid.UUID | None = Field(default_factory=uuid.uuid4, primary_key=True)
     config_items: list["ItemConfiguracion"] = Relationship(
         back_populates="problemas", link_model=ProblemaItemLink
@@ -92,6 +99,11 @@ class ProblemaActualizar(SQLModel):
     id_config_items: None | list[uuid.UUID] = Field(
         default=None, foreign_key="items_configuracion.id"
     )
+    revision: int | None = None
+
+
+class ProblemaActualizarLote(ProblemaActualizar):
+    id: uuid.UUID
 
 
 @dataclass
@@ -0,0 +1,43 @@
+import uuid
+from dataclasses import dataclass
+
+from sqlmodel import SQLModel
+
+from app.models.commons import Prioridad, TipoEntidad
+
+
+@dataclass
+class BusquedaFilter:
+    q: str
+    tipo_entidad: TipoEntidad | None = None
+    # Shared by every entity, e.g. `CERRADO` matches changes, incidents and problems
+    estado: str | None = None
+    prioridad: Prioridad | None = None
+    categoria: str | None = None
+
+
+class ResultadoBusqueda(SQLModel):
+    tipo_entidad: TipoEntidad
+    id: uuid.UUID
+    # `nombre` for config items
+    titulo: str
+    descripcion: str
+    estado: str
+    # Config items have no priority, changes and problems no category
+    prioridad: Prioridad | None
+    categoria: str | None
+    relevancia: float
+
+
+class FacetasBusqueda(SQLModel):
+    tipo_entidad: dict[TipoEntidad, int] = {}
+    estado: dict[str, int] = {}
+    prioridad: dict[Prioridad, int] = {}
+    categoria: dict[str, int] = {}
+
+
+class Busqueda(SQLModel):
+    # Matches of every page, the facets count them all too
+    total: int
+    facetas: FacetasBusqueda
+    resultados: list[ResultadoBusqueda]
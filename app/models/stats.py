@@ -0,0 +1,25 @@
+from datetime import date
+
+from sqlmodel import SQLModel
+
+from app.models.commons import Prioridad
+
+DIAS_DEFAULT = 30
+DIAS_MAXIMO = 365
+
+
+class TendenciaDiaria(SQLModel):
+    fecha: date
+    abiertos: int
+    cerrados: int
+
+
+class Estadisticas(SQLModel):
+    # Current totals, regardless of the period
+    total: int
+    por_estado: dict[str, int]
+    por_prioridad: dict[Prioridad, int]
+    # One entry per day of the period, oldest first
+    tendencia: list[TendenciaDiaria]
+    # Of the ones closed during the period, None if there are none
+    tiempo_medio_cierre_horas: float | None
@@ -1,12 +1,56 @@
-from sqlmodel import SQLModel
+import uuid
+from datetime import datetime
+
+from pydantic import EmailStr
+from sqlmodel import Field, SQLModel
+
+from app.models.users import Rol
 
 
 # JSON payload containing access token
 class Token(SQLModel):
     access_token: str
     token_type: str = "bearer"
+    # Exchanged for a new pair at /login/refresh-token, only once
+    refresh_token: str | None = None
+    expires_in: int | None = None
+
+
+class RefreshToken(SQLModel):
+    refresh_token: str
 
 
 # Contents of JWT token
 class TokenPayload(SQLModel):
     sub: str | None = None
+    # "access" or "refresh", tokens issued before refresh tokens have none
+    typ: str | None = None
+    # Access tokens carry the user, so read-only routes don't load it
+    nombre: str | None = None
+    apellido: str | None = None
+    email: EmailStr | None = None
+    rol: Rol | None = None
+    # Refresh tokens: their own id and the one of the login they descend from
+    jti: uuid.UUID | None = None
+    fam: uuid.UUID | None = None
+
+
+class UsuarioToken(SQLModel):
+    """The authenticated user as described by its access token, which may be
+    up to ACCESS_TOKEN_EXPIRE_MINUTES old."""
+
+    id: uuid.UUID
+    nombre: str
+    apellido: str
+    email: EmailStr
+    rol: Rol
+
+
+class TokenRevocado(SQLModel, table=True):
+    """Refresh tokens already used, and logins (token families) revoked. Rows
+    are only needed until the token expires, so the table stays small."""
+
+    __tablename__: str = "tokens_revocados"
+
+    jti: uuid.UUID = Field(primary_key=True)
+    expira: datetime = Field(index=True)
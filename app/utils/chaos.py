@@ -0,0 +1,183 @@
+import random
+from collections.abc import Callable
+
+from faker import Faker
+
+from app.models.changes import EstadoCambio, ImpactoCambio
+from app.models.commons import Prioridad
+from app.models.config_items import EstadoItem
+from app.models.incidents import EstadoIncidente
+from app.models.problems import EstadoProblema
+
+fake = Faker()
+
+MAX_UPDATES = 100
+MAX_DESCRIPTION = 100
+
+
+def random_apply(data: dict, key: str, randomizer: Callable, chances: float = 0.5):
+    if random.random() < chances:
+        data[key] = randomizer()
+
+
+def random_descripcion(data: dict):
+    # 0.3 chances because it should be unlikely to change a description
+    random_apply(
+        data=data,
+        key="descripcion",
+        randomizer=lambda: fake.text(max_nb_chars=MAX_DESCRIPTION),
+        chances=0.3,
+    )
+
+
+def random_prioridad(data: dict):
+    random_apply(
+        data=data, key="prioridad", randomizer=lambda: fake.enum(Prioridad).value
+    )
+
+
+def random_responsable(data: dict, empleados_id: list):
+    # 0.7 chances to make it likely to set a responsable_id
+    random_apply(
+        data=data,
+        key="responsable_id",
+        randomizer=lambda: random.choice(empleados_id),
+        chances=0.7,
+    )
+
+
+def generate_random_id_choices(data_id: list, min_rand: int = 1, max_rand: int = 4):
+    k = random.randint(min_rand, max_rand)
+    return random.choices(data_id, k=k)
+
+
+def random_config_items(data: dict, config_items_id: list):
+    random_apply(
+        data=data,
+        key="id_config_items",
+        randomizer=lambda: generate_random_id_choices(config_items_id),
+    )
+
+
+def random_problemas(data: dict, problems_id: list):
+    random_apply(
+        data=data,
+        key="id_problemas",
+        randomizer=lambda: generate_random_id_choices(problems_id, max_rand=2),
+    )
+
+
+def random_incidentes(data: dict, incidents_id: list):
+    random_apply(
+        data=data,
+        key="id_incidentes",
+        randomizer=lambda: generate_random_id_choices(incidents_id, max_rand=2),
+    )
+
+
+# Every chaos_* function returns up to `updates` random PATCH bodies for the
+# given entities. Each one sends the revision it was made from, so a second
+# update of the same entity is rejected as a conflict instead of overwriting
+# the first one.
+
+
+def chaos_config_items(config_items, updates: int = MAX_UPDATES) -> list[dict]:
+    bodies = []
+
+    for _ in range(updates):
+        config_item = random.choice(config_items)
+        data = {}
+
+        random_descripcion(data)
+        random_apply(data, "estado", lambda: fake.enum(EstadoItem).value)
+
+        # Skip if there's no update
+        if len(data.keys()) == 0:
+            continue
+
+        bodies.append(
+            {"id": config_item["id"], "revision": config_item["revision"], **data}
+        )
+
+    return bodies
+
+
+def chaos_incidents(
+    incidents, config_items_id, empleados_id, updates: int = MAX_UPDATES
+) -> list[dict]:
+    bodies = []
+
+    for _ in range(updates):
+        incident = random.choice(incidents)
+        data = {}
+
+        random_descripcion(data)
+        random_prioridad(data)
+        random_apply(data, "estado", lambda: fake.enum(EstadoIncidente).value)
+        random_responsable(data, empleados_id)
+        random_config_items(data, config_items_id)
+
+        # Skip if there's no update
+        if len(data.keys()) == 0:
+            continue
+
+        bodies.append({"id": incident["id"], "revision": incident["revision"], **data})
+
+    return bodies
+
+
+def chaos_changes(
+    changes,
+    incidents_id,
+    problems_id,
+    config_items_id,
+    empleados_id,
+    updates: int = MAX_UPDATES,
+) -> list[dict]:
+    bodies = []
+
+    for _ in range(updates):
+        change = random.choice(changes)
+        data = {}
+
+        random_descripcion(data)
+        random_prioridad(data)
+        random_apply(data, "impacto", lambda: fake.enum(ImpactoCambio).value)
+        random_apply(data, "estado", lambda: fake.enum(EstadoCambio).value)
+        random_config_items(data, config_items_id)
+        random_problemas(data, problems_id)
+        random_incidentes(data, incidents_id)
+        random_responsable(data, empleados_id)
+
+        # Skip if there's no update
+        if len(data.keys()) == 0:
+            continue
+
+        bodies.append({"id": change["id"], "revision": change["revision"], **data})
+
+    return bodies
+
+
+def chaos_problems(
+    problems, incidents_id, config_items_id, empleados_id, updates: int = MAX_UPDATES
+) -> list[dict]:
+    bodies = []
+
+    for _ in range(updates):
+        problem = random.choice(problems)
+        data = {}
+
+        random_descripcion(data)
+        random_prioridad(data)
+        random_apply(data, "estado", lambda: fake.enum(EstadoProblema).value)
+        random_responsable(data, empleados_id)
+        random_incidentes(data, incidents_id)
+        random_config_items(data, config_items_id)
+
+        # Skip if there's no update
+        if len(data.keys()) == 0:
+            continue
+
+        bodies.append({"id": problem["id"], "revision": problem["revision"], **data})
+
+    return bodies
@@ -45,6 +45,41 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = ""
     POSTGRES_DB: str = ""
 
+    # Per worker: the Dockerfile runs 4 workers, so a replica may open up to
+    # 4 * (POSTGRES_POOL_SIZE + POSTGRES_MAX_OVERFLOW) connections
+    POSTGRES_POOL_SIZE: int = 5
+    POSTGRES_MAX_OVERFLOW: int = 10
+    POSTGRES_POOL_TIMEOUT: float = 30
+    POSTGRES_POOL_RECYCLE: int = 60 * 30
+    POSTGRES_POOL_PRE_PING: bool = True
+    # 0 disables the timeout
+    POSTGRES_STATEMENT_TIMEOUT_MS: int = 30_000
+    POSTGRES_APPLICATION_NAME: str = "9559-backend"
+
+    # "async" hands audit rows to a background writer once the audited write
+    # is committed, instead of inserting them in the same transaction
+    AUDIT_MODE: Literal["sync", "async"] = "sync"
+    AUDIT_QUEUE_SIZE: int = 10_000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    # After this, the request writes its audit rows itself
+    AUDIT_ENQUEUE_TIMEOUT_SECONDS: float = 5.0
+    # Every N versions an audit row stores the full state instead of a diff
+    AUDIT_SNAPSHOT_INTERVAL: int = 10
+    # Monthly partitions created ahead by app/audit_maintenance.py
+    AUDIT_PARTITION_MONTHS_AHEAD: int = 3
+    # Partitions older than this are archived and dropped, 0 keeps them forever
+    AUDIT_RETENTION_MONTHS: int = 0
+    AUDIT_ARCHIVE_DIR: str = "archive/auditorias"
+    # How long /stats answers are reused, 0 disables the cache
+    STATS_CACHE_TTL_SECONDS: float = 30
+    # /events: events a slow client can fall behind before its stream is
+    # closed, so it reconnects and replays them from the audit log
+    EVENTS_QUEUE_SIZE: int = 1_000
+    EVENTS_HEARTBEAT_SECONDS: float = 15
+    # Most events replayed after Last-Event-ID on reconnection
+    EVENTS_REPLAY_LIMIT: int = 1_000
+
     @computed_field
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> PostgresDsn:
@@ -64,7 +99,20 @@ class Settings(BaseSettings):
 
         return AppVersion(version=version)
 
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # Access tokens carry the user's rol and name, which read-only routes trust
+    # until they expire, so keep them short. Refresh tokens renew them.
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # Per worker caches of decoded tokens and of the authenticated user
+    TOKEN_CACHE_MAXSIZE: int = 10_000
+    USER_CACHE_TTL_SECONDS: float = 60
+    USER_CACHE_MAXSIZE: int = 10_000
+    # Existing hashes are upgraded to the new cost on their next login
+    BCRYPT_ROUNDS: int = 12
+    # Threads hashing passwords, and how many more can wait for one before
+    # logins and signups are answered with 503
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
     SECRET_KEY: str = "secret"  # secrets.token_urlsafe(32)
 
 
@@ -0,0 +1,387 @@
+"""Production-sized datasets for load tests and benchmarks, written straight
+into the database instead of through the services (see
+`scripts/generate-large-dataset.py`)."""
+
+import logging
+import random
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from faker import Faker
+from psycopg.types.json import Json
+from sqlalchemy import insert, text
+from sqlmodel import Session, SQLModel
+
+from app.core.security import get_password_hash
+from app.crud.audit_partitions import ParticionesAuditoriaService
+from app.crud.kpis import KpisService
+from app.models.auditoria import Auditoria
+from app.models.changes import Cambio, EstadoCambio, ImpactoCambio
+from app.models.changes_incidents_link import CambioIncidenteLink
+from app.models.changes_items_link import CambioItemLink
+from app.models.changes_problems_link import CambioProblemaLink
+from app.models.commons import Operacion, Prioridad, TipoEntidad
+from app.models.config_items import CategoriaItem, EstadoItem, ItemConfiguracion
+from app.models.incidents import CategoriaIncidente, EstadoIncidente, Incidente
+from app.models.incidents_items_link import IncidenteItemLink
+from app.models.problems import EstadoProblema, Problema
+from app.models.problems_incidents_link import ProblemaIncidenteLink
+from app.models.problems_items_link import ProblemaItemLink
+from app.models.users import Rol, Usuario
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+fake = Faker()
+
+# Faker is far too slow for millions of rows, texts are drawn from a pool
+POOL = 1_000
+
+# The higher, the more links point at the first entities of each kind
+SESGO = 3
+
+MODELOS = {
+    TipoEntidad.CONFIG_ITEM: ItemConfiguracion,
+    TipoEntidad.INCIDENTE: Incidente,
+    TipoEntidad.PROBLEMA: Problema,
+    TipoEntidad.CAMBIO: Cambio,
+}
+
+# States an entity goes through, one step per update. Reaching CERRADO sets
+# `fecha_cierre` and ends its history, like the services do.
+CICLOS = {
+    TipoEntidad.CONFIG_ITEM: [estado.value for estado in EstadoItem],
+    TipoEntidad.INCIDENTE: [estado.value for estado in EstadoIncidente],
+    TipoEntidad.PROBLEMA: [estado.value for estado in EstadoProblema],
+    TipoEntidad.CAMBIO: [
+        EstadoCambio.RECIBIDO.value,
+        EstadoCambio.ACEPTADO.value,
+        EstadoCambio.EN_PROGRESO.value,
+        EstadoCambio.CERRADO.value,
+    ],
+}
+CERRADO = "CERRADO"
+
+# Link table (entity column first), related kind, mean and max per entity
+RELACIONES = {
+    TipoEntidad.INCIDENTE: [
+        (IncidenteItemLink, TipoEntidad.CONFIG_ITEM, 1.5, 10),
+    ],
+    TipoEntidad.PROBLEMA: [
+        (ProblemaItemLink, TipoEntidad.CONFIG_ITEM, 2, 20),
+        (ProblemaIncidenteLink, TipoEntidad.INCIDENTE, 4, 50),
+    ],
+    TipoEntidad.CAMBIO: [
+        (CambioItemLink, TipoEntidad.CONFIG_ITEM, 3, 50),
+        (CambioIncidenteLink, TipoEntidad.INCIDENTE, 1, 10),
+        (CambioProblemaLink, TipoEntidad.PROBLEMA, 0.5, 5),
+    ],
+}
+
+# Changes are audited with the ids of their relations, see `_estado_cambio`
+CAMPOS_RELACION = {
+    TipoEntidad.CONFIG_ITEM: "id_config_items",
+    TipoEntidad.INCIDENTE: "id_incidentes",
+    TipoEntidad.PROBLEMA: "id_problemas",
+}
+
+
+@dataclass
+class Dataset:
+    ahora: datetime
+    dias: int
+    max_updates: int
+    cantidades: dict[TipoEntidad, int]
+    empleados: list[uuid.UUID]
+    titulos: list[str]
+    textos: list[str]
+    # Rows written so far, of every table
+    escritas: int = 0
+
+    def __post_init__(self) -> None:
+        # Ids are derived from the position, so relations can point at any
+        # entity without keeping millions of ids in memory. The random high
+        # bits keep them apart from the ones of any other run.
+        self.bases = {tipo: uuid.uuid4().int >> 40 << 40 for tipo in MODELOS}
+
+    def id(self, tipo: TipoEntidad, indice: int) -> uuid.UUID:
+        return uuid.UUID(int=self.bases[tipo] | indice)
+
+    def relacionados(
+        self, tipo: TipoEntidad, media: float, maximo: int
+    ) -> list[uuid.UUID]:
+        cantidad = min(maximo, round(random.expovariate(1 / media)))
+        indices = {
+            int(self.cantidades[tipo] * random.random() ** SESGO)
+            for _ in range(cantidad)
+        }
+
+        return [self.id(tipo, indice) for indice in indices]
+
+
+def _json(fila: dict) -> dict:
+    # What `model_dump(mode="json")` stores in the audit log
+    return {
+        campo: valor.isoformat()
+        if isinstance(valor, datetime)
+        else str(valor)
+        if isinstance(valor, uuid.UUID)
+        else valor
+        for campo, valor in fila.items()
+    }
+
+
+def _entidad(dataset: Dataset, tipo: TipoEntidad, indice: int) -> dict:
+    fecha = dataset.ahora - timedelta(seconds=random.uniform(0, dataset.dias * 86400))
+    fila = {
+        "id": dataset.id(tipo, indice),
+        "descripcion": random.choice(dataset.textos),
+        "owner_id": random.choice(dataset.empleados),
+        "estado": CICLOS[tipo][0],
+        "fecha_creacion": fecha,
+        "revision": 1,
+        "fecha_actualizacion": fecha,
+    }
+
+    if tipo == TipoEntidad.CONFIG_ITEM:
+        fila["nombre"] = f"{random.choice(dataset.titulos)} {indice}"
+        fila["version"] = fake.numerify(text="#.%.%")
+        fila["categoria"] = random.choice(list(CategoriaItem)).value
+        return fila
+
+    fila["titulo"] = random.choice(dataset.titulos)
+    fila["prioridad"] = random.choice(list(Prioridad)).value
+    fila["responsable_id"] = None
+    fila["fecha_cierre"] = None
+
+    if tipo == TipoEntidad.INCIDENTE:
+        fila["categoria"] = random.choice(list(CategoriaIncidente)).value
+    elif tipo == TipoEntidad.PROBLEMA:
+        fila["solucion"] = None
+    else:
+        fila["impacto"] = random.choice(list(ImpactoCambio)).value
+
+    return fila
+
+
+def _actualizar(dataset: Dataset, tipo: TipoEntidad, fila: dict) -> None:
+    ciclo = CICLOS[tipo]
+    eleccion = random.random()
+
+    if eleccion < 0.5 and fila["estado"] != ciclo[-1]:
+        fila["estado"] = ciclo[ciclo.index(fila["estado"]) + 1]
+
+        if fila["estado"] == CERRADO:
+            fila["fecha_cierre"] = fila["fecha_actualizacion"]
+    elif eleccion < 0.7 and "prioridad" in fila:
+        fila["prioridad"] = random.choice(list(Prioridad)).value
+    elif eleccion < 0.9 and "responsable_id" in fila:
+        fila["responsable_id"] = random.choice(dataset.empleados)
+    else:
+        fila["descripcion"] = random.choice(dataset.textos)
+
+
+def _historia(
+    dataset: Dataset, tipo: TipoEntidad, fila: dict, relaciones: dict
+) -> list[dict]:
+    """Updates `fila` up to `max_updates` times and returns its audit rows,
+    stored as `AuditoriaService.registrar_filas` would."""
+    estado = {**_json(fila), **relaciones}
+    auditorias = [
+        {
+            "id": uuid.UUID(int=random.getrandbits(128), version=4),
+            "tipo_entidad": tipo.value,
+            "id_entidad": fila["id"],
+            "operacion": Operacion.CREAR.value,
+            "actualizado_por": fila["owner_id"],
+            "estado_nuevo": estado,
+            "fecha_actualizacion": fila["fecha_actualizacion"],
+            "version": 1,
+            "es_snapshot": True,
+        }
+    ]
+
+    for version in range(2, random.randint(1, dataset.max_updates + 1) + 1):
+        if fila.get("fecha_cierre"):
+            break
+
+        # Each update happens somewhere between the previous one and now
+        fila["fecha_actualizacion"] += (
+            dataset.ahora - fila["fecha_actualizacion"]
+        ) * random.uniform(0, 0.5)
+        fila["revision"] = version
+        _actualizar(dataset, tipo, fila)
+
+        anterior, estado = estado, {**_json(fila), **relaciones}
+        es_snapshot = (version - 1) % settings.AUDIT_SNAPSHOT_INTERVAL == 0
+
+        auditorias.append(
+            {
+                **auditorias[0],
+                "id": uuid.UUID(int=random.getrandbits(128), version=4),
+                "operacion": Operacion.ACTUALIZAR.value,
+                "actualizado_por": random.choice(dataset.empleados),
+                "estado_nuevo": estado
+                if es_snapshot
+                else {
+                    campo: valor
+                    for campo, valor in estado.items()
+                    if anterior.get(campo) != valor
+                },
+                "fecha_actualizacion": fila["fecha_actualizacion"],
+                "version": version,
+                "es_snapshot": es_snapshot,
+            }
+        )
+
+    return auditorias
+
+
+def _escribir(session: Session, modelo: type[SQLModel], filas: list[dict]) -> None:
+    if not filas:
+        return
+
+    if session.get_bind().dialect.name != "postgresql":
+        session.execute(insert(modelo), filas)
+        return
+
+    columnas = list(filas[0])
+    cursor = session.connection().connection.cursor()
+
+    with cursor.copy(
+        f"COPY {modelo.__tablename__} ({', '.join(columnas)}) FROM STDIN"
+    ) as copy:
+        for fila in filas:
+            copy.write_row(
+                [
+                    Json(fila[columna])
+                    if isinstance(fila[columna], dict)
+                    else fila[columna]
+                    for columna in columnas
+                ]
+            )
+
+
+def _generar(session: Session, dataset: Dataset, tipo: TipoEntidad, lote: int) -> int:
+    """Writes every entity of `tipo` with its links and history, returns the
+    number of rows written."""
+    total = dataset.cantidades[tipo]
+    escritas = 0
+
+    for inicio in range(0, total, lote):
+        filas, auditorias = [], []
+        links: dict[type[SQLModel], list[dict]] = defaultdict(list)
+
+        for indice in range(inicio, min(inicio + lote, total)):
+            fila = _entidad(dataset, tipo, indice)
+            relaciones = {}
+
+            for link, tipo_relacion, media, maximo in RELACIONES.get(tipo, []):
+                columna, columna_relacion = link.__table__.c.keys()
+                ids = dataset.relacionados(tipo_relacion, media, maximo)
+                links[link].extend(
+                    {columna: fila["id"], columna_relacion: id} for id in ids
+                )
+
+                if tipo == TipoEntidad.CAMBIO:
+                    relaciones[CAMPOS_RELACION[tipo_relacion]] = [str(id) for id in ids]
+
+            auditorias.extend(_historia(dataset, tipo, fila, relaciones))
+            filas.append(fila)
+
+        _escribir(session, MODELOS[tipo], filas)
+
+        for link, filas_link in links.items():
+            _escribir(session, link, filas_link)
+
+        _escribir(session, Auditoria, auditorias)
+        session.commit()
+
+        escritas += len(filas) + len(auditorias) + sum(map(len, links.values()))
+        logger.info("%s: %d/%d", tipo.value, inicio + len(filas), total)
+
+    return escritas
+
+
+def _crear_empleados(session: Session, cantidad: int, password: str) -> list[dict]:
+    # Hashed once, every employee shares the password
+    contraseña_hasheada = get_password_hash(password)
+    sufijo = uuid.uuid4().hex[:8]
+    empleados = [
+        {
+            "id": uuid.uuid4(),
+            "nombre": fake.first_name(),
+            "apellido": fake.last_name(),
+            "email": f"empleado{indice}.{sufijo}@loadtest.company.com",
+            "rol": Rol.EMPLEADO.value,
+            "contraseña_hasheada": contraseña_hasheada,
+        }
+        for indice in range(cantidad)
+    ]
+
+    _escribir(session, Usuario, empleados)
+    session.commit()
+
+    return empleados
+
+
+def cantidades_por_defecto(config_items: int) -> dict[TipoEntidad, int]:
+    return {
+        TipoEntidad.CONFIG_ITEM: config_items,
+        TipoEntidad.INCIDENTE: config_items * 2,
+        TipoEntidad.PROBLEMA: config_items // 10,
+        TipoEntidad.CAMBIO: config_items // 2,
+    }
+
+
+def generar_dataset(
+    session: Session,
+    *,
+    cantidades: dict[TipoEntidad, int],
+    empleados: int = 200,
+    password: str = "12345678",
+    dias: int = 365,
+    max_updates: int = 10,
+    lote: int = 10_000,
+) -> Dataset:
+    """Writes `empleados` employees and `cantidades` entities of each kind
+    linked to each other, with their audit history, and rebuilds the KPI
+    rollups. Every call adds a new dataset, nothing is replaced."""
+    ahora = datetime.now(timezone.utc)
+
+    if session.get_bind().dialect.name == "postgresql":
+        # Audit rows go to the monthly partition of their date
+        desde = (ahora - timedelta(days=dias)).date()
+        ParticionesAuditoriaService.crear_particiones(
+            session=session,
+            desde=desde,
+            meses=(ahora.year - desde.year) * 12 + ahora.month - desde.month,
+        )
+
+    filas_empleados = _crear_empleados(session, empleados, password)
+    dataset = Dataset(
+        ahora=ahora,
+        dias=dias,
+        max_updates=max_updates,
+        cantidades=cantidades,
+        empleados=[empleado["id"] for empleado in filas_empleados],
+        titulos=[fake.catch_phrase() for _ in range(POOL)],
+        textos=[fake.text(max_nb_chars=500) for _ in range(POOL)],
+        escritas=len(filas_empleados),
+    )
+
+    # In this order, so every link points at rows already written
+    for tipo in MODELOS:
+        dataset.escritas += _generar(session, dataset, tipo, lote)
+
+    logger.info("Rebuilding KPI rollups")
+    KpisService.reconstruir(session=session)
+
+    if session.get_bind().dialect.name == "postgresql":
+        # Fresh statistics, otherwise the first plans are made for empty tables
+        session.execute(text("ANALYZE"))
+        session.commit()
+
+    return dataset
@@ -0,0 +1,201 @@
+import json
+import random
+import uuid
+from collections.abc import Callable, Generator
+from pathlib import Path
+
+import pytest
+from faker import Faker
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine, text
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.api.deps import get_db
+from app.main import app
+from app.models.auditoria import Auditoria
+from app.models.commons import TipoEntidad
+from app.models.users import Usuario
+from app.utils.config import settings
+from app.utils.large_dataset import Dataset, generar_dataset
+from benchmarks.utils import Medicion, medir, regresiones
+
+BASELINE = Path(__file__).parent / "baseline.json"
+RESULTADOS = Path(__file__).parent / "results.json"
+
+PASSWORD = "12345678"
+# Changes the write benchmarks go through
+MUESTRA = 1_000
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    grupo = parser.getgroup("benchmarks")
+    grupo.addoption(
+        "--sizes",
+        default="1000",
+        help="comma separated sizes (rows in `cambios`), e.g. 1000,100000,1000000",
+    )
+    grupo.addoption("--rounds", type=int, default=50, help="timed calls per benchmark")
+    grupo.addoption(
+        "--database-url",
+        help="migrated Postgres database to run on, ITS DATA IS DELETED. "
+        "In-memory SQLite by default",
+    )
+    grupo.addoption(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="time and memory allowed over the baseline, 0.5 is 50%% more",
+    )
+    grupo.addoption(
+        "--update-baseline",
+        action="store_true",
+        help="store the results as the new baseline instead of comparing",
+    )
+
+
+def pytest_generate_tests(metafunc: pytest.Metafunc) -> None:
+    if "tamanio" in metafunc.fixturenames:
+        tamanios = [int(t) for t in metafunc.config.getoption("--sizes").split(",")]
+        metafunc.parametrize("tamanio", tamanios, scope="session")
+
+
+# One database per size: `tamanio` makes pytest group the tests by it
+@pytest.fixture(scope="session")
+def engine(
+    request: pytest.FixtureRequest,
+    tamanio: int,  # noqa: ARG001
+) -> Generator[Engine, None, None]:
+    url = request.config.getoption("--database-url")
+
+    if url is None:
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        SQLModel.metadata.create_all(engine)
+    else:
+        engine = create_engine(url)
+
+        # Every size starts from an empty database
+        with Session(engine) as session:
+            tablas = [
+                tabla.name
+                for tabla in SQLModel.metadata.sorted_tables
+                if tabla.name != "appversion"
+            ]
+            session.execute(text(f"TRUNCATE {', '.join(tablas)} CASCADE"))
+            session.commit()
+
+    yield engine
+
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def dataset(engine: Engine, tamanio: int) -> Dataset:
+    # Same rows on every run, but for the ids
+    random.seed(0)
+    Faker.seed(0)
+
+    with Session(engine) as session:
+        return generar_dataset(
+            session,
+            cantidades={
+                TipoEntidad.CONFIG_ITEM: tamanio,
+                TipoEntidad.INCIDENTE: tamanio,
+                TipoEntidad.PROBLEMA: max(tamanio // 10, 1),
+                TipoEntidad.CAMBIO: tamanio,
+            },
+            empleados=20,
+            password=PASSWORD,
+            max_updates=5,
+        )
+
+
+@pytest.fixture(scope="session")
+def cambios(engine: Engine, dataset: Dataset) -> list[tuple[uuid.UUID, uuid.UUID]]:  # noqa: ARG001
+    """Changes with the id of their creation audit, to roll them back to."""
+    with Session(engine) as session:
+        filas = session.exec(
+            select(Auditoria.id_entidad, Auditoria.id)
+            .where(Auditoria.tipo_entidad == TipoEntidad.CAMBIO, Auditoria.version == 1)
+            .order_by(Auditoria.fecha_actualizacion)
+            .limit(MUESTRA)
+        ).all()
+
+    return [tuple(fila) for fila in filas]
+
+
+@pytest.fixture(scope="session")
+def client(engine: Engine, dataset: Dataset) -> Generator[TestClient, None, None]:
+    def get_session_override():
+        with Session(engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_db] = get_session_override
+    client = TestClient(app)
+
+    with Session(engine) as session:
+        email = session.exec(
+            select(Usuario.email).where(Usuario.id == dataset.empleados[0])
+        ).one()
+
+    r = client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": email, "password": PASSWORD},
+    )
+    client.headers["Authorization"] = f"Bearer {r.json()['access_token']}"
+
+    yield client
+
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture(scope="session")
+def registro(request: pytest.FixtureRequest) -> Generator[dict, None, None]:
+    resultados: dict[str, dict] = {}
+
+    yield resultados
+
+    RESULTADOS.write_text(json.dumps(resultados, indent=2, sort_keys=True) + "\n")
+
+    if request.config.getoption("--update-baseline"):
+        base = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+        base.update(resultados)
+        BASELINE.write_text(json.dumps(base, indent=2, sort_keys=True) + "\n")
+
+
+@pytest.fixture(scope="session")
+def baseline() -> dict:
+    return json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+
+
+@pytest.fixture
+def benchmark(
+    request: pytest.FixtureRequest,
+    engine: Engine,
+    dataset: Dataset,  # noqa: ARG001
+    registro: dict,
+    baseline: dict,
+) -> Callable[[Callable[[], object]], Medicion]:
+    """Measures a call, records it in `results.json` and fails if it got
+    worse than its entry in `baseline.json`."""
+    clave = f"{engine.dialect.name}/{request.node.nodeid.split('/')[-1]}"
+
+    def benchmark_llamada(llamada: Callable[[], object]) -> Medicion:
+        # Writes pick the same values on every run, and so run the same queries
+        random.seed(clave)
+        medicion = medir(engine, llamada, request.config.getoption("--rounds"))
+        registro[clave] = medicion.to_dict()
+
+        if not request.config.getoption("--update-baseline"):
+            errores = regresiones(
+                medicion,
+                baseline.get(clave),
+                tolerancia=request.config.getoption("--tolerance"),
+            )
+            assert not errores, f"{clave} regressed: {'; '.join(errores)}"
+
+        return medicion
+
+    return benchmark_llamada
@@ -0,0 +1,137 @@
+import itertools
+import random
+import uuid
+from collections.abc import Callable
+
+from sqlalchemy import Engine
+from sqlmodel import Session
+
+from app.crud.audits import AuditoriaService
+from app.crud.changes import CambiosService
+from app.models.auditoria import AuditoriaFilter
+from app.models.changes import (
+    CambioActualizar,
+    CambioCrear,
+    CambioFilter,
+    EstadoCambio,
+    ImpactoCambio,
+)
+from app.models.commons import Prioridad, TipoEntidad
+from app.utils.large_dataset import Dataset
+
+
+def test_get_changes(benchmark: Callable, engine: Engine) -> None:
+    def llamada() -> None:
+        with Session(engine) as session:
+            CambiosService.get_changes(session=session, cambio_filter=CambioFilter())
+
+    benchmark(llamada)
+
+
+def test_get_changes_filtered(benchmark: Callable, engine: Engine) -> None:
+    cambio_filter = CambioFilter(
+        prioridad=Prioridad.ALTA, estado=EstadoCambio.EN_PROGRESO
+    )
+
+    def llamada() -> None:
+        with Session(engine) as session:
+            CambiosService.get_changes(session=session, cambio_filter=cambio_filter)
+
+    benchmark(llamada)
+
+
+def test_get_audits(benchmark: Callable, engine: Engine) -> None:
+    def llamada() -> None:
+        with Session(engine) as session:
+            AuditoriaService.get_audits(
+                session=session, auditoria_filter=AuditoriaFilter()
+            )
+
+    benchmark(llamada)
+
+
+def test_get_audits_of_change(
+    benchmark: Callable, engine: Engine, cambios: list[tuple[uuid.UUID, uuid.UUID]]
+) -> None:
+    siguiente = itertools.cycle(cambios)
+
+    def llamada() -> None:
+        id_cambio, _ = next(siguiente)
+
+        with Session(engine) as session:
+            AuditoriaService.get_audits(
+                session=session,
+                auditoria_filter=AuditoriaFilter(
+                    tipo_entidad=TipoEntidad.CAMBIO, id_entidad=id_cambio
+                ),
+            )
+
+    benchmark(llamada)
+
+
+def test_create_cambio(benchmark: Callable, engine: Engine, dataset: Dataset) -> None:
+    owner_id = dataset.empleados[0]
+
+    def llamada() -> None:
+        cambio_crear = CambioCrear(
+            titulo="Benchmark",
+            descripcion="Benchmark",
+            prioridad=Prioridad.MEDIA,
+            impacto=ImpactoCambio.MENOR,
+            owner_id=owner_id,
+            id_config_items=dataset.relacionados(TipoEntidad.CONFIG_ITEM, 3, 10),
+            id_incidentes=dataset.relacionados(TipoEntidad.INCIDENTE, 1, 5),
+        )
+
+        with Session(engine) as session:
+            CambiosService.create_cambio(
+                session=session, cambio_crear=cambio_crear, current_user_id=owner_id
+            )
+
+    benchmark(llamada)
+
+
+def test_update_change(
+    benchmark: Callable,
+    engine: Engine,
+    dataset: Dataset,
+    cambios: list[tuple[uuid.UUID, uuid.UUID]],
+) -> None:
+    siguiente = itertools.cycle(cambios)
+
+    def llamada() -> None:
+        id_cambio, _ = next(siguiente)
+
+        with Session(engine) as session:
+            CambiosService.update_change(
+                session=session,
+                id_change=id_cambio,
+                cambio_actualizar=CambioActualizar(
+                    prioridad=random.choice(list(Prioridad))
+                ),
+                current_user_id=dataset.empleados[0],
+            )
+
+    benchmark(llamada)
+
+
+def test_rollback_change(
+    benchmark: Callable,
+    engine: Engine,
+    dataset: Dataset,
+    cambios: list[tuple[uuid.UUID, uuid.UUID]],
+) -> None:
+    siguiente = itertools.cycle(cambios)
+
+    def llamada() -> None:
+        id_cambio, id_auditoria = next(siguiente)
+
+        with Session(engine) as session:
+            CambiosService.rollback_change(
+                session=session,
+                id_change=id_cambio,
+                id_audit=id_auditoria,
+                current_user_id=dataset.empleados[0],
+            )
+
+    benchmark(llamada)
@@ -0,0 +1,102 @@
+import itertools
+import random
+import uuid
+from collections.abc import Callable
+
+from fastapi.testclient import TestClient
+
+from app.models.commons import Prioridad, TipoEntidad
+from app.utils.config import settings
+from app.utils.large_dataset import Dataset
+
+CHANGES_URL = f"{settings.API_V1_STR}/changes"
+AUDITS_URL = f"{settings.API_V1_STR}/audits"
+
+
+def test_get_changes(benchmark: Callable, client: TestClient) -> None:
+    def llamada() -> None:
+        r = client.get(f"{CHANGES_URL}/")
+        assert r.status_code == 200
+
+    benchmark(llamada)
+
+
+def test_get_audits(benchmark: Callable, client: TestClient) -> None:
+    def llamada() -> None:
+        r = client.get(AUDITS_URL)
+        assert r.status_code == 200
+
+    benchmark(llamada)
+
+
+def test_get_history(
+    benchmark: Callable,
+    client: TestClient,
+    cambios: list[tuple[uuid.UUID, uuid.UUID]],
+) -> None:
+    siguiente = itertools.cycle(cambios)
+
+    def llamada() -> None:
+        id_cambio, _ = next(siguiente)
+        r = client.get(f"{CHANGES_URL}/{id_cambio}/history")
+        assert r.status_code == 200
+
+    benchmark(llamada)
+
+
+def test_create_change(
+    benchmark: Callable, client: TestClient, dataset: Dataset
+) -> None:
+    def llamada() -> None:
+        r = client.post(
+            f"{CHANGES_URL}/",
+            json={
+                "titulo": "Benchmark",
+                "descripcion": "Benchmark",
+                "prioridad": Prioridad.MEDIA.value,
+                "impacto": "MENOR",
+                "id_config_items": [
+                    str(id)
+                    for id in dataset.relacionados(TipoEntidad.CONFIG_ITEM, 3, 10)
+                ],
+            },
+        )
+        assert r.status_code == 200
+
+    benchmark(llamada)
+
+
+def test_update_change(
+    benchmark: Callable,
+    client: TestClient,
+    cambios: list[tuple[uuid.UUID, uuid.UUID]],
+) -> None:
+    siguiente = itertools.cycle(cambios)
+
+    def llamada() -> None:
+        id_cambio, _ = next(siguiente)
+        r = client.patch(
+            f"{CHANGES_URL}/{id_cambio}",
+            json={"prioridad": random.choice(list(Prioridad)).value},
+        )
+        assert r.status_code == 200
+
+    benchmark(llamada)
+
+
+def test_rollback_change(
+    benchmark: Callable,
+    client: TestClient,
+    cambios: list[tuple[uuid.UUID, uuid.UUID]],
+) -> None:
+    siguiente = itertools.cycle(cambios)
+
+    def llamada() -> None:
+        id_cambio, id_auditoria = next(siguiente)
+        r = client.post(
+            f"{CHANGES_URL}/{id_cambio}/rollback",
+            params={"id_auditoria": str(id_auditoria)},
+        )
+        assert r.status_code == 200
+
+    benchmark(llamada)
@@ -0,0 +1,113 @@
+import gc
+import json
+import statistics
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+
+from sqlalchemy import Engine, event
+
+# Differences below these are noise whatever the tolerance
+MARGEN = {"p50_ms": 1.0, "kb": 64.0}
+
+
+@dataclass
+class Medicion:
+    # Per call
+    consultas: int
+    # How fast the machine was, to compare times taken on different ones
+    calibracion_ms: float
+    p50_ms: float
+    p99_ms: float
+    kb: float
+
+    def to_dict(self) -> dict:
+        return {campo: round(valor, 3) for campo, valor in asdict(self).items()}
+
+
+def calibrar() -> float:
+    """Median of a few runs of fixed CPU bound work, in milliseconds."""
+    datos = [{"id": i, "titulo": f"Titulo {i}", "valor": i * 0.5} for i in range(2_000)]
+    tiempos = []
+
+    for _ in range(9):
+        start = time.perf_counter()
+        json.loads(json.dumps(datos))
+        sorted(datos, key=lambda fila: fila["titulo"])
+        tiempos.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(tiempos)
+
+
+def medir(engine: Engine, llamada: Callable[[], object], rondas: int) -> Medicion:
+    """Runs `llamada` once to warm up the caches, once more to count its
+    queries and the memory it allocates, then `rondas` times to time it
+    without any tracing nor garbage collection, like `timeit`, between two
+    calibrations."""
+    llamada()
+
+    statements: list[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, *args) -> None:  # noqa: ARG001
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    tracemalloc.start()
+    try:
+        llamada()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    antes = calibrar()
+    tiempos = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(rondas):
+            start = time.perf_counter()
+            llamada()
+            tiempos.append((time.perf_counter() - start) * 1000)
+    finally:
+        gc.enable()
+
+    percentiles = statistics.quantiles(tiempos, n=100, method="inclusive")
+
+    return Medicion(
+        consultas=len(statements),
+        calibracion_ms=(antes + calibrar()) / 2,
+        p50_ms=statistics.median(tiempos),
+        p99_ms=percentiles[98],
+        kb=pico / 1024,
+    )
+
+
+def regresiones(
+    medicion: Medicion, base: dict | None, *, tolerancia: float
+) -> list[str]:
+    """What got worse than the baseline. Query counts are exact, time and
+    memory only count beyond `tolerancia` (0.5 is 50% more) and `MARGEN`.
+    The baseline time is scaled by how fast the machine is now."""
+    if base is None:
+        return []
+
+    errores = []
+
+    if medicion.consultas > base["consultas"]:
+        errores.append(f"{medicion.consultas} queries, baseline {base['consultas']}")
+
+    escala = {"p50_ms": medicion.calibracion_ms / base["calibracion_ms"], "kb": 1.0}
+
+    for campo, margen in MARGEN.items():
+        valor = getattr(medicion, campo)
+        esperado = base[campo] * escala[campo]
+
+        if valor > max(esperado * (1 + tolerancia), esperado + margen):
+            errores.append(
+                f"{campo} {valor:.2f}, baseline {base[campo]:.2f} "
+                f"({esperado:.2f} on this machine now)"
+            )
+
+    return errores
@@ -0,0 +1,142 @@
+"""Compares the size of the audit history of a busy change stored as full
+snapshots (AUDIT_SNAPSHOT_INTERVAL=1, the previous behaviour) and as deltas
+with a snapshot every N versions, and the average time to rebuild a version.
+
+    python scripts/benchmark-audit-storage.py [--updates 500]
+"""
+
+import argparse
+import json
+import random
+import time
+import uuid
+
+from faker import Faker
+from sqlalchemy import func
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.crud.audits import AuditoriaService
+from app.models.auditoria import Auditoria, AuditoriaCrear
+from app.models.changes import EstadoCambio
+from app.models.commons import Operacion, Prioridad, TipoEntidad
+from app.models.kpis import KpiDiario
+from app.utils.config import settings
+
+Faker.seed(0)
+fake = Faker()
+
+INTERVALS = [1, 10, 50]
+
+
+def generate_states(updates: int) -> list[dict]:
+    random.seed(0)
+
+    estado = {
+        "id": str(uuid.uuid4()),
+        "titulo": fake.sentence(),
+        "descripcion": fake.text(max_nb_chars=1000),
+        "prioridad": Prioridad.MEDIA.value,
+        "estado": EstadoCambio.RECIBIDO.value,
+        "responsable_id": None,
+        "id_config_items": [str(uuid.uuid4()) for _ in range(50)],
+        "id_incidentes": [str(uuid.uuid4()) for _ in range(20)],
+        "id_problemas": [str(uuid.uuid4()) for _ in range(10)],
+    }
+    estados = [dict(estado)]
+
+    for _ in range(updates):
+        estado = dict(estado)
+        campo = random.choice(["prioridad", "estado", "responsable_id", "items"])
+
+        if campo == "prioridad":
+            estado["prioridad"] = random.choice(list(Prioridad)).value
+        elif campo == "estado":
+            estado["estado"] = random.choice(list(EstadoCambio)).value
+        elif campo == "responsable_id":
+            estado["responsable_id"] = str(uuid.uuid4())
+        else:
+            estado["id_config_items"] = estado["id_config_items"] + [str(uuid.uuid4())]
+
+        estados.append(estado)
+
+    return estados
+
+
+def run(intervalo: int, estados: list[dict]) -> dict:
+    settings.AUDIT_SNAPSHOT_INTERVAL = intervalo
+
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(
+        engine, tables=[Auditoria.__table__, KpiDiario.__table__]
+    )
+    id_entidad = uuid.UUID(estados[0]["id"])
+
+    with Session(engine) as session:
+        start = time.perf_counter()
+
+        for indice, estado in enumerate(estados):
+            auditoria = AuditoriaCrear(
+                tipo_entidad=TipoEntidad.CAMBIO,
+                id_entidad=id_entidad,
+                operacion=Operacion.CREAR if indice == 0 else Operacion.ACTUALIZAR,
+                estado_nuevo=estado,
+                actualizado_por=uuid.uuid4(),
+            )
+            AuditoriaService.registrar_operaciones(
+                session=session, auditorias_crear=[auditoria]
+            )
+            session.commit()
+
+        escritura = time.perf_counter() - start
+
+        auditorias = session.exec(select(Auditoria)).all()
+        tamanio = sum(len(json.dumps(a.estado_nuevo)) for a in auditorias)
+        snapshots = session.exec(
+            select(func.count()).select_from(Auditoria).where(Auditoria.es_snapshot)
+        ).one()
+
+        # What a rollback to each version costs
+        auditorias.sort(key=lambda auditoria: auditoria.version)
+        start = time.perf_counter()
+
+        for auditoria, estado in zip(auditorias, estados, strict=True):
+            reconstruido = AuditoriaService.reconstruir_estado(
+                session=session, auditoria=auditoria
+            )
+            assert reconstruido == estado
+
+        lectura = (time.perf_counter() - start) / len(auditorias)
+
+    return {
+        "intervalo": intervalo,
+        "filas": len(auditorias),
+        "snapshots": snapshots,
+        "kb": tamanio / 1024,
+        "escritura_ms": escritura * 1000,
+        "reconstruir_ms": lectura * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--updates", type=int, default=500)
+    args = parser.parse_args()
+
+    estados = generate_states(args.updates)
+    resultados = [run(intervalo, estados) for intervalo in INTERVALS]
+    base = resultados[0]["kb"]
+
+    print(
+        f"{'interval':>8} {'rows':>6} {'snapshots':>9} {'estado_nuevo KB':>15} "
+        f"{'vs full':>8} {'write ms':>9} {'rebuild ms':>10}"
+    )
+
+    for r in resultados:
+        print(
+            f"{r['intervalo']:>8} {r['filas']:>6} {r['snapshots']:>9} "
+            f"{r['kb']:>15.1f} {r['kb'] / base:>8.1%} "
+            f"{r['escritura_ms']:>9.0f} {r['reconstruir_ms']:>10.2f}"
+        )
+
+
+main()
@@ -0,0 +1,98 @@
+"""Sends a burst of concurrent logins to a running app while polling the
+health check, and reports login throughput and latency, how many were
+rejected with 503, and how much the burst slowed down the other requests.
+
+    python scripts/benchmark-login.py [--logins 200] [--concurrency 20]
+
+Compare runs with different BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS and
+PASSWORD_HASH_QUEUE_SIZE.
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BASE_URL = "http://localhost:8000/api/v1"
+LOGIN_URL = f"{BASE_URL}/login/access-token"
+HEALTH_URL = f"{BASE_URL}/utils/health-check"
+METRICS_URL = f"{BASE_URL}/utils/metrics"
+
+
+def login(email: str, password: str) -> tuple[int, float]:
+    start = time.perf_counter()
+    r = requests.post(LOGIN_URL, data={"username": email, "password": password})
+
+    return r.status_code, time.perf_counter() - start
+
+
+def poll_health(stop: threading.Event, latencies: list[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        requests.get(HEALTH_URL)
+        latencies.append(time.perf_counter() - start)
+        time.sleep(0.05)
+
+
+def percentile(values: list[float], p: float) -> float:
+    return statistics.quantiles(values, n=100)[int(p) - 1] if len(values) > 1 else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--email", default="john@company.com")
+    parser.add_argument("--password", default="12345678")
+    args = parser.parse_args()
+
+    # Idle latency of the other requests, to compare with the burst
+    idle: list[float] = []
+    stop = threading.Event()
+    poller = threading.Thread(target=poll_health, args=(stop, idle))
+    poller.start()
+    time.sleep(1)
+    stop.set()
+    poller.join()
+
+    durante: list[float] = []
+    stop = threading.Event()
+    poller = threading.Thread(target=poll_health, args=(stop, durante))
+    poller.start()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        resultados = list(
+            executor.map(lambda _: login(args.email, args.password), range(args.logins))
+        )
+    total = time.perf_counter() - start
+
+    stop.set()
+    poller.join()
+
+    ok = [latencia for status, latencia in resultados if status == 200]
+    rechazados = sum(1 for status, _ in resultados if status == 503)
+    errores = len(resultados) - len(ok) - rechazados
+
+    print(f"logins:           {len(resultados)} in {total:.2f}s")
+    print(f"throughput:       {len(ok) / total:.1f} logins/s")
+    print(
+        f"login latency:    p50 {percentile(ok, 50) * 1000:.0f}ms "
+        f"p95 {percentile(ok, 95) * 1000:.0f}ms"
+    )
+    print(f"rejected (503):   {rechazados}")
+    print(f"other errors:     {errores}")
+    print(
+        f"health-check p95: idle {percentile(idle, 95) * 1000:.1f}ms, "
+        f"during burst {percentile(durante, 95) * 1000:.1f}ms"
+    )
+
+    hashing = requests.get(METRICS_URL).json().get("password_hash_seconds")
+    if hashing:
+        print(f"hash time (mean): {hashing['sum'] / hashing['count'] * 1000:.0f}ms")
+
+
+main()
@@ -0,0 +1,80 @@
+"""Bulk-writes a production-sized dataset into the database of the settings:
+employees, config items, incidents, problems and changes linked to each other,
+each one with a history of updates in the audit log, and then rebuilds the KPI
+rollups from it.
+
+    python scripts/generate-large-dataset.py [--config-items 100000] [--seed 0]
+
+Incidents, problems and changes are sized from --config-items unless given.
+Links are skewed towards a few hot entities, like the handful of config items
+most incidents and changes point at in production. On Postgres every table is
+written with COPY, in transactions of --batch entities: a million config items
+with their history take minutes, not the hours it takes through the API.
+
+Every run adds a new dataset, nothing is replaced. The generated employees log
+in with --password, e.g. to run `scripts/load-test.py` as one of them.
+"""
+
+import argparse
+import logging
+import random
+import time
+
+from faker import Faker
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.models.commons import TipoEntidad
+from app.utils.large_dataset import cantidades_por_defecto, generar_dataset
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config-items", type=int, default=100_000)
+    parser.add_argument("--incidents", type=int, help="default: 2 per config item")
+    parser.add_argument("--problems", type=int, help="default: 1 per 10 config items")
+    parser.add_argument("--changes", type=int, help="default: 1 per 2 config items")
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--password", default="12345678")
+    parser.add_argument("--days", type=int, default=365, help="age of the oldest row")
+    parser.add_argument("--max-updates", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    Faker.seed(args.seed)
+
+    cantidades = cantidades_por_defecto(args.config_items)
+
+    for tipo, cantidad in [
+        (TipoEntidad.INCIDENTE, args.incidents),
+        (TipoEntidad.PROBLEMA, args.problems),
+        (TipoEntidad.CAMBIO, args.changes),
+    ]:
+        if cantidad is not None:
+            cantidades[tipo] = cantidad
+
+    start = time.perf_counter()
+
+    with Session(engine) as session:
+        dataset = generar_dataset(
+            session,
+            cantidades=cantidades,
+            empleados=args.employees,
+            password=args.password,
+            dias=args.days,
+            max_updates=args.max_updates,
+            lote=args.batch,
+        )
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"{dataset.escritas} rows in {elapsed:.0f}s "
+        f"({dataset.escritas / elapsed:.0f} rows/s)"
+    )
+
+
+main()
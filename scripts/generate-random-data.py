@@ -1,16 +1,12 @@
-import random
-from collections.abc import Callable
-
 import requests
-from faker import Faker
-
-from app.models.changes import EstadoCambio, ImpactoCambio
-from app.models.commons import Prioridad
-from app.models.config_items import EstadoItem
-from app.models.incidents import EstadoIncidente
-from app.models.problems import EstadoProblema
 
-fake = Faker()
+from app.models.pagination import LIMIT_MAXIMO
+from app.utils.chaos import (
+    chaos_changes,
+    chaos_config_items,
+    chaos_incidents,
+    chaos_problems,
+)
 
 BASE_URL = "http://localhost:8000/api/v1"
 USERS_URL = f"{BASE_URL}/users"
@@ -20,9 +16,6 @@ CHANGES_URL = f"{BASE_URL}/changes"
 PROBLEMS_URL = f"{BASE_URL}/problems"
 INCIDENTS_URL = f"{BASE_URL}/incidents"
 
-MAX_UPDATES = 100
-MAX_DESCRIPTION = 100
-
 
 def get_headers():
     r = requests.post(
@@ -46,185 +39,54 @@ def get_empleados(headers: dict):
     return empleados
 
 
-def get_config_items():
-    r = requests.get(CONFIG_ITEMS_URL)
-
-    return r.json()
-
-
-def get_changes():
-    r = requests.get(CHANGES_URL)
-
-    return r.json()
-
-
-def get_problems():
-    r = requests.get(PROBLEMS_URL)
-
-    return r.json()
-
-
-def get_incidents():
-    r = requests.get(INCIDENTS_URL)
-
-    return r.json()
-
-
-### CHAOS
-
-
-def random_apply(data: dict, key: str, randomizer: Callable, chances: float = 0.5):
-    if random.random() < chances:
-        data[key] = randomizer()
-
-
-def random_descripcion(data: dict):
-    # 0.3 chances because it should be unlikely to change a description
-    random_apply(
-        data=data,
-        key="descripcion",
-        randomizer=lambda: fake.text(max_nb_chars=MAX_DESCRIPTION),
-        chances=0.3,
-    )
-
-
-def random_prioridad(data: dict):
-    random_apply(
-        data=data, key="prioridad", randomizer=lambda: fake.enum(Prioridad).value
-    )
-
-
-def random_responsable(data: dict, empleados_id: dict):
-    # 0.7 chances to make it likely to set a responsable_id
-    random_apply(
-        data=data,
-        key="responsable_id",
-        randomizer=lambda: random.choice(empleados_id),
-        chances=0.7,
-    )
-
-
-def generate_random_id_choices(data_id: dict, min_rand: int = 1, max_rand: int = 4):
-    k = random.randint(min_rand, max_rand)
-    return random.choices(data_id, k=k)
-
+def get_all(url: str) -> list[dict]:
+    # Lists are paginated, every page but the last one has an X-Next-Cursor
+    items = []
+    params = {"limit": LIMIT_MAXIMO}
 
-def random_config_items(data: dict, config_items_id: dict):
-    random_apply(
-        data=data,
-        key="id_config_items",
-        randomizer=lambda: generate_random_id_choices(config_items_id),
-    )
-
-
-def random_problemas(data: dict, problems_id: dict):
-    random_apply(
-        data=data,
-        key="id_problemas",
-        randomizer=lambda: generate_random_id_choices(problems_id, max_rand=2),
-    )
-
-
-def random_incidentes(data: dict, incidents_id: dict):
-    random_apply(
-        data=data,
-        key="id_incidentes",
-        randomizer=lambda: generate_random_id_choices(incidents_id, max_rand=2),
-    )
+    while True:
+        r = requests.get(url, params=params)
+        items.extend(r.json())
 
+        if "X-Next-Cursor" not in r.headers:
+            return items
 
-def chaos_config_items(config_items, headers):
-    for _ in range(MAX_UPDATES):
-        config_item = random.choice(config_items)
-        config_item_id = config_item["id"]
-        data = {}
+        params["cursor"] = r.headers["X-Next-Cursor"]
 
-        random_descripcion(data)
-        random_apply(data, "estado", lambda: fake.enum(EstadoItem).value)
 
-        # Skip if there's no update
-        if len(data.keys()) == 0:
-            continue
-
-        r = requests.patch(
-            f"{CONFIG_ITEMS_URL}/{config_item_id}", json=data, headers=headers
-        )
-
-        if r.status_code >= 400:
-            print("[config items] ", r.json())
-
-
-def chaos_incidents(incidents, config_items_id, empleados_id, headers):
-    for _ in range(MAX_UPDATES):
-        incident = random.choice(incidents)
-        incident_id = incident["id"]
-        data = {}
-
-        random_descripcion(data)
-        random_prioridad(data)
-        random_apply(data, "estado", lambda: fake.enum(EstadoIncidente).value)
-        random_responsable(data, empleados_id)
-        random_config_items(data, config_items_id)
-
-        # Skip if there's no update
-        if len(data.keys()) == 0:
-            continue
-
-        r = requests.patch(f"{INCIDENTS_URL}/{incident_id}", json=data, headers=headers)
+def get_config_items():
+    return get_all(CONFIG_ITEMS_URL)
 
-        if r.status_code >= 400:
-            print("[incidents]: ", r.json())
 
+def get_changes():
+    return get_all(CHANGES_URL)
 
-def chaos_changes(
-    changes, incidents_id, problems_id, config_items_id, empleados_id, headers
-):
-    for _ in range(MAX_UPDATES):
-        change = random.choice(changes)
-        change_id = change["id"]
-        data = {}
 
-        random_descripcion(data)
-        random_prioridad(data)
-        random_apply(data, "impacto", lambda: fake.enum(ImpactoCambio).value)
-        random_apply(data, "estado", lambda: fake.enum(EstadoCambio).value)
-        random_config_items(data, config_items_id)
-        random_problemas(data, problems_id)
-        random_incidentes(data, incidents_id)
-        random_responsable(data, empleados_id)
+def get_problems():
+    return get_all(PROBLEMS_URL)
 
-        # Skip if there's no update
-        if len(data.keys()) == 0:
-            continue
 
-        r = requests.patch(f"{CHANGES_URL}/{change_id}", json=data, headers=headers)
+def get_incidents():
+    return get_all(INCIDENTS_URL)
 
-        if r.status_code >= 400:
-            print("[changes] ", r.json())
 
+### CHAOS
 
-def chaos_problems(problems, incidents_id, config_items_id, empleados_id, headers):
-    for _ in range(MAX_UPDATES):
-        problem = random.choice(problems)
-        problem_id = problem["id"]
-        data = {}
 
-        random_descripcion(data)
-        random_prioridad(data)
-        random_apply(data, "estado", lambda: fake.enum(EstadoProblema).value)
-        random_responsable(data, empleados_id)
-        # random_apply(data, "id_incidentes", lambda: random.choice(incidents_id))
-        random_incidentes(data, incidents_id)
-        random_config_items(data, config_items_id)
+def patch_bulk(url: str, updates: list[dict], headers: dict, tag: str):
+    # A single request per entity type instead of one per update
+    if len(updates) == 0:
+        return
 
-        # Skip if there's no update
-        if len(data.keys()) == 0:
-            continue
+    r = requests.patch(f"{url}/bulk", json=updates, headers=headers)
 
-        r = requests.patch(f"{PROBLEMS_URL}/{problem_id}", json=data, headers=headers)
+    if r.status_code >= 400:
+        print(f"[{tag}] ", r.json())
+        return
 
-        if r.status_code >= 400:
-            print("[problems] ", r.json())
+    for resultado in r.json():
+        if resultado["error"] is not None:
+            print(f"[{tag}] ", resultado)
 
 
 def main():
@@ -235,37 +97,51 @@ def main():
     changes = get_changes()
     problems = get_problems()
 
-    chaos_config_items(config_items=config_items, headers=headers)
+    patch_bulk(
+        CONFIG_ITEMS_URL, chaos_config_items(config_items), headers, "config items"
+    )
 
     empleados_id = [empleado["id"] for empleado in empleados]
     config_items_id = [config_item["id"] for config_item in config_items]
 
-    chaos_incidents(
-        incidents=incidents,
-        config_items_id=config_items_id,
-        empleados_id=empleados_id,
-        headers=headers,
+    patch_bulk(
+        INCIDENTS_URL,
+        chaos_incidents(
+            incidents=incidents,
+            config_items_id=config_items_id,
+            empleados_id=empleados_id,
+        ),
+        headers,
+        "incidents",
     )
 
     incidents_id = [incident["id"] for incident in incidents]
 
-    chaos_problems(
-        problems=problems,
-        incidents_id=incidents_id,
-        config_items_id=config_items_id,
-        empleados_id=empleados_id,
-        headers=headers,
+    patch_bulk(
+        PROBLEMS_URL,
+        chaos_problems(
+            problems=problems,
+            incidents_id=incidents_id,
+            config_items_id=config_items_id,
+            empleados_id=empleados_id,
+        ),
+        headers,
+        "problems",
     )
 
     problems_id = [problem["id"] for problem in problems]
 
-    chaos_changes(
-        changes=changes,
-        incidents_id=incidents_id,
-        problems_id=problems_id,
-        config_items_id=config_items_id,
-        empleados_id=empleados_id,
-        headers=headers,
+    patch_bulk(
+        CHANGES_URL,
+        chaos_changes(
+            changes=changes,
+            incidents_id=incidents_id,
+            problems_id=problems_id,
+            config_items_id=config_items_id,
+            empleados_id=empleados_id,
+        ),
+        headers,
+        "changes",
     )
 
 
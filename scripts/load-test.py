@@ -0,0 +1,378 @@
+"""Drives a running app with a mix of reads and writes at a fixed request rate
+and reports throughput, errors and a latency histogram per operation.
+
+    python scripts/load-test.py [--profile mixed] [--rps 50] [--duration 60]
+
+Requests are started on schedule whether or not the previous ones finished
+(open loop), and latency is measured from the scheduled start. A slow server
+shows up as growing latencies instead of as a lower request rate that hides
+them. --concurrency caps the connections, requests beyond it wait for one.
+
+Writes are the random updates of `app.utils.chaos`, made from the revision
+last seen by the driver, so they only conflict (409) when two in-flight
+updates pick the same entity. Run it against a production-sized dataset, see
+`scripts/generate-large-dataset.py`.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from collections import Counter, defaultdict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+import httpx
+
+from app.models.commons import Prioridad
+from app.utils.chaos import (
+    chaos_changes,
+    chaos_config_items,
+    chaos_incidents,
+    chaos_problems,
+)
+
+# Entities of each kind the operations pick from
+MUESTRA = 1_000
+# Updates per PATCH /bulk
+LOTE = 50
+
+# Seconds before the access token expires to refresh it
+MARGEN_TOKEN = 60
+
+# Upper bounds (ms) of the histogram buckets
+BUCKETS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+PERFILES = {
+    "read": {"list": 35, "get": 35, "search": 15, "history": 10, "kpis": 5},
+    "mixed": {
+        "list": 25,
+        "get": 25,
+        "search": 10,
+        "history": 5,
+        "kpis": 5,
+        "patch": 25,
+        "patch_bulk": 5,
+    },
+    "write": {"list": 10, "get": 10, "patch": 60, "patch_bulk": 20},
+}
+
+RUTAS = {
+    "config_items": "/config-items",
+    "incidents": "/incidents/",
+    "problems": "/problems/",
+    "changes": "/changes/",
+}
+
+
+@dataclass
+class Muestra:
+    config_items: list[dict]
+    incidents: list[dict]
+    problems: list[dict]
+    changes: list[dict]
+    empleados_id: list[str]
+    palabras: list[str] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.palabras = [
+            palabra
+            for entidad in self.incidents + self.changes
+            for palabra in entidad["titulo"].split()
+            if len(palabra) > 3
+        ] or ["server"]
+
+    def ids(self, tipo: str) -> list[str]:
+        return [entidad["id"] for entidad in getattr(self, tipo)]
+
+    def updates(self, tipo: str, cantidad: int) -> list[dict]:
+        if tipo == "config_items":
+            return chaos_config_items(self.config_items, updates=cantidad)
+
+        if tipo == "incidents":
+            return chaos_incidents(
+                self.incidents,
+                self.ids("config_items"),
+                self.empleados_id,
+                updates=cantidad,
+            )
+
+        if tipo == "problems":
+            return chaos_problems(
+                self.problems,
+                self.ids("incidents"),
+                self.ids("config_items"),
+                self.empleados_id,
+                updates=cantidad,
+            )
+
+        return chaos_changes(
+            self.changes,
+            self.ids("incidents"),
+            self.ids("problems"),
+            self.ids("config_items"),
+            self.empleados_id,
+            updates=cantidad,
+        )
+
+    def actualizada(self, tipo: str, id: str, revision: int | None = None) -> None:
+        # Later updates are made from the new revision
+        for entidad in getattr(self, tipo):
+            if entidad["id"] == id:
+                entidad["revision"] = revision or entidad["revision"] + 1
+
+
+Operacion = Callable[[httpx.AsyncClient, Muestra], Awaitable[httpx.Response]]
+
+
+def _tipo(muestra: Muestra) -> str:
+    return random.choice([tipo for tipo in RUTAS if getattr(muestra, tipo)])
+
+
+def _url(tipo: str, id: str) -> str:
+    return f"{RUTAS[tipo].rstrip('/')}/{id}"
+
+
+async def op_list(cliente: httpx.AsyncClient, muestra: Muestra) -> httpx.Response:
+    params = {"limit": 100}
+
+    if random.random() < 0.5:
+        params["prioridad"] = random.choice(list(Prioridad)).value
+
+    tipo = _tipo(muestra)
+
+    if tipo == "config_items":
+        params.pop("prioridad", None)
+
+    return await cliente.get(RUTAS[tipo], params=params)
+
+
+async def op_get(cliente: httpx.AsyncClient, muestra: Muestra) -> httpx.Response:
+    tipo = _tipo(muestra)
+
+    return await cliente.get(_url(tipo, random.choice(muestra.ids(tipo))))
+
+
+async def op_search(cliente: httpx.AsyncClient, muestra: Muestra) -> httpx.Response:
+    return await cliente.get("/search", params={"q": random.choice(muestra.palabras)})
+
+
+async def op_history(cliente: httpx.AsyncClient, muestra: Muestra) -> httpx.Response:
+    tipo = random.choice(["config_items", "changes"])
+
+    return await cliente.get(f"{_url(tipo, random.choice(muestra.ids(tipo)))}/history")
+
+
+async def op_kpis(cliente: httpx.AsyncClient, muestra: Muestra) -> httpx.Response:  # noqa: ARG001
+    tipo = random.choice(["incidents", "problems", "changes"])
+
+    return await cliente.get(f"/kpis/{tipo}", params={"dias": 30})
+
+
+async def op_patch(cliente: httpx.AsyncClient, muestra: Muestra) -> httpx.Response:
+    tipo = _tipo(muestra)
+
+    # Chaos may pick no field to change
+    while not (updates := muestra.updates(tipo, 1)):
+        pass
+
+    body = dict(updates[0])
+    id = body.pop("id")
+
+    r = await cliente.patch(_url(tipo, id), json=body)
+
+    if r.status_code == 200:
+        muestra.actualizada(tipo, id, r.json()["revision"])
+
+    return r
+
+
+async def op_patch_bulk(cliente: httpx.AsyncClient, muestra: Muestra) -> httpx.Response:
+    tipo = _tipo(muestra)
+    r = await cliente.patch(
+        f"{RUTAS[tipo].rstrip('/')}/bulk", json=muestra.updates(tipo, LOTE)
+    )
+
+    if r.status_code == 200:
+        for resultado in r.json():
+            if resultado["error"] is None:
+                muestra.actualizada(tipo, resultado["id"])
+
+    return r
+
+
+OPERACIONES: dict[str, Operacion] = {
+    "list": op_list,
+    "get": op_get,
+    "search": op_search,
+    "history": op_history,
+    "kpis": op_kpis,
+    "patch": op_patch,
+    "patch_bulk": op_patch_bulk,
+}
+
+
+@dataclass
+class Resultados:
+    latencias: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    estados: dict[str, Counter] = field(default_factory=lambda: defaultdict(Counter))
+
+
+async def ejecutar(
+    cliente: httpx.AsyncClient,
+    muestra: Muestra,
+    nombre: str,
+    programado: float,
+    resultados: Resultados,
+) -> None:
+    try:
+        r = await OPERACIONES[nombre](cliente, muestra)
+        estado = str(r.status_code)
+    except httpx.HTTPError as e:
+        estado = type(e).__name__
+
+    # From the scheduled start, so time spent waiting for a connection counts
+    resultados.latencias[nombre].append(time.perf_counter() - programado)
+    resultados.estados[nombre][estado] += 1
+
+
+async def cargar_muestra(cliente: httpx.AsyncClient) -> Muestra:
+    listas = await asyncio.gather(
+        *(cliente.get(ruta, params={"limit": MUESTRA}) for ruta in RUTAS.values()),
+        cliente.get("/users", params={"rol": "EMPLEADO"}),
+    )
+
+    for r in listas:
+        r.raise_for_status()
+
+    *entidades, empleados = (r.json() for r in listas)
+
+    return Muestra(*entidades, empleados_id=[empleado["id"] for empleado in empleados])
+
+
+def autorizar(cliente: httpx.AsyncClient, token: dict) -> None:
+    cliente.headers["Authorization"] = f"Bearer {token['access_token']}"
+
+
+async def renovar_token(cliente: httpx.AsyncClient, token: dict) -> None:
+    """Runs longer than an access token lasts would end in 401s, so it is
+    exchanged for a new pair with the refresh token before it expires."""
+    while True:
+        await asyncio.sleep(max(token["expires_in"] - MARGEN_TOKEN, 1))
+
+        r = await cliente.post(
+            "/login/refresh-token", json={"refresh_token": token["refresh_token"]}
+        )
+        r.raise_for_status()
+        token = r.json()
+        autorizar(cliente, token)
+
+
+async def correr(args: argparse.Namespace) -> tuple[Resultados, float]:
+    async with httpx.AsyncClient(
+        base_url=args.base_url,
+        timeout=args.timeout,
+        limits=httpx.Limits(max_connections=args.concurrency),
+    ) as cliente:
+        r = await cliente.post(
+            "/login/access-token",
+            data={"username": args.email, "password": args.password},
+        )
+        r.raise_for_status()
+        autorizar(cliente, r.json())
+        renovacion = asyncio.create_task(renovar_token(cliente, r.json()))
+
+        muestra = await cargar_muestra(cliente)
+        pesos = PERFILES[args.profile]
+        nombres = random.choices(
+            list(pesos), weights=list(pesos.values()), k=args.rps * args.duration
+        )
+
+        resultados = Resultados()
+        tareas = []
+        start = time.perf_counter()
+
+        for indice, nombre in enumerate(nombres):
+            programado = start + indice / args.rps
+            await asyncio.sleep(max(0, programado - time.perf_counter()))
+            tareas.append(
+                asyncio.create_task(
+                    ejecutar(cliente, muestra, nombre, programado, resultados)
+                )
+            )
+
+        await asyncio.gather(*tareas)
+        renovacion.cancel()
+
+        return resultados, time.perf_counter() - start
+
+
+def percentile(values: list[float], p: float) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0
+
+    return statistics.quantiles(values, n=100, method="inclusive")[int(p) - 1]
+
+
+def histograma(latencias: list[float]) -> str:
+    conteos = Counter(
+        next((b for b in BUCKETS if latencia * 1000 <= b), None)
+        for latencia in latencias
+    )
+    celdas = [f"<={b}ms:{conteos[b]}" for b in BUCKETS if conteos[b]]
+
+    if conteos[None]:
+        celdas.append(f">{BUCKETS[-1]}ms:{conteos[None]}")
+
+    return " ".join(celdas)
+
+
+def reportar(resultados: Resultados, total: float) -> None:
+    todas = [lat for lats in resultados.latencias.values() for lat in lats]
+    print(f"requests:   {len(todas)} in {total:.1f}s ({len(todas) / total:.1f} req/s)")
+    print(
+        f"{'operation':>10} {'count':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+        f"{'max ms':>8}  status"
+    )
+
+    nombres = [nombre for nombre in OPERACIONES if nombre in resultados.latencias]
+
+    for nombre in nombres:
+        latencias = resultados.latencias[nombre]
+        estados = ", ".join(
+            f"{estado}:{cantidad}"
+            for estado, cantidad in sorted(resultados.estados[nombre].items())
+        )
+        print(
+            f"{nombre:>10} {len(latencias):>6} {percentile(latencias, 50) * 1000:>8.1f} "
+            f"{percentile(latencias, 90) * 1000:>8.1f} "
+            f"{percentile(latencias, 99) * 1000:>8.1f} {max(latencias) * 1000:>8.1f}  "
+            f"{estados}"
+        )
+
+    print()
+    for nombre in nombres:
+        print(f"{nombre:>10} {histograma(resultados.latencias[nombre])}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--email", default="john@company.com")
+    parser.add_argument("--password", default="12345678")
+    parser.add_argument("--profile", choices=list(PERFILES), default="mixed")
+    parser.add_argument("--rps", type=int, default=50)
+    parser.add_argument("--duration", type=int, default=60, help="seconds")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+
+    resultados, total = asyncio.run(correr(args))
+    reportar(resultados, total)
+
+
+main()
@@ -9,5 +9,11 @@ python app/backend_pre_start.py
 # Run migrations
 alembic upgrade head
 
+# Create upcoming audit partitions and archive expired ones
+python app/audit_maintenance.py
+
+# Backfill the KPI rollups from the audit log on the first deploy
+python app/kpi_rollups.py --if-empty
+
 # Create initial data in DB
 python app/initial_data.py
@@ -639,3 +639,29 @@ def test_get_audit_by_id(
 
     assert auditoria
     assert auditoria["id"] == auditorias[0]["id"]
+
+
+def test_get_audits_paginated_newest_first(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    r = client.get(AUDITS_URL, params={"limit": 2})
+
+    assert 200 <= r.status_code < 300
+    primera_pagina = r.json()
+    assert len(primera_pagina) == 2
+    assert r.headers["X-Next-Cursor"]
+
+    r = client.get(
+        AUDITS_URL, params={"limit": 2, "cursor": r.headers["X-Next-Cursor"]}
+    )
+
+    assert 200 <= r.status_code < 300
+    segunda_pagina = r.json()
+    assert len(segunda_pagina) == 2
+
+    fechas = [
+        auditoria["fecha_actualizacion"]
+        for auditoria in primera_pagina + segunda_pagina
+    ]
+    assert fechas == sorted(fechas, reverse=True)
+    assert not {a["id"] for a in primera_pagina} & {a["id"] for a in segunda_pagina}
@@ -1,17 +1,19 @@
 # ruff: noqa: ARG001
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 from faker import Faker
 from fastapi.testclient import TestClient
+from sqlalchemy import update
 from sqlmodel import Session, select
 
-from app.models.changes import EstadoCambio, ImpactoCambio, Prioridad
+from app.models.changes import Cambio, EstadoCambio, ImpactoCambio, Prioridad
 from app.models.commons import Operacion, TipoEntidad
 from app.models.config_items import ItemConfiguracion
 from app.models.incidents import Incidente
 from app.models.problems import Problema
 from app.models.users import Usuario
 from app.utils.config import settings
+from tests.utils.utils import count_queries
 
 Faker.seed(0)
 fake = Faker()
@@ -1049,3 +1051,321 @@ def test_rollback_change_problemas(
     assert len(cambio_rollback["problemas"]) == len(update_1["id_problemas"])
     for i in range(len(update_1["id_problemas"])):
         assert cambio_rollback["problemas"][i]["id"] == update_1["id_problemas"][i]
+
+
+def test_get_changes_query_count_does_not_grow_with_rows(
+    client: TestClient, session: Session
+) -> None:
+    def queries_for(limit: int) -> tuple[int, int]:
+        # Start from a cold identity map so relationships are really loaded
+        session.expire_all()
+
+        with count_queries(session) as statements:
+            r = client.get(BASE_URL, params={"limit": limit})
+
+        assert 200 <= r.status_code < 300
+        return len(r.json()), len(statements)
+
+    filas_pocas, queries_pocas = queries_for(1)
+    filas_muchas, queries_muchas = queries_for(100)
+
+    assert filas_muchas > filas_pocas
+    assert queries_muchas == queries_pocas
+
+
+def test_create_changes_in_bulk_audits_each_change(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    # Given two changes linked to existing entities
+    config_item = session.exec(select(ItemConfiguracion)).first()
+    incidente = session.exec(select(Incidente)).first()
+    problema = session.exec(select(Problema)).first()
+
+    data = [
+        {
+            "titulo": fake.word(),
+            "descripcion": fake.text(max_nb_chars=100),
+            "prioridad": Prioridad.BAJA,
+            "impacto": ImpactoCambio.MENOR,
+            "id_config_items": [str(config_item.id)],
+            "id_incidentes": [str(incidente.id)],
+            "id_problemas": [str(problema.id)],
+        }
+        for _ in range(2)
+    ]
+
+    # When the user creates them in bulk
+    r = client.post(f"{BASE_URL}/bulk", json=data, headers=empleado_token_headers)
+
+    # Then both are created with their relations
+    assert 200 <= r.status_code < 300
+
+    resultados = r.json()
+
+    assert all(resultado["error"] is None for resultado in resultados)
+
+    for resultado in resultados:
+        cambio = client.get(f"{BASE_URL}/{resultado['id']}").json()
+
+        assert cambio["config_items"][0]["id"] == str(config_item.id)
+        assert cambio["incidentes"][0]["id"] == str(incidente.id)
+        assert cambio["problemas"][0]["id"] == str(problema.id)
+
+        # And the creation audit keeps the linked ids for rollbacks
+        history = client.get(
+            f"{BASE_URL}/{resultado['id']}/history", headers=empleado_token_headers
+        ).json()
+
+        assert len(history) == 1
+        assert history[0]["operacion"] == Operacion.CREAR
+        assert history[0]["estado_nuevo"]["id_problemas"] == [str(problema.id)]
+
+
+def test_update_changes_in_bulk_reports_missing_relations(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    # Given a change and a problem id that does not exist
+    cambio = session.exec(select(Cambio)).first()
+    id_inexistente = "00000000-0000-0000-0000-000000000000"
+
+    data = [{"id": str(cambio.id), "titulo": "Nuevo", "id_problemas": [id_inexistente]}]
+
+    # When the user updates it in bulk
+    r = client.patch(f"{BASE_URL}/bulk", json=data, headers=empleado_token_headers)
+
+    # Then the row is rejected and the change is left untouched
+    assert 200 <= r.status_code < 300
+
+    resultado = r.json()[0]
+
+    assert resultado["error"] == f"No existen problemas: {id_inexistente}"
+    assert client.get(f"{BASE_URL}/{cambio.id}").json()["titulo"] != "Nuevo"
+
+
+def test_get_change_not_modified(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    cambio = session.exec(select(Cambio)).first()
+
+    r = client.get(f"{BASE_URL}/{cambio.id}")
+
+    assert r.status_code == 200
+
+    etag = r.headers["ETag"]
+    last_modified = r.headers["Last-Modified"]
+
+    assert etag.startswith('W/"')
+
+    r = client.get(f"{BASE_URL}/{cambio.id}", headers={"If-None-Match": etag})
+
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["ETag"] == etag
+
+    r = client.get(
+        f"{BASE_URL}/{cambio.id}", headers={"If-Modified-Since": last_modified}
+    )
+
+    assert r.status_code == 304
+
+    # Any update, even one that leaves the same values, is a new revision
+    r = client.patch(
+        f"{BASE_URL}/{cambio.id}",
+        json={"titulo": cambio.titulo},
+        headers=empleado_token_headers,
+    )
+
+    assert r.status_code == 200
+
+    r = client.get(f"{BASE_URL}/{cambio.id}", headers={"If-None-Match": etag})
+
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+
+
+def test_change_etag_follows_related_entities(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    cambio = session.exec(select(Cambio).where(Cambio.config_items.any())).first()
+    config_item = cambio.config_items[0]
+
+    etag = client.get(f"{BASE_URL}/{cambio.id}").headers["ETag"]
+
+    r = client.patch(
+        f"{settings.API_V1_STR}/config-items/{config_item.id}",
+        json={"descripcion": "Renombrado"},
+        headers=empleado_token_headers,
+    )
+
+    assert r.status_code == 200
+
+    r = client.get(f"{BASE_URL}/{cambio.id}", headers={"If-None-Match": etag})
+
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+
+
+def test_change_etag_follows_the_update_date(
+    client: TestClient, session: Session
+) -> None:
+    cambio = session.exec(select(Cambio)).first()
+    etag = client.get(f"{BASE_URL}/{cambio.id}").headers["ETag"]
+
+    # Written by other means, without bumping the revision
+    cambio.fecha_actualizacion += timedelta(seconds=1)
+    session.add(cambio)
+    session.commit()
+
+    r = client.get(f"{BASE_URL}/{cambio.id}", headers={"If-None-Match": etag})
+
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+
+
+def test_get_changes_not_modified(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    r = client.get(BASE_URL, params={"limit": 5})
+    etag = r.headers["ETag"]
+
+    assert "Last-Modified" not in r.headers
+
+    r = client.get(BASE_URL, params={"limit": 5}, headers={"If-None-Match": etag})
+
+    assert r.status_code == 304
+    assert r.headers["X-Limit"] == "5"
+
+    # Another page is another response
+    r = client.get(BASE_URL, params={"limit": 4}, headers={"If-None-Match": etag})
+
+    assert r.status_code == 200
+
+    cambio = session.exec(
+        select(Cambio).order_by(Cambio.fecha_creacion, Cambio.id)
+    ).first()
+    client.patch(
+        f"{BASE_URL}/{cambio.id}",
+        json={"prioridad": "BAJA"},
+        headers=empleado_token_headers,
+    )
+
+    r = client.get(BASE_URL, params={"limit": 5}, headers={"If-None-Match": etag})
+
+    assert r.status_code == 200
+
+
+def test_update_change_with_stale_revision_conflicts(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    cambio = session.exec(select(Cambio)).first()
+    titulo = cambio.titulo
+    revision = client.get(f"{BASE_URL}/{cambio.id}").json()["revision"]
+
+    r = client.patch(
+        f"{BASE_URL}/{cambio.id}",
+        json={"titulo": "Primero", "revision": revision},
+        headers=empleado_token_headers,
+    )
+
+    assert r.status_code == 200
+    assert r.json()["revision"] == revision + 1
+
+    # A second client that read the same revision
+    r = client.patch(
+        f"{BASE_URL}/{cambio.id}",
+        json={"titulo": "Segundo", "revision": revision},
+        headers=empleado_token_headers,
+    )
+
+    assert r.status_code == 409
+    assert client.get(f"{BASE_URL}/{cambio.id}").json()["titulo"] == "Primero"
+
+    client.patch(
+        f"{BASE_URL}/{cambio.id}",
+        json={"titulo": titulo},
+        headers=empleado_token_headers,
+    )
+
+
+def test_update_change_with_if_match(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    cambio = session.exec(select(Cambio)).first()
+    etag = client.get(f"{BASE_URL}/{cambio.id}").headers["ETag"]
+
+    r = client.patch(
+        f"{BASE_URL}/{cambio.id}",
+        json={"prioridad": "ALTA"},
+        headers={**empleado_token_headers, "If-Match": etag},
+    )
+
+    assert r.status_code == 200
+
+    nuevo_etag = r.headers["ETag"]
+
+    assert nuevo_etag != etag
+    assert client.get(f"{BASE_URL}/{cambio.id}").headers["ETag"] == nuevo_etag
+
+    r = client.patch(
+        f"{BASE_URL}/{cambio.id}",
+        json={"prioridad": "BAJA"},
+        headers={**empleado_token_headers, "If-Match": etag},
+    )
+
+    assert r.status_code == 409
+
+
+def test_concurrent_update_of_change_conflicts(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    cambio = session.exec(select(Cambio)).first()
+    titulo = cambio.titulo
+
+    # Another transaction writes the row after it was read
+    session.execute(
+        update(Cambio)
+        .where(Cambio.id == cambio.id)
+        .values(revision=Cambio.revision + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+    r = client.patch(
+        f"{BASE_URL}/{cambio.id}",
+        json={"titulo": "Pisado"},
+        headers=empleado_token_headers,
+    )
+
+    assert r.status_code == 409
+
+    session.refresh(cambio)
+
+    assert cambio.titulo == titulo
+
+
+def test_update_changes_in_bulk_reports_stale_revisions(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    cambio = session.exec(select(Cambio)).first()
+    titulo = cambio.titulo
+    revision = client.get(f"{BASE_URL}/{cambio.id}").json()["revision"]
+
+    data = [
+        {"id": str(cambio.id), "titulo": "Lote 1", "revision": revision},
+        {"id": str(cambio.id), "titulo": "Lote 2", "revision": revision},
+    ]
+
+    r = client.patch(f"{BASE_URL}/bulk", json=data, headers=empleado_token_headers)
+
+    assert r.status_code == 200
+
+    resultados = r.json()
+
+    assert resultados[0]["error"] is None
+    assert resultados[1]["error"].startswith("Modificado por otra operación")
+    assert client.get(f"{BASE_URL}/{cambio.id}").json()["titulo"] == "Lote 1"
+
+    client.patch(
+        f"{BASE_URL}/{cambio.id}",
+        json={"titulo": titulo},
+        headers=empleado_token_headers,
+    )
@@ -1,13 +1,17 @@
 # ruff: noqa: ARG001
 
+import gzip
+import json
+import uuid
 from datetime import datetime, timezone
 
 from app.models.commons import Operacion
 from faker import Faker
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from sqlmodel import Session, select
 
-from app.models.config_items import CategoriaItem, EstadoItem
+from app.models.auditoria import Auditoria
+from app.models.config_items import CategoriaItem, EstadoItem, ItemConfiguracion
 from app.utils.config import settings
 
 Faker.seed(0)
@@ -107,6 +111,42 @@ def test_get_config_item_by_estado(client: TestClient, session: Session) -> None
         assert item_config["estado"] == estado
 
 
+def test_get_config_items_paginated(client: TestClient, session: Session) -> None:
+    # Given all config items
+    r = client.get(f"{BASE_URL}")
+    id_items_config = [item_config["id"] for item_config in r.json()]
+
+    # When the user walks the list two items at a time
+    ids_paginados = []
+    params = {"limit": 2}
+
+    while True:
+        r = client.get(f"{BASE_URL}", params=params)
+
+        assert 200 <= r.status_code < 300
+        assert r.headers["X-Limit"] == "2"
+        assert len(r.json()) <= 2
+
+        ids_paginados.extend(item_config["id"] for item_config in r.json())
+
+        if "X-Next-Cursor" not in r.headers:
+            break
+
+        params["cursor"] = r.headers["X-Next-Cursor"]
+
+    # Then every config item is returned exactly once and in the same order
+    assert ids_paginados == id_items_config
+
+
+def test_get_config_items_with_invalid_cursor_returns_error(
+    client: TestClient, session: Session
+) -> None:
+    r = client.get(f"{BASE_URL}", params={"cursor": "not-a-cursor"})
+
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Cursor inválido"
+
+
 def test_get_config_item_by_id(
     client: TestClient, session: Session, empleado_token_headers: dict[str, str]
 ) -> None:
@@ -697,4 +737,148 @@ def test_rollback_item_to_patched_version(
     assert item_rollback["id"] == item_created["id"]
     assert item_rollback["nombre"] != item_created["nombre"]
     assert item_rollback["nombre"] == update_uno["nombre"]
-    assert item_rollback["nombre"] != update_dos["nombre"]
\ No newline at end of file
+    assert item_rollback["nombre"] != update_dos["nombre"]
+
+def test_import_config_items_from_csv(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    # Given a CSV with a row missing its categoria
+    archivo = (
+        "nombre,descripcion,version,categoria\n"
+        "Importado A,Servidor de base de datos,1.0,HARDWARE\n"
+        "Importado B,Sin categoria,1.0,\n"
+        "Importado C,Manual de operaciones,2.3,DOCUMENTACION\n"
+    )
+
+    # When it is imported
+    r = client.post(
+        f"{BASE_URL}/import",
+        files={"archivo": ("items.csv", archivo.encode(), "text/csv")},
+        headers=empleado_token_headers,
+    )
+
+    # Then the valid rows are created and the invalid one is reported
+    assert r.status_code == 200
+
+    resultado = r.json()
+
+    assert resultado["creados"] == 2
+    assert resultado["actualizados"] == 0
+    assert [error["indice"] for error in resultado["errores"]] == [1]
+    assert "categoria" in resultado["errores"][0]["error"]
+
+    items = session.exec(
+        select(ItemConfiguracion).where(ItemConfiguracion.nombre.like("Importado %"))
+    ).all()
+
+    assert {item.nombre for item in items} == {"Importado A", "Importado C"}
+
+    auditorias = session.exec(
+        select(Auditoria).where(Auditoria.id_entidad.in_([item.id for item in items]))
+    ).all()
+
+    assert [auditoria.operacion for auditoria in auditorias] == [Operacion.CREAR] * 2
+
+
+def test_import_config_items_updates_existing_ones(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    item = session.exec(
+        select(ItemConfiguracion).where(ItemConfiguracion.nombre == "Importado A")
+    ).one()
+    revision = item.revision
+
+    filas = [
+        {
+            "id": str(item.id),
+            "nombre": "Importado A",
+            "descripcion": "Servidor de base de datos",
+            "version": "1.1",
+            "categoria": CategoriaItem.HARDWARE.value,
+            "estado": EstadoItem.EN_PRODUCCION.value,
+        },
+        {"nombre": "Importado D", "descripcion": "JSON roto", "version": "1"},
+        {
+            "nombre": "Importado E",
+            "descripcion": "Con un owner que no existe",
+            "version": "1",
+            "categoria": CategoriaItem.SOFTWARE.value,
+            "owner_id": str(uuid.uuid4()),
+        },
+    ]
+    lineas = [json.dumps(fila) for fila in filas]
+    lineas[1] = lineas[1][:-5]
+
+    r = client.post(
+        f"{BASE_URL}/import",
+        files={
+            "archivo": ("items.ndjson.gz", gzip.compress("\n".join(lineas).encode()))
+        },
+        headers=empleado_token_headers,
+    )
+
+    assert r.status_code == 200
+
+    resultado = r.json()
+
+    assert resultado["creados"] == 0
+    assert resultado["actualizados"] == 1
+    assert [error["indice"] for error in resultado["errores"]] == [1, 2]
+
+    session.refresh(item)
+
+    assert item.version == "1.1"
+    assert item.estado == EstadoItem.EN_PRODUCCION
+    assert item.revision == revision + 1
+
+    auditoria = session.exec(
+        select(Auditoria)
+        .where(Auditoria.id_entidad == item.id)
+        .order_by(Auditoria.version.desc())
+    ).first()
+
+    assert auditoria.operacion == Operacion.ACTUALIZAR
+    assert auditoria.estado_nuevo["version"] == "1.1"
+
+
+def test_import_config_items_keeps_fields_missing_in_the_row(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    item = session.exec(
+        select(ItemConfiguracion).where(ItemConfiguracion.nombre == "Importado A")
+    ).one()
+    estado, owner_id = item.estado, item.owner_id
+
+    # Given a row of an existing item without estado nor owner_id
+    archivo = (
+        "id,nombre,descripcion,version,categoria\n"
+        f"{item.id},Importado A,Servidor de base de datos,1.2,HARDWARE\n"
+    )
+
+    r = client.post(
+        f"{BASE_URL}/import",
+        files={"archivo": ("items.csv", archivo.encode(), "text/csv")},
+        headers=empleado_token_headers,
+    )
+
+    # Then only the fields it has are replaced
+    assert r.status_code == 200
+    assert r.json()["actualizados"] == 1
+
+    session.refresh(item)
+
+    assert item.version == "1.2"
+    assert item.estado == estado == EstadoItem.EN_PRODUCCION
+    assert item.owner_id == owner_id
+
+
+def test_import_config_items_rejects_unknown_files(
+    client: TestClient, empleado_token_headers: dict[str, str]
+) -> None:
+    r = client.post(
+        f"{BASE_URL}/import",
+        files={"archivo": ("items.xlsx", b"")},
+        headers=empleado_token_headers,
+    )
+
+    assert r.status_code == 400
@@ -0,0 +1,201 @@
+import json
+import threading
+import time
+from collections.abc import Callable
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core.events import eventos
+from app.models.changes import Cambio
+from app.models.commons import Operacion, TipoEntidad
+from app.models.incidents import Incidente
+from app.utils.config import settings
+
+BASE_URL = f"{settings.API_V1_STR}/events"
+
+
+def parse_events(body: str) -> list[dict]:
+    mensajes = []
+
+    for bloque in body.strip().split("\n\n"):
+        campos = dict(linea.split(": ", 1) for linea in bloque.splitlines())
+        mensajes.append({**campos, "data": json.loads(campos["data"])})
+
+    return mensajes
+
+
+def stream(
+    client: TestClient,
+    headers: dict[str, str],
+    escribir: Callable[[], None] = lambda: None,
+    **params: str,
+) -> list[dict]:
+    """Reads /events while `escribir` runs, until the stream is ended."""
+
+    def escribir_y_cerrar() -> None:
+        deadline = time.monotonic() + 5
+
+        while eventos.suscriptores == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        try:
+            escribir()
+        except Exception as error:
+            errores.append(error)
+        finally:
+            eventos.stop()
+
+    errores: list[Exception] = []
+    thread = threading.Thread(target=escribir_y_cerrar)
+    thread.start()
+
+    r = client.get(BASE_URL, params=params, headers=headers)
+    thread.join()
+
+    if errores:
+        raise errores[0]
+
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+
+    return parse_events(r.text) if r.text.strip() else []
+
+
+def test_events_require_authentication(client: TestClient) -> None:
+    r = client.get(BASE_URL)
+
+    assert r.status_code == 401
+
+
+def test_committed_writes_are_streamed(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    cambio = session.exec(select(Cambio)).first()
+    incidente = session.exec(select(Incidente)).first()
+
+    def escribir() -> None:
+        for url in [
+            f"{settings.API_V1_STR}/incidents/{incidente.id}",
+            f"{settings.API_V1_STR}/changes/{cambio.id}",
+        ]:
+            r = client.patch(
+                url, json={"descripcion": "En vivo"}, headers=empleado_token_headers
+            )
+            assert r.status_code == 200
+
+    # Given a client watching a single change
+    mensajes = stream(
+        client, empleado_token_headers, escribir, id_entidad=str(cambio.id)
+    )
+
+    # Then it only gets the writes of that change
+    assert len(mensajes) == 1
+    assert mensajes[0]["event"] == Operacion.ACTUALIZAR.value
+    assert mensajes[0]["data"]["tipo_entidad"] == TipoEntidad.CAMBIO.value
+    assert mensajes[0]["data"]["id_entidad"] == str(cambio.id)
+    assert mensajes[0]["data"]["revision"] == session.get(Cambio, cambio.id).revision
+
+
+def test_rolled_back_writes_are_not_streamed(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    cambio = session.exec(select(Cambio)).first()
+
+    def escribir() -> None:
+        # A stale revision is rejected after the audit rows were added
+        r = client.patch(
+            f"{settings.API_V1_STR}/changes/{cambio.id}",
+            json={"descripcion": "Nunca guardado", "revision": 0},
+            headers=empleado_token_headers,
+        )
+        assert r.status_code == 409
+
+    assert stream(client, empleado_token_headers, escribir) == []
+
+
+def test_last_event_id_replays_missed_writes(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    cambio = session.exec(select(Cambio)).first()
+    url = f"{settings.API_V1_STR}/changes/{cambio.id}"
+
+    def escribir(descripcion: str) -> Callable[[], None]:
+        def patch() -> None:
+            r = client.patch(
+                url, json={"descripcion": descripcion}, headers=empleado_token_headers
+            )
+            assert r.status_code == 200
+
+        return patch
+
+    # Given a client that got an event and then disconnected
+    (ultimo,) = stream(
+        client, empleado_token_headers, escribir("v1"), id_entidad=str(cambio.id)
+    )
+
+    for descripcion in ["v2", "v3"]:
+        escribir(descripcion)()
+
+    # When it reconnects with the id of the last event it got
+    mensajes = stream(
+        client,
+        {**empleado_token_headers, "Last-Event-ID": ultimo["id"]},
+        id_entidad=str(cambio.id),
+    )
+
+    # Then it gets the writes it missed, in order
+    versiones = [mensaje["data"]["version"] for mensaje in mensajes]
+
+    assert versiones == [ultimo["data"]["version"] + 1, ultimo["data"]["version"] + 2]
+
+
+def test_truncated_replay_ends_the_stream(
+    client: TestClient,
+    session: Session,
+    empleado_token_headers: dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    cambio = session.exec(select(Cambio)).first()
+    url = f"{settings.API_V1_STR}/changes/{cambio.id}"
+
+    def escribir() -> None:
+        r = client.patch(
+            url, json={"descripcion": "v1"}, headers=empleado_token_headers
+        )
+        assert r.status_code == 200
+
+    (ultimo,) = stream(
+        client, empleado_token_headers, escribir, id_entidad=str(cambio.id)
+    )
+
+    for descripcion in ["v2", "v3", "v4"]:
+        r = client.patch(
+            url, json={"descripcion": descripcion}, headers=empleado_token_headers
+        )
+        assert r.status_code == 200
+
+    # Given a client that missed more writes than one replay sends
+    monkeypatch.setattr(settings, "EVENTS_REPLAY_LIMIT", 2)
+
+    # When it reconnects, the stream ends right after the replay
+    r = client.get(
+        BASE_URL,
+        params={"id_entidad": str(cambio.id)},
+        headers={**empleado_token_headers, "Last-Event-ID": ultimo["id"]},
+    )
+    assert r.status_code == 200
+    primera = parse_events(r.text)
+
+    # And reconnecting from the last replayed id gets the rest
+    segunda = stream(
+        client,
+        {**empleado_token_headers, "Last-Event-ID": primera[-1]["id"]},
+        id_entidad=str(cambio.id),
+    )
+
+    versiones = [mensaje["data"]["version"] for mensaje in primera + segunda]
+
+    assert len(primera) == 2
+    assert versiones == [ultimo["data"]["version"] + i for i in range(1, 4)]
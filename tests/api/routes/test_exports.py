@@ -0,0 +1,124 @@
+import csv
+import gzip
+import io
+import json
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, func, select
+
+from app.models.auditoria import Auditoria
+from app.models.changes import Cambio
+from app.models.commons import TipoEntidad
+from app.models.incidents import Incidente
+from app.utils.config import settings
+
+BASE_URL = f"{settings.API_V1_STR}/export"
+
+
+def test_export_changes_as_ndjson(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    r = client.get(f"{BASE_URL}/changes", headers=empleado_token_headers)
+
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/x-ndjson"
+    assert 'filename="cambios.ndjson"' in r.headers["content-disposition"]
+
+    cambios = [json.loads(linea) for linea in r.text.splitlines()]
+    total = session.exec(select(func.count()).select_from(Cambio)).one()
+
+    assert len(cambios) == total
+    assert list(cambios[0])[:2] == ["id", "titulo"]
+    assert cambios[0]["revision"] >= 1
+
+    cambio = session.get(Cambio, uuid.UUID(cambios[0]["id"]))
+    assert cambios[0]["titulo"] == cambio.titulo
+    assert cambios[0]["estado"] == cambio.estado.value
+
+
+def test_export_incidents_as_csv_with_filters(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    estado = session.exec(select(Incidente)).first().estado
+
+    r = client.get(
+        f"{BASE_URL}/incidents",
+        params={"formato": "csv", "estado": estado.value},
+        headers=empleado_token_headers,
+    )
+
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/csv")
+
+    incidentes = list(csv.DictReader(io.StringIO(r.text)))
+    total = session.exec(
+        select(func.count()).select_from(Incidente).where(Incidente.estado == estado)
+    ).one()
+
+    assert len(incidentes) == total
+    assert {incidente["estado"] for incidente in incidentes} == {estado.value}
+
+
+def test_export_without_matches_has_only_the_header(
+    client: TestClient, empleado_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{BASE_URL}/incidents",
+        params={"formato": "csv", "titulo": "No existe ningún incidente así"},
+        headers=empleado_token_headers,
+    )
+
+    assert r.status_code == 200
+    assert r.text.splitlines()[0].startswith("id,titulo,")
+    assert len(r.text.splitlines()) == 1
+
+
+def test_export_audits_gzipped(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{BASE_URL}/audits",
+        params={"tipo_entidad": TipoEntidad.INCIDENTE.value, "gzip": True},
+        headers=empleado_token_headers,
+    )
+
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/gzip"
+    assert 'filename="auditorias.ndjson.gz"' in r.headers["content-disposition"]
+
+    auditorias = [
+        json.loads(linea) for linea in gzip.decompress(r.content).splitlines()
+    ]
+    total = session.exec(
+        select(func.count())
+        .select_from(Auditoria)
+        .where(Auditoria.tipo_entidad == TipoEntidad.INCIDENTE)
+    ).one()
+
+    assert len(auditorias) == total
+    assert all(isinstance(a["estado_nuevo"], dict) for a in auditorias)
+
+    # Oldest first, like a replay of the log
+    fechas = [a["fecha_actualizacion"] for a in auditorias]
+    assert fechas == sorted(fechas)
+
+
+def test_export_only_for_empleados(
+    client: TestClient, cliente_token_headers: dict[str, str]
+) -> None:
+    r = client.get(f"{BASE_URL}/changes", headers=cliente_token_headers)
+
+    assert r.status_code == 401
+
+
+def test_export_rejects_unknown_formats(
+    client: TestClient, empleado_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{BASE_URL}/changes",
+        params={"formato": "xml"},
+        headers=empleado_token_headers,
+    )
+
+    assert r.status_code == 422
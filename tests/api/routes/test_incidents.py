@@ -693,3 +693,100 @@ def test_closing_incidente_sets_closing_date(
         incident["config_items"][0]["id"] == incidente_created["config_items"][0]["id"]
     )
     assert incident["fecha_cierre"] is not None
+
+
+def test_create_incidentes_in_bulk(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    # Given two valid incidentes and one linked to a missing config item
+    config_item = session.exec(select(ItemConfiguracion)).first()
+    id_inexistente = "00000000-0000-0000-0000-000000000000"
+
+    data = [
+        {
+            "titulo": fake.word(),
+            "descripcion": fake.text(max_nb_chars=100),
+            "prioridad": Prioridad.BAJA,
+            "categoria": CategoriaIncidente.SOFTWARE,
+            "id_config_items": [str(config_item.id)],
+        },
+        {
+            "titulo": fake.word(),
+            "descripcion": fake.text(max_nb_chars=100),
+            "prioridad": Prioridad.ALTA,
+            "categoria": CategoriaIncidente.HARDWARE,
+            "id_config_items": [id_inexistente],
+        },
+        {
+            "titulo": fake.word(),
+            "descripcion": fake.text(max_nb_chars=100),
+            "prioridad": Prioridad.MEDIA,
+            "categoria": CategoriaIncidente.SOFTWARE,
+            "id_config_items": [],
+        },
+    ]
+
+    # When the user creates them in bulk
+    r = client.post(f"{BASE_URL}/bulk", json=data, headers=empleado_token_headers)
+
+    # Then every row gets its own result
+    assert 200 <= r.status_code < 300
+
+    resultados = r.json()
+
+    assert [resultado["indice"] for resultado in resultados] == [0, 1, 2]
+    assert resultados[0]["error"] is None
+    assert resultados[1]["id"] is None
+    assert id_inexistente in resultados[1]["error"]
+    assert resultados[2]["error"] is None
+
+    # And only the valid ones are persisted
+    incidente = client.get(f"{BASE_URL}/{resultados[0]['id']}").json()
+
+    assert incidente["titulo"] == data[0]["titulo"]
+    assert incidente["config_items"][0]["id"] == str(config_item.id)
+
+    usuario = session.exec(
+        select(Usuario).where(Usuario.email == "alice@company.com")
+    ).first()
+    assert incidente["owner_id"] == str(usuario.id)
+
+
+def test_update_incidentes_in_bulk(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    # Given an incidente and an id that does not exist
+    incidente_created = create_random_incident(client, empleado_token_headers)
+    id_inexistente = "00000000-0000-0000-0000-000000000000"
+
+    data = [
+        {"id": incidente_created["id"], "estado": EstadoIncidente.CERRADO},
+        {"id": id_inexistente, "titulo": "No existe"},
+    ]
+
+    # When the user updates them in bulk
+    r = client.patch(f"{BASE_URL}/bulk", json=data, headers=empleado_token_headers)
+
+    # Then only the existing one is updated
+    assert 200 <= r.status_code < 300
+
+    resultados = r.json()
+
+    assert resultados[0] == {"indice": 0, "id": incidente_created["id"], "error": None}
+    assert resultados[1]["error"] == "No existe incidente"
+
+    incidente = client.get(f"{BASE_URL}/{incidente_created['id']}").json()
+
+    assert incidente["estado"] == EstadoIncidente.CERRADO
+    assert incidente["fecha_cierre"] is not None
+    assert incidente["config_items"] == incidente_created["config_items"]
+
+
+def test_create_incidentes_in_bulk_with_empty_list_returns_error(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    # When the user sends an empty batch
+    r = client.post(f"{BASE_URL}/bulk", json=[], headers=empleado_token_headers)
+
+    # Then it fails returning an error
+    assert r.status_code == 422
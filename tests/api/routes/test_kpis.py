@@ -0,0 +1,83 @@
+from fastapi.testclient import TestClient
+
+from app.models.changes import EstadoCambio, ImpactoCambio
+from app.models.commons import Prioridad
+from app.models.incidents import CategoriaIncidente, EstadoIncidente
+from app.utils.config import settings
+
+BASE_URL = f"{settings.API_V1_STR}/kpis"
+
+
+def test_incident_kpis_follow_creates_and_closes(
+    client: TestClient, empleado_token_headers: dict[str, str]
+) -> None:
+    antes = client.get(f"{BASE_URL}/incidents", params={"dias": 1}).json()
+
+    r = client.post(
+        f"{settings.API_V1_STR}/incidents",
+        json={
+            "titulo": "Pantalla azul",
+            "descripcion": "Al iniciar",
+            "prioridad": Prioridad.URGENTE,
+            "categoria": CategoriaIncidente.SOFTWARE,
+            "id_config_items": [],
+        },
+        headers=empleado_token_headers,
+    )
+    incidente = r.json()
+
+    durante = client.get(f"{BASE_URL}/incidents", params={"dias": 1}).json()
+
+    client.patch(
+        f"{settings.API_V1_STR}/incidents/{incidente['id']}",
+        json={"estado": EstadoIncidente.CERRADO},
+        headers=empleado_token_headers,
+    )
+
+    r = client.get(f"{BASE_URL}/incidents", params={"dias": 1})
+    despues = r.json()
+
+    assert r.status_code == 200
+    assert durante["dias"][0]["creados"] == antes["dias"][0]["creados"] + 1
+    assert durante["dias"][0]["backlog"] == antes["dias"][0]["backlog"] + 1
+    assert (
+        durante["backlog_por_prioridad"][Prioridad.URGENTE]
+        == antes["backlog_por_prioridad"].get(Prioridad.URGENTE, 0) + 1
+    )
+
+    assert despues["dias"][0]["cerrados"] == antes["dias"][0]["cerrados"] + 1
+    assert despues["dias"][0]["backlog"] == antes["dias"][0]["backlog"]
+    assert despues["mttr_horas"] is not None
+    assert despues["tasa_exito"] is None
+
+
+def test_change_kpis_have_success_rate(
+    client: TestClient, empleado_token_headers: dict[str, str]
+) -> None:
+    r = client.get(f"{settings.API_V1_STR}/config-items")
+    id_config_items = [r.json()[0]["id"]]
+
+    for estado in [EstadoCambio.CERRADO, EstadoCambio.RECHAZADO]:
+        r = client.post(
+            f"{settings.API_V1_STR}/changes",
+            json={
+                "titulo": "Actualizar kernel",
+                "descripcion": "A la ultima LTS",
+                "prioridad": Prioridad.MEDIA,
+                "impacto": ImpactoCambio.MENOR,
+                "id_config_items": id_config_items,
+            },
+            headers=empleado_token_headers,
+        )
+        client.patch(
+            f"{settings.API_V1_STR}/changes/{r.json()['id']}",
+            json={"estado": estado},
+            headers=empleado_token_headers,
+        )
+
+    r = client.get(f"{BASE_URL}/changes", params={"dias": 1})
+    kpis = r.json()
+
+    assert r.status_code == 200
+    assert 0 < kpis["tasa_exito"] < 1
+    assert EstadoCambio.RECHAZADO not in kpis["backlog_por_estado"]
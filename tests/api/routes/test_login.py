@@ -1,6 +1,11 @@
 # ruff: noqa: ARG001
+import pytest
 from fastapi.testclient import TestClient
+from sqlmodel import Session, select
 
+from app.core import security
+from app.core.hashing import HashingSaturado
+from app.models.users import Usuario
 from app.utils.config import settings
 
 BASE_URL = f"{settings.API_V1_STR}/login"
@@ -39,3 +44,129 @@ def test_get_access_token_user_not_exists(client: TestClient) -> None:
     r = client.post(f"{BASE_URL}/access-token", data=login_data)
 
     assert r.status_code == 400
+
+
+def test_login_rehashes_password_when_cost_changes(
+    client: TestClient, session: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+    login_data = {"username": "carl@company.com", "password": "12345678"}
+
+    r = client.post(f"{BASE_URL}/access-token", data=login_data)
+
+    assert r.status_code == 200
+
+    usuario = session.exec(
+        select(Usuario).where(Usuario.email == "carl@company.com")
+    ).one()
+    session.refresh(usuario)
+
+    assert usuario.contraseña_hasheada.startswith("$2b$05$")
+
+    # The new hash still matches the password
+    r = client.post(f"{BASE_URL}/access-token", data=login_data)
+
+    assert r.status_code == 200
+
+
+def test_login_when_hashing_is_saturated_returns_error(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def saturado(*args) -> None:
+        raise HashingSaturado
+
+    monkeypatch.setattr(security.hashing_pool, "run", saturado)
+    login_data = {"username": "alice@company.com", "password": "12345678"}
+
+    r = client.post(f"{BASE_URL}/access-token", data=login_data)
+
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
+
+
+def login(client: TestClient) -> dict:
+    login_data = {"username": "alice@company.com", "password": "12345678"}
+
+    r = client.post(f"{BASE_URL}/access-token", data=login_data)
+
+    assert r.status_code == 200
+
+    return r.json()
+
+
+def test_refresh_token_returns_new_pair(client: TestClient) -> None:
+    tokens = login(client)
+
+    r = client.post(
+        f"{BASE_URL}/refresh-token", json={"refresh_token": tokens["refresh_token"]}
+    )
+
+    assert r.status_code == 200
+
+    nuevos = r.json()
+
+    assert nuevos["refresh_token"] != tokens["refresh_token"]
+    assert nuevos["expires_in"] == settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+    r = client.get(
+        f"{settings.API_V1_STR}/users/me",
+        headers={"Authorization": f"Bearer {nuevos['access_token']}"},
+    )
+
+    assert r.status_code == 200
+    assert r.json()["email"] == "alice@company.com"
+
+
+def test_reused_refresh_token_revokes_family(client: TestClient) -> None:
+    tokens = login(client)
+
+    r = client.post(
+        f"{BASE_URL}/refresh-token", json={"refresh_token": tokens["refresh_token"]}
+    )
+    nuevos = r.json()
+
+    r = client.post(
+        f"{BASE_URL}/refresh-token", json={"refresh_token": tokens["refresh_token"]}
+    )
+
+    assert r.status_code == 401
+
+    # The token issued before the reuse is revoked too
+    r = client.post(
+        f"{BASE_URL}/refresh-token", json={"refresh_token": nuevos["refresh_token"]}
+    )
+
+    assert r.status_code == 401
+
+
+def test_logout_revokes_refresh_token(client: TestClient) -> None:
+    tokens = login(client)
+
+    r = client.post(
+        f"{BASE_URL}/logout", json={"refresh_token": tokens["refresh_token"]}
+    )
+
+    assert r.status_code == 204
+
+    r = client.post(
+        f"{BASE_URL}/refresh-token", json={"refresh_token": tokens["refresh_token"]}
+    )
+
+    assert r.status_code == 401
+
+
+def test_refresh_token_is_not_an_access_token(client: TestClient) -> None:
+    tokens = login(client)
+
+    r = client.get(
+        f"{settings.API_V1_STR}/users/me",
+        headers={"Authorization": f"Bearer {tokens['refresh_token']}"},
+    )
+
+    assert r.status_code == 403
+
+
+def test_invalid_refresh_token(client: TestClient) -> None:
+    r = client.post(f"{BASE_URL}/refresh-token", json={"refresh_token": "invalid"})
+
+    assert r.status_code == 401
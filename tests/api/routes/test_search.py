@@ -0,0 +1,130 @@
+from fastapi.testclient import TestClient
+
+from app.models.commons import Prioridad, TipoEntidad
+from app.models.incidents import CategoriaIncidente
+from app.utils.config import settings
+
+BASE_URL = f"{settings.API_V1_STR}/search"
+
+
+def test_search_ranks_title_matches_first(
+    client: TestClient, empleado_token_headers: dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/config-items",
+        json={
+            "nombre": "Router del tercer piso",
+            "descripcion": "Reemplaza al que fallaba con el firmware Zorblax",
+            "version": "2.1",
+            "categoria": "HARDWARE",
+        },
+        headers=empleado_token_headers,
+    )
+    item_config = r.json()
+
+    r = client.post(
+        f"{settings.API_V1_STR}/incidents",
+        json={
+            "titulo": "Falla del firmware Zorblax",
+            "descripcion": "El router no levanta",
+            "prioridad": Prioridad.ALTA,
+            "categoria": CategoriaIncidente.HARDWARE,
+            "id_config_items": [item_config["id"]],
+        },
+        headers=empleado_token_headers,
+    )
+    incidente = r.json()
+
+    r = client.get(BASE_URL, params={"q": "zorblax"})
+    busqueda = r.json()
+    resultados = busqueda["resultados"]
+
+    assert r.status_code == 200
+    assert busqueda["total"] == 2
+    assert [
+        (resultado["tipo_entidad"], resultado["id"]) for resultado in resultados
+    ] == [
+        (TipoEntidad.INCIDENTE, incidente["id"]),
+        (TipoEntidad.CONFIG_ITEM, item_config["id"]),
+    ]
+    assert resultados[1]["titulo"] == "Router del tercer piso"
+    assert resultados[1]["prioridad"] is None
+    assert resultados[0]["relevancia"] > resultados[1]["relevancia"]
+
+
+def test_search_counts_facets_of_every_match(
+    client: TestClient, empleado_token_headers: dict[str, str]
+) -> None:
+    r = client.get(f"{settings.API_V1_STR}/config-items")
+    id_config_items = [r.json()[0]["id"]]
+
+    for prioridad in [Prioridad.ALTA, Prioridad.ALTA, Prioridad.BAJA]:
+        client.post(
+            f"{settings.API_V1_STR}/problems",
+            json={
+                "titulo": "Backups Quuxor incompletos",
+                "descripcion": "Faltan archivos",
+                "prioridad": prioridad,
+                "id_config_items": id_config_items,
+                "id_incidentes": [],
+            },
+            headers=empleado_token_headers,
+        )
+
+    client.post(
+        f"{settings.API_V1_STR}/incidents",
+        json={
+            "titulo": "No se puede restaurar",
+            "descripcion": "El backup Quuxor de ayer está vacío",
+            "prioridad": Prioridad.ALTA,
+            "categoria": CategoriaIncidente.SOFTWARE,
+            "id_config_items": id_config_items,
+        },
+        headers=empleado_token_headers,
+    )
+
+    r = client.get(BASE_URL, params={"q": "quuxor", "limit": 3})
+    busqueda = r.json()
+
+    assert r.status_code == 200
+    assert busqueda["total"] == 4
+    assert busqueda["facetas"] == {
+        "tipo_entidad": {TipoEntidad.PROBLEMA: 3, TipoEntidad.INCIDENTE: 1},
+        "estado": {"EN_ANALISIS": 3, "NUEVO": 1},
+        "prioridad": {Prioridad.ALTA: 3, Prioridad.BAJA: 1},
+        "categoria": {CategoriaIncidente.SOFTWARE: 1},
+    }
+    assert len(busqueda["resultados"]) == 3
+    assert all(
+        resultado["tipo_entidad"] == TipoEntidad.PROBLEMA
+        for resultado in busqueda["resultados"]
+    )
+
+    r = client.get(
+        BASE_URL,
+        params={"q": "quuxor", "limit": 3, "cursor": r.headers["X-Next-Cursor"]},
+    )
+    busqueda = r.json()
+
+    assert [resultado["tipo_entidad"] for resultado in busqueda["resultados"]] == [
+        TipoEntidad.INCIDENTE
+    ]
+    assert "X-Next-Cursor" not in r.headers
+
+    r = client.get(BASE_URL, params={"q": "quuxor", "prioridad": "BAJA"})
+    busqueda = r.json()
+
+    assert busqueda["total"] == 1
+    assert busqueda["facetas"]["prioridad"] == {Prioridad.BAJA: 1}
+
+    r = client.get(BASE_URL, params={"q": "quuxor", "tipo_entidad": "INCIDENTE"})
+    busqueda = r.json()
+
+    assert busqueda["total"] == 1
+    assert busqueda["facetas"]["categoria"] == {CategoriaIncidente.SOFTWARE: 1}
+
+
+def test_search_without_query_returns_error(client: TestClient) -> None:
+    r = client.get(BASE_URL, params={"q": ""})
+
+    assert r.status_code == 422
@@ -0,0 +1,97 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, func, select
+
+from app.api.routes.stats import cache
+from app.models.commons import Prioridad
+from app.models.incidents import CategoriaIncidente, EstadoIncidente, Incidente
+from app.utils.config import settings
+
+BASE_URL = f"{settings.API_V1_STR}/stats"
+INCIDENTS_URL = f"{settings.API_V1_STR}/incidents"
+
+
+def create_incidente(client: TestClient, token_headers: dict[str, str]) -> dict:
+    r = client.post(
+        INCIDENTS_URL,
+        json={
+            "titulo": "Impresora sin toner",
+            "descripcion": "No imprime",
+            "prioridad": Prioridad.BAJA,
+            "categoria": CategoriaIncidente.HARDWARE,
+            "id_config_items": [],
+        },
+        headers=token_headers,
+    )
+
+    return r.json()
+
+
+def test_get_incidents_stats(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    cache.clear()
+    incidente = create_incidente(client, empleado_token_headers)
+    client.patch(
+        f"{INCIDENTS_URL}/{incidente['id']}",
+        json={"estado": EstadoIncidente.CERRADO},
+        headers=empleado_token_headers,
+    )
+
+    r = client.get(f"{BASE_URL}/incidents", params={"dias": 7})
+    estadisticas = r.json()
+
+    por_estado = dict(
+        session.exec(
+            select(Incidente.estado, func.count()).group_by(Incidente.estado)
+        ).all()
+    )
+
+    assert r.status_code == 200
+    assert estadisticas["total"] == sum(por_estado.values())
+    assert estadisticas["por_estado"] == {
+        estado.value: cantidad for estado, cantidad in por_estado.items()
+    }
+    assert sum(estadisticas["por_prioridad"].values()) == estadisticas["total"]
+
+    tendencia = estadisticas["tendencia"]
+    hoy = datetime.now(timezone.utc).date().isoformat()
+
+    assert len(tendencia) == 7
+    assert tendencia[-1]["fecha"] == hoy
+    assert tendencia[-1]["abiertos"] >= 1
+    assert tendencia[-1]["cerrados"] >= 1
+    assert estadisticas["tiempo_medio_cierre_horas"] >= 0
+
+
+def test_stats_are_cached(
+    client: TestClient, empleado_token_headers: dict[str, str]
+) -> None:
+    cache.clear()
+    total = client.get(f"{BASE_URL}/incidents").json()["total"]
+
+    create_incidente(client, empleado_token_headers)
+
+    assert client.get(f"{BASE_URL}/incidents").json()["total"] == total
+
+    cache.clear()
+
+    assert client.get(f"{BASE_URL}/incidents").json()["total"] == total + 1
+
+
+@pytest.mark.parametrize("entidad", ["problems", "changes"])
+def test_get_stats(client: TestClient, entidad: str) -> None:
+    r = client.get(f"{BASE_URL}/{entidad}")
+    estadisticas = r.json()
+
+    assert r.status_code == 200
+    assert estadisticas["total"] > 0
+    assert len(estadisticas["tendencia"]) == 30
+
+
+def test_get_stats_with_too_many_days_returns_error(client: TestClient) -> None:
+    r = client.get(f"{BASE_URL}/changes", params={"dias": 366})
+
+    assert r.status_code == 422
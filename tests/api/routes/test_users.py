@@ -5,9 +5,13 @@ from faker import Faker
 from fastapi.testclient import TestClient
 from sqlmodel import Session, select
 
+from app.api.deps import get_current_user
+from app.core.metrics import metrics
 from app.core.security import verify_password
+from app.crud.users import UsuariosService, usuarios_cache
 from app.models.users import Rol, Usuario
 from app.utils.config import settings
+from tests.utils.utils import count_queries
 
 Faker.seed(0)
 fake = Faker()
@@ -251,3 +255,46 @@ def test_get_users_me_error(client: TestClient, session: Session) -> None:
     r = client.get(f"{BASE_URL}/me")
 
     assert 400 <= r.status_code < 500
+
+
+def test_current_user_is_cached(
+    session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    token = empleado_token_headers["Authorization"].removeprefix("Bearer ")
+    usuario = get_current_user(session, token)
+    usuarios_cache.invalidate(usuario.id)
+    hits = metrics.snapshot().get("users_cache_hits_total", 0)
+
+    get_current_user(session, token)
+
+    with count_queries(session) as queries:
+        assert get_current_user(session, token) == usuario
+
+    assert queries == []
+    assert metrics.snapshot()["users_cache_hits_total"] == hits + 1
+
+    # Invalidated users are read again
+    db_usuario = session.get(Usuario, usuario.id)
+    db_usuario.nombre = "Renombrado"
+    session.add(db_usuario)
+    session.commit()
+    UsuariosService.invalidar_usuario(id_usuario=db_usuario.id)
+
+    assert get_current_user(session, token).nombre == "Renombrado"
+
+    db_usuario.nombre = usuario.nombre
+    session.add(db_usuario)
+    session.commit()
+    UsuariosService.invalidar_usuario(id_usuario=db_usuario.id)
+
+
+def test_me_is_read_from_the_access_token(
+    client: TestClient, session: Session, empleado_token_headers: dict[str, str]
+) -> None:
+    with count_queries(session) as queries:
+        r = client.get(f"{BASE_URL}/me", headers=empleado_token_headers)
+
+    assert r.status_code == 200
+    assert r.json()["email"] == "alice@company.com"
+    assert r.json()["rol"] == Rol.EMPLEADO
+    assert queries == []
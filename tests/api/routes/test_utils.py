@@ -0,0 +1,16 @@
+from fastapi.testclient import TestClient
+
+from app.utils.config import settings
+
+BASE_URL = f"{settings.API_V1_STR}/utils"
+
+
+def test_get_metrics(client: TestClient) -> None:
+    r = client.get(f"{BASE_URL}/metrics")
+
+    assert 200 <= r.status_code < 300
+
+    metricas = r.json()
+
+    assert "db_pool_size" in metricas
+    assert "db_pool_saturation" in metricas
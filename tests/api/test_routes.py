@@ -0,0 +1,18 @@
+import inspect
+
+from fastapi.routing import APIRoute
+
+from app.api.deps import get_db
+from app.main import app
+
+
+def _uses_session(route: APIRoute) -> bool:
+    return any(sub.call is get_db for sub in route.dependant.dependencies)
+
+
+def test_routes_using_the_db_are_not_coroutines() -> None:
+    # Sync handlers run in the threadpool, so blocking DB calls (and bcrypt)
+    # don't stall the event loop
+    for route in app.routes:
+        if isinstance(route, APIRoute) and _uses_session(route):
+            assert not inspect.iscoroutinefunction(route.endpoint), route.path
@@ -0,0 +1,122 @@
+import uuid
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Engine, event
+from sqlmodel import Session, SQLModel, create_engine, func, select
+
+from app.core.audit_writer import AuditWriter
+from app.crud import unit_of_work
+from app.crud.unit_of_work import UnitOfWork
+from app.models.auditoria import Auditoria, AuditoriaCrear
+from app.models.commons import Operacion, TipoEntidad
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(tmp_path: Path) -> Engine:
+    # A file so the writer thread gets its own connection
+    engine = create_engine(f"sqlite:///{tmp_path / 'audits.db'}")
+    SQLModel.metadata.create_all(engine, tables=[Auditoria.__table__])
+
+    return engine
+
+
+def new_writer(**kwargs) -> AuditWriter:
+    return AuditWriter(
+        **{
+            "queue_size": 100,
+            "batch_size": 10,
+            "flush_interval": 0.05,
+            "enqueue_timeout": 0.01,
+            **kwargs,
+        }
+    )
+
+
+def new_row() -> dict:
+    auditoria = AuditoriaCrear(
+        tipo_entidad=TipoEntidad.CONFIG_ITEM,
+        id_entidad=uuid.uuid4(),
+        operacion=Operacion.CREAR,
+        estado_nuevo={},
+        actualizado_por=uuid.uuid4(),
+    )
+
+    return Auditoria.model_validate(auditoria).model_dump()
+
+
+def count_audits(engine: Engine) -> int:
+    with Session(engine) as session:
+        return session.exec(select(func.count()).select_from(Auditoria)).one()
+
+
+def test_stop_flushes_every_queued_row(engine: Engine) -> None:
+    # Long enough that nothing is flushed by the interval alone
+    writer = new_writer(flush_interval=60)
+    writer.start(engine)
+
+    assert writer.submit([new_row() for _ in range(25)]) == []
+
+    writer.stop()
+
+    assert count_audits(engine) == 25
+    assert not writer.running
+
+
+def test_full_queue_hands_rows_back() -> None:
+    # Not started, so nothing drains the queue
+    writer = new_writer(queue_size=2)
+    rows = [new_row() for _ in range(5)]
+
+    rechazadas = writer.submit(rows)
+
+    assert rechazadas == rows[2:]
+
+
+def test_rows_submitted_while_stopping_are_handed_back(engine: Engine) -> None:
+    writer = new_writer()
+    writer.start(engine)
+    writer.stop()
+    rows = [new_row() for _ in range(3)]
+
+    # Queued after _STOP they would never be flushed
+    assert writer.submit(rows) == rows
+
+
+def test_unit_of_work_writes_its_audits_when_the_writer_stops_on_commit(
+    engine: Engine, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    writer = new_writer()
+    monkeypatch.setattr(unit_of_work, "audit_writer", writer)
+    writer.start(engine)
+
+    with Session(engine) as session:
+        # Stopped after the unit of work chose to queue its rows
+        event.listen(session, "before_commit", lambda _: writer.stop(), once=True)
+
+        with UnitOfWork(session) as uow:
+            uow.auditar_lote([AuditoriaCrear.model_validate(new_row())])
+
+    assert count_audits(engine) == 1
+
+
+def test_unit_of_work_queues_audits_after_commit(
+    engine: Engine, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    writer = new_writer()
+    monkeypatch.setattr(unit_of_work, "audit_writer", writer)
+    writer.start(engine)
+
+    with Session(engine) as session:
+        with UnitOfWork(session) as uow:
+            uow.auditar_lote([AuditoriaCrear.model_validate(new_row())])
+
+        with pytest.raises(ValueError):
+            with UnitOfWork(session) as uow:
+                uow.auditar_lote([AuditoriaCrear.model_validate(new_row())])
+                raise ValueError
+
+    writer.stop()
+
+    # Only the committed unit of work is audited
+    assert count_audits(engine) == 1
@@ -0,0 +1,57 @@
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import TTLCache
+from app.core.metrics import metrics
+
+
+@pytest.fixture(name="reloj")
+def reloj_fixture(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    ahora = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: ahora[0])
+
+    return ahora
+
+
+def test_entries_expire_after_ttl(reloj: list[float]) -> None:
+    cache = TTLCache(name="test_ttl", ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=3)
+
+    reloj[0] += 5
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+
+    reloj[0] += 5
+
+    assert cache.get("a") is None
+
+
+def test_least_recently_used_entry_is_evicted(reloj: list[float]) -> None:  # noqa: ARG001
+    cache = TTLCache(name="test_lru", ttl=10, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_invalidate_and_metrics(reloj: list[float]) -> None:  # noqa: ARG001
+    cache = TTLCache(name="test_metrics", ttl=10)
+
+    assert cache.get_or_set("a", lambda: 1) == 1
+    assert cache.get_or_set("a", lambda: 2) == 1
+
+    cache.invalidate("a")
+
+    assert cache.get_or_set("a", lambda: 3) == 3
+
+    snapshot = metrics.snapshot()
+    assert snapshot["test_metrics_cache_hits_total"] == 1
+    assert snapshot["test_metrics_cache_misses_total"] == 2
+    assert snapshot["test_metrics_cache_invalidations_total"] == 1
+    assert snapshot["test_metrics_cache_size"] == 1
@@ -0,0 +1,50 @@
+import uuid
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from app.core.db import SEED_NAMESPACE, populate_db
+from app.db_seed import seed_cambios, seed_usuarios
+from app.models.auditoria import Auditoria
+from app.models.changes import Cambio
+from app.models.config_items import ItemConfiguracion
+from app.models.incidents import Incidente
+from app.models.problems import Problema
+from app.models.users import Usuario
+from tests.utils.utils import count_queries
+
+MODELOS = [Usuario, ItemConfiguracion, Incidente, Problema, Cambio, Auditoria]
+
+
+def contar(session: Session) -> list[int]:
+    return [
+        session.exec(select(func.count()).select_from(modelo)).one()
+        for modelo in MODELOS
+    ]
+
+
+def test_seeds_get_ids_derived_from_their_key(session: Session) -> None:
+    usuario = session.exec(
+        select(Usuario).where(Usuario.email == seed_usuarios[0].email)
+    ).one()
+    cambio = session.exec(
+        select(Cambio).where(Cambio.titulo == seed_cambios[0].titulo)
+    ).one()
+
+    assert usuario.id == uuid.uuid5(SEED_NAMESPACE, f"usuarios:{usuario.email}")
+    assert cambio.owner_id == usuario.id
+    assert len(cambio.config_items) == 1
+    assert len(cambio.incidentes) == 1
+    assert len(cambio.problemas) == 1
+
+
+def test_seeding_again_only_reads_the_keys(session: Session) -> None:
+    antes = contar(session)
+
+    with count_queries(session) as statements:
+        populate_db(session)
+
+    assert contar(session) == antes
+    # One indexed lookup per seeded table, nothing is hashed or written
+    assert len(statements) == 5
+    assert all(statement.lstrip().startswith("SELECT") for statement in statements)
@@ -0,0 +1,43 @@
+from sqlalchemy.pool import QueuePool
+
+from app.core.engine import InstrumentedQueuePool, create_db_engine, pool_saturation
+from app.core.metrics import metrics
+from app.utils.config import settings
+
+
+def test_engine_applies_pool_settings() -> None:
+    pool_settings = settings.model_copy(
+        update={
+            "POSTGRES_POOL_SIZE": 3,
+            "POSTGRES_MAX_OVERFLOW": 2,
+            "POSTGRES_POOL_TIMEOUT": 1.5,
+            "POSTGRES_POOL_RECYCLE": 120,
+        }
+    )
+    engine = create_db_engine(pool_settings)
+
+    assert isinstance(engine.pool, InstrumentedQueuePool)
+    assert engine.pool.size() == 3
+    assert engine.pool._max_overflow == 2
+    assert engine.pool._timeout == 1.5
+    assert engine.pool._recycle == 120
+    assert engine.pool._pre_ping
+
+
+def test_pool_gauges_are_exported() -> None:
+    snapshot = metrics.snapshot()
+
+    assert snapshot["db_pool_checked_out"] == 0
+    assert snapshot["db_pool_saturation"] == 0
+
+
+def test_other_engines_keep_the_app_pool_gauges() -> None:
+    create_db_engine(settings.model_copy(update={"POSTGRES_POOL_SIZE": 3}))
+
+    assert metrics.snapshot()["db_pool_size"] == settings.POSTGRES_POOL_SIZE
+
+
+def test_unbounded_pool_saturation_is_zero() -> None:
+    pool = QueuePool(lambda: None, pool_size=0, max_overflow=-1)
+
+    assert pool_saturation(pool) == 0
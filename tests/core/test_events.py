@@ -0,0 +1,88 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+from app.core.events import FIN, Eventos
+from app.models.commons import Operacion, TipoEntidad
+from app.models.events import Evento, EventoFilter
+
+
+def new_event(tipo_entidad: TipoEntidad, id_entidad: uuid.UUID | None = None) -> Evento:
+    return Evento(
+        id=uuid.uuid4(),
+        tipo_entidad=tipo_entidad,
+        id_entidad=id_entidad or uuid.uuid4(),
+        operacion=Operacion.ACTUALIZAR,
+        version=2,
+        revision=2,
+        fecha_actualizacion=datetime.now(timezone.utc),
+    )
+
+
+def pending(cola: asyncio.Queue) -> list:
+    eventos = []
+
+    while not cola.empty():
+        eventos.append(cola.get_nowait())
+
+    return eventos
+
+
+def test_publish_delivers_matching_events() -> None:
+    async def main() -> None:
+        broker = Eventos(queue_size=10)
+        id_cambio = uuid.uuid4()
+        todos = broker.suscribir(EventoFilter())
+        cambios = broker.suscribir(EventoFilter(tipo_entidad=TipoEntidad.CAMBIO))
+        cambio = broker.suscribir(EventoFilter(id_entidad=id_cambio))
+
+        incidente = new_event(TipoEntidad.INCIDENTE)
+        otro_cambio = new_event(TipoEntidad.CAMBIO)
+        el_cambio = new_event(TipoEntidad.CAMBIO, id_cambio)
+
+        # From another thread, like the listener
+        await asyncio.to_thread(broker.publicar, [incidente, otro_cambio, el_cambio])
+        await asyncio.sleep(0)
+
+        assert pending(todos.cola) == [incidente, otro_cambio, el_cambio]
+        assert pending(cambios.cola) == [otro_cambio, el_cambio]
+        assert pending(cambio.cola) == [el_cambio]
+
+        broker.cancelar(cambio)
+        await asyncio.to_thread(broker.publicar, [el_cambio])
+        await asyncio.sleep(0)
+
+        assert pending(cambio.cola) == []
+        assert broker.suscriptores == 2
+
+    asyncio.run(main())
+
+
+def test_slow_subscriber_is_closed_instead_of_dropping_events() -> None:
+    async def main() -> None:
+        broker = Eventos(queue_size=2)
+        suscripcion = broker.suscribir(EventoFilter())
+        eventos = [new_event(TipoEntidad.PROBLEMA) for _ in range(4)]
+
+        broker.publicar(eventos)
+        await asyncio.sleep(0)
+
+        # The client reconnects and replays from the last event it got
+        assert pending(suscripcion.cola) == [*eventos[:2], FIN]
+        assert suscripcion.cerrada
+
+    asyncio.run(main())
+
+
+def test_stop_ends_every_stream() -> None:
+    async def main() -> None:
+        broker = Eventos(queue_size=10)
+        suscripciones = [broker.suscribir(EventoFilter()) for _ in range(3)]
+
+        broker.stop()
+        await asyncio.sleep(0)
+
+        for suscripcion in suscripciones:
+            assert pending(suscripcion.cola) == [FIN]
+
+    asyncio.run(main())
@@ -0,0 +1,30 @@
+import threading
+import time
+
+import pytest
+
+from app.core.hashing import HashingPool, HashingSaturado
+
+
+def test_pool_rejects_work_past_its_queue() -> None:
+    pool = HashingPool(workers=1, max_pendientes=1)
+    liberar = threading.Event()
+    ocupados = [
+        threading.Thread(target=pool.run, args=(liberar.wait,)) for _ in range(2)
+    ]
+
+    for hilo in ocupados:
+        hilo.start()
+
+    # One running and one queued, a third one fails without waiting
+    while pool._en_uso < 2:
+        time.sleep(0.01)
+
+    with pytest.raises(HashingSaturado):
+        pool.run(sum, [1, 2])
+
+    liberar.set()
+    for hilo in ocupados:
+        hilo.join()
+
+    assert pool.run(sum, [1, 2]) == 3
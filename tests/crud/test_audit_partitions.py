@@ -0,0 +1,146 @@
+import uuid
+from datetime import date, datetime, timezone
+
+from sqlmodel import Session, SQLModel, create_engine, delete, select
+from sqlmodel.pool import StaticPool
+
+from app.crud.audit_partitions import (
+    ParticionesAuditoriaService,
+    meses_vencidos,
+    nombre_particion,
+    sumar_meses,
+)
+from app.crud.audits import AuditoriaService
+from app.crud.events import EventosService
+from app.crud.kpis import KpisService
+from app.crud.pagination import encode_cursor
+from app.models.auditoria import Auditoria, AuditoriaCrear, AuditoriaFilter
+from app.models.commons import Operacion, TipoEntidad
+from app.models.events import EventoFilter
+from app.models.kpis import KpiDiario
+
+
+def test_sumar_meses_crosses_years() -> None:
+    assert sumar_meses(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert sumar_meses(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert nombre_particion(date(2026, 2, 1)) == "auditorias_2026_02"
+
+
+def test_only_partitions_older_than_retention_expire() -> None:
+    particiones = [date(2025, mes, 1) for mes in range(1, 13)]
+
+    vencidas = meses_vencidos(particiones, hoy=date(2025, 12, 15), retencion=3)
+
+    # September, October, November and December are kept
+    assert vencidas == [date(2025, mes, 1) for mes in range(1, 9)]
+
+
+def test_current_month_never_expires() -> None:
+    particiones = [date(2025, 11, 1), date(2025, 12, 1)]
+
+    assert meses_vencidos(particiones, hoy=date(2025, 12, 31), retencion=0) == [
+        date(2025, 11, 1)
+    ]
+
+
+def test_archived_entities_keep_their_state_and_rollups() -> None:
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    id_entidad = uuid.uuid4()
+
+    def fila(revision: int, estado: str, fecha: datetime) -> dict:
+        auditoria = Auditoria.model_validate(
+            AuditoriaCrear(
+                tipo_entidad=TipoEntidad.INCIDENTE,
+                id_entidad=id_entidad,
+                operacion=Operacion.CREAR if revision == 1 else Operacion.ACTUALIZAR,
+                estado_nuevo={
+                    "estado": estado,
+                    "prioridad": "ALTA",
+                    "categoria": "SOFTWARE",
+                    "fecha_creacion": datetime(2025, 1, 10).isoformat(),
+                    "fecha_cierre": None,
+                    "revision": revision,
+                },
+                actualizado_por=uuid.uuid4(),
+            )
+        )
+        auditoria.fecha_actualizacion = fecha
+
+        return auditoria.model_dump()
+
+    def rollups(session: Session) -> dict:
+        return {
+            (kpi.fecha, kpi.estado): (kpi.creados, kpi.entradas, kpi.salidas)
+            for kpi in session.exec(select(KpiDiario)).all()
+            if kpi.creados or kpi.entradas or kpi.salidas
+        }
+
+    with Session(engine) as session:
+        for revision, estado, dia in [(1, "NUEVO", 10), (2, "EN_PROGRESO", 20)]:
+            AuditoriaService.registrar_filas(
+                session=session,
+                filas=[
+                    fila(revision, estado, datetime(2025, 1, dia, tzinfo=timezone.utc))
+                ],
+            )
+
+        # What `archivar_particion` does to January, but the export
+        ParticionesAuditoriaService._conservar_estados(
+            session=session, mes=date(2025, 1, 1)
+        )
+        session.exec(
+            delete(Auditoria).where(
+                Auditoria.fecha_actualizacion < datetime(2025, 2, 1)
+            )
+        )
+        session.commit()
+
+        # Only diffs against what the log has, without the state before it
+        AuditoriaService.registrar_filas(
+            session=session,
+            filas=[fila(3, "RESUELTO", datetime(2025, 3, 5, tzinfo=timezone.utc))],
+        )
+        session.commit()
+
+        auditorias = session.exec(select(Auditoria).order_by(Auditoria.version)).all()
+
+        assert [auditoria.version for auditoria in auditorias] == [2, 3]
+        assert auditorias[0].es_arrastre
+        assert not auditorias[1].es_snapshot
+
+        # The carried state is not a write of the history
+        historial = AuditoriaService.get_audits(
+            session=session,
+            auditoria_filter=AuditoriaFilter(id_entidad=id_entidad),
+        )
+        assert [auditoria.version for auditoria in historial] == [3]
+
+        eventos = EventosService.get_eventos(
+            session=session,
+            evento_filter=EventoFilter(id_entidad=id_entidad),
+            cursor=encode_cursor(datetime(2025, 1, 1), uuid.UUID(int=0)),
+            limite=10,
+        )
+        assert [evento.version for evento in eventos] == [3]
+        assert (
+            AuditoriaService.reconstruir_estado(
+                session=session, auditoria=auditorias[1]
+            )["estado"]
+            == "RESUELTO"
+        )
+
+        incrementales = rollups(session)
+
+        # Created once, and only in the backlog as RESUELTO
+        assert sum(creados for creados, _, _ in incrementales.values()) == 1
+        backlog: dict[str, int] = {}
+        for (_, estado), (_, entradas, salidas) in incrementales.items():
+            backlog[estado] = backlog.get(estado, 0) + entradas - salidas
+        assert backlog == {"NUEVO": 0, "EN_PROGRESO": 0, "RESUELTO": 1}
+
+        KpisService.reconstruir(session=session)
+
+        assert rollups(session) == incrementales
@@ -0,0 +1,303 @@
+import importlib.util
+import uuid
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import event, text, update
+from sqlmodel import Session, select
+
+from app.core import db
+from app.crud.audits import AuditoriaService
+from app.crud.config_items import ItemsConfiguracionService as crud
+from app.models.auditoria import Auditoria, AuditoriaCrear, AuditoriaFilter
+from app.models.commons import Operacion, TipoEntidad
+from app.models.config_items import (
+    CategoriaItem,
+    ItemConfiguracion,
+    ItemConfiguracionActualizar,
+    ItemConfiguracionCrear,
+)
+from app.models.kpis import KpiDiario
+from app.models.users import Usuario
+from app.utils.config import settings
+
+
+def test_updates_store_deltas_between_snapshots(
+    session: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "AUDIT_SNAPSHOT_INTERVAL", 3)
+    usuario = session.exec(select(Usuario)).first()
+
+    item_config = crud.create_item_configuracion(
+        session=session,
+        item_config_crear=ItemConfiguracionCrear(
+            nombre="Debian",
+            descripcion="Sistema Operativo",
+            version="12",
+            categoria=CategoriaItem.SOFTWARE,
+            owner_id=usuario.id,
+        ),
+        current_user_id=usuario.id,
+    )
+
+    for descripcion in ["v2", "v3", "v4", "v5"]:
+        crud.update_item_configuracion(
+            session=session,
+            id_item_config=item_config.id,
+            item_config_actualizar=ItemConfiguracionActualizar(descripcion=descripcion),
+            current_user_id=usuario.id,
+        )
+
+    auditorias = session.exec(
+        select(Auditoria)
+        .where(Auditoria.id_entidad == item_config.id)
+        .order_by(Auditoria.version)
+    ).all()
+
+    assert [auditoria.version for auditoria in auditorias] == [1, 2, 3, 4, 5]
+    assert [auditoria.es_snapshot for auditoria in auditorias] == [
+        True,
+        False,
+        False,
+        True,
+        False,
+    ]
+    assert auditorias[1].estado_nuevo["descripcion"] == "v2"
+    assert "nombre" not in auditorias[1].estado_nuevo
+
+    # Every version can be rebuilt from the nearest snapshot
+    descripciones = ["Sistema Operativo", "v2", "v3", "v4", "v5"]
+
+    for auditoria, descripcion in zip(auditorias, descripciones, strict=True):
+        estado = AuditoriaService.reconstruir_estado(
+            session=session, auditoria=auditoria
+        )
+
+        assert estado["descripcion"] == descripcion
+        assert estado["nombre"] == "Debian"
+
+
+def explain(session: Session, run_query: Callable[[], object]) -> str:
+    statements: list[tuple[str, dict]] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, *args) -> None:  # noqa: ARG001
+        statements.append((statement, parameters))
+
+    connection = session.connection()
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    try:
+        run_query()
+    finally:
+        event.remove(connection, "before_cursor_execute", before_cursor_execute)
+
+    statement, parameters = statements[-1]
+    plan = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters).all()
+
+    return "\n".join(row[0] for row in plan)
+
+
+@pytest.mark.parametrize(
+    ("auditoria_filter", "indice"),
+    [
+        (
+            AuditoriaFilter(tipo_entidad=TipoEntidad.CAMBIO, id_entidad=uuid.uuid4()),
+            "ix_auditorias_tipo_entidad_id_entidad_fecha",
+        ),
+        (
+            AuditoriaFilter(operacion=Operacion.ELIMINAR),
+            "ix_auditorias_operacion_fecha",
+        ),
+    ],
+)
+def test_audit_filters_use_indexes(
+    auditoria_filter: AuditoriaFilter, indice: str
+) -> None:
+    # Plans are only meaningful on Postgres with the migrations applied
+    if db.engine.dialect.name != "postgresql":
+        pytest.skip("EXPLAIN plans are checked on Postgres only")
+
+    with Session(db.engine) as session:
+        # Small test tables would always be scanned sequentially
+        session.exec(text("SET LOCAL enable_seqscan = off"))
+
+        plan = explain(
+            session,
+            lambda: AuditoriaService.get_audits(
+                session=session, auditoria_filter=auditoria_filter
+            ),
+        )
+
+    assert indice in plan
+
+
+def test_audit_versions_follow_entity_revisions(session: Session) -> None:
+    usuario = session.exec(select(Usuario)).first()
+    id_entidad = uuid.uuid4()
+
+    def fila(operacion: Operacion, revision: int) -> dict:
+        return Auditoria.model_validate(
+            AuditoriaCrear(
+                tipo_entidad=TipoEntidad.CONFIG_ITEM,
+                id_entidad=id_entidad,
+                operacion=operacion,
+                estado_nuevo={"nombre": f"r{revision}", "revision": revision},
+                actualizado_por=usuario.id,
+            )
+        ).model_dump()
+
+    # The async writer may receive the rows out of order
+    AuditoriaService.registrar_filas(
+        session=session,
+        filas=[
+            fila(Operacion.ACTUALIZAR, 3),
+            fila(Operacion.CREAR, 1),
+            fila(Operacion.ACTUALIZAR, 2),
+        ],
+    )
+    session.commit()
+
+    auditorias = session.exec(
+        select(Auditoria)
+        .where(Auditoria.id_entidad == id_entidad)
+        .order_by(Auditoria.version)
+    ).all()
+
+    assert [auditoria.operacion for auditoria in auditorias] == [
+        Operacion.CREAR,
+        Operacion.ACTUALIZAR,
+        Operacion.ACTUALIZAR,
+    ]
+    assert AuditoriaService.reconstruir_estado(
+        session=session, auditoria=auditorias[-1]
+    ) == {"nombre": "r3", "revision": 3}
+
+
+def test_writers_flushing_out_of_order_keep_the_latest_revision(
+    session: Session,
+) -> None:
+    usuario = session.exec(select(Usuario)).first()
+    id_entidad = uuid.uuid4()
+    estados = {
+        revision: {
+            "estado": estado,
+            "prioridad": "ALTA",
+            "categoria": "ORDEN",
+            "fecha_creacion": datetime(2025, 12, 1, tzinfo=timezone.utc).isoformat(),
+            "fecha_cierre": None,
+            "revision": revision,
+        }
+        for revision, estado in [(1, "NUEVO"), (2, "EN_PROGRESO"), (3, "RESUELTO")]
+    }
+
+    def fila(revision: int) -> dict:
+        return {
+            **Auditoria.model_validate(
+                AuditoriaCrear(
+                    tipo_entidad=TipoEntidad.INCIDENTE,
+                    id_entidad=id_entidad,
+                    operacion=Operacion.CREAR
+                    if revision == 1
+                    else Operacion.ACTUALIZAR,
+                    estado_nuevo=estados[revision],
+                    actualizado_por=usuario.id,
+                )
+            ).model_dump(),
+            "estado_anterior": estados.get(revision - 1),
+        }
+
+    # Two async writers, the one with the later revision flushes first
+    for revision in [1, 3, 2]:
+        AuditoriaService.registrar_filas(session=session, filas=[fila(revision)])
+        session.commit()
+
+    auditorias = session.exec(
+        select(Auditoria)
+        .where(Auditoria.id_entidad == id_entidad)
+        .order_by(Auditoria.version)
+    ).all()
+
+    assert [auditoria.version for auditoria in auditorias] == [1, 2, 3]
+    # Revision 3 was stored before its base, so it doesn't depend on it
+    assert [auditoria.es_snapshot for auditoria in auditorias] == [True, False, True]
+
+    for auditoria in auditorias:
+        assert (
+            AuditoriaService.reconstruir_estado(session=session, auditoria=auditoria)
+            == estados[auditoria.version]
+        )
+
+    backlog = {}
+    for kpi in session.exec(
+        select(KpiDiario).where(KpiDiario.categoria == "ORDEN")
+    ).all():
+        backlog[kpi.estado] = backlog.get(kpi.estado, 0) + kpi.entradas - kpi.salidas
+
+    assert backlog == {"NUEVO": 0, "EN_PROGRESO": 0, "RESUELTO": 1}
+
+
+def test_revisions_are_backfilled_from_audit_history(session: Session) -> None:
+    usuario = session.exec(select(Usuario)).first()
+
+    def actualizar(nombre: str) -> None:
+        crud.update_item_configuracion(
+            session=session,
+            id_item_config=item_config.id,
+            item_config_actualizar=ItemConfiguracionActualizar(nombre=nombre),
+            current_user_id=usuario.id,
+        )
+
+    item_config = crud.create_item_configuracion(
+        session=session,
+        item_config_crear=ItemConfiguracionCrear(
+            nombre="n0",
+            descripcion="Sistema Operativo",
+            version="12",
+            categoria=CategoriaItem.SOFTWARE,
+            owner_id=usuario.id,
+        ),
+        current_user_id=usuario.id,
+    )
+
+    for nombre in ["n1", "n2", "n3"]:
+        actualizar(nombre)
+
+    # Given an item audited before it had a revision, as 4ecd49e5faec left it
+    session.exec(
+        update(ItemConfiguracion)
+        .where(ItemConfiguracion.id == item_config.id)
+        .values(revision=1)
+    )
+    session.commit()
+
+    # When the revisions are backfilled
+    versiones = Path(__file__).parents[2] / "app" / "alembic" / "versions"
+    spec = importlib.util.spec_from_file_location(
+        "backfill", versiones / "3c9e51b7d2a4_backfill_revision_from_audit_versions.py"
+    )
+    migracion = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migracion)
+
+    with Operations.context(MigrationContext.configure(session.connection())):
+        migracion.upgrade()
+    session.commit()
+
+    for nombre in ["n4", "n5"]:
+        actualizar(nombre)
+
+    # Then later writes go on from the last audit
+    auditorias = session.exec(
+        select(Auditoria)
+        .where(Auditoria.id_entidad == item_config.id)
+        .order_by(Auditoria.version)
+    ).all()
+
+    estado = AuditoriaService.reconstruir_estado(
+        session=session, auditoria=auditorias[-1]
+    )
+
+    assert [auditoria.version for auditoria in auditorias] == [1, 2, 3, 4, 5, 6]
+    assert estado["nombre"] == "n5"
@@ -1,10 +1,13 @@
+import warnings
 from datetime import datetime, timezone
 
 from sqlmodel import Session, select
 
 from app.crud.changes import CambiosService as crud
+from app.models.auditoria import Auditoria
 from app.models.changes import (
     Cambio,
+    CambioActualizar,
     CambioCrear,
     CambioFilter,
     EstadoCambio,
@@ -60,3 +63,57 @@ def test_get_change_by_titulo(session: Session) -> None:
     for cambio in cambios:
         assert cambio.titulo.lower().find(cambio_filter.titulo)
 
+
+def test_rollback_change_restores_typed_fields(session: Session) -> None:
+    usuario = session.exec(select(Usuario)).first()
+
+    cambio = crud.create_cambio(
+        session=session,
+        cambio_crear=CambioCrear(
+            titulo="Upgrade RAM",
+            descripcion="8 GB to 64 GB",
+            prioridad=Prioridad.URGENTE,
+            impacto=ImpactoCambio.MENOR,
+            owner_id=usuario.id,
+            id_config_items=[],
+        ),
+        current_user_id=usuario.id,
+    )
+
+    for cambio_actualizar in [
+        CambioActualizar(
+            prioridad=Prioridad.BAJA,
+            estado=EstadoCambio.CERRADO,
+            responsable_id=usuario.id,
+        ),
+        CambioActualizar(prioridad=Prioridad.ALTA, estado=EstadoCambio.EN_PROGRESO),
+    ]:
+        crud.update_change(
+            session=session,
+            id_change=cambio.id,
+            cambio_actualizar=cambio_actualizar,
+            current_user_id=usuario.id,
+        )
+
+    cerrado = session.exec(
+        select(Auditoria).where(
+            Auditoria.id_entidad == cambio.id, Auditoria.version == 2
+        )
+    ).one()
+
+    # The audit holds JSON strings, serializing them as enums would warn
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+
+        restaurado = crud.rollback_change(
+            session=session,
+            id_change=cambio.id,
+            id_audit=cerrado.id,
+            current_user_id=usuario.id,
+        )
+        restaurado.model_dump(mode="json")
+
+    assert restaurado.prioridad is Prioridad.BAJA
+    assert restaurado.estado is EstadoCambio.CERRADO
+    assert isinstance(restaurado.fecha_cierre, datetime)
+    assert restaurado.responsable_id == usuario.id
@@ -1,15 +1,29 @@
+import gzip
+import io
+import json
+import uuid
+import warnings
 from datetime import datetime, timezone
 
+import pytest
+from sqlalchemy import event
 from sqlmodel import Session, select
 
+from app.crud import imports
 from app.crud.config_items import ItemsConfiguracionService as crud
+from app.crud.unit_of_work import UnitOfWork
+from app.models.auditoria import Auditoria
+from app.models.commons import Operacion, TipoEntidad
 from app.models.config_items import (
     CategoriaItem,
     EstadoItem,
     ItemConfiguracion,
+    ItemConfiguracionActualizar,
     ItemConfiguracionCrear,
     ItemConfiguracionFilter,
+    ItemConfiguracionImportar,
 )
+from app.models.exports import FormatoExportacion
 from app.models.users import Usuario
 from app.models.changes import Cambio, CambioPublico
 
@@ -59,3 +73,211 @@ def test_create_item_configuracion(session: Session) -> None:
     assert item_config_db.estado == EstadoItem.PLANEADO
     assert item_config_db.owner_id == usuario.id
     assert item_config_db.fecha_creacion.astimezone(timezone.utc) > now
+
+
+def test_create_item_configuracion_commits_item_and_audit_once(
+    session: Session,
+) -> None:
+    usuario = session.exec(select(Usuario)).first()
+    commits = []
+
+    def after_commit(session: Session) -> None:
+        commits.append(session)
+
+    item_config = ItemConfiguracionCrear(
+        nombre="Debian",
+        descripcion="Sistema Operativo",
+        version="13",
+        categoria=CategoriaItem.SOFTWARE,
+        owner_id=usuario.id,
+    )
+
+    event.listen(session, "after_commit", after_commit)
+    try:
+        item_config_created = crud.create_item_configuracion(
+            session=session, item_config_crear=item_config, current_user_id=usuario.id
+        )
+    finally:
+        event.remove(session, "after_commit", after_commit)
+
+    assert len(commits) == 1
+
+    auditoria = session.exec(
+        select(Auditoria).where(Auditoria.id_entidad == item_config_created.id)
+    ).one()
+
+    assert auditoria.tipo_entidad == TipoEntidad.CONFIG_ITEM
+    assert auditoria.operacion == Operacion.CREAR
+
+
+def test_unit_of_work_rolls_back_item_and_audit_together(session: Session) -> None:
+    usuario = session.exec(select(Usuario)).first()
+
+    item_config = ItemConfiguracion(
+        nombre="Fedora",
+        descripcion="Sistema Operativo",
+        version="42",
+        categoria=CategoriaItem.SOFTWARE,
+        owner_id=usuario.id,
+    )
+
+    with pytest.raises(RuntimeError):
+        with UnitOfWork(session) as uow:
+            session.add(item_config)
+            uow.auditar(
+                tipo_entidad=TipoEntidad.CONFIG_ITEM,
+                id_entidad=item_config.id,
+                operacion=Operacion.CREAR,
+                estado_nuevo=item_config.model_dump(mode="json"),
+                actualizado_por=usuario.id,
+            )
+            raise RuntimeError
+
+    assert not session.exec(
+        select(ItemConfiguracion).where(ItemConfiguracion.id == item_config.id)
+    ).first()
+    assert not session.exec(
+        select(Auditoria).where(Auditoria.id_entidad == item_config.id)
+    ).first()
+
+
+def test_import_reports_repeated_rows_and_commits_each_batch(
+    session: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(imports, "LOTE_IMPORTACION", 2)
+    usuario = session.exec(select(Usuario)).first()
+    id_item = uuid.uuid4()
+
+    filas = [
+        {"id": str(id_item), "nombre": "Lote 1", "version": "1"},
+        {"id": str(id_item), "nombre": "Lote 1 otra vez", "version": "2"},
+        {"nombre": "Lote 2", "version": "1"},
+    ]
+    archivo = "\n".join(
+        json.dumps({**fila, "descripcion": "Importado", "categoria": "SOFTWARE"})
+        for fila in filas
+    )
+
+    resultado = crud.importar_items_configuracion(
+        session=session,
+        archivo=io.BytesIO(archivo.encode()),
+        formato=FormatoExportacion.NDJSON,
+        current_user_id=usuario.id,
+    )
+
+    assert resultado.creados == 2
+    assert [(error.indice, error.id) for error in resultado.errores] == [(1, id_item)]
+
+    item = session.get(ItemConfiguracion, id_item)
+
+    assert item.nombre == "Lote 1"
+    assert item.owner_id == usuario.id
+    assert item.revision == 1
+
+
+@pytest.mark.parametrize(
+    ("roto", "comprimido"),
+    [
+        # Not UTF-8 halfway through
+        (lambda datos: datos + b"\n\xff\xfe\n" + datos, False),
+        # Gzip cut short
+        (lambda datos: gzip.compress(datos)[:-20], True),
+        (lambda datos: datos, True),
+    ],
+)
+def test_import_reports_unreadable_files_after_what_it_imported(
+    session: Session, monkeypatch: pytest.MonkeyPatch, roto, comprimido: bool
+) -> None:
+    monkeypatch.setattr(imports, "LOTE_IMPORTACION", 20)
+    usuario = session.exec(select(Usuario)).first()
+    datos = "\n".join(
+        json.dumps(
+            {
+                "nombre": f"Ilegible {indice}",
+                "descripcion": "Importado",
+                "version": "1",
+                "categoria": "SOFTWARE",
+            }
+        )
+        for indice in range(100)
+    ).encode()
+
+    resultado = crud.importar_items_configuracion(
+        session=session,
+        archivo=io.BytesIO(roto(datos)),
+        formato=FormatoExportacion.NDJSON,
+        comprimido=comprimido,
+        current_user_id=usuario.id,
+    )
+
+    # Everything before the unreadable part is imported, and where it starts
+    # is reported
+    [error] = resultado.errores
+    assert error.indice == resultado.creados
+    assert error.error.startswith("No se puede leer el archivo")
+
+
+def test_import_reports_malformed_csv_rows() -> None:
+    archivo = (
+        "nombre,descripcion,version,categoria\n"
+        "A,Bien,1,SOFTWARE\n"
+        f"B,{'x' * 200_000},1,SOFTWARE\n"
+        "C,Bien,1,SOFTWARE\n"
+    )
+
+    filas = list(
+        imports.leer_filas(
+            io.BytesIO(archivo.encode()),
+            ItemConfiguracionImportar,
+            formato=FormatoExportacion.CSV,
+            comprimido=False,
+        )
+    )
+
+    assert [indice for indice, _ in filas] == [0, 1, 2]
+    assert filas[1][1].startswith("CSV inválido")
+    assert filas[2][1].nombre == "C"
+
+
+def test_rollback_item_config_restores_typed_fields(session: Session) -> None:
+    usuario = session.exec(select(Usuario)).first()
+
+    item_config = crud.create_item_configuracion(
+        session=session,
+        item_config_crear=ItemConfiguracionCrear(
+            nombre="Ubuntu",
+            descripcion="Sistema Operativo",
+            version="24.04",
+            categoria=CategoriaItem.SOFTWARE,
+            owner_id=usuario.id,
+        ),
+        current_user_id=usuario.id,
+    )
+    crud.update_item_configuracion(
+        session=session,
+        id_item_config=item_config.id,
+        item_config_actualizar=ItemConfiguracionActualizar(
+            categoria=CategoriaItem.HARDWARE, estado=EstadoItem.EN_PRODUCCION
+        ),
+        current_user_id=usuario.id,
+    )
+    creacion = session.exec(
+        select(Auditoria).where(
+            Auditoria.id_entidad == item_config.id, Auditoria.version == 1
+        )
+    ).one()
+
+    # The audit holds JSON strings, serializing them as enums would warn
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+
+        restaurado = crud.rollback_item_config(
+            session=session,
+            id_item_config=item_config.id,
+            id_audit=creacion.id,
+            current_user_id=usuario.id,
+        )
+        restaurado.model_dump(mode="json")
+
+    assert restaurado.categoria is CategoriaItem.SOFTWARE
+    assert restaurado.estado is EstadoItem.PLANEADO
@@ -0,0 +1,39 @@
+import json
+
+import pytest
+from sqlmodel import Session, func, select
+
+from app.crud import exports
+from app.crud.exports import ExportacionService, columnas_exportadas
+from app.models.changes import Cambio, CambioPublico
+from app.models.exports import FormatoExportacion
+
+
+def test_export_is_read_lazily_in_batches(
+    session: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(exports, "LOTE_EXPORTACION", 2)
+    total = session.exec(select(func.count()).select_from(Cambio)).one()
+
+    partes = ExportacionService.exportar(
+        session=session,
+        query=columnas_exportadas(
+            Cambio, CambioPublico, columna_fecha="fecha_creacion"
+        ),
+        formato=FormatoExportacion.NDJSON,
+    )
+
+    # Nothing is queried until the response is streamed, then each chunk
+    # holds one batch of rows
+    lineas = [parte.decode().splitlines() for parte in partes]
+
+    assert [len(parte) for parte in lineas] == [
+        min(2, total - inicio) for inicio in range(0, total, 2)
+    ]
+
+    ids = [json.loads(linea)["id"] for parte in lineas for linea in parte]
+    esperados = session.exec(
+        select(Cambio.id).order_by(Cambio.fecha_creacion, Cambio.id)
+    ).all()
+
+    assert ids == [str(id) for id in esperados]
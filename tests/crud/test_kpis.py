@@ -0,0 +1,91 @@
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlmodel import Session, select
+
+from app.crud.kpis import KpisService, _nuevos_deltas, acumular
+from app.models.commons import TipoEntidad
+from app.models.kpis import KpiDiario
+
+CREACION = datetime(2025, 12, 1, 9, tzinfo=timezone.utc)
+CIERRE = datetime(2025, 12, 3, 15, tzinfo=timezone.utc)
+
+ABIERTO = {
+    "estado": "NUEVO",
+    "prioridad": "ALTA",
+    "categoria": "SOFTWARE",
+    "fecha_creacion": CREACION.isoformat(),
+    "fecha_cierre": None,
+}
+CERRADO = {**ABIERTO, "estado": "CERRADO", "fecha_cierre": CIERRE.isoformat()}
+
+
+def test_close_moves_the_entity_between_buckets() -> None:
+    deltas = _nuevos_deltas()
+
+    acumular(
+        deltas,
+        tipo_entidad=TipoEntidad.INCIDENTE,
+        anterior=None,
+        nuevo=ABIERTO,
+        fecha=CREACION,
+    )
+    acumular(
+        deltas,
+        tipo_entidad=TipoEntidad.INCIDENTE,
+        anterior=ABIERTO,
+        nuevo=CERRADO,
+        fecha=CIERRE,
+    )
+
+    nuevo = (date(2025, 12, 1), TipoEntidad.INCIDENTE, "NUEVO", "ALTA", "SOFTWARE")
+    cerrado = (date(2025, 12, 3), TipoEntidad.INCIDENTE, "CERRADO", "ALTA", "SOFTWARE")
+
+    assert deltas[nuevo]["creados"] == 1
+    assert deltas[nuevo]["entradas"] == 1
+    assert deltas[(date(2025, 12, 3), *nuevo[1:])]["salidas"] == 1
+    assert deltas[cerrado]["entradas"] == 1
+    assert deltas[cerrado]["cerrados"] == 1
+    assert deltas[cerrado]["segundos_hasta_cierre"] == 54 * 3600
+
+
+def test_reopening_takes_the_close_back() -> None:
+    deltas = _nuevos_deltas()
+
+    acumular(
+        deltas,
+        tipo_entidad=TipoEntidad.PROBLEMA,
+        anterior=CERRADO,
+        nuevo=ABIERTO,
+        fecha=datetime(2025, 12, 5, tzinfo=timezone.utc),
+    )
+
+    cerrado = (date(2025, 12, 3), TipoEntidad.PROBLEMA, "CERRADO", "ALTA", "SOFTWARE")
+
+    assert deltas[cerrado]["cerrados"] == -1
+    assert deltas[cerrado]["segundos_hasta_cierre"] == -54 * 3600
+
+
+def test_incremental_rollups_match_a_rebuild(session: Session) -> None:
+    def rollups() -> dict:
+        return {
+            (kpi.fecha, kpi.tipo_entidad, kpi.estado, kpi.prioridad, kpi.categoria): (
+                kpi.creados,
+                kpi.entradas,
+                kpi.salidas,
+                kpi.cerrados,
+                pytest.approx(kpi.segundos_hasta_cierre),
+            )
+            for kpi in session.exec(select(KpiDiario)).all()
+            # Buckets whose changes cancelled out are not recreated
+            if kpi.creados or kpi.entradas or kpi.salidas or kpi.cerrados
+        }
+
+    # Written by every test before this one
+    incrementales = rollups()
+    assert incrementales
+
+    session.expire_all()
+    assert KpisService.reconstruir(session=session) > 0
+
+    assert rollups() == incrementales
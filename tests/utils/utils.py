@@ -1,4 +1,9 @@
+from collections.abc import Generator
+from contextlib import contextmanager
+
 from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session
 
 from app.utils.config import settings
 
@@ -23,3 +28,18 @@ def get_cliente_token_headers(client: TestClient) -> dict[str, str]:
     login_data = {"username": "carl@company.com", "password": "12345678"}
 
     return get_user_token_header(client, login_data)
+
+
+@contextmanager
+def count_queries(session: Session) -> Generator[list[str], None, None]:
+    statements: list[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, *args) -> None:  # noqa: ARG001
+        statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)